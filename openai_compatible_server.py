@@ -7,8 +7,11 @@ import torch
 import time
 import uuid
 import os
+import json
+import threading
 from fastapi import FastAPI, HTTPException, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any, Union
@@ -121,6 +124,104 @@ async def load_model():
         logger.error(f"❌ Failed to load model: {e}")
         logger.info("Running in mock mode")
 
+# 스트리밍 (SSE)
+
+def _stop_sequences(stop: Optional[Union[str, List[str]]]) -> List[str]:
+    if isinstance(stop, str):
+        stop = [stop]
+    return [s for s in (stop or []) if s]
+
+def _stream_model_text(prompt: str, request: ChatCompletionRequest):
+    """백그라운드 스레드에서 생성하며 디코딩된 텍스트 조각 반환 (stop 문자열은 조각 경계와 무관하게 감지)"""
+    from transformers import TextIteratorStreamer, StoppingCriteria, StoppingCriteriaList
+
+    class StopOnEvent(StoppingCriteria):
+        def __init__(self):
+            self.event = threading.Event()
+
+        def __call__(self, input_ids, scores, **kwargs) -> bool:
+            return self.event.is_set()
+
+    inputs = tokenizer.encode(prompt, return_tensors="pt").to(next(model.parameters()).device)
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=60.0)
+    stopper = StopOnEvent()
+    generate_kwargs = dict(
+        input_ids=inputs,
+        max_new_tokens=request.max_tokens,
+        temperature=request.temperature,
+        top_p=request.top_p,
+        pad_token_id=tokenizer.eos_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+        do_sample=True,
+        streamer=streamer,
+        stopping_criteria=StoppingCriteriaList([stopper])
+    )
+
+    def generate():
+        try:
+            model.generate(**generate_kwargs)
+        except Exception as e:
+            logger.error(f"Model inference error: {e}")
+            streamer.end()
+
+    thread = threading.Thread(target=generate, daemon=True)
+    thread.start()
+
+    stops = _stop_sequences(request.stop)
+    holdback = max((len(s) for s in stops), default=1) - 1  # stop 문자열 앞부분일 수 있는 꼬리는 보류
+    buffer = ""
+    try:
+        for piece in streamer:
+            buffer += piece
+            cuts = [i for i in (buffer.find(s) for s in stops) if i >= 0]
+            if cuts:
+                yield buffer[:min(cuts)]
+                buffer = ""
+                break
+            if len(buffer) > holdback:
+                split = len(buffer) - holdback
+                yield buffer[:split]
+                buffer = buffer[split:]
+        else:
+            yield buffer
+    finally:
+        # stop 감지, 클라이언트 연결 종료 시 다음 토큰에서 생성 중단
+        stopper.event.set()
+        thread.join()
+
+def _chat_completion_chunks(prompt: str, request: ChatCompletionRequest):
+    """chat.completion.chunk SSE 이벤트 생성 (StreamingResponse가 스레드풀에서 순회)"""
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:8]}"
+    created = int(time.time())
+
+    def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": request.model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+        return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    yield chunk({"role": "assistant"})
+
+    if model is None or tokenizer is None:
+        response_text = f"[Mock Response] 입력하신 메시지를 받았습니다: '{request.messages[-1].content}'"
+        for word in response_text.split(" "):
+            yield chunk({"content": word + " "})
+    else:
+        try:
+            for piece in _stream_model_text(prompt, request):
+                if piece:
+                    yield chunk({"content": piece})
+        except Exception as e:
+            logger.error(f"Model streaming error: {e}")
+            yield chunk({"content": "죄송합니다. 일시적인 오류가 발생했습니다."})
+
+    yield chunk({}, finish_reason="stop")
+    yield "data: [DONE]\n\n"
+
 # OpenAI 호환 엔드포인트들
 
 @app.get("/v1/models")
@@ -163,6 +264,14 @@ async def chat_completions(
     
     prompt += "Assistant: "
     
+    # 스트리밍: 생성되는 대로 SSE 청크 전송
+    if request.stream:
+        return StreamingResponse(
+            _chat_completion_chunks(prompt, request),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
     # 모델이 없으면 목업 응답
     if model is None or tokenizer is None:
         response_text = f"[Mock Response] 입력하신 메시지를 받았습니다: '{request.messages[-1].content}'"
@@ -0,0 +1,319 @@
+"""
+나비얌 챗봇 추론 실행기
+
+동기식 챗봇 추론을 전용 워커 풀에서 실행하여 이벤트 루프 블로킹 방지
+- 스레드/프로세스 풀 선택 가능
+- 제한된 대기열 (가득 차면 429)
+- 요청별 타임아웃 (초과 시 503)
+- 실행기 종료/워커 챗봇 미초기화 (503, 타임아웃과 별도 메시지/통계)
+- 대기열 깊이 / 대기 시간 메트릭
+- 스트리밍: 워커의 LLM 텍스트 조각을 이벤트 루프로 전달 (스레드 모드)
+"""
+
+import asyncio
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceRejectedError(Exception):
+    """대기열이 가득 차 요청을 받을 수 없음 (429)"""
+
+
+class InferenceTimeoutError(Exception):
+    """요청별 타임아웃 초과 (503)"""
+
+
+class InferenceUnavailableError(Exception):
+    """실행기가 시작되지 않았거나 종료됨 (503)"""
+
+
+def _timed_call(func: Callable, args: tuple, kwargs: dict):
+    """워커에서 실행 시작 시각을 함께 반환 (프로세스 풀에서도 pickle 가능하도록 모듈 레벨 정의)"""
+    started_at = time.time()
+    return started_at, func(*args, **kwargs)
+
+
+class InferenceExecutor:
+    """제한된 대기열을 가진 추론 워커 풀"""
+
+    def __init__(self, max_workers: int = 2, max_queue_size: int = 16,
+                 timeout: float = 30.0, mode: str = "thread",
+                 initializer: Optional[Callable] = None, initargs: tuple = ()):
+        """
+        Args:
+            max_workers: 동시 실행 워커 수
+            max_queue_size: 워커 외 대기 가능한 요청 수
+            timeout: 요청별 타임아웃 (초, 대기 시간 포함)
+            mode: "thread" 또는 "process"
+            initializer: 워커 초기화 함수 (프로세스 모드에서 워커별 챗봇 생성용)
+            initargs: initializer 인자
+        """
+        if mode not in ("thread", "process"):
+            raise ValueError(f"지원하지 않는 실행 모드: {mode}")
+
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.timeout = timeout
+        self.mode = mode
+
+        if mode == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=max_workers, initializer=initializer, initargs=initargs
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="inference",
+                initializer=initializer, initargs=initargs
+            )
+
+        # 실행 중 + 대기 중 요청 수 제한
+        self._capacity = max_workers + max_queue_size
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # 메트릭
+        self._wait_times: deque = deque(maxlen=1000)
+        self._run_times: deque = deque(maxlen=1000)
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'timed_out': 0,
+            'unavailable': 0,
+            'max_queue_depth': 0
+        }
+
+        logger.info(
+            f"InferenceExecutor 초기화: mode={mode}, workers={max_workers}, "
+            f"queue={max_queue_size}, timeout={timeout}s"
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        """워커를 기다리는 요청 수"""
+        return max(0, self._in_flight - self.max_workers)
+
+    def _admit(self):
+        """대기열 입장 (가득 차면 거부)"""
+        with self._lock:
+            if self._closed:
+                self.stats['unavailable'] += 1
+                raise InferenceUnavailableError("추론 실행기가 종료되었습니다")
+            if self._in_flight >= self._capacity:
+                self.stats['rejected'] += 1
+                raise InferenceRejectedError(
+                    f"추론 대기열이 가득 찼습니다 ({self._in_flight}/{self._capacity})"
+                )
+            self._in_flight += 1
+            self.stats['submitted'] += 1
+            self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], self.queue_depth)
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """워커 풀에서 func 실행 후 결과 반환
+
+        Raises:
+            InferenceRejectedError: 대기열 초과
+            InferenceTimeoutError: 타임아웃 초과
+            InferenceUnavailableError: 실행기 종료됨
+        """
+        self._admit()
+        timeout = self.timeout if timeout is None else timeout
+        submitted_at = time.time()
+
+        try:
+            concurrent_future = self._pool.submit(_timed_call, func, args, kwargs)
+        except RuntimeError as e:
+            self._release()
+            with self._lock:
+                self.stats['unavailable'] += 1
+            raise InferenceUnavailableError(str(e))
+
+        # 타임아웃으로 호출자가 먼저 빠져나가도 워커가 끝나는 시점에 슬롯 반환
+        concurrent_future.add_done_callback(lambda _: self._release())
+
+        try:
+            started_at, result = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(concurrent_future)), timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            # 아직 시작되지 않은 작업만 취소됨 (실행 중인 작업은 완료까지 슬롯 점유)
+            concurrent_future.cancel()
+            with self._lock:
+                self.stats['timed_out'] += 1
+            raise InferenceTimeoutError(f"추론 시간 초과 ({timeout}s)")
+        except InferenceUnavailableError:
+            with self._lock:
+                self.stats['unavailable'] += 1
+            raise
+        except Exception:
+            with self._lock:
+                self.stats['failed'] += 1
+            raise
+
+        finished_at = time.time()
+        with self._lock:
+            self.stats['completed'] += 1
+            self._wait_times.append(started_at - submitted_at)
+            self._run_times.append(finished_at - started_at)
+
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """실행기 통계 (워커 수 산정용)"""
+        # 락 안에서는 복사만 하고 정렬은 락 밖에서 (모니터링 조회가 입장/반환과 경합하지 않도록)
+        with self._lock:
+            wait_times = list(self._wait_times)
+            run_times = list(self._run_times)
+            stats = dict(self.stats)
+            in_flight = self._in_flight
+        wait_times.sort()
+        run_times.sort()
+
+        def _summary(values):
+            if not values:
+                return {}
+            return {
+                'avg': sum(values) / len(values),
+                'p50': values[len(values) // 2],
+                'p95': values[min(len(values) - 1, int(len(values) * 0.95))],
+                'max': values[-1]
+            }
+
+        stats.update({
+            'mode': self.mode,
+            'max_workers': self.max_workers,
+            'max_queue_size': self.max_queue_size,
+            'in_flight': in_flight,
+            'queue_depth': max(0, in_flight - self.max_workers),
+            'wait_time': _summary(wait_times),
+            'run_time': _summary(run_times)
+        })
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        """실행기 종료"""
+        with self._lock:
+            self._closed = True
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        logger.info("InferenceExecutor 종료")
+
+
+# 전역 실행기 인스턴스
+_inference_executor: Optional[InferenceExecutor] = None
+
+# 워커가 사용하는 챗봇 (스레드 모드: 서버 챗봇 공유, 프로세스 모드: 워커 프로세스별 생성)
+_worker_chatbot = None
+
+
+def init_inference_executor(**kwargs) -> InferenceExecutor:
+    """전역 추론 실행기 생성 (기존 실행기는 종료)"""
+    global _inference_executor
+    if _inference_executor is not None:
+        _inference_executor.shutdown(wait=False)
+    _inference_executor = InferenceExecutor(**kwargs)
+    return _inference_executor
+
+
+def get_inference_executor() -> InferenceExecutor:
+    """전역 추론 실행기 반환 (없으면 기본 설정으로 생성)"""
+    global _inference_executor
+    if _inference_executor is None:
+        _inference_executor = InferenceExecutor()
+    return _inference_executor
+
+
+def set_worker_chatbot(chatbot_instance):
+    """워커가 사용할 챗봇 지정 (스레드 모드)"""
+    global _worker_chatbot
+    _worker_chatbot = chatbot_instance
+
+
+def init_worker_chatbot(config=None):
+    """프로세스 모드 워커 초기화: 워커 프로세스마다 서버와 같은 설정으로 챗봇 생성
+
+    Args:
+        config: 서버가 로드한 AppConfig (initargs로 전달, 없으면 기본 설정)
+    """
+    from inference.chatbot import create_naviyam_chatbot
+    if config is None:
+        from utils.config import get_default_config
+        config = get_default_config()
+    set_worker_chatbot(create_naviyam_chatbot(config))
+
+
+def process_chat(user_input, on_token: Optional[Callable[[str], None]] = None):
+    """워커에서 실행되는 챗봇 처리 (on_token: LLM 응답 텍스트 조각 콜백)"""
+    if _worker_chatbot is None:
+        raise InferenceUnavailableError("워커 챗봇이 초기화되지 않았습니다")
+    return _worker_chatbot.process_user_input(user_input, on_token=on_token)
+
+
+async def dispatch_inference(func: Callable, *args, **kwargs) -> Any:
+    """추론 실행기로 작업 위임 후 백프레셔 예외를 HTTP 에러로 변환"""
+    try:
+        return await get_inference_executor().run(func, *args, **kwargs)
+    except InferenceRejectedError as e:
+        logger.warning(f"추론 요청 거부: {e}")
+        raise HTTPException(status_code=429, detail="요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요")
+    except InferenceTimeoutError as e:
+        logger.warning(f"추론 시간 초과: {e}")
+        raise HTTPException(status_code=503, detail="응답 시간이 초과되었습니다. 잠시 후 다시 시도해주세요")
+    except InferenceUnavailableError as e:
+        logger.error(f"추론 실행 불가: {e}")
+        raise HTTPException(status_code=503, detail="추론 서비스를 사용할 수 없습니다. 잠시 후 다시 시도해주세요")
+
+
+async def stream_inference(user_input) -> AsyncIterator[Tuple[str, Any]]:
+    """챗봇 처리를 워커 풀에서 실행하며 ("token", 텍스트 조각)... ("output", ChatbotOutput) 순서로 반환
+
+    토큰은 스레드 모드에서만 전달됨 (프로세스 모드는 콜백을 넘길 수 없어 최종 출력만 반환)
+    대기열 초과/타임아웃은 dispatch_inference와 같이 HTTPException으로 발생
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def on_token(delta: str):
+        loop.call_soon_threadsafe(queue.put_nowait, delta)
+
+    streaming = get_inference_executor().mode == "thread"
+    task = asyncio.ensure_future(
+        dispatch_inference(process_chat, user_input, on_token=on_token if streaming else None)
+    )
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter not in done:
+                getter.cancel()
+                break
+            yield "token", getter.result()
+
+        # 워커가 끝나기 전에 넣은 조각은 완료 통지보다 먼저 대기열에 들어가 있음
+        while not queue.empty():
+            yield "token", queue.get_nowait()
+        yield "output", task.result()
+    finally:
+        # 클라이언트가 먼저 끊은 경우 대기 중단 (실행 중인 워커는 완료까지 슬롯 점유)
+        task.cancel()
+
+
+def shutdown_inference_executor():
+    """전역 추론 실행기 종료"""
+    global _inference_executor
+    if _inference_executor is not None:
+        _inference_executor.shutdown()
+        _inference_executor = None
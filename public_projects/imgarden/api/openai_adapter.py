@@ -5,13 +5,15 @@ OpenAI API 호환 어댑터
 
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any, Literal
+from typing import AsyncIterator, List, Optional, Dict, Any, Literal, Tuple
 from datetime import datetime
 import uuid
 import logging
 
 from inference.chatbot import NaviyamChatbot
 from data.data_structure import UserInput
+from api.inference_executor import process_chat, dispatch_inference, stream_inference
+from api.streaming import SSE_DONE, sse_event, sse_response, prefetch_events
 
 logger = logging.getLogger(__name__)
 
@@ -99,25 +101,32 @@ def extract_conversation_context(messages: List[Message]) -> str:
     return "\n".join(context_parts) if context_parts else ""
 
 
+def format_recommendations(recommendations: List[Dict] = None) -> str:
+    """추천 음식점 목록 텍스트 (응답 뒤에 덧붙임, 추천이 없으면 빈 문자열)"""
+    if not recommendations:
+        return ""
+
+    rec_text = "\n\n추천 음식점:\n"
+    for i, rec in enumerate(recommendations[:3], 1):
+        name = rec.get('name', '알 수 없음')
+        category = rec.get('category', '')
+        price = rec.get('average_price', 0)
+        rec_text += f"{i}. {name}"
+        if category:
+            rec_text += f" ({category})"
+        if price:
+            rec_text += f" - 평균 {price:,}원"
+        rec_text += "\n"
+    return rec_text
+
+
 def convert_to_openai_format(naviyam_response: str, 
                             recommendations: List[Dict] = None,
                             metadata: Dict = None) -> ChatCompletionResponse:
     """나비얌 응답을 OpenAI 형식으로 변환"""
     
     # 추천 정보가 있으면 응답에 포함
-    if recommendations and len(recommendations) > 0:
-        rec_text = "\n\n추천 음식점:\n"
-        for i, rec in enumerate(recommendations[:3], 1):
-            name = rec.get('name', '알 수 없음')
-            category = rec.get('category', '')
-            price = rec.get('average_price', 0)
-            rec_text += f"{i}. {name}"
-            if category:
-                rec_text += f" ({category})"
-            if price:
-                rec_text += f" - 평균 {price:,}원"
-            rec_text += "\n"
-        naviyam_response += rec_text
+    naviyam_response += format_recommendations(recommendations)
     
     # OpenAI 형식으로 포장
     response_message = Message(
@@ -145,6 +154,57 @@ def convert_to_openai_format(naviyam_response: str,
     )
 
 
+async def stream_openai_chunks(events: AsyncIterator[Tuple[str, Any]]) -> AsyncIterator[str]:
+    """챗봇 스트림(stream_inference)을 chat.completion.chunk SSE 이벤트로 변환
+
+    LLM 응답이면 정제된 조각을 생성되는 대로 보내고 끝에 남은 부분과 추천 목록을 덧붙임,
+    템플릿 응답이면 완성된 응답을 한 번에 보냄.
+    최종 응답이 보낸 조각으로 시작하지 않으면 (개인화 말투 조정 등) 최종 응답 전체를 정정 조각으로 보냄
+    """
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:8]}"
+    created = int(datetime.now().timestamp())
+
+    def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+        return sse_event({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": "naviyam-chatbot",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        })
+
+    yield chunk({"role": "assistant"})
+
+    streamed_text = ""
+    try:
+        async for kind, value in events:
+            if kind == "token":
+                streamed_text += value
+                yield chunk({"content": value})
+                continue
+
+            response = value.response
+            if response.text.startswith(streamed_text):
+                content = response.text[len(streamed_text):]
+            else:
+                logger.warning("스트리밍한 텍스트와 최종 응답이 달라 최종 응답 전체를 다시 전송")
+                content = "\n\n" + response.text
+            content += format_recommendations(response.recommendations)
+            if content:
+                yield chunk({"content": content})
+    except Exception as e:
+        logger.error(f"챗봇 스트리밍 중 오류: {e}")
+        yield chunk({"content": "죄송합니다. 요청을 처리하는 중 오류가 발생했습니다."})
+
+    yield chunk({}, finish_reason="stop")
+    yield SSE_DONE
+
+
+async def _single_output_events(text: str) -> AsyncIterator[Tuple[str, Any]]:
+    """완성된 텍스트를 스트림 이벤트 하나로 전달 (폴백 응답용)"""
+    yield "token", text
+
+
 # === API 엔드포인트 ===
 
 def get_chatbot_instance():
@@ -159,13 +219,6 @@ async def chat_completions(
     """OpenAI ChatCompletion API 호환 엔드포인트"""
     
     try:
-        # 스트리밍은 현재 지원하지 않음
-        if request.stream:
-            raise HTTPException(
-                status_code=400, 
-                detail="스트리밍은 현재 지원되지 않습니다"
-            )
-        
         # 사용자 메시지 추출
         user_message = extract_user_message(request.messages)
         
@@ -175,27 +228,30 @@ async def chat_completions(
         # 세션 ID 생성
         session_id = f"openai_session_{uuid.uuid4().hex[:8]}"
         
-        # 대화 컨텍스트 추출 (선택적)
-        context = extract_conversation_context(request.messages)
-        
-        # 나비얌 형식으로 변환
+        # 나비얌 형식으로 변환 (이전 대화는 챗봇의 대화 메모리가 사용자별로 관리)
         user_input = UserInput(
             text=user_message,
             user_id=user_id,
             session_id=session_id,
-            timestamp=datetime.now(),
-            context=context if context else None
+            timestamp=datetime.now()
         )
         
         # 챗봇이 초기화되지 않은 경우 간단한 폴백 응답
         if chatbot_instance is None:
             logger.warning("챗봇이 초기화되지 않았습니다. 폴백 응답 반환")
             fallback_response = "죄송합니다. 현재 서비스 준비 중입니다. 잠시 후 다시 시도해주세요."
+            if request.stream:
+                return sse_response(stream_openai_chunks(_single_output_events(fallback_response)))
             return convert_to_openai_format(fallback_response)
         
-        # 나비얌 챗봇 호출
+        # 스트리밍: LLM 응답 조각을 생성되는 대로 전송 (대기열 초과 등은 전송 전에 HTTP 에러로)
+        if request.stream:
+            events = await prefetch_events(stream_inference(user_input))
+            return sse_response(stream_openai_chunks(events))
+        
+        # 나비얌 챗봇 호출 (추론 워커 풀에서 실행)
         try:
-            output = chatbot_instance.process_user_input(user_input)
+            output = await dispatch_inference(process_chat, user_input)
             
             # OpenAI 형식으로 변환
             return convert_to_openai_format(
@@ -204,11 +260,15 @@ async def chat_completions(
                 metadata=output.response.metadata
             )
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"챗봇 처리 중 오류: {e}")
             error_response = "죄송합니다. 요청을 처리하는 중 오류가 발생했습니다."
             return convert_to_openai_format(error_response)
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -3,23 +3,34 @@
 백엔드 담당자용 기본 구조
 """
 
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from datetime import datetime
 import logging
 import asyncio
+import math
+import time
 import uuid
 
 from inference.chatbot import NaviyamChatbot, create_naviyam_chatbot
 from data.data_structure import UserInput, ChatbotOutput
 from utils.config import load_config
 from utils.logging_utils import setup_logging
+from utils.monitoring import get_production_monitor
+from utils.tracing import get_request_tracer
+from utils.security import get_rate_limiter, init_rate_limiter
+from api.inference_executor import (
+    init_inference_executor, get_inference_executor, shutdown_inference_executor,
+    init_worker_chatbot, set_worker_chatbot, process_chat, dispatch_inference, stream_inference
+)
 
 # OpenAI 호환 어댑터 임포트
 from api.openai_adapter import router as openai_router
+from api.streaming import sse_event, sse_response, prefetch_events
 
 # 로깅 설정
 logger = logging.getLogger(__name__)
@@ -42,16 +53,80 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 속도 제한 대상 경로 (추론을 실행하는 채팅 라우트)
+RATE_LIMITED_PATHS = ("/chat", "/v1/chat/completions")
+
+
+@app.middleware("http")
+async def enforce_rate_limit(request: Request, call_next):
+    """채팅 요청 사용자별 속도 제한 (X-User-Id 헤더, 없으면 클라이언트 IP 기준)"""
+    if request.method != "POST" or request.url.path not in RATE_LIMITED_PATHS:
+        return await call_next(request)
+
+    user_key = request.headers.get("x-user-id")
+    if not user_key:
+        user_key = f"ip:{request.client.host if request.client else 'unknown'}"
+
+    limiter = get_rate_limiter()
+    if limiter.backend.shared:
+        decision = await run_in_threadpool(limiter.acquire, user_key)
+    else:
+        decision = limiter.acquire(user_key)
+
+    headers = {
+        "X-RateLimit-Limit": str(decision.limit),
+        "X-RateLimit-Remaining": str(decision.remaining),
+        "X-RateLimit-Reset": str(math.ceil(decision.reset_after))
+    }
+    if not decision.allowed:
+        headers["Retry-After"] = str(max(1, math.ceil(decision.retry_after)))
+        request.state.rejection = "rate_limited"
+        return JSONResponse(
+            status_code=429,
+            content={
+                "error": "RATE_LIMITED",
+                "message": "요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요",
+                "timestamp": datetime.now().isoformat()
+            },
+            headers=headers
+        )
+
+    response = await call_next(request)
+    response.headers.update(headers)
+    return response
+
+
+# 나중에 등록한 미들웨어가 바깥쪽에서 실행되므로 속도 제한(429) 응답도 메트릭에 기록됨
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """라우트별 요청 수/응답 시간을 프로덕션 모니터에 기록"""
+    start_time = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # 경로 파라미터 대신 라우트 템플릿 사용 (/users/{user_id}/profile -> users_user_id_profile)
+        # 라우팅 전에 거부된 요청(속도 제한)은 라우트가 없으므로 요청 경로 사용
+        route = request.scope.get("route")
+        # 추론 대기열 초과(429)는 라우트 안에서 발생하므로 상태 코드로 구분
+        rejection = getattr(request.state, "rejection", None) or ("queue_full" if status_code == 429 else None)
+        path = getattr(route, "path", None) or (request.url.path if rejection else "unmatched")
+        request_type = path.strip("/").replace("/", "_").replace("{", "").replace("}", "") or "root"
+        success = status_code < 500 and not rejection
+        monitor = get_production_monitor()
+        if rejection:
+            monitor.record_rejection(request_type, rejection)
+        monitor.record_request("", request_type, time.perf_counter() - start_time, success)
+
+
 # 전역 변수
 chatbot: Optional[NaviyamChatbot] = None
 
 # OpenAI 어댑터 라우터 등록
 app.include_router(openai_router)
 
-# OpenAI 어댑터에 챗봇 인스턴스 주입
-from api.openai_adapter import get_chatbot_instance
-app.dependency_overrides[get_chatbot_instance] = get_chatbot
-
 
 # === 요청/응답 모델 정의 ===
 
@@ -60,6 +135,7 @@ class ChatRequest(BaseModel):
     message: str = Field(..., description="사용자 메시지", min_length=1, max_length=1000)
     user_id: str = Field(..., description="사용자 ID", min_length=1, max_length=100)
     session_id: Optional[str] = Field(None, description="세션 ID")
+    stream: bool = Field(False, description="SSE 스트리밍 여부 (token 이벤트 후 done 이벤트로 전체 응답)")
     
     class Config:
         json_schema_extra = {
@@ -119,6 +195,11 @@ def get_chatbot() -> NaviyamChatbot:
     return chatbot
 
 
+# OpenAI 어댑터에 챗봇 인스턴스 주입
+from api.openai_adapter import get_chatbot_instance
+app.dependency_overrides[get_chatbot_instance] = get_chatbot
+
+
 def generate_session_id() -> str:
     """세션 ID 생성"""
     return str(uuid.uuid4())
@@ -149,6 +230,26 @@ async def health_check():
         raise HTTPException(status_code=503, detail="서비스 점검 중")
 
 
+def setup_inference_executor(config, chatbot_instance: NaviyamChatbot):
+    """추론 워커 풀 생성 (기존 풀은 종료)
+
+    스레드 모드: 워커가 서버 챗봇을 공유
+    프로세스 모드: 워커 프로세스마다 서버 설정(config)으로 챗봇 생성
+    """
+    inference_config = getattr(config, "inference", None)
+    executor_mode = getattr(inference_config, "executor_mode", "thread")
+    set_worker_chatbot(chatbot_instance)
+    process_mode = executor_mode == "process"
+    init_inference_executor(
+        max_workers=getattr(inference_config, "executor_workers", 2),
+        max_queue_size=getattr(inference_config, "executor_queue_size", 16),
+        timeout=getattr(inference_config, "response_timeout", 30),
+        mode=executor_mode,
+        initializer=init_worker_chatbot if process_mode else None,
+        initargs=(config,) if process_mode else ()
+    )
+
+
 @app.on_event("startup")
 async def startup_event():
     """서버 시작 시 초기화"""
@@ -162,10 +263,21 @@ async def startup_event():
         # 로깅 설정
         setup_logging(config)
         
+        # 사용자별 속도 제한 (sqlite 저장소는 같은 호스트의 워커 프로세스끼리 한도 공유)
+        inference_config = getattr(config, "inference", None)
+        init_rate_limiter(
+            max_requests_per_minute=getattr(inference_config, "rate_limit_per_minute", 30),
+            burst=getattr(inference_config, "rate_limit_burst", None),
+            backend_type=getattr(inference_config, "rate_limit_backend", "memory")
+        )
+        
         # 챗봇 초기화
         logger.info("챗봇 초기화 중...")
         chatbot = create_naviyam_chatbot(config)
         
+        # 추론 워커 풀 초기화 (모든 채팅 라우트가 이 풀을 통해 실행)
+        setup_inference_executor(config, chatbot)
+        
         logger.info("나비얌 챗봇 API 서버 초기화 완료")
         
     except Exception as e:
@@ -183,6 +295,13 @@ async def shutdown_event():
         # 챗봇 상태 저장
         if chatbot:
             chatbot.save_state("outputs/chatbot_state_backup.json")
+        
+        shutdown_inference_executor()
+        get_rate_limiter().backend.close()
+        
+        # 지연 쓰기 대기 중인 사용자 프로필 저장
+        if chatbot and chatbot.user_manager:
+            chatbot.user_manager.close()
             
         logger.info("나비얌 챗봇 API 서버 종료 완료")
         
@@ -223,6 +342,44 @@ async def health_check():
         raise HTTPException(status_code=500, detail="헬스체크 실패")
 
 
+def to_chat_response(output: ChatbotOutput, user_id: str, session_id: str) -> ChatResponse:
+    """챗봇 출력을 채팅 응답 모델로 변환"""
+    return ChatResponse(
+        response=output.response.text,
+        user_id=user_id,
+        session_id=session_id,
+        timestamp=datetime.now().isoformat(),
+        recommendations=output.response.recommendations,
+        follow_up_questions=output.response.follow_up_questions,
+        intent=output.extracted_info.intent.value,
+        confidence=output.extracted_info.confidence,
+        metadata=output.response.metadata
+    )
+
+
+async def stream_chat_events(events: AsyncIterator[Tuple[str, Any]],
+                             user_id: str, session_id: str) -> AsyncIterator[str]:
+    """챗봇 스트림을 /chat SSE 이벤트로 변환
+
+    - token: {"delta": 텍스트 조각} (LLM 응답일 때만, 정제 전 텍스트)
+    - done: ChatResponse 전체 (최종 정제 응답과 추천 결과)
+    - error: {"detail": 메시지}
+    """
+    try:
+        async for kind, value in events:
+            if kind == "token":
+                yield sse_event({"delta": value}, event="token")
+            else:
+                response = to_chat_response(value, user_id, session_id)
+                logger.info(f"챗봇 스트리밍 응답 완료 - 사용자: {user_id}, 의도: {response.intent}")
+                yield sse_event(response.model_dump(), event="done")
+    except HTTPException as e:
+        yield sse_event({"detail": e.detail}, event="error")
+    except Exception as e:
+        logger.error(f"챗봇 스트리밍 실패: {e}")
+        yield sse_event({"detail": f"챗봇 처리 실패: {str(e)}"}, event="error")
+
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest, chatbot_instance: NaviyamChatbot = Depends(get_chatbot)):
     """메인 채팅 엔드포인트"""
@@ -238,25 +395,22 @@ async def chat(request: ChatRequest, chatbot_instance: NaviyamChatbot = Depends(
             timestamp=datetime.now()
         )
         
-        # 챗봇 처리
-        output: ChatbotOutput = chatbot_instance.process_user_input(user_input)
+        # 스트리밍: LLM 응답 조각을 생성되는 대로 전송 (대기열 초과 등은 전송 전에 HTTP 에러로)
+        if request.stream:
+            events = await prefetch_events(stream_inference(user_input))
+            return sse_response(stream_chat_events(events, request.user_id, session_id))
+        
+        # 챗봇 처리 (추론 워커 풀에서 실행)
+        output: ChatbotOutput = await dispatch_inference(process_chat, user_input)
         
         # 응답 변환
-        response = ChatResponse(
-            response=output.response.text,
-            user_id=request.user_id,
-            session_id=session_id,
-            timestamp=datetime.now().isoformat(),
-            recommendations=output.response.recommendations,
-            follow_up_questions=output.response.follow_up_questions,
-            intent=output.extracted_info.intent.value,
-            confidence=output.extracted_info.confidence,
-            metadata=output.response.metadata
-        )
+        response = to_chat_response(output, request.user_id, session_id)
         
         logger.info(f"챗봇 응답 완료 - 사용자: {request.user_id}, 의도: {output.extracted_info.intent.value}")
         return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"챗봇 처리 실패: {e}")
         raise HTTPException(status_code=500, detail=f"챗봇 처리 실패: {str(e)}")
@@ -319,21 +473,63 @@ async def reset_conversation(user_id: str, chatbot_instance: NaviyamChatbot = De
         raise HTTPException(status_code=500, detail="대화 리셋 실패")
 
 
+def _wants_prometheus(request: Request, format: Optional[str]) -> bool:
+    """Prometheus 스크레이퍼(Accept: text/plain, openmetrics) 또는 ?format=prometheus"""
+    if format:
+        return format == "prometheus"
+    accept = request.headers.get("accept", "")
+    return "text/plain" in accept or "openmetrics" in accept
+
+
 @app.get("/metrics")
-async def get_metrics(chatbot_instance: NaviyamChatbot = Depends(get_chatbot)):
-    """성능 지표 조회"""
+async def get_metrics(request: Request, format: Optional[str] = None):
+    """성능 지표 조회 (기본 JSON, Prometheus 텍스트 형식 지원)"""
     try:
-        metrics = chatbot_instance.get_performance_metrics()
+        executor_stats = get_inference_executor().get_stats()
+        monitor = get_production_monitor()
+
+        if _wants_prometheus(request, format):
+            gauges = {
+                f"inference_{key}": value for key, value in executor_stats.items()
+                if isinstance(value, (int, float)) and not isinstance(value, bool)
+            }
+            return PlainTextResponse(
+                monitor.export_prometheus(extra_gauges=gauges) + get_request_tracer().export_prometheus(),
+                media_type="text/plain; version=0.0.4; charset=utf-8"
+            )
+
         return {
             "timestamp": datetime.now().isoformat(),
-            "metrics": metrics
+            "metrics": get_chatbot().get_performance_metrics(),
+            "monitor": monitor.get_dashboard_data(),
+            "inference_executor": executor_stats
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"성능 지표 조회 실패: {e}")
         raise HTTPException(status_code=500, detail="성능 지표 조회 실패")
 
 
+@app.get("/traces")
+async def get_traces(limit: int = 20, slow_only: bool = False, minutes: int = 5):
+    """단계별 지연 추적 조회
+
+    단계별 소요 시간 분위수(최근 minutes분)와 최근 샘플링된 요청의 span 트리 반환
+    (프로세스 모드에서는 워커 프로세스별로 집계되므로 서버 프로세스 기준 값만 보임)
+    """
+    tracer = get_request_tracer()
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "enabled": tracer.enabled,
+        "sample_rate": tracer.sample_rate,
+        "slow_threshold": tracer.slow_threshold,
+        "summary": tracer.get_stage_summary(minutes),
+        "traces": tracer.get_recent_traces(limit, slow_only)
+    }
+
+
 @app.get("/knowledge/stats")
 async def get_knowledge_stats(chatbot_instance: NaviyamChatbot = Depends(get_chatbot)):
     """지식베이스 통계 조회"""
@@ -400,6 +596,12 @@ async def reload_chatbot():
         # 새 챗봇 초기화
         config = load_config()
         chatbot = create_naviyam_chatbot(config)
+        if get_inference_executor().mode == "process":
+            # 워커 프로세스의 챗봇은 부모에서 교체할 수 없으므로 풀을 새로 생성
+            # (기존 풀에서 실행 중인 요청은 이전 챗봇으로 완료됨)
+            setup_inference_executor(config, chatbot)
+        else:
+            set_worker_chatbot(chatbot)
         
         logger.info("챗봇 재로드 완료")
         return {"message": "챗봇이 성공적으로 재로드되었습니다"}
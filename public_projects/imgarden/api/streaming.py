@@ -0,0 +1,49 @@
+"""
+SSE(Server-Sent Events) 응답 헬퍼
+"""
+
+import json
+from typing import Any, AsyncIterator, Optional
+
+from fastapi.responses import StreamingResponse
+
+SSE_DONE = "data: [DONE]\n\n"
+
+# 프록시 버퍼링을 끄고 캐시하지 않음
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(data: Any, event: Optional[str] = None) -> str:
+    """SSE 이벤트 문자열 (data는 JSON 직렬화)"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    if event:
+        return f"event: {event}\ndata: {payload}\n\n"
+    return f"data: {payload}\n\n"
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """SSE 이벤트 스트림 응답"""
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+async def prefetch_events(events: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    """첫 항목을 미리 받아 둔 스트림 반환
+
+    대기열 초과/타임아웃처럼 스트림 시작 전에 나는 에러를 응답 헤더 전송 전에 HTTP 상태로 돌려주기 위함
+    """
+    try:
+        first = await events.__anext__()
+    except StopAsyncIteration:
+        first = None
+        exhausted = True
+    else:
+        exhausted = False
+
+    async def chained():
+        if exhausted:
+            return
+        yield first
+        async for item in events:
+            yield item
+
+    return chained()
@@ -139,6 +139,10 @@ class NaviyamDataLoader:
                 )
                 self.knowledge.foodcard_users[str(user_id)] = fc_user
 
+            # 보조 인덱스 구축 (가게별 메뉴, 카테고리별 가게, 가격 사다리)
+            self.knowledge.build_indexes()
+            self.knowledge.build_coupon_index()
+
             logger.info(f"지식베이스 로드 완료: 가게 {len(self.knowledge.shops)}개, 메뉴 {len(self.knowledge.menus)}개, 쿠폰 {len(self.knowledge.coupons)}개")
             return self.knowledge
 
@@ -3,9 +3,13 @@
 """
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 from enum import Enum
+import bisect
+import heapq
+import threading
+import time
 import sys
 from pathlib import Path
 
@@ -280,6 +284,186 @@ class FoodcardUser:
         return self.balance < threshold
 
 
+class KnowledgeIndexes:
+    """NaviyamKnowledge 보조 인덱스 (구축 시점 스냅샷, 교체 방식으로만 갱신)"""
+
+    def __init__(self, shops: Dict[int, NaviyamShop], menus: Dict[int, NaviyamMenu]):
+        # 등록 순서 (동점 정렬을 기존 순회 순서와 맞추기 위함)
+        self.shop_order: Dict[int, int] = {shop_id: i for i, shop_id in enumerate(shops)}
+        self.menu_order: Dict[int, int] = {menu_id: i for i, menu_id in enumerate(menus)}
+
+        # 가게 -> 메뉴 (가격 오름차순, 같은 가격은 등록 순)
+        self.shop_menus: Dict[int, List[NaviyamMenu]] = {}
+        for menu in menus.values():
+            self.shop_menus.setdefault(menu.shop_id, []).append(menu)
+        for shop_menus in self.shop_menus.values():
+            shop_menus.sort(key=lambda menu: menu.price)
+
+        # 카테고리 -> 가게 (복합 카테고리 "한식/치킨"은 분리한 각 카테고리에도 등록)
+        self.category_shops: Dict[str, List[NaviyamShop]] = {}
+        self.composite_category_shops: Dict[str, List[NaviyamShop]] = {}
+        self.good_influence_shops: List[NaviyamShop] = []
+        for shop in shops.values():
+            self.category_shops.setdefault(shop.category, []).append(shop)
+            if "/" in shop.category:
+                for part in dict.fromkeys(shop.category.split("/")):
+                    self.composite_category_shops.setdefault(part, []).append(shop)
+            if shop.is_good_influence_shop:
+                self.good_influence_shops.append(shop)
+        self.categories_lower: List[Tuple[str, str]] = [(c, c.lower()) for c in self.category_shops]
+
+        # 전체 메뉴 가격 사다리 (bisect 예산 검색)
+        self.menus_by_price: List[NaviyamMenu] = sorted(menus.values(), key=lambda menu: menu.price)
+        self.menu_prices: List[int] = [menu.price for menu in self.menus_by_price]
+
+    def merge_shops(self, categories: List[str]) -> List[NaviyamShop]:
+        """여러 카테고리의 가게를 등록 순으로 병합"""
+        if len(categories) == 1:
+            return list(self.category_shops[categories[0]])
+        shops = [shop for category in categories for shop in self.category_shops[category]]
+        shops.sort(key=lambda shop: self.shop_order.get(shop.id, 0))
+        return shops
+
+
+class CouponIndex:
+    """쿠폰 적용 조건 인덱스
+
+    - 사용 조건별 분할 (ALL/SHOP 등 무조건, FOODCARD, GOOD_SHOP, CATEGORY별, EMERGENCY)
+    - 유효기간은 구축 시 1회 파싱, 시작/종료 시각 힙으로 만료 처리
+    - (사용자 구분, 착한가게 여부, 카테고리, 최소금액 구간) 단위 결과 캐시
+    """
+
+    def __init__(self, coupons: Dict[str, NaviyamCoupon], max_cache_size: int = 1024):
+        self.coupons: List[NaviyamCoupon] = list(coupons.values())
+        self.max_cache_size = max_cache_size
+
+        # 사용 조건별 분할 (등록 순 인덱스)
+        self.unconditional: List[int] = []
+        self.foodcard: List[int] = []
+        self.good_shop: List[int] = []
+        self.emergency: List[int] = []
+        self.category: Dict[str, List[int]] = {}
+        self.teen_only: List[bool] = []
+        for rank, coupon in enumerate(self.coupons):
+            if coupon.usage_type == "FOODCARD":
+                self.foodcard.append(rank)
+            elif coupon.usage_type == "GOOD_SHOP":
+                self.good_shop.append(rank)
+            elif coupon.usage_type == "EMERGENCY":
+                self.emergency.append(rank)
+            elif coupon.usage_type == "CATEGORY":
+                for target in dict.fromkeys(coupon.target):
+                    self.category.setdefault(target, []).append(rank)
+            else:
+                self.unconditional.append(rank)
+            self.teen_only.append("TEEN_FOODCARD" in coupon.target)
+
+        # 최소 주문 금액 구간 (가격 -> 구간 번호, 쿠폰은 자신의 구간 이상에서만 적용)
+        self.thresholds: List[int] = sorted({c.min_amount for c in self.coupons if c.min_amount})
+        self.threshold_ranks: List[int] = [
+            bisect.bisect_left(self.thresholds, c.min_amount) + 1 if c.min_amount else 0
+            for c in self.coupons
+        ]
+
+        # 유효기간 (시작 <= 현재 <= 종료) 및 상태 변경 시각 힙
+        now = time.time()
+        self.windows: List[Tuple[float, float]] = [self._parse_window(c) for c in self.coupons]
+        self.active: List[bool] = [self._in_window(rank, now) for rank in range(len(self.coupons))]
+        self._events: List[Tuple[float, bool, int]] = []
+        for rank, (start, end) in enumerate(self.windows):
+            if start > now:
+                self._events.append((start, False, rank))
+            if now <= end < float('inf'):
+                self._events.append((end, True, rank))
+        heapq.heapify(self._events)
+
+        self._cache: Dict[Tuple, List[NaviyamCoupon]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'expiry_events': 0}
+
+    @staticmethod
+    def _parse_window(coupon: NaviyamCoupon) -> Tuple[float, float]:
+        """유효기간을 타임스탬프로 변환 (형식 오류 시 항상 무효)"""
+        try:
+            start = datetime.fromisoformat(coupon.valid_from.replace('Z', '+00:00')).timestamp() \
+                if coupon.valid_from else float('-inf')
+            end = datetime.fromisoformat(coupon.valid_until.replace('Z', '+00:00')).timestamp() \
+                if coupon.valid_until else float('inf')
+        except (ValueError, AttributeError):
+            return float('inf'), float('-inf')
+        return start, end
+
+    def _in_window(self, rank: int, now: float) -> bool:
+        start, end = self.windows[rank]
+        return start <= now <= end
+
+    def _advance(self, now: float):
+        """시작/종료 시각이 지난 쿠폰 상태 갱신 (변경 시 캐시 무효화)"""
+        events = self._events
+        changed = False
+        while events and (now > events[0][0] or (now == events[0][0] and not events[0][1])):
+            _, _, rank = heapq.heappop(events)
+            self.active[rank] = self._in_window(rank, now)
+            self.stats['expiry_events'] += 1
+            changed = True
+        if changed:
+            self._cache.clear()
+
+    def _collect(self, has_foodcard: bool, low_balance: bool, non_teen: bool,
+                 is_good_shop: bool, category: Optional[str], bucket: int) -> List[NaviyamCoupon]:
+        ranks = list(self.unconditional)
+        if has_foodcard:
+            ranks.extend(self.foodcard)
+        if is_good_shop:
+            ranks.extend(self.good_shop)
+        if category in self.category:
+            ranks.extend(self.category[category])
+        if not has_foodcard or low_balance:
+            ranks.extend(self.emergency)
+        ranks.sort()
+
+        exclude_teen = has_foodcard and non_teen
+        return [
+            self.coupons[rank] for rank in ranks
+            if self.active[rank] and self.threshold_ranks[rank] <= bucket
+            and not (exclude_teen and self.teen_only[rank])
+        ]
+
+    def lookup(self, foodcard_user: Optional[FoodcardUser], is_good_shop: bool,
+               category: Optional[str], price: int) -> List[NaviyamCoupon]:
+        """조건에 맞는 유효 쿠폰 목록 (등록 순)"""
+        has_foodcard = bool(foodcard_user)
+        low_balance = has_foodcard and foodcard_user.is_low_balance()
+        non_teen = has_foodcard and foodcard_user.target_age_group != "청소년"
+        bucket = bisect.bisect_right(self.thresholds, price)
+        key = (has_foodcard, low_balance, non_teen, is_good_shop, category, bucket)
+
+        with self._lock:
+            self._advance(time.time())
+            coupons = self._cache.get(key)
+            if coupons is None:
+                self.stats['misses'] += 1
+                coupons = self._collect(has_foodcard, low_balance, non_teen, is_good_shop, category, bucket)
+                if len(self._cache) >= self.max_cache_size:
+                    self._cache.clear()
+                self._cache[key] = coupons
+            else:
+                self.stats['hits'] += 1
+        return coupons
+
+    def get_stats(self) -> Dict[str, Any]:
+        """인덱스 통계"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update({
+                'coupons': len(self.coupons),
+                'active': sum(self.active),
+                'cache_entries': len(self._cache),
+                'pending_events': len(self._events)
+            })
+        return stats
+
+
 @dataclass
 class NaviyamKnowledge:
     """나비얌 도메인 지식베이스"""
@@ -290,84 +474,114 @@ class NaviyamKnowledge:
     reviews: List[Dict] = field(default_factory=list)
     popular_combinations: List[Dict] = field(default_factory=list)  # 인기 조합
 
+    # 보조 인덱스 (shops/menus 추가·교체 시 다음 조회에서 자동 재구축)
+    _indexes: Optional[KnowledgeIndexes] = field(default=None, init=False, repr=False, compare=False)
+    _index_signature: Optional[Tuple] = field(default=None, init=False, repr=False, compare=False)
+    _coupon_index: Optional[CouponIndex] = field(default=None, init=False, repr=False, compare=False)
+    _coupon_index_signature: Optional[Tuple] = field(default=None, init=False, repr=False, compare=False)
+
+    def build_indexes(self) -> KnowledgeIndexes:
+        """보조 인덱스 구축 (데이터 로드 완료 시 호출)"""
+        signature = (id(self.shops), len(self.shops), id(self.menus), len(self.menus))
+        indexes = KnowledgeIndexes(self.shops, self.menus)
+        self._indexes, self._index_signature = indexes, signature
+        return indexes
+
+    @property
+    def indexes(self) -> KnowledgeIndexes:
+        """보조 인덱스 (가게/메뉴 수가 바뀌었으면 재구축, 기존 항목의 값 수정은 build_indexes로 반영)"""
+        indexes = self._indexes
+        if indexes is None or self._index_signature != (id(self.shops), len(self.shops),
+                                                         id(self.menus), len(self.menus)):
+            indexes = self.build_indexes()
+        return indexes
+
+    def build_coupon_index(self) -> CouponIndex:
+        """쿠폰 인덱스 구축 (쿠폰 로드·수정 후 호출)"""
+        signature = (id(self.coupons), len(self.coupons))
+        coupon_index = CouponIndex(self.coupons)
+        self._coupon_index, self._coupon_index_signature = coupon_index, signature
+        return coupon_index
+
+    @property
+    def coupon_index(self) -> CouponIndex:
+        """쿠폰 인덱스 (쿠폰 수가 바뀌었으면 재구축)"""
+        coupon_index = self._coupon_index
+        if coupon_index is None or self._coupon_index_signature != (id(self.coupons), len(self.coupons)):
+            coupon_index = self.build_coupon_index()
+        return coupon_index
+
     def get_good_influence_shops(self) -> List[NaviyamShop]:
         """착한가게 목록 반환"""
-        return [shop for shop in self.shops.values() if shop.is_good_influence_shop]
+        return list(self.indexes.good_influence_shops)
 
     def get_shops_by_category(self, category: str) -> List[NaviyamShop]:
         """카테고리별 가게 목록 반환"""
+        indexes = self.indexes
+
         # 정확한 카테고리 매칭
-        exact_matches = [shop for shop in self.shops.values() if shop.category == category]
-        
+        exact_matches = indexes.category_shops.get(category)
+        if exact_matches:
+            return list(exact_matches)
+
         # 복합 카테고리 처리 (예: "한식/치킨"에서 "한식" 검색 시에도 포함)
-        if not exact_matches:
-            partial_matches = []
-            for shop in self.shops.values():
-                if "/" in shop.category and category in shop.category.split("/"):
-                    partial_matches.append(shop)
-            return partial_matches
-            
-        return exact_matches
+        return list(indexes.composite_category_shops.get(category, []))
+
+    def find_shops_by_category_keyword(self, keyword: str, ignore_case: bool = True) -> List[NaviyamShop]:
+        """카테고리에 keyword가 포함된 가게 목록 (등록 순)"""
+        indexes = self.indexes
+        if ignore_case:
+            keyword = keyword.lower()
+            categories = [c for c, c_lower in indexes.categories_lower if keyword in c_lower]
+        else:
+            categories = [c for c, _ in indexes.categories_lower if keyword in c]
+        return indexes.merge_shops(categories) if categories else []
+
+    def get_shop_menus(self, shop_id: int) -> List[NaviyamMenu]:
+        """가게 메뉴 목록 (가격 오름차순)"""
+        return list(self.indexes.shop_menus.get(shop_id, []))
+
+    def get_cheapest_menu(self, shop_id: int, max_price: Optional[int] = None) -> Optional[NaviyamMenu]:
+        """가게의 가장 저렴한 메뉴 (max_price 초과면 None)"""
+        shop_menus = self.indexes.shop_menus.get(shop_id)
+        if not shop_menus:
+            return None
+        cheapest = shop_menus[0]
+        if max_price is not None and cheapest.price > max_price:
+            return None
+        return cheapest
     
     def get_available_categories(self) -> List[str]:
         """현재 등록된 가게들의 카테고리 목록 반환"""
-        categories = set()
-        for shop in self.shops.values():
-            categories.add(shop.category)
-        return sorted(list(categories))
+        return sorted(self.indexes.category_shops)
 
     def get_menus_in_budget(self, max_budget: int) -> List[NaviyamMenu]:
-        """예산 내 메뉴 목록 반환"""
-        return [menu for menu in self.menus.values() if menu.price <= max_budget]
+        """예산 내 메뉴 목록 반환 (가격 오름차순)"""
+        indexes = self.indexes
+        return indexes.menus_by_price[:bisect.bisect_right(indexes.menu_prices, max_budget)]
     
-    def get_applicable_coupons(self, user_id: Optional[int] = None, shop_id: Optional[int] = None, 
+    def get_applicable_coupons(self, user_id: Optional[int] = None, shop_id: Optional[int] = None,
                              category: Optional[str] = None, price: int = 0) -> List[NaviyamCoupon]:
-        """사용 가능한 쿠폰 목록 반환"""
-        applicable_coupons = []
-        
+        """사용 가능한 쿠폰 목록 반환 (할인 금액 내림차순)"""
         # 급식카드 사용자 확인
         foodcard_user = None
         if user_id and str(user_id) in self.foodcard_users:
             foodcard_user = self.foodcard_users[str(user_id)]
-        
+
         # 가게 정보 확인
         shop = None
         if shop_id and shop_id in self.shops:
             shop = self.shops[shop_id]
             if not category:
                 category = shop.category
-        
-        for coupon in self.coupons.values():
-            # 유효기간 검사
-            if not coupon.is_valid():
-                continue
-                
-            # 최소 금액 검사
-            if coupon.min_amount and price < coupon.min_amount:
-                continue
-            
-            # 사용 대상 검사
-            if coupon.usage_type == "FOODCARD" and not foodcard_user:
-                continue
-            
-            if coupon.usage_type == "GOOD_SHOP" and (not shop or not shop.is_good_influence_shop):
-                continue
-                
-            if coupon.usage_type == "CATEGORY" and category not in coupon.target:
-                continue
-                
-            if coupon.usage_type == "EMERGENCY" and foodcard_user and not foodcard_user.is_low_balance():
-                continue
-            
-            # 대상 연령 검사
-            if "TEEN_FOODCARD" in coupon.target and foodcard_user and foodcard_user.target_age_group != "청소년":
-                continue
-                
-            applicable_coupons.append(coupon)
-            
+
+        # 유효기간/사용 대상/최소 금액은 인덱스에서 조회
+        applicable_coupons = self.coupon_index.lookup(
+            foodcard_user, bool(shop and shop.is_good_influence_shop), category, price
+        )
+
         # 할인 금액 기준 정렬
-        applicable_coupons.sort(key=lambda c: c.calculate_discount(price), reverse=True)
-        return applicable_coupons
+        return sorted(applicable_coupons, key=lambda c: c.calculate_discount(price), reverse=True)
 
 
 @dataclass
@@ -0,0 +1,183 @@
+"""
+학습 데이터 직렬화 벤치마크
+기존 _make_json_serializable(재귀 __dict__ 순회 + 문자열마다 이모지 정규식 컴파일) + json.dumps 방식과
+타입별 인코더 RecordSerializer의 배치(기존 flush 1회 = buffer_size개 레코드) 직렬화 시간 비교
+
+사용법:
+    python inference/benchmark_record_serializer.py --batch_size 100 --repeat 50
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from data.data_structure import (
+    ExtractedInfo, ExtractedEntity, IntentType, ConfidenceLevel, LearningData
+)
+from nlp.preprocessor import NaviyamTextPreprocessor
+from inference.record_serializer import RecordSerializer, get_record_serializer, orjson
+
+SAMPLE_TEXTS = [
+    "만원으로 친구랑 치킨 먹고 싶어요 😋",
+    "근처에 착한가게 있어?",
+    "오늘 점심 뭐 먹지 ㅠㅠ 배고파",
+    "급식카드로 김치찌개 먹을 수 있는 곳 알려줘",
+    "5천원 이하 분식 추천해줘!!",
+    "가족이랑 저녁에 한식 먹으러 갈래 🍚"
+]
+
+
+def legacy_make_json_serializable(obj: Any, visited=None) -> Any:
+    """기존 LearningDataCollector._make_json_serializable"""
+    if visited is None:
+        visited = set()
+
+    obj_id = id(obj)
+    if obj_id in visited:
+        return None
+
+    if isinstance(obj, (str, int, float, bool, type(None))):
+        if isinstance(obj, str):
+            import re
+            emoji_pattern = re.compile('[\U00010000-\U0010ffff]', flags=re.UNICODE)
+            return emoji_pattern.sub('', obj)
+        return obj
+    elif isinstance(obj, datetime):
+        return obj.isoformat()
+    elif isinstance(obj, dict):
+        visited.add(obj_id)
+        return {k: legacy_make_json_serializable(v, visited) for k, v in obj.items()}
+    elif isinstance(obj, (list, deque)):
+        visited.add(obj_id)
+        return [legacy_make_json_serializable(item, visited) for item in obj]
+    elif hasattr(obj, '__dict__'):
+        visited.add(obj_id)
+        if type(obj.__dict__).__name__ == 'mappingproxy':
+            return legacy_make_json_serializable(dict(obj.__dict__), visited)
+        return legacy_make_json_serializable(obj.__dict__, visited)
+    else:
+        return str(obj)
+
+
+def legacy_dumps(record: Dict[str, Any]) -> str:
+    return json.dumps(legacy_make_json_serializable(record), ensure_ascii=False)
+
+
+def legacy_encode_line(record: Dict[str, Any]) -> bytes:
+    """기존 flush에서 레코드 1건당 수행하던 작업 (변환 + json.dumps + 파일 쓰기용 인코딩)"""
+    return (legacy_dumps(record) + '\n').encode('utf-8')
+
+
+def build_records(count: int) -> List[Dict[str, Any]]:
+    """챗봇 1턴에서 수집되는 레코드 구성 (NLU/상호작용/추천/구조화 학습 데이터 순환)"""
+    preprocessor = NaviyamTextPreprocessor()
+    records = []
+    for i in range(count):
+        text = SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]
+        preprocessed = preprocessor.preprocess(text)
+        entities = ExtractedEntity(food_type="치킨", budget=10000, companions=["친구"])
+        extracted_info = ExtractedInfo(
+            intent=IntentType.FOOD_REQUEST, entities=entities, confidence=0.82,
+            confidence_level=ConfidenceLevel.HIGH, raw_text=text
+        )
+        recommendations = [
+            {"shop_id": j, "shop_name": f"착한식당 {j}호점", "menu": "양념치킨", "price": 9000 + j * 500,
+             "is_good_influence_shop": j % 2 == 0, "reason": "예산 안에서 먹을 수 있어요 👍"}
+            for j in range(5)
+        ]
+        timestamp = datetime.now().isoformat()
+        kind = i % 4
+        if kind == 0:
+            records.append({"timestamp": timestamp, "user_id": f"user_{i % 50}", "data_type": "nlu_features",
+                            "features": {"input_text": text, "preprocessed": preprocessed,
+                                         "intent": extracted_info.intent.value, "confidence": 0.82,
+                                         "entities": extracted_info.entities.__dict__}})
+        elif kind == 1:
+            records.append({"timestamp": timestamp, "user_id": f"user_{i % 50}", "data_type": "interaction",
+                            "interaction": {"input_text": text, "intent": "food_request", "confidence": 0.82,
+                                            "response_text": "이런 곳은 어때요? 😊", "response_time_ms": 120,
+                                            "conversation_turn": i % 7}})
+        elif kind == 2:
+            records.append({"timestamp": timestamp, "user_id": f"user_{i % 50}", "data_type": "recommendation",
+                            "recommendations": recommendations, "user_selection": None,
+                            "recommendation_count": len(recommendations)})
+        else:
+            learning_data = LearningData(user_id=f"user_{i % 50}", extracted_entities=entities.__dict__,
+                                         intent_confidence=0.82, recommendations_provided=recommendations)
+            records.append({"timestamp": timestamp, "user_id": f"user_{i % 50}", "data_type": "interaction",
+                            "learning_data": learning_data, "quality_score": 0.4, "is_valid": False})
+    return records
+
+
+def _measure(func, batch: List[Dict[str, Any]], repeat: int) -> Dict[str, float]:
+    """배치 직렬화 시간 측정 (ms)"""
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for record in batch:
+            func(record)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        'mean_ms': statistics.mean(latencies),
+        'p50_ms': latencies[len(latencies) // 2],
+        'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    }
+
+
+def count_mismatches(batch: List[Dict[str, Any]], serializer: RecordSerializer) -> int:
+    """전처리 결과가 없는 레코드에서 기존 방식과 출력 비교 (전처리 결과는 Enum을 값으로 저장하므로 제외)"""
+    mismatches = 0
+    for record in batch:
+        if record["data_type"] == "nlu_features":
+            continue
+        if json.loads(legacy_dumps(record)) != json.loads(serializer.dumps(record)):
+            mismatches += 1
+    return mismatches
+
+
+def run_benchmark(batch_size: int = 100, repeat: int = 50) -> Dict[str, Any]:
+    """기존 직렬화와 타입별 인코더 직렬화 비교"""
+    batch = build_records(batch_size)
+    serializer = get_record_serializer()
+
+    legacy_stats = _measure(legacy_encode_line, batch, repeat)
+    fast_stats = _measure(serializer.dumps_bytes, batch, repeat)
+
+    return {
+        'records': len(batch),
+        'backend': 'orjson' if orjson is not None else 'json',
+        'mismatches': count_mismatches(batch, serializer),
+        'legacy_serializer': legacy_stats,
+        'record_serializer': fast_stats,
+        'legacy_bytes': sum(len(legacy_dumps(r).encode('utf-8')) for r in batch),
+        'record_bytes': sum(len(serializer.dumps_bytes(r)) for r in batch),
+        'speedup_mean': legacy_stats['mean_ms'] / fast_stats['mean_ms'] if fast_stats['mean_ms'] else float('inf')
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="학습 데이터 직렬화 벤치마크")
+    parser.add_argument("--batch_size", type=int, default=100, help="flush 1회 레코드 수 (기존 buffer_size)")
+    parser.add_argument("--repeat", type=int, default=50, help="배치 반복 횟수")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    result = run_benchmark(args.batch_size, args.repeat)
+
+    print(f"=== 학습 데이터 직렬화 벤치마크 ({result['records']}개 레코드 배치 x {args.repeat}회, {result['backend']}) ===")
+    print(f"출력 불일치 (전처리 결과 제외): {result['mismatches']}건")
+    print(f"배치 크기: 기존 {result['legacy_bytes'] / 1024:.1f}KB, 신규 {result['record_bytes'] / 1024:.1f}KB")
+    for name in ('legacy_serializer', 'record_serializer'):
+        stats = result[name]
+        print(f"{name}: 평균 {stats['mean_ms']:.3f}ms, p50 {stats['p50_ms']:.3f}ms, p95 {stats['p95_ms']:.3f}ms")
+    print(f"배치 직렬화 시간 개선: {result['speedup_mean']:.1f}배")
@@ -5,7 +5,7 @@
 
 import time
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 from dataclasses import asdict
 import json
@@ -25,9 +25,10 @@ from nlp.llm_normalizer import LLMNormalizer, LLMNormalizedOutput
 from .user_manager import NaviyamUserManager
 from .response_generator import NaviyamResponseGenerator
 from .foodcard_manager import FoodcardManager
-from rag.retriever import create_naviyam_retriever
+from rag.retriever import create_naviyam_retriever, RetrievalResult
 from utils.security import get_input_validator, get_rate_limiter, get_content_filter
-from utils.cache import get_query_cache
+from utils.cache import get_query_cache, init_embedding_cache
+from utils.tracing import get_request_tracer
 from utils.emotion_detector import EmotionDetector
 
 logger = logging.getLogger(__name__)
@@ -170,6 +171,12 @@ class NaviyamChatbot:
         self.conversation_memory = ConversationMemory(config.data.max_conversations)
         self.performance_monitor = PerformanceMonitor()
 
+        # 단계별 지연 추적 (utils/tracing.py)
+        self.tracer = get_request_tracer()
+        self.tracer.enabled = config.inference.tracing_enabled
+        self.tracer.sample_rate = config.inference.trace_sample_rate
+        self.tracer.slow_threshold = config.inference.trace_slow_threshold
+
         # 상태 관리
         self.is_initialized = False
         self.last_cleanup_time = datetime.now()
@@ -347,7 +354,10 @@ class NaviyamChatbot:
 
         self.user_manager = NaviyamUserManager(
             save_path=str(Path(self.config.data.output_path) / "user_profiles"),
-            enable_personalization=self.config.inference.enable_personalization
+            enable_personalization=self.config.inference.enable_personalization,
+            backend=self.config.inference.profile_backend,
+            cache_size=self.config.inference.profile_cache_size,
+            flush_interval=self.config.inference.profile_flush_interval
         )
 
         logger.info("사용자 관리자 초기화 완료")
@@ -368,6 +378,11 @@ class NaviyamChatbot:
             
             logger.info(f"RAG Vector Store 타입: {store_type}")
             
+            # 쿼리 임베딩 디스크 스필 (설정 시에만, 디렉토리 잠금을 얻은 프로세스만 사용)
+            if getattr(vector_store_type, 'embedding_spill', False):
+                from utils.config import PathConfig
+                init_embedding_cache(spill_dir=PathConfig().CACHE_DIR / "embeddings")
+            
             # RAG Retriever 생성 (test_data.json 사용)
             if store_type == "prebuilt_faiss":
                 # PrebuiltFAISS 전용 생성 로직
@@ -451,12 +466,21 @@ class NaviyamChatbot:
         else:
             logger.info("학습 데이터 수집기는 main.py에서 초기화됩니다")
 
-    def process_user_input(self, user_input: UserInput) -> ChatbotOutput:
-        """사용자 입력 처리 (메인 메서드)"""
+    def process_user_input(self, user_input: UserInput,
+                           on_token: Optional[Callable[[str], None]] = None) -> ChatbotOutput:
+        """사용자 입력 처리 (메인 메서드)
+
+        Args:
+            user_input: 사용자 입력
+            on_token: LLM 응답 생성 시 텍스트 조각마다 호출 (스트리밍용, 템플릿 응답이면 호출되지 않음)
+        """
         if not self.is_initialized:
             raise RuntimeError("챗봇이 초기화되지 않았습니다")
 
         start_time = time.time()
+        tracer = self.tracer
+        trace = tracer.start_trace("process_user_input", user_id=user_input.user_id)
+        trace_error = None
 
         try:
             # 1. 입력 검증
@@ -464,23 +488,27 @@ class NaviyamChatbot:
                 return self._generate_empty_input_response(user_input)
 
             # 2. 전처리
-            preprocessed = self.preprocessor.preprocess(user_input.text)
+            with tracer.span("preprocess"):
+                preprocessed = self.preprocessor.preprocess(user_input.text)
 
             # 3. 의도 및 엔티티 추출
             # extracted_info = self.nlu.extract_intent_and_entities(
             #     user_input.text, user_input.user_id
             # )
             # 3. 스마트 NLU 처리 (LLM 통합)
-            extracted_info = self._smart_nlu_processing(user_input, preprocessed)
+            with tracer.span("nlu"):
+                extracted_info = self._smart_nlu_processing(user_input, preprocessed)
 
             # 3.5. RAG 검색 (추천 관련 의도인 경우)
-            rag_context = self._perform_rag_search(user_input, extracted_info)
+            with tracer.span("rag"):
+                rag_result = self._perform_rag_search(user_input, extracted_info)
 
             # 4. 사용자 프로필 조회/업데이트
-            user_profile = self.user_manager.get_or_create_user_profile(user_input.user_id)
-            self.user_manager.update_user_interaction(
-                user_input.user_id, extracted_info, preprocessed.emotion
-            )
+            with tracer.span("profile"):
+                user_profile = self.user_manager.get_or_create_user_profile(user_input.user_id)
+                self.user_manager.update_user_interaction(
+                    user_input.user_id, extracted_info, preprocessed.emotion
+                )
 
             # 5. 응답 생성
             # response = self.response_generator.generate_response(
@@ -492,14 +520,16 @@ class NaviyamChatbot:
             # )
 
             # 5. 스마트 응답 생성 (LLM 통합)
-            response = self._smart_response_generation(
-                extracted_info, user_profile, user_input.user_id, rag_context
-            )
+            with tracer.span("response_generation"):
+                response = self._smart_response_generation(
+                    extracted_info, user_profile, user_input.user_id, rag_result, on_token
+                )
             
             # 5.5. 감정 상태 결정 및 적용
-            emotion = self._determine_emotion(
-                extracted_info, user_input.text, response.text, user_input.user_id
-            )
+            with tracer.span("emotion"):
+                emotion = self._determine_emotion(
+                    extracted_info, user_input.text, response.text, user_input.user_id, preprocessed
+                )
             response.emotion = emotion
             if response.metadata.get("onboarding_complete"):
                 # 사용자를 normal_mode로 전환하기 위해 interaction_count 증가
@@ -510,62 +540,64 @@ class NaviyamChatbot:
 
                 logger.info(f"사용자 {user_input.user_id} 온보딩 완료")
             # 6. 개인화 적용
-            response = self.user_manager.personalize_response(response, user_profile)
+            with tracer.span("personalization"):
+                response = self.user_manager.personalize_response(response, user_profile)
 
-            # 7. 학습 데이터 수집
-            learning_data = self._collect_learning_data(
-                user_input, extracted_info, response, preprocessed
-            )
-
-            # 8. 학습 데이터 수집 (기존 시스템 활용)
-            if self.data_collector:
-                # NLU 데이터 수집
-                nlu_features = {
-                    "input_text": user_input.text,
-                    "preprocessed": preprocessed,
-                    "intent": extracted_info.intent.value,
-                    "confidence": extracted_info.confidence,
-                    "entities": asdict(extracted_info.entities)
-                }
-                self.data_collector.collect_nlu_features(
-                    user_id=user_input.user_id,
-                    features=nlu_features
+            with tracer.span("data_collection"):
+                # 7. 학습 데이터 수집
+                learning_data = self._collect_learning_data(
+                    user_input, extracted_info, response, preprocessed
                 )
-                
-                # 상호작용 데이터 수집
-                self.data_collector.collect_interaction_data(
-                    user_id=user_input.user_id,
-                    interaction_data={
+
+                # 8. 학습 데이터 수집 (기존 시스템 활용)
+                if self.data_collector:
+                    # NLU 데이터 수집
+                    nlu_features = {
                         "input_text": user_input.text,
+                        "preprocessed": preprocessed,
                         "intent": extracted_info.intent.value,
                         "confidence": extracted_info.confidence,
-                        "response_text": response.text,
-                        "response_time_ms": int((time.time() - start_time) * 1000),
-                        "conversation_turn": len(self.conversation_memory.conversations.get(user_input.user_id, [])) + 1
+                        "entities": asdict(extracted_info.entities)
                     }
-                )
-                
-                # 추천 데이터 수집
-                if response.recommendations:
-                    self.data_collector.collect_recommendation_data(
+                    self.data_collector.collect_nlu_features(
                         user_id=user_input.user_id,
-                        recommendations=response.recommendations
+                        features=nlu_features
                     )
                 
-                # 구조화된 학습 데이터 수집
-                if learning_data:
-                    # LearningData 객체로 변환
-                    from data.data_structure import LearningData
-                    structured_data = LearningData(
-                        user_id=user_input.user_id,
-                        extracted_entities=extracted_info.entities.__dict__,
-                        intent_confidence=extracted_info.confidence,
-                        recommendations_provided=response.recommendations or []
-                    )
-                    self.data_collector.collect_learning_data(
+                    # 상호작용 데이터 수집
+                    self.data_collector.collect_interaction_data(
                         user_id=user_input.user_id,
-                        learning_data=structured_data
+                        interaction_data={
+                            "input_text": user_input.text,
+                            "intent": extracted_info.intent.value,
+                            "confidence": extracted_info.confidence,
+                            "response_text": response.text,
+                            "response_time_ms": int((time.time() - start_time) * 1000),
+                            "conversation_turn": len(self.conversation_memory.conversations.get(user_input.user_id, [])) + 1
+                        }
                     )
+                
+                    # 추천 데이터 수집
+                    if response.recommendations:
+                        self.data_collector.collect_recommendation_data(
+                            user_id=user_input.user_id,
+                            recommendations=response.recommendations
+                        )
+                
+                    # 구조화된 학습 데이터 수집
+                    if learning_data:
+                        # LearningData 객체로 변환
+                        from data.data_structure import LearningData
+                        structured_data = LearningData(
+                            user_id=user_input.user_id,
+                            extracted_entities=extracted_info.entities.__dict__,
+                            intent_confidence=extracted_info.confidence,
+                            recommendations_provided=response.recommendations or []
+                        )
+                        self.data_collector.collect_learning_data(
+                            user_id=user_input.user_id,
+                            learning_data=structured_data
+                        )
 
             # 8. 세션 데이터 생성
             session_data = self._generate_session_data(
@@ -574,9 +606,10 @@ class NaviyamChatbot:
 
             # 9. 대화 기록 저장
             if self.config.inference.save_conversations:
-                self.conversation_memory.add_conversation(
-                    user_input.user_id, user_input.text, response.text, extracted_info, emotion
-                )
+                with tracer.span("conversation_memory"):
+                    self.conversation_memory.add_conversation(
+                        user_input.user_id, user_input.text, response.text, extracted_info, emotion
+                    )
 
             # 10. 성능 모니터링
             response_time = time.time() - start_time
@@ -594,6 +627,7 @@ class NaviyamChatbot:
 
         except Exception as e:
             logger.error(f"사용자 입력 처리 실패: {e}")
+            trace_error = type(e).__name__
 
             # 에러 응답 생성
             error_response = self._generate_error_response(user_input, str(e))
@@ -603,6 +637,9 @@ class NaviyamChatbot:
 
             return error_response
 
+        finally:
+            tracer.finish_trace(trace, error=trace_error)
+
     def _generate_empty_input_response(self, user_input: UserInput) -> ChatbotOutput:
         """빈 입력 응답 생성"""
         response = ChatbotResponse(
@@ -892,6 +929,11 @@ class NaviyamChatbot:
 
     def __del__(self):
         """소멸자"""
+        try:
+            if self.user_manager:
+                self.user_manager.close()
+        except:
+            pass
         try:
             if self.model:
                 self.model.cleanup_memory()
@@ -901,9 +943,9 @@ class NaviyamChatbot:
     def _smart_nlu_processing(self, user_input: UserInput, preprocessed) -> ExtractedInfo:
         """스마트 NLU 처리 (LLM 통합)"""
 
-        # LLM 정규화 사용 여부 결정
+        # LLM 정규화 사용 여부 결정 (전처리 결과 공유)
         if (self.llm_normalizer and
-                self.llm_normalizer.should_use_llm_normalization(user_input.text)):
+                self.llm_normalizer.should_use_llm_normalization(user_input.text, preprocessed)):
 
             logger.debug(f"복잡한 입력 감지, LLM 정규화 사용: {user_input.text}")
 
@@ -922,11 +964,12 @@ class NaviyamChatbot:
                 }
 
             # LLM으로 입력 정규화
-            llm_output = self.llm_normalizer.normalize_user_input(
-                user_input.text,
-                conversation_context,
-                user_context
-            )
+            with self.tracer.span("llm_normalize"):
+                llm_output = self.llm_normalizer.normalize_user_input(
+                    user_input.text,
+                    conversation_context,
+                    user_context
+                )
 
             # LLM 정규화 결과로 NLU 수행
             extracted_info = self.nlu.extract_from_llm_normalized(
@@ -936,18 +979,18 @@ class NaviyamChatbot:
             logger.debug(f"LLM+NLU 결과: intent={extracted_info.intent.value}, confidence={extracted_info.confidence}")
 
         else:
-            # 기존 방식으로 NLU 수행
+            # 기존 방식으로 NLU 수행 (2단계 전처리 결과 재사용)
             extracted_info = self.nlu.extract_intent_and_entities(
-                user_input.text, user_input.user_id
+                user_input.text, user_input.user_id, preprocess_result=preprocessed
             )
             logger.debug(f"기존 NLU 결과: intent={extracted_info.intent.value}, confidence={extracted_info.confidence}")
 
         return extracted_info
 
-    def _perform_rag_search(self, user_input: UserInput, extracted_info: ExtractedInfo) -> str:
-        """RAG 검색 수행"""
+    def _perform_rag_search(self, user_input: UserInput, extracted_info: ExtractedInfo) -> Optional[RetrievalResult]:
+        """RAG 검색 수행 (대상 의도가 아니거나 실패 시 None)"""
         if not self.retriever:
-            return ""
+            return None
         
         # 추천 관련 의도에서만 RAG 검색 수행
         recommendation_intents = [
@@ -959,7 +1002,7 @@ class NaviyamChatbot:
         ]
         
         if extracted_info.intent not in recommendation_intents:
-            return ""
+            return None
         
         try:
             # NLU가 추출한 엔티티를 활용한 검색 쿼리 구성
@@ -987,20 +1030,21 @@ class NaviyamChatbot:
                     logger.debug(f"개선된 RAG 검색 쿼리: {search_query}")
             
             # RAG 검색 수행
-            rag_context = self.retriever.get_context_for_llm(search_query)
-            logger.info(f"RAG 검색 완료: {len(rag_context)} 문자")
-            return rag_context
+            rag_result = self.retriever.retrieve(search_query)
+            logger.info(f"RAG 검색 완료: {len(rag_result.hits)}개 문서")
+            return rag_result
             
         except Exception as e:
             logger.error(f"RAG 검색 실패: {e}")
-            return ""
+            return None
 
     def _smart_response_generation(
             self,
             extracted_info: ExtractedInfo,
             user_profile,
             user_id: str,
-            rag_context: str = ""
+            rag_result: Optional[RetrievalResult] = None,
+            on_token: Optional[Callable[[str], None]] = None
     ) -> ChatbotResponse:
         """스마트 응답 생성 (LLM 통합)"""
 
@@ -1016,7 +1060,7 @@ class NaviyamChatbot:
                 extracted_info=extracted_info,
                 user_profile=user_profile,
                 conversation_context=conversation_context,
-                rag_context=rag_context
+                rag_hits=rag_result.hits if rag_result else None
             )
 
         # 창의적 LLM 응답이 필요한지 판단
@@ -1030,13 +1074,14 @@ class NaviyamChatbot:
                 extracted_info=extracted_info,
                 user_profile=user_profile,
                 conversation_context=conversation_context,
-                rag_context=rag_context
+                rag_hits=rag_result.hits if rag_result else None
             )
 
             # LLM으로 아동 친화적 응답 생성
-            llm_response_text = self.llm_normalizer.generate_child_friendly_response(
-                extracted_info, base_response.recommendations, conversation_context
-            )
+            with self.tracer.span("llm_response"):
+                llm_response_text = self.llm_normalizer.generate_child_friendly_response(
+                    extracted_info, base_response.recommendations, conversation_context, on_token=on_token
+                )
 
             # LLM 응답이 성공적이면 사용
             if llm_response_text and len(llm_response_text.strip()) > 10:
@@ -1056,7 +1101,7 @@ class NaviyamChatbot:
                 extracted_info=extracted_info,
                 user_profile=user_profile,
                 conversation_context=conversation_context,
-                rag_context=rag_context
+                rag_hits=rag_result.hits if rag_result else None
             )
             response.metadata["generation_method"] = "template"
             return response
@@ -1066,7 +1111,8 @@ class NaviyamChatbot:
         extracted_info: ExtractedInfo, 
         user_text: str, 
         response_text: str, 
-        user_id: str
+        user_id: str,
+        preprocessed=None
     ) -> str:
         """감정 상태 결정"""
         try:
@@ -1092,7 +1138,8 @@ class NaviyamChatbot:
                 intent=extracted_info.intent,
                 user_text=user_text,
                 response_text=response_text,
-                context=context
+                context=context,
+                preprocess_result=preprocessed
             )
             
             # 감정 전이 확률을 고려한 최종 감정 결정
@@ -1233,12 +1280,7 @@ class NaviyamChatbot:
             "invalid_samples": metrics.invalid_samples,
             "missing_fields": metrics.missing_fields,
             "confidence_distribution": metrics.confidence_distribution,
-            "buffer_sizes": {
-                "nlu": len(self.data_collector.nlu_buffer),
-                "interaction": len(self.data_collector.interaction_buffer),
-                "recommendation": len(self.data_collector.recommendation_buffer),
-                "feedback": len(self.data_collector.feedback_buffer)
-            },
+            "log_writer": self.data_collector.log_writer.get_stats(),
             "active_sessions": len(self.data_collector.active_sessions)
         }
 
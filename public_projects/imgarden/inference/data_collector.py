@@ -7,16 +7,18 @@ import json
 import csv
 import pickle
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Iterator, Callable
 from datetime import datetime, timedelta
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass
 import logging
-from collections import defaultdict, deque
+from collections import defaultdict
 import threading
-import queue
 import time
 
 from data.data_structure import UserProfile, ExtractedInfo, LearningData, UserState
+from inference.learning_log import LearningLogWriter
+from inference.record_serializer import get_record_serializer
+from inference.training_data_store import TrainingDataStore, flatten_record
 
 logger = logging.getLogger(__name__)
 
@@ -47,15 +49,27 @@ class DataQualityMetrics:
             self.confidence_distribution = {}
 
 
+def _record_user_id(data_point: Dict[str, Any]) -> Optional[str]:
+    """로그 인덱스 키 (사용자 ID)"""
+    user_id = data_point.get("user_id")
+    return str(user_id) if user_id is not None else None
+
+
 class LearningDataCollector:
     """나비얌 학습 데이터 수집기"""
 
-    def __init__(self, save_path: str, buffer_size: int = 100, auto_save_interval: int = 300):
+    def __init__(self, save_path: str, buffer_size: int = 100, auto_save_interval: int = 300,
+                 max_queue_size: int = 10000, compression: Optional[str] = None,
+                 segment_max_bytes: int = 64 * 1024 * 1024, num_user_buckets: int = 16):
         """
         Args:
             save_path: 데이터 저장 경로
-            buffer_size: 버퍼링할 데이터 개수
-            auto_save_interval: 자동 저장 간격 (초)
+            buffer_size: 한 번에 묶어서 기록(그룹 커밋)할 최대 데이터 개수
+            auto_save_interval: 세션 정리 간격 (초)
+            max_queue_size: 기록 대기열 크기 (가득 차면 버리지 않고 대기)
+            compression: 로그 압축 방식 (None, "gzip", "zstd")
+            segment_max_bytes: 로그 세그먼트 회전 크기
+            num_user_buckets: 로그 파티션 사용자 해시 버킷 수
         """
         self.save_path = Path(save_path)
         self.buffer_size = buffer_size
@@ -67,11 +81,19 @@ class LearningDataCollector:
         (self.save_path / "processed").mkdir(exist_ok=True)
         (self.save_path / "sessions").mkdir(exist_ok=True)
 
-        # 데이터 버퍼들
-        self.nlu_buffer = deque(maxlen=buffer_size)
-        self.interaction_buffer = deque(maxlen=buffer_size)
-        self.recommendation_buffer = deque(maxlen=buffer_size)
-        self.feedback_buffer = deque(maxlen=buffer_size)
+        # 추가 전용 로그 (요청 경로는 대기열에 넣기만 함)
+        # 날짜 x 사용자 해시 버킷으로 분할하고 세그먼트마다 사용자 오프셋 인덱스 기록
+        self.serializer = get_record_serializer()
+        self.store = TrainingDataStore(self.save_path / "raw", num_buckets=num_user_buckets)
+        self.log_writer = LearningLogWriter(
+            self.save_path / "raw",
+            max_queue_size=max_queue_size,
+            group_commit_size=buffer_size,
+            segment_max_bytes=segment_max_bytes,
+            compression=compression,
+            serializer=self._serialize_record,
+            index_key=_record_user_id
+        )
 
         # 실시간 세션 관리
         self.active_sessions: Dict[str, CollectionSession] = {}
@@ -82,11 +104,14 @@ class LearningDataCollector:
 
         # 스레드 안전성
         self.lock = threading.Lock()
-        self.save_queue = queue.Queue()
 
-        # 자동 저장 스레드
+        # 레코드 수신 리스너 (예: 인기도 엔진), 수집 스레드에서 바로 호출
+        self._event_listeners: List[Callable[[Dict[str, Any]], Any]] = []
+
+        # 세션 정리 스레드
         self.auto_save_thread = None
         self.is_running = False
+        self._stop_event = threading.Event()
         self._start_auto_save_thread()
 
         logger.info(f"학습 데이터 수집기 초기화 완료: {self.save_path}")
@@ -101,12 +126,11 @@ class LearningDataCollector:
         self.auto_save_thread.start()
 
     def _auto_save_worker(self):
-        """자동 저장 워커"""
+        """세션 정리 워커 (데이터는 로그 기록기가 계속 기록)"""
         while self.is_running:
             try:
-                time.sleep(self.auto_save_interval)
+                self._stop_event.wait(self.auto_save_interval)
                 if self.is_running:  # 종료 체크
-                    self._flush_all_buffers()
                     self._cleanup_old_sessions()
             except Exception as e:
                 logger.error(f"자동 저장 실패: {e}")
@@ -122,8 +146,8 @@ class LearningDataCollector:
             }
 
             with self.lock:
-                self.nlu_buffer.append(data_point)
                 self.quality_metrics.total_collected += 1
+            self._append_to_log(data_point)
 
             # 세션에 추가
             self._add_to_session(user_id, data_point)
@@ -144,8 +168,8 @@ class LearningDataCollector:
             }
 
             with self.lock:
-                self.interaction_buffer.append(data_point)
                 self.quality_metrics.total_collected += 1
+            self._append_to_log(data_point)
 
             self._add_to_session(user_id, data_point)
 
@@ -168,8 +192,8 @@ class LearningDataCollector:
             }
 
             with self.lock:
-                self.recommendation_buffer.append(data_point)
                 self.quality_metrics.total_collected += 1
+            self._append_to_log(data_point)
 
             self._add_to_session(user_id, data_point)
 
@@ -192,8 +216,8 @@ class LearningDataCollector:
             }
 
             with self.lock:
-                self.feedback_buffer.append(data_point)
                 self.quality_metrics.total_collected += 1
+            self._append_to_log(data_point)
 
             self._add_to_session(user_id, data_point)
 
@@ -209,7 +233,7 @@ class LearningDataCollector:
                 "timestamp": datetime.now().isoformat(),
                 "user_id": user_id,
                 "data_type": "structured_learning",
-                "learning_data": asdict(learning_data)
+                "learning_data": learning_data  # 로그 기록 시 직렬화
             }
 
             # 데이터 품질 검증
@@ -223,8 +247,8 @@ class LearningDataCollector:
                 else:
                     self.quality_metrics.invalid_samples += 1
 
-            # 버퍼에는 검증 결과와 함께 저장
-            self._add_to_appropriate_buffer(data_point)
+            # 로그에는 검증 결과와 함께 저장
+            self._append_to_log(data_point)
             self._add_to_session(user_id, data_point)
 
             logger.debug(f"구조화 학습 데이터 수집: {user_id}, quality: {quality_score:.2f}")
@@ -265,22 +289,20 @@ class LearningDataCollector:
 
         return is_valid, final_score
 
-    def _add_to_appropriate_buffer(self, data_point: Dict[str, Any]):
-        """데이터 타입에 따라 적절한 버퍼에 추가"""
-        data_type = data_point.get("data_type", "unknown")
+    def _append_to_log(self, data_point: Dict[str, Any]):
+        """사용자 해시 버킷 로그 스트림에 추가"""
+        stream = self.store.bucket_stream(data_point.get("user_id"))
+        self.log_writer.append(stream, data_point)
 
-        with self.lock:
-            if data_type == "nlu_features":
-                self.nlu_buffer.append(data_point)
-            elif data_type == "interaction":
-                self.interaction_buffer.append(data_point)
-            elif data_type == "recommendation":
-                self.recommendation_buffer.append(data_point)
-            elif data_type == "feedback":
-                self.feedback_buffer.append(data_point)
-            else:
-                # 기본적으로 interaction 버퍼에
-                self.interaction_buffer.append(data_point)
+        for listener in self._event_listeners:
+            try:
+                listener(data_point)
+            except Exception as e:
+                logger.warning(f"데이터 리스너 처리 실패: {e}")
+
+    def add_event_listener(self, listener: Callable[[Dict[str, Any]], Any]):
+        """수집되는 레코드를 실시간으로 받을 리스너 등록 (가볍게 처리해야 함)"""
+        self._event_listeners.append(listener)
 
     def _add_to_session(self, user_id: str, data_point: Dict[str, Any]):
         """세션에 데이터 포인트 추가"""
@@ -298,25 +320,42 @@ class LearningDataCollector:
             self.active_sessions[session_id].data_points.append(data_point)
 
     def get_user_learning_data(self, user_id: str, days: int = 7) -> List[Dict[str, Any]]:
-        """사용자별 학습 데이터 조회"""
+        """사용자별 학습 데이터 조회 (저장된 로그 + 아직 기록되지 않은 활성 세션 데이터, 시간순)"""
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
 
-        user_data = []
+        # 저장된 로그: 사용자 버킷 세그먼트에서 인덱스 오프셋으로 해당 사용자 레코드만 읽음
+        user_data = list(self.store.iter_records(start=start_date, end=end_date, user_id=user_id))
+        seen = {(data.get("timestamp"), data.get("data_type")) for data in user_data}
 
-        # 활성 세션에서 검색
+        # 활성 세션에서 검색 (이미 로그에 기록된 데이터 제외)
         with self.lock:
             for session in self.active_sessions.values():
                 if session.user_id == user_id:
                     for data_point in session.data_points:
                         timestamp = datetime.fromisoformat(data_point["timestamp"])
-                        if start_date <= timestamp <= end_date:
+                        key = (data_point["timestamp"], data_point.get("data_type"))
+                        if start_date <= timestamp <= end_date and key not in seen:
+                            seen.add(key)
                             user_data.append(data_point)
 
-        # 저장된 파일에서도 검색 (구현 시 추가)
-
+        user_data.sort(key=lambda x: x["timestamp"])
         return user_data
 
+    def iter_recent_data(self, days: int = 7, data_types: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """최근 N일 로그 레코드 지연 순회 (세그먼트 순서)"""
+        self._flush_all_buffers()
+        return self.store.iter_records(days=days, data_types=data_types)
+
+    def iter_training_rows(self, days: int = 7) -> Iterator[Dict[str, Any]]:
+        """최근 N일 학습용 평탄화 행 지연 순회 (user_input, bot_response, quality_score 등)"""
+        for record in self.iter_recent_data(days=days):
+            yield flatten_record(record)
+
+    def get_recent_data(self, days: int = 7) -> List[Dict[str, Any]]:
+        """최근 N일 학습용 평탄화 데이터 목록"""
+        return list(self.iter_training_rows(days=days))
+
     def get_data_completeness_score(self, user_id: str) -> float:
         """사용자 데이터 완성도 점수 계산"""
         user_data = self.get_user_learning_data(user_id, days=30)
@@ -353,85 +392,18 @@ class LearningDataCollector:
 
         return total_score / len(requirements)  # 평균 점수
 
-    def _flush_all_buffers(self):
-        """모든 버퍼 데이터 저장"""
-        try:
-            current_time = datetime.now()
-            date_str = current_time.strftime("%Y%m%d")
-
-            with self.lock:
-                # 각 버퍼별로 저장
-                self._save_buffer_to_file(self.nlu_buffer, f"nlu_features_{date_str}")
-                self._save_buffer_to_file(self.interaction_buffer, f"interactions_{date_str}")
-                self._save_buffer_to_file(self.recommendation_buffer, f"recommendations_{date_str}")
-                self._save_buffer_to_file(self.feedback_buffer, f"feedback_{date_str}")
-
-                # 버퍼 클리어
-                self.nlu_buffer.clear()
-                self.interaction_buffer.clear()
-                self.recommendation_buffer.clear()
-                self.feedback_buffer.clear()
-
-            logger.info("모든 버퍼 데이터 저장 완료")
-
-        except Exception as e:
-            logger.error(f"버퍼 저장 실패: {e}")
-
-    def _make_json_serializable(self, obj: Any, visited=None) -> Any:
-        """객체를 JSON 직렬화 가능한 형태로 변환 (순환 참조 방지)"""
-        if visited is None:
-            visited = set()
-        
-        # 순환 참조 체크
-        obj_id = id(obj)
-        if obj_id in visited:
-            return None  # 순환 참조 발견 시 None 반환
-        
-        if isinstance(obj, (str, int, float, bool, type(None))):
-            if isinstance(obj, str):
-                # 문자열에서 이모지 제거 (저장 시만)
-                import re
-                emoji_pattern = re.compile('[\U00010000-\U0010ffff]', flags=re.UNICODE)
-                return emoji_pattern.sub('', obj)
-            return obj
-        elif isinstance(obj, datetime):
-            return obj.isoformat()
-        elif isinstance(obj, dict):
-            visited.add(obj_id)
-            return {k: self._make_json_serializable(v, visited) for k, v in obj.items()}
-        elif isinstance(obj, (list, deque)):
-            visited.add(obj_id)
-            return [self._make_json_serializable(item, visited) for item in obj]
-        elif hasattr(obj, '__dict__'):
-            visited.add(obj_id)
-            # mappingproxy 타입 처리
-            if type(obj.__dict__).__name__ == 'mappingproxy':
-                return self._make_json_serializable(dict(obj.__dict__), visited)
-            return self._make_json_serializable(obj.__dict__, visited)
+    def _flush_all_buffers(self, timeout: float = 30.0) -> bool:
+        """기록 대기 중인 데이터가 모두 파일에 반영될 때까지 대기"""
+        flushed = self.log_writer.flush(timeout=timeout)
+        if flushed:
+            logger.info("모든 대기 데이터 저장 완료")
         else:
-            return str(obj)  # 기타 타입은 문자열로 변환
-    
-    def _save_buffer_to_file(self, buffer: deque, filename: str):
-        """버퍼 데이터를 파일로 저장"""
-        if not buffer:
-            return
-
-        file_path = self.save_path / "raw" / f"{filename}.jsonl"
-
-        try:
-            # 기존 파일이 있으면 append 모드
-            mode = 'a' if file_path.exists() else 'w'
+            logger.warning(f"대기 데이터 저장 지연: {self.log_writer.get_stats()['pending']}개 미기록")
+        return flushed
 
-            with open(file_path, mode, encoding='utf-8') as f:
-                for data_point in buffer:
-                    # 직렬화 가능한 형태로 변환
-                    serializable_data = self._make_json_serializable(data_point)
-                    f.write(json.dumps(serializable_data, ensure_ascii=False) + '\n')
-
-            logger.debug(f"버퍼 저장 완료: {filename}, {len(buffer)} items")
-
-        except Exception as e:
-            logger.error(f"버퍼 저장 실패 ({filename}): {e}")
+    def _serialize_record(self, data_point: Dict[str, Any]) -> bytes:
+        """로그 레코드 직렬화 (로그 기록 스레드에서 실행)"""
+        return self.serializer.dumps_bytes(data_point)
 
     def _cleanup_old_sessions(self):
         """오래된 세션 정리"""
@@ -467,7 +439,7 @@ class LearningDataCollector:
             }
 
             with open(session_file, 'w', encoding='utf-8') as f:
-                json.dump(session_data, f, ensure_ascii=False, indent=2)
+                f.write(self.serializer.dumps(session_data, indent=True))
 
             logger.debug(f"세션 저장 완료: {session.session_id}")
 
@@ -475,56 +447,51 @@ class LearningDataCollector:
             logger.error(f"세션 저장 실패 ({session.session_id}): {e}")
 
     def export_training_data(self, output_path: str, format: str = "jsonl", days: int = 30) -> bool:
-        """학습용 데이터 익스포트"""
+        """학습용 데이터 익스포트
+
+        jsonl/json은 하루치씩 정렬하며 바로 기록하고, parquet/npz는 평탄화 행을 청크 단위 열 파일로 기록
+        (pyarrow가 없으면 parquet 대신 npz)
+        """
         try:
             output_path = Path(output_path)
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-
-            # 모든 데이터 수집
-            all_data = []
-
-            # 원시 데이터 파일들에서 수집
-            raw_files = list((self.save_path / "raw").glob("*.jsonl"))
-
-            for file_path in raw_files:
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        for line in f:
-                            data = json.loads(line.strip())
-                            timestamp = datetime.fromisoformat(data["timestamp"])
-                            if start_date <= timestamp <= end_date:
-                                all_data.append(data)
-                except Exception as e:
-                    logger.warning(f"파일 읽기 실패 ({file_path}): {e}")
-
-            # 활성 버퍼에서도 수집
-            with self.lock:
-                for buffer in [self.nlu_buffer, self.interaction_buffer,
-                               self.recommendation_buffer, self.feedback_buffer]:
-                    for data in buffer:
-                        timestamp = datetime.fromisoformat(data["timestamp"])
-                        if start_date <= timestamp <= end_date:
-                            all_data.append(data)
 
-            # 데이터 정렬 (시간순)
-            all_data.sort(key=lambda x: x["timestamp"])
+            # 대기 중인 데이터까지 기록된 뒤 로그 세그먼트에서 수집 (시간순)
+            self._flush_all_buffers()
+            records = self.store.iter_records_sorted(days=days)
+            count = 0
 
             # 포맷에 따라 저장
             if format.lower() == "jsonl":
                 with open(output_path, 'w', encoding='utf-8') as f:
-                    for data in all_data:
+                    for data in records:
                         f.write(json.dumps(data, ensure_ascii=False) + '\n')
+                        count += 1
 
             elif format.lower() == "json":
                 with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(all_data, f, ensure_ascii=False, indent=2)
+                    f.write('[')
+                    for data in records:
+                        f.write(',\n' if count else '\n')
+                        f.write(json.dumps(data, ensure_ascii=False, indent=2))
+                        count += 1
+                    f.write('\n]' if count else ']')
 
             elif format.lower() == "csv":
-                # CSV는 플랫한 구조로 변환 필요
+                # CSV는 플랫한 구조로 변환 필요 (열 이름을 첫 행 기준으로 정하므로 목록으로 수집)
+                all_data = list(records)
+                count = len(all_data)
                 self._export_to_csv(all_data, output_path)
 
-            logger.info(f"학습 데이터 익스포트 완료: {output_path}, {len(all_data)} records")
+            elif format.lower() in ("parquet", "npz"):
+                def training_rows():
+                    nonlocal count
+                    for data in records:
+                        count += 1
+                        yield flatten_record(data)
+
+                output_path = self.store.export_columnar(output_path, training_rows())
+
+            logger.info(f"학습 데이터 익스포트 완료: {output_path}, {count} records")
             return True
 
         except Exception as e:
@@ -575,16 +542,19 @@ class LearningDataCollector:
 
     def get_collection_statistics(self) -> Dict[str, Any]:
         """데이터 수집 통계 반환"""
-        with self.lock:
-            buffer_stats = {
-                "nlu_buffer_size": len(self.nlu_buffer),
-                "interaction_buffer_size": len(self.interaction_buffer),
-                "recommendation_buffer_size": len(self.recommendation_buffer),
-                "feedback_buffer_size": len(self.feedback_buffer),
-                "total_buffer_size": (len(self.nlu_buffer) + len(self.interaction_buffer) +
-                                      len(self.recommendation_buffer) + len(self.feedback_buffer))
-            }
+        log_stats = self.log_writer.get_stats()
+        buffer_stats = {
+            "total_buffer_size": log_stats["pending"],
+            "queue_depth": log_stats["queue_depth"],
+            "max_queue_depth": log_stats["max_queue_depth"],
+            "blocked_appends": log_stats["blocked_appends"],
+            "blocked_seconds": log_stats["blocked_seconds"],
+            "written": log_stats["written"],
+            "group_commits": log_stats["group_commits"],
+            "write_errors": log_stats["write_errors"]
+        }
 
+        with self.lock:
             session_stats = {
                 "active_sessions": len(self.active_sessions),
                 "total_sessions_today": len([s for s in self.active_sessions.values()
@@ -617,13 +587,14 @@ class LearningDataCollector:
         """정상 종료"""
         logger.info("데이터 수집기 종료 시작...")
 
-        # 자동 저장 스레드 종료
+        # 세션 정리 스레드 종료
         self.is_running = False
+        self._stop_event.set()
         if self.auto_save_thread and self.auto_save_thread.is_alive():
             self.auto_save_thread.join(timeout=5)
 
-        # 남은 데이터 모두 저장
-        self._flush_all_buffers()
+        # 대기열에 남은 데이터 모두 기록 후 로그 기록기 종료
+        self.log_writer.close()
 
         # 활성 세션 모두 저장
         with self.lock:
@@ -0,0 +1,378 @@
+"""
+학습 데이터 추가 전용(append-only) 로그
+요청 경로는 대기열에 넣기만 하고, 백그라운드 스레드가 그룹 커밋으로 세그먼트 파일에 기록
+- 제한된 대기열 (가득 차면 버리지 않고 대기 = 백프레셔)
+- 스트림/날짜별 세그먼트 파일, 크기 초과 시 회전
+- 선택적 gzip / zstd 압축
+- 비압축 세그먼트는 키(사용자) -> 바이트 오프셋 사이드카 인덱스(.idx) 기록
+"""
+
+import gzip
+import json
+import os
+import queue
+import re
+import threading
+import time
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# 압축 방식별 세그먼트 확장자
+SEGMENT_SUFFIXES = {None: ".jsonl", "gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+
+# 세그먼트 사이드카 인덱스 확장자 (줄마다 "오프셋\t키")
+INDEX_SUFFIX = ".idx"
+
+_SEGMENT_NAME = re.compile(r"^(?P<stream>.+)_(?P<date>\d{8})(?:_(?P<seq>\d+))?\.jsonl(?:\.gz|\.zst)?$")
+
+
+def _default_serializer(record: Any) -> str:
+    return json.dumps(record, ensure_ascii=False, default=str)
+
+
+class _Segment:
+    """열려 있는 세그먼트 파일 (스트림별 1개)"""
+
+    def __init__(self, path: Path, date_str: str, compression: Optional[str], indexed: bool = False):
+        self.path = path
+        self.date_str = date_str
+        self.bytes_written = 0
+        self._raw = open(path, 'ab')
+        # 오프셋은 비압축 세그먼트에서만 의미가 있음
+        self._index = open(Path(str(path) + INDEX_SUFFIX), 'ab') if indexed and compression is None else None
+        self._pending_index = b''
+        if compression == "gzip":
+            self._writer = gzip.GzipFile(fileobj=self._raw, mode='ab')
+            self._flush = self._writer.flush
+        elif compression == "zstd":
+            import zstandard
+            self._writer = zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+            self._flush = lambda: self._writer.flush(zstandard.FLUSH_BLOCK)
+        else:
+            self._writer = self._raw
+            self._flush = self._raw.flush
+
+    def write(self, lines: List[tuple]) -> int:
+        """(키, 줄 바이트) 목록 기록 후 바이트 수 반환 (인덱스 항목은 flush 시 기록)"""
+        data = b''.join(line for _, line in lines)
+        offset = self.bytes_written
+        self._writer.write(data)
+        self.bytes_written += len(data)
+        if self._index is not None:
+            entries = []
+            for key, line in lines:
+                if key is not None:
+                    key = str(key).replace('\t', ' ').replace('\n', ' ')
+                    entries.append(f"{offset}\t{key}\n")
+                offset += len(line)
+            self._pending_index += ''.join(entries).encode('utf-8')
+        return len(data)
+
+    def flush(self, fsync: bool = False):
+        self._flush()
+        self._raw.flush()
+        if fsync:
+            os.fsync(self._raw.fileno())
+        # 데이터가 디스크에 반영된 뒤 인덱스 기록 (인덱스가 데이터보다 앞서지 않도록)
+        if self._pending_index:
+            self._index.write(self._pending_index)
+            self._index.flush()
+            self._pending_index = b''
+
+    def close(self):
+        try:
+            if self._writer is not self._raw:
+                self._writer.close()
+        finally:
+            self._raw.close()
+            if self._index is not None:
+                self._index.close()
+
+
+class LearningLogWriter:
+    """세그먼트 회전 + 그룹 커밋 로그 기록기 (유실 없음)"""
+
+    def __init__(self, log_dir: str, max_queue_size: int = 10000, group_commit_size: int = 100,
+                 segment_max_bytes: int = 64 * 1024 * 1024, compression: Optional[str] = None,
+                 fsync: bool = False, serializer: Optional[Callable[[Any], Union[str, bytes]]] = None,
+                 index_key: Optional[Callable[[Any], Any]] = None):
+        """
+        Args:
+            log_dir: 세그먼트 저장 디렉토리
+            max_queue_size: 대기열 최대 길이 (가득 차면 append가 대기)
+            group_commit_size: 한 번의 커밋(flush)에 묶는 최대 레코드 수
+            segment_max_bytes: 세그먼트 회전 기준 크기 (압축 전 바이트)
+            compression: None, "gzip", "zstd" (zstandard 미설치 시 gzip)
+            fsync: 커밋마다 fsync 수행 여부
+            serializer: 레코드 -> JSON 문자열(또는 UTF-8 바이트) 변환 함수
+            index_key: 레코드 -> 인덱스 키 (지정 시 비압축 세그먼트에 오프셋 인덱스 기록)
+        """
+        if compression not in SEGMENT_SUFFIXES:
+            raise ValueError(f"지원하지 않는 압축 방식: {compression}")
+        if compression == "zstd":
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                logger.warning("zstandard 라이브러리가 없어 gzip 압축을 사용합니다")
+                compression = "gzip"
+
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.max_queue_size = max_queue_size
+        self.group_commit_size = max(1, group_commit_size)
+        self.segment_max_bytes = segment_max_bytes
+        self.compression = compression
+        self.fsync = fsync
+        self.serializer = serializer or _default_serializer
+        self.index_key = index_key
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._segments: Dict[str, _Segment] = {}
+        self._next_seq: Dict[tuple, int] = {}
+
+        # 커밋 진행 상황 (flush 대기용)
+        self._lock = threading.Lock()
+        self._committed_cond = threading.Condition(self._lock)
+        self._enqueued = 0
+        self._committed = 0
+        self._closing = False
+
+        self.stats = {
+            'enqueued': 0,
+            'written': 0,
+            'bytes_written': 0,
+            'group_commits': 0,
+            'max_group_size': 0,
+            'max_queue_depth': 0,
+            'blocked_appends': 0,
+            'blocked_seconds': 0.0,
+            'segments_opened': 0,
+            'serialize_errors': 0,
+            'write_errors': 0,
+            'lost_on_close': 0,
+            'last_commit_ms': 0.0
+        }
+
+        self._thread = threading.Thread(target=self._writer_loop, name="learning-log-writer", daemon=True)
+        self._thread.start()
+
+        logger.info(
+            f"LearningLogWriter 초기화: {self.log_dir}, queue={max_queue_size}, "
+            f"group={self.group_commit_size}, compression={compression}"
+        )
+
+    def append(self, stream: str, record: Any):
+        """레코드 추가 (대기열이 가득 차면 자리가 날 때까지 대기)
+
+        Raises:
+            RuntimeError: 기록기가 종료됨
+        """
+        if self._closing:
+            raise RuntimeError("로그 기록기가 종료되었습니다")
+
+        item = (stream, record)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            start = time.perf_counter()
+            self._queue.put(item)
+            with self._lock:
+                self.stats['blocked_appends'] += 1
+                self.stats['blocked_seconds'] += time.perf_counter() - start
+
+        with self._lock:
+            self._enqueued += 1
+            self.stats['enqueued'] += 1
+            depth = self._queue.qsize()
+            if depth > self.stats['max_queue_depth']:
+                self.stats['max_queue_depth'] = depth
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """현재까지 추가된 레코드가 모두 커밋될 때까지 대기"""
+        with self._committed_cond:
+            target = self._enqueued
+            return self._committed_cond.wait_for(lambda: self._committed >= target, timeout=timeout)
+
+    def _writer_loop(self):
+        """대기열에 쌓인 레코드를 묶어서 기록 (종료 요청 후에도 대기열을 모두 비운 뒤 종료)"""
+        while True:
+            try:
+                batch = [self._queue.get(timeout=0.1)]
+            except queue.Empty:
+                if self._closing:
+                    break
+                continue
+
+            while len(batch) < self.group_commit_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._commit(batch)
+
+        self._close_segments()
+
+    def _commit(self, batch: List[tuple]):
+        """스트림별로 직렬화 후 기록, 스트림당 1회 flush (실패 시 재시도)"""
+        start = time.perf_counter()
+        pending: Dict[str, List[tuple]] = {}
+        for stream, record in batch:
+            try:
+                line = self.serializer(record)
+            except Exception as e:
+                logger.warning(f"레코드 직렬화 실패, 기본 직렬화 사용: {e}")
+                self.stats['serialize_errors'] += 1
+                line = _default_serializer(record)
+            if isinstance(line, str):
+                line = line.encode('utf-8')
+            key = self.index_key(record) if self.index_key else None
+            pending.setdefault(stream, []).append((key, line + b'\n'))
+
+        retries = 0
+        while pending:
+            try:
+                for stream in list(pending):
+                    lines = pending[stream]
+                    segment = self._get_segment(stream, sum(len(line) for _, line in lines))
+                    written = segment.write(lines)
+                    segment.flush(self.fsync)
+                    self.stats['bytes_written'] += written
+                    del pending[stream]
+            except OSError as e:
+                retries += 1
+                self.stats['write_errors'] += 1
+                logger.error(f"학습 로그 기록 실패 (재시도 {retries}회): {e}")
+                self._close_segments()
+                if self._closing and retries >= 3:
+                    lost = sum(len(lines) for lines in pending.values())
+                    self.stats['lost_on_close'] += lost
+                    logger.error(f"종료 중 기록하지 못한 레코드 {lost}개")
+                    break
+                time.sleep(min(0.1 * 2 ** retries, 5.0))
+
+        with self._committed_cond:
+            self._committed += len(batch)
+            self.stats['written'] += len(batch)
+            self.stats['group_commits'] += 1
+            self.stats['max_group_size'] = max(self.stats['max_group_size'], len(batch))
+            self.stats['last_commit_ms'] = (time.perf_counter() - start) * 1000
+            self._committed_cond.notify_all()
+
+    def _get_segment(self, stream: str, incoming_bytes: int) -> _Segment:
+        """스트림의 현재 세그먼트 (날짜 변경/크기 초과 시 새 세그먼트)"""
+        date_str = datetime.now().strftime("%Y%m%d")
+        segment = self._segments.get(stream)
+        if segment is not None and (segment.date_str != date_str or
+                                    (segment.bytes_written and
+                                     segment.bytes_written + incoming_bytes > self.segment_max_bytes)):
+            segment.close()
+            segment = None
+        if segment is None:
+            segment = _Segment(self._new_segment_path(stream, date_str), date_str, self.compression,
+                               indexed=self.index_key is not None)
+            self._segments[stream] = segment
+            self.stats['segments_opened'] += 1
+        return segment
+
+    def _new_segment_path(self, stream: str, date_str: str) -> Path:
+        """기존 세그먼트 뒤 번호로 새 파일 경로 생성 (이전 프로세스 파일에 이어 쓰지 않음)"""
+        key = (stream, date_str)
+        seq = self._next_seq.get(key)
+        if seq is None:
+            seq = 0
+            for path in self.log_dir.glob(f"{stream}_{date_str}_*"):
+                match = _SEGMENT_NAME.match(path.name)
+                if match and match.group('stream') == stream and match.group('seq'):
+                    seq = max(seq, int(match.group('seq')) + 1)
+        self._next_seq[key] = seq + 1
+        return self.log_dir / f"{stream}_{date_str}_{seq:04d}{SEGMENT_SUFFIXES[self.compression]}"
+
+    def _close_segments(self):
+        for segment in self._segments.values():
+            try:
+                segment.close()
+            except OSError as e:
+                logger.error(f"세그먼트 닫기 실패 ({segment.path}): {e}")
+        self._segments.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """기록기 통계 (백프레셔 지표 포함)"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pending'] = self._enqueued - self._committed
+        stats.update({
+            'queue_depth': self._queue.qsize(),
+            'max_queue_size': self.max_queue_size,
+            'compression': self.compression,
+            'running': self._thread.is_alive()
+        })
+        return stats
+
+    def close(self, timeout: Optional[float] = None):
+        """대기열을 모두 기록한 뒤 종료"""
+        self._closing = True
+        if self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+        logger.info(f"LearningLogWriter 종료: {self.stats['written']}개 기록")
+
+
+def _open_segment(path: Path):
+    if path.name.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if path.name.endswith('.zst'):
+        import io
+        import zstandard
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True),
+                                encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def parse_segment_name(name: str) -> Optional[Tuple[str, str, int]]:
+    """세그먼트 파일명 -> (스트림, YYYYMMDD, 번호), 세그먼트가 아니면 None"""
+    match = _SEGMENT_NAME.match(name)
+    if not match:
+        return None
+    return match.group('stream'), match.group('date'), int(match.group('seq') or -1)
+
+
+def iter_segment_paths(log_dir: str, streams: Optional[List[str]] = None) -> List[Path]:
+    """로그 디렉토리의 세그먼트 파일 목록 (이전 형식 {stream}_{date}.jsonl 포함, 이름순)"""
+    paths = []
+    for path in sorted(Path(log_dir).glob("*.jsonl*")):
+        parsed = parse_segment_name(path.name)
+        if not parsed:
+            continue
+        if streams is not None and parsed[0] not in streams:
+            continue
+        paths.append(path)
+    return paths
+
+
+def iter_segment_records(path: Path) -> Iterator[Dict[str, Any]]:
+    """세그먼트 1개의 레코드 순회 (기록 중 잘린 마지막 줄은 건너뜀)"""
+    try:
+        with _open_segment(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"손상된 로그 레코드 건너뜀: {path}")
+    except EOFError:
+        # 기록 중인 압축 세그먼트 (flush된 레코드까지만 읽음)
+        logger.debug(f"기록 중인 세그먼트: {path}")
+    except (OSError, ImportError) as e:
+        logger.warning(f"세그먼트 읽기 실패 ({path}): {e}")
+
+
+def iter_log_records(log_dir: str, streams: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """로그 디렉토리 전체 레코드 순회"""
+    for path in iter_segment_paths(log_dir, streams):
+        yield from iter_segment_records(path)
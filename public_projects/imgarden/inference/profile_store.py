@@ -0,0 +1,394 @@
+"""
+사용자 프로필 저장소
+
+NaviyamUserManager가 사용하는 교체 가능한 프로필 백엔드
+- JSONFileProfileBackend: 기존 사용자별 JSON 파일 방식
+- SQLiteProfileBackend: 단일 SQLite 파일 (기본값)
+- ProfileStore: 최근 사용 프로필 LRU 캐시 + 첫 접근 시 지연 로드 + 지연 쓰기(write-behind) 일괄 저장
+"""
+
+import json
+import sqlite3
+import threading
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Any, Iterator, List
+
+from data.data_structure import UserProfile
+
+logger = logging.getLogger(__name__)
+
+
+def profile_to_dict(profile: UserProfile) -> Dict[str, Any]:
+    """UserProfile을 저장용 dict로 변환"""
+    return {
+        "user_id": profile.user_id,
+        "preferred_categories": list(profile.preferred_categories),
+        "average_budget": profile.average_budget,
+        "favorite_shops": list(profile.favorite_shops),
+        "recent_orders": list(profile.recent_orders),
+        "conversation_style": profile.conversation_style,
+        "last_updated": profile.last_updated.isoformat(),
+        "taste_preferences": dict(profile.taste_preferences),
+        "companion_patterns": list(profile.companion_patterns),
+        "location_preferences": list(profile.location_preferences),
+        "good_influence_preference": profile.good_influence_preference,
+        "interaction_count": profile.interaction_count,
+        "data_completeness": profile.data_completeness
+    }
+
+
+def profile_from_dict(profile_data: Dict[str, Any]) -> UserProfile:
+    """저장된 dict를 UserProfile로 변환"""
+    return UserProfile(
+        user_id=profile_data["user_id"],
+        preferred_categories=profile_data.get("preferred_categories", []),
+        average_budget=profile_data.get("average_budget"),
+        favorite_shops=profile_data.get("favorite_shops", []),
+        recent_orders=profile_data.get("recent_orders", []),
+        conversation_style=profile_data.get("conversation_style", "friendly"),
+        last_updated=datetime.fromisoformat(profile_data.get("last_updated", datetime.now().isoformat())),
+        taste_preferences=profile_data.get("taste_preferences", {}),
+        companion_patterns=profile_data.get("companion_patterns", []),
+        location_preferences=profile_data.get("location_preferences", []),
+        good_influence_preference=profile_data.get("good_influence_preference", 0.5),
+        interaction_count=profile_data.get("interaction_count", 0),
+        data_completeness=profile_data.get("data_completeness", 0.0)
+    )
+
+
+class ProfileBackend(ABC):
+    """프로필 영구 저장소 인터페이스 (dict 단위로 읽고 씀)"""
+
+    @abstractmethod
+    def load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """사용자 프로필 1개 로드 (없으면 None)"""
+        pass
+
+    @abstractmethod
+    def save_many(self, profiles: Dict[str, Dict[str, Any]]):
+        """여러 프로필을 한 번에 저장"""
+        pass
+
+    @abstractmethod
+    def delete(self, user_id: str):
+        """프로필 삭제"""
+        pass
+
+    @abstractmethod
+    def iter_profiles(self) -> Iterator[Dict[str, Any]]:
+        """저장된 전체 프로필 순회 (통계/정리용)"""
+        pass
+
+    def close(self):
+        """저장소 종료"""
+        pass
+
+
+class JSONFileProfileBackend(ProfileBackend):
+    """사용자별 JSON 파일 저장소 (기존 방식 호환)"""
+
+    def __init__(self, save_path: str):
+        self.save_path = Path(save_path)
+        self.save_path.mkdir(parents=True, exist_ok=True)
+
+    def _profile_file(self, user_id: str) -> Path:
+        return self.save_path / f"{user_id}.json"
+
+    def load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        profile_file = self._profile_file(user_id)
+        if not profile_file.exists():
+            return None
+        with open(profile_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_many(self, profiles: Dict[str, Dict[str, Any]]):
+        for user_id, profile_data in profiles.items():
+            with open(self._profile_file(user_id), 'w', encoding='utf-8') as f:
+                json.dump(profile_data, f, ensure_ascii=False, indent=2)
+
+    def delete(self, user_id: str):
+        profile_file = self._profile_file(user_id)
+        if profile_file.exists():
+            profile_file.unlink()
+
+    def iter_profiles(self) -> Iterator[Dict[str, Any]]:
+        for profile_file in self.save_path.glob("*.json"):
+            try:
+                with open(profile_file, 'r', encoding='utf-8') as f:
+                    yield json.load(f)
+            except Exception as e:
+                logger.warning(f"프로필 로드 실패 ({profile_file}): {e}")
+
+
+class SQLiteProfileBackend(ProfileBackend):
+    """단일 SQLite 파일 프로필 저장소
+
+    처음 생성될 때 같은 디렉토리의 기존 사용자별 JSON 파일을 1회 가져옴
+    """
+
+    def __init__(self, db_path: str, import_json_dir: Optional[str] = None):
+        """
+        Args:
+            db_path: SQLite 파일 경로
+            import_json_dir: 기존 JSON 프로필 디렉토리 (DB가 비어 있을 때만 가져옴)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS user_profiles ("
+            "user_id TEXT PRIMARY KEY, data TEXT NOT NULL, last_updated TEXT)"
+        )
+        self._conn.commit()
+
+        if import_json_dir:
+            self._import_json_profiles(Path(import_json_dir))
+
+    def _import_json_profiles(self, json_dir: Path):
+        """기존 JSON 프로필 1회 이관"""
+        with self._lock:
+            has_rows = self._conn.execute("SELECT 1 FROM user_profiles LIMIT 1").fetchone()
+        if has_rows or not json_dir.exists():
+            return
+
+        profiles = {}
+        for profile_data in JSONFileProfileBackend(str(json_dir)).iter_profiles():
+            if isinstance(profile_data, dict) and "user_id" in profile_data:
+                profiles[profile_data["user_id"]] = profile_data
+        if profiles:
+            self.save_many(profiles)
+            logger.info(f"기존 JSON 프로필 {len(profiles)}개를 SQLite로 이관")
+
+    def load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM user_profiles WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_many(self, profiles: Dict[str, Dict[str, Any]]):
+        rows = [
+            (user_id, json.dumps(profile_data, ensure_ascii=False), profile_data.get("last_updated"))
+            for user_id, profile_data in profiles.items()
+        ]
+        with self._lock:
+            with self._conn:  # 한 트랜잭션으로 일괄 저장
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO user_profiles (user_id, data, last_updated) VALUES (?, ?, ?)",
+                    rows
+                )
+
+    def delete(self, user_id: str):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM user_profiles WHERE user_id = ?", (user_id,))
+
+    def iter_profiles(self) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM user_profiles").fetchall()
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_profile_backend(backend_type: str, save_path: str) -> ProfileBackend:
+    """프로필 백엔드 생성
+
+    Args:
+        backend_type: "sqlite" 또는 "json"
+        save_path: 프로필 저장 디렉토리
+    """
+    if backend_type == "sqlite":
+        return SQLiteProfileBackend(str(Path(save_path) / "profiles.db"), import_json_dir=save_path)
+    if backend_type == "json":
+        return JSONFileProfileBackend(save_path)
+    raise ValueError(f"지원하지 않는 프로필 백엔드: {backend_type}")
+
+
+class ProfileStore:
+    """LRU 캐시와 지연 쓰기를 갖춘 프로필 저장소
+
+    - 프로필은 첫 접근 시 백엔드에서 로드 (시작 시 전체 로드 없음)
+    - 변경된 프로필은 dirty로 표시만 하고 백그라운드 스레드가 주기적으로 일괄 저장
+    - 캐시에서 밀려난 dirty 프로필은 다음 저장 시까지 직렬화된 상태로 보관
+    """
+
+    def __init__(self, backend: ProfileBackend, cache_size: int = 1024,
+                 flush_interval: float = 1.0, flush_batch_size: int = 64):
+        """
+        Args:
+            backend: 영구 저장소
+            cache_size: 메모리에 유지할 프로필 수
+            flush_interval: 지연 쓰기 주기 (초, 0 이하이면 즉시 저장)
+            flush_batch_size: dirty 프로필이 이 수를 넘으면 주기 전에 저장
+        """
+        self.backend = backend
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+
+        self._cache: 'OrderedDict[str, UserProfile]' = OrderedDict()
+        self._dirty: set = set()
+        self._pending: Dict[str, Dict[str, Any]] = {}  # 캐시에서 밀려난 미저장 프로필
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+
+        self.stats = {'hits': 0, 'misses': 0, 'loads': 0, 'flushes': 0, 'written': 0}
+
+        self._closed = False
+        self._wakeup = threading.Event()
+        self._flusher = None
+        if flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name="profile-flusher", daemon=True)
+            self._flusher.start()
+
+    def get(self, user_id: str) -> Optional[UserProfile]:
+        """프로필 조회 (캐시에 없으면 백엔드에서 로드, 없으면 None)"""
+        with self._lock:
+            profile = self._cache.get(user_id)
+            if profile is not None:
+                self._cache.move_to_end(user_id)
+                self.stats['hits'] += 1
+                return profile
+            self.stats['misses'] += 1
+            profile_data = self._pending.get(user_id)
+
+        if profile_data is None:
+            try:
+                profile_data = self.backend.load(user_id)
+            except Exception as e:
+                logger.warning(f"프로필 로드 실패 ({user_id}): {e}")
+                return None
+            if profile_data is None:
+                return None
+
+        profile = profile_from_dict(profile_data)
+        with self._lock:
+            # 로드하는 동안 다른 스레드가 먼저 넣었으면 그 객체를 사용
+            existing = self._cache.get(user_id)
+            if existing is not None:
+                return existing
+            self.stats['loads'] += 1
+            self._insert(user_id, profile)
+        return profile
+
+    def put(self, profile: UserProfile):
+        """프로필 추가/변경 표시 (저장은 지연 쓰기)"""
+        with self._lock:
+            if self._cache.get(profile.user_id) is not profile:
+                self._insert(profile.user_id, profile)
+            else:
+                self._cache.move_to_end(profile.user_id)
+            self._pending.pop(profile.user_id, None)
+            self._dirty.add(profile.user_id)
+            dirty_count = len(self._dirty) + len(self._pending)
+
+        if self._flusher is None:
+            self.flush()
+        elif dirty_count >= self.flush_batch_size:
+            self._wakeup.set()
+
+    def _insert(self, user_id: str, profile: UserProfile):
+        """캐시에 넣고 용량 초과분 제거 (lock 보유 상태에서 호출)"""
+        self._cache[user_id] = profile
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.cache_size:
+            evicted_id, evicted = self._cache.popitem(last=False)
+            if evicted_id in self._dirty:
+                self._dirty.discard(evicted_id)
+                self._pending[evicted_id] = profile_to_dict(evicted)
+
+    def delete(self, user_id: str):
+        """프로필 삭제 (캐시와 백엔드 모두)"""
+        with self._lock:
+            self._cache.pop(user_id, None)
+            self._dirty.discard(user_id)
+            self._pending.pop(user_id, None)
+        self.backend.delete(user_id)
+
+    def flush(self) -> int:
+        """dirty 프로필을 백엔드에 일괄 저장
+
+        Returns:
+            저장한 프로필 수
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty and not self._pending:
+                    return 0
+                batch = dict(self._pending)
+                for user_id in self._dirty:
+                    batch[user_id] = profile_to_dict(self._cache[user_id])
+                self._pending.clear()
+                self._dirty.clear()
+
+            try:
+                self.backend.save_many(batch)
+            except Exception as e:
+                logger.error(f"프로필 일괄 저장 실패 ({len(batch)}개): {e}")
+                # 다음 저장 때 다시 시도 (그 사이 변경된 프로필은 dirty가 우선)
+                with self._lock:
+                    for user_id, profile_data in batch.items():
+                        if user_id not in self._dirty and user_id not in self._pending:
+                            self._pending[user_id] = profile_data
+                return 0
+
+            with self._lock:
+                self.stats['flushes'] += 1
+                self.stats['written'] += len(batch)
+            return len(batch)
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def iter_profiles(self) -> Iterator[UserProfile]:
+        """전체 프로필 순회 (미저장 변경분을 먼저 반영)"""
+        self.flush()
+        for profile_data in self.backend.iter_profiles():
+            try:
+                user_id = profile_data["user_id"]
+                with self._lock:
+                    cached = self._cache.get(user_id)
+                yield cached if cached is not None else profile_from_dict(profile_data)
+            except Exception as e:
+                logger.warning(f"프로필 변환 실패: {e}")
+
+    def cached_user_ids(self) -> List[str]:
+        """메모리에 있는 프로필 ID 목록"""
+        with self._lock:
+            return list(self._cache.keys())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 통계"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update({
+                'cached': len(self._cache),
+                'dirty': len(self._dirty) + len(self._pending),
+                'cache_size': self.cache_size
+            })
+        return stats
+
+    def close(self):
+        """남은 변경분 저장 후 종료"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5.0)
+        self.flush()
+        self.backend.close()
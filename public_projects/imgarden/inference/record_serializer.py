@@ -0,0 +1,199 @@
+"""
+학습 데이터 레코드 직렬화
+알려진 dataclass는 타입별 인코더로 바로 변환하고, orjson이 있으면 순회까지 orjson에 맡김 (없으면 표준 json)
+"""
+
+import dataclasses
+import json
+import re
+import threading
+import logging
+from collections import deque
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Set
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# 저장 시 제거하는 이모지 (BMP 밖 문자)
+EMOJI_PATTERN = re.compile('[\U00010000-\U0010ffff]')
+
+# BMP 밖 문자의 UTF-8 첫 바이트
+_UTF8_4BYTE_LEADS = (b'\xf0', b'\xf1', b'\xf2', b'\xf3', b'\xf4')
+
+_SCALAR_TYPES = (int, float, bool, type(None))
+
+
+def strip_emoji(text: str) -> str:
+    """문자열에서 이모지 제거 (ASCII 문자열은 검사 생략)"""
+    return text if text.isascii() else EMOJI_PATTERN.sub('', text)
+
+
+class RecordSerializer:
+    """타입별 인코더 기반 JSON 직렬화기
+
+    - str/int/float/bool/None/dict/list/tuple은 그대로, 그 외 타입은 등록된 인코더로 한 단계씩 변환
+    - 미등록 타입은 최초 1회 판별 후 인코더 캐시 (dataclass는 필드 인코더 자동 등록)
+    - orjson 사용 시 이모지는 직렬화 결과에서 한 번에 제거
+    """
+
+    def __init__(self, remove_emoji: bool = True):
+        self.remove_emoji = remove_emoji
+        self._encoders: Dict[type, Callable[[Any], Any]] = {
+            datetime: datetime.isoformat,
+            date: date.isoformat,
+            deque: list,
+            set: list,
+            frozenset: list
+        }
+        self._lock = threading.Lock()
+
+    def register(self, cls: type, encoder: Callable[[Any], Any]):
+        """타입별 인코더 등록 (encoder(obj) -> dict/list/기본 타입, 내부 값은 다시 직렬화됨)"""
+        with self._lock:
+            self._encoders[cls] = encoder
+
+    def register_dataclass(self, cls: type, exclude: tuple = ()):
+        """dataclass 필드 인코더 등록 ('_'로 시작하는 내부 필드 제외)"""
+        names = tuple(
+            f.name for f in dataclasses.fields(cls)
+            if not f.name.startswith('_') and f.name not in exclude
+        )
+
+        def encode(obj):
+            return {name: getattr(obj, name) for name in names}
+
+        self.register(cls, encode)
+
+    def _encoder_for(self, cls: type) -> Callable[[Any], Any]:
+        encoder = self._encoders.get(cls)
+        if encoder is None:
+            encoder = self._resolve(cls)
+        return encoder
+
+    def _resolve(self, cls: type) -> Callable[[Any], Any]:
+        """미등록 타입의 인코더 결정 후 캐시"""
+        if issubclass(cls, Enum):
+            encoder = _enum_value
+        elif issubclass(cls, str):
+            encoder = str
+        elif issubclass(cls, bool):
+            encoder = bool
+        elif issubclass(cls, int):
+            encoder = int
+        elif issubclass(cls, float):
+            encoder = float
+        elif issubclass(cls, dict):
+            encoder = dict
+        elif issubclass(cls, (list, tuple, deque, set, frozenset)):
+            encoder = list
+        elif issubclass(cls, (datetime, date)):
+            encoder = _isoformat
+        elif dataclasses.is_dataclass(cls):
+            self.register_dataclass(cls)
+            return self._encoders[cls]
+        else:
+            encoder = _object_attributes
+        self.register(cls, encoder)
+        return encoder
+
+    def _default(self, obj: Any) -> Any:
+        """orjson이 직접 처리하지 않는 타입 변환"""
+        return self._encoder_for(type(obj))(obj)
+
+    def to_serializable(self, obj: Any) -> Any:
+        """JSON 호환 값으로 변환 (순환 참조는 None)"""
+        return self._convert(obj, set())
+
+    def _convert(self, obj: Any, active: Set[int]) -> Any:
+        cls = type(obj)
+        if cls is str:
+            return strip_emoji(obj) if self.remove_emoji else obj
+        if cls in _SCALAR_TYPES:
+            return obj
+
+        # 순환 참조는 현재 경로 기준으로만 검사 (같은 객체를 여러 곳에서 참조해도 유지)
+        obj_id = id(obj)
+        if obj_id in active:
+            return None
+        active.add(obj_id)
+        try:
+            if cls is dict:
+                return {
+                    (key if isinstance(key, (str,) + _SCALAR_TYPES) else str(key)): self._convert(value, active)
+                    for key, value in obj.items()
+                }
+            if cls is list or cls is tuple:
+                return [self._convert(item, active) for item in obj]
+            return self._convert(self._encoder_for(cls)(obj), active)
+        finally:
+            active.discard(obj_id)
+
+    def dumps_bytes(self, obj: Any, indent: bool = False) -> bytes:
+        """UTF-8 JSON 바이트로 직렬화 (로그 기록용)"""
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            try:
+                data = orjson.dumps(obj, default=self._default, option=option)
+            except orjson.JSONEncodeError:
+                data = None  # 순환 참조, 64비트 초과 정수 등은 아래에서 처리
+            if data is not None:
+                # 이모지는 문자열 안에만 나타나므로 결과에서 한 번에 제거 (4바이트 UTF-8 문자가 있을 때만)
+                if self.remove_emoji and any(lead in data for lead in _UTF8_4BYTE_LEADS):
+                    data = EMOJI_PATTERN.sub('', data.decode('utf-8')).encode('utf-8')
+                return data
+        return json.dumps(self._convert(obj, set()), ensure_ascii=False, indent=2 if indent else None).encode('utf-8')
+
+    def dumps(self, obj: Any, indent: bool = False) -> str:
+        """JSON 문자열로 직렬화"""
+        return self.dumps_bytes(obj, indent).decode('utf-8')
+
+
+def _enum_value(obj: Enum) -> Any:
+    return obj.value
+
+
+def _isoformat(obj) -> str:
+    return obj.isoformat()
+
+
+def _object_attributes(obj: Any) -> Any:
+    """일반 객체: 인스턴스 속성 dict (속성이 없으면 문자열)"""
+    attributes = getattr(obj, '__dict__', None)
+    return attributes if isinstance(attributes, dict) else str(obj)
+
+
+# 전역 직렬화기 (알려진 dataclass 인코더 등록)
+_record_serializer: Optional[RecordSerializer] = None
+_record_serializer_lock = threading.Lock()
+
+
+def _create_record_serializer() -> RecordSerializer:
+    from data.data_structure import ExtractedInfo, ExtractedEntity, LearningData, ChatbotResponse
+
+    serializer = RecordSerializer()
+    for cls in (ExtractedInfo, ExtractedEntity, LearningData, ChatbotResponse):
+        serializer.register_dataclass(cls)
+    try:
+        from nlp.preprocessor import PreprocessResult
+        serializer.register_dataclass(PreprocessResult)  # 발화 단위 캐시(_memo)는 저장하지 않음
+    except ImportError as e:
+        logger.debug(f"PreprocessResult 인코더 등록 생략: {e}")
+    return serializer
+
+
+def get_record_serializer() -> RecordSerializer:
+    """전역 레코드 직렬화기 반환"""
+    global _record_serializer
+    if _record_serializer is None:
+        with _record_serializer_lock:
+            if _record_serializer is None:
+                _record_serializer = _create_record_serializer()
+    return _record_serializer
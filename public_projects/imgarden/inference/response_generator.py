@@ -16,6 +16,7 @@ from data.data_structure import (
 from nlp.nlg import NaviyamNLG, ResponseTone
 from nlp.llm_normalizer import LLMNormalizer
 from models.koalpaca_model import KoAlpacaModel
+from rag.retriever import RetrievalHit
 
 logger = logging.getLogger(__name__)
 
@@ -53,11 +54,8 @@ class RecommendationEngine:
                 # 그래도 못 찾으면 원본 그대로 사용
                 target_category = food_type
 
-        # 해당 카테고리 가게 찾기
-        matching_shops = [
-            shop for shop in self.knowledge.shops.values()
-            if target_category.lower() in shop.category.lower()
-        ]
+        # 해당 카테고리 가게 찾기 (카테고리 인덱스)
+        matching_shops = self.knowledge.find_shops_by_category_keyword(target_category)
 
         # 착한가게 우선 정렬
         matching_shops.sort(key=lambda x: (
@@ -66,20 +64,10 @@ class RecommendationEngine:
         ))
 
         for shop in matching_shops[:limit]:
-            # 해당 가게의 메뉴 찾기
-            shop_menus = [
-                menu for menu in self.knowledge.menus.values()
-                if menu.shop_id == shop.id
-            ]
-
-            # 예산에 맞는 메뉴 필터링
-            if budget:
-                shop_menus = [menu for menu in shop_menus if menu.price <= budget]
-
-            if shop_menus:
-                # 가장 인기있거나 저렴한 메뉴 선택
-                best_menu = min(shop_menus, key=lambda x: x.price)
+            # 예산에 맞는 가장 저렴한 메뉴 선택 (가게별 가격순 메뉴 인덱스)
+            best_menu = self.knowledge.get_cheapest_menu(shop.id, budget or None)
 
+            if best_menu:
                 recommendations.append({
                     'shop_id': shop.id,
                     'shop_name': shop.name,
@@ -100,11 +88,8 @@ class RecommendationEngine:
         """예산별 추천"""
         recommendations = []
 
-        # 예산 내 메뉴 찾기
-        affordable_menus = [
-            menu for menu in self.knowledge.menus.values()
-            if menu.price <= budget
-        ]
+        # 예산 내 메뉴 찾기 (가격 사다리 이진 탐색)
+        affordable_menus = self.knowledge.get_menus_in_budget(budget)
 
         # 음식 종류 필터링
         if food_type:
@@ -116,12 +101,10 @@ class RecommendationEngine:
             }
             target_category = category_mapping.get(food_type, food_type)
 
-            filtered_menus = []
-            for menu in affordable_menus:
-                shop = self.knowledge.shops.get(menu.shop_id)
-                if shop and target_category.lower() in shop.category.lower():
-                    filtered_menus.append(menu)
-            affordable_menus = filtered_menus
+            matching_shop_ids = {
+                shop.id for shop in self.knowledge.find_shops_by_category_keyword(target_category)
+            }
+            affordable_menus = [menu for menu in affordable_menus if menu.shop_id in matching_shop_ids]
 
         # 가격 대비 가치 정렬 (가격 낮은 순, 착한가게 우선)
         menu_recommendations = []
@@ -137,8 +120,9 @@ class RecommendationEngine:
 
                 menu_recommendations.append((score, menu, shop))
 
-        # 점수 순 정렬
-        menu_recommendations.sort(key=lambda x: x[0], reverse=True)
+        # 점수 순 정렬 (동점은 메뉴 등록 순)
+        menu_order = self.knowledge.indexes.menu_order
+        menu_recommendations.sort(key=lambda x: (-x[0], menu_order.get(x[1].id, 0)))
 
         for score, menu, shop in menu_recommendations[:limit]:
             recommendations.append({
@@ -251,7 +235,7 @@ class NaviyamResponseGenerator:
         extracted_info: ExtractedInfo,
         user_profile: UserProfile = None,
         conversation_context: List[Dict] = None,
-        rag_context: str = ""
+        rag_hits: Optional[List[RetrievalHit]] = None
     ) -> ChatbotResponse:
         """메인 응답 생성 메서드"""
 
@@ -266,7 +250,7 @@ class NaviyamResponseGenerator:
             rejection_count = self._count_rejections(conversation_context)
             
             # 2. 의도별 추천 데이터 생성
-            recommendations = self._get_recommendations(extracted_info, user_profile, rag_context)
+            recommendations = self._get_recommendations(extracted_info, user_profile, rag_hits)
             
             # 거부가 많으면 다른 카테고리 추천
             if rejection_count >= 2:
@@ -286,7 +270,8 @@ class NaviyamResponseGenerator:
             logger.error(f"응답 생성 실패: {e}")
             return self._generate_fallback_response(extracted_info)
 
-    def _get_recommendations(self, extracted_info: ExtractedInfo, user_profile: UserProfile = None, rag_context: str = "") -> List[Dict]:
+    def _get_recommendations(self, extracted_info: ExtractedInfo, user_profile: UserProfile = None,
+                             rag_hits: Optional[List[RetrievalHit]] = None) -> List[Dict]:
         """의도별 추천 데이터 생성"""
 
         intent = extracted_info.intent
@@ -313,11 +298,10 @@ class NaviyamResponseGenerator:
                 )
             else:
                 # 일반 추천 (착한가게 우선)
-                good_shops = [shop for shop in self.knowledge.shops.values() if shop.is_good_influence_shop]
+                good_shops = self.knowledge.get_good_influence_shops()
                 for shop in good_shops[:3]:
-                    shop_menus = [menu for menu in self.knowledge.menus.values() if menu.shop_id == shop.id]
-                    if shop_menus:
-                        best_menu = min(shop_menus, key=lambda x: x.price)
+                    best_menu = self.knowledge.get_cheapest_menu(shop.id)
+                    if best_menu:
                         recommendations.append({
                             'shop_id': shop.id,
                             'shop_name': shop.name,
@@ -350,9 +334,8 @@ class NaviyamResponseGenerator:
 
             for shop in self.knowledge.shops.values():
                 if self._is_shop_open(shop, current_time):
-                    shop_menus = [menu for menu in self.knowledge.menus.values() if menu.shop_id == shop.id]
-                    if shop_menus:
-                        best_menu = min(shop_menus, key=lambda x: x.price)
+                    best_menu = self.knowledge.get_cheapest_menu(shop.id)
+                    if best_menu:
                         open_shops.append({
                             'shop_id': shop.id,
                             'shop_name': shop.name,
@@ -368,9 +351,8 @@ class NaviyamResponseGenerator:
             # 근처 가게 추천 (실제로는 GPS 연동 필요)
             nearby_shops = list(self.knowledge.shops.values())[:3]
             for shop in nearby_shops:
-                shop_menus = [menu for menu in self.knowledge.menus.values() if menu.shop_id == shop.id]
-                if shop_menus:
-                    best_menu = min(shop_menus, key=lambda x: x.price)
+                best_menu = self.knowledge.get_cheapest_menu(shop.id)
+                if best_menu:
                     recommendations.append({
                         'shop_id': shop.id,
                         'shop_name': shop.name,
@@ -420,10 +402,10 @@ class NaviyamResponseGenerator:
                     'message': f"현재 급식카드 잔액: {current_balance:,}원" if current_balance else "급식카드가 등록되지 않았습니다."
                 })
 
-        # RAG 컨텍스트로 추천 결과 보강
-        if rag_context and rag_context.strip():
-            logger.info(f"RAG 컨텍스트로 추천 결과 보강 (기본 추천: {len(recommendations)}개)")
-            recommendations = self._enrich_recommendations_with_rag(recommendations, rag_context)
+        # RAG 검색 결과로 추천 결과 보강
+        if rag_hits:
+            logger.info(f"RAG 검색 결과로 추천 결과 보강 (기본 추천: {len(recommendations)}개)")
+            recommendations = self._enrich_recommendations_with_rag(recommendations, rag_hits)
             logger.info(f"RAG 보강 후 최종 추천: {len(recommendations)}개")
 
         return recommendations
@@ -894,12 +876,11 @@ class NaviyamResponseGenerator:
         # 각 카테고리에 대한 추천 생성
         recommendations = []
         for category in selected_categories:
-            shops = [s for s in self.knowledge.shops.values() if category in s.category]
+            shops = self.knowledge.find_shops_by_category_keyword(category, ignore_case=False)
             if shops:
                 shop = random.choice(shops)
-                shop_menus = [menu for menu in self.knowledge.menus.values() if menu.shop_id == shop.id]
-                if shop_menus:
-                    best_menu = min(shop_menus, key=lambda x: x.price)
+                best_menu = self.knowledge.get_cheapest_menu(shop.id)
+                if best_menu:
                     recommendations.append({
                         'shop_id': shop.id,
                         'shop_name': shop.name,
@@ -1058,106 +1039,83 @@ class NaviyamResponseGenerator:
         # 다른 정보 수집...
         return self._generate_template_response(extracted_info, recommendations, user_profile)
 
-    def _parse_rag_context_to_recommendations(self, rag_context: str) -> List[Dict]:
-        """RAG 컨텍스트를 추천 형태로 파싱"""
-        recommendations = []
-        
-        try:
-            # RAG 컨텍스트에서 가게/메뉴 정보 추출
-            lines = rag_context.split('\n')
-            current_recommendation = {}
-            
-            for line in lines:
-                line = line.strip()
-                if not line or line.startswith('다음은') or line.startswith('관련된'):
-                    continue
-                    
-                # 가게 정보 파싱
-                if '[shop]' in line.lower() or '가게 이름:' in line:
-                    if current_recommendation:
-                        recommendations.append(current_recommendation)
-                        current_recommendation = {}
-                    
-                    # 가게 정보 추출
-                    shop_info = self._extract_shop_info_from_line(line)
-                    if shop_info:
-                        current_recommendation.update(shop_info)
-                        current_recommendation['type'] = 'shop'
-                
-                # 메뉴 정보 파싱
-                elif '[menu]' in line.lower() or '메뉴명:' in line:
-                    if current_recommendation:
-                        recommendations.append(current_recommendation)
-                        current_recommendation = {}
-                    
-                    # 메뉴 정보 추출
-                    menu_info = self._extract_menu_info_from_line(line)
-                    if menu_info:
-                        current_recommendation.update(menu_info)
-                        current_recommendation['type'] = 'menu'
-            
-            # 마지막 추천 추가
-            if current_recommendation:
-                recommendations.append(current_recommendation)
-                
-            logger.info(f"RAG 컨텍스트에서 {len(recommendations)}개 추천 파싱 완료")
-            return recommendations[:3]  # 최대 3개 제한
-            
-        except Exception as e:
-            logger.error(f"RAG 컨텍스트 파싱 실패: {e}")
-            return []
+    def _rag_hit_to_recommendation(self, hit: RetrievalHit) -> Dict:
+        """RAG 검색 결과를 추천 형태로 변환"""
+        recommendation = {
+            'shop_id': hit.shop_id,
+            'shop_name': hit.shop_name,
+            'category': hit.category,
+            'type': hit.doc_type,
+            'rag_description': hit.description,
+            'rag_context': True,
+            'semantic_match_score': hit.score
+        }
+        if hit.doc_type == 'menu':
+            recommendation.update({'menu_id': hit.menu_id, 'menu_name': hit.name, 'price': hit.price or 0})
+        if hit.address:
+            recommendation['address'] = hit.address
+        if hit.is_good_influence:
+            recommendation['is_good_influence_shop'] = True
+        return recommendation
+
+    @staticmethod
+    def _matches_rag_hit(recommendation: Dict, hit: RetrievalHit) -> bool:
+        """추천과 RAG 결과가 같은 가게/메뉴인지 (ID 우선, 없으면 이름)
+
+        양쪽 모두 메뉴가 있으면 메뉴까지 같아야 함 (같은 가게의 다른 메뉴는 불일치)
+        가게 결과이거나 메뉴 없는 추천이면 가게만 비교
+        """
+        rec_menu_id = recommendation.get('menu_id')
+        if hit.menu_id is not None and rec_menu_id is not None:
+            return rec_menu_id == hit.menu_id
 
-    def _enrich_recommendations_with_rag(self, recommendations: List[Dict], rag_context: str) -> List[Dict]:
+        if hit.shop_id is not None and recommendation.get('shop_id') is not None:
+            same_shop = recommendation.get('shop_id') == hit.shop_id
+        else:
+            shop_name = recommendation.get('shop_name')
+            same_shop = bool(shop_name) and shop_name == hit.shop_name
+        if not same_shop:
+            return False
+
+        hit_has_menu = hit.doc_type == 'menu' or hit.menu_id is not None
+        rec_menu_name = recommendation.get('menu_name')
+        if hit_has_menu and (rec_menu_id is not None or rec_menu_name):
+            # 추천 엔진 결과는 menu_id 없이 메뉴 이름만 있는 경우가 많음
+            return bool(rec_menu_name) and rec_menu_name == hit.name
+        return True
+
+    def _enrich_recommendations_with_rag(self, recommendations: List[Dict], rag_hits: List[RetrievalHit]) -> List[Dict]:
         """추천 엔진 결과를 RAG 정보로 보강"""
         if not recommendations:
-            # 추천 엔진 결과가 없으면 RAG만으로 추천 생성 (폴백)
+            # 추천 엔진 결과가 없으면 RAG만으로 추천 생성 (폴백, 최대 3개)
             logger.info("추천 엔진 결과가 없어 RAG 전용 추천으로 폴백")
-            return self._parse_rag_context_to_recommendations(rag_context)
+            return [self._rag_hit_to_recommendation(hit) for hit in rag_hits[:3]]
         
         try:
-            # RAG에서 추가 정보 추출
-            rag_info = self._extract_rag_additional_info(rag_context)
-            
             # 기존 추천에 RAG 정보 보강
             enriched_recommendations = []
             
             for rec in recommendations:
                 enriched_rec = rec.copy()
                 
-                # RAG에서 관련 정보 찾아서 보강
-                shop_name = rec.get('shop_name', '')
-                menu_name = rec.get('menu_name', '')
-                
-                # RAG 정보에서 매칭되는 가게/메뉴 찾기
-                for rag_item in rag_info:
-                    if (rag_item.get('shop_name', '') == shop_name or 
-                        rag_item.get('menu_name', '') == menu_name):
-                        
-                        # RAG에서 추가 정보 병합
+                # 매칭되는 가게/메뉴 중 순위가 가장 높은 결과로 보강
+                for hit in rag_hits:
+                    if self._matches_rag_hit(rec, hit):
                         enriched_rec.update({
-                            'rag_description': rag_item.get('description', ''),
+                            'rag_description': hit.description,
                             'rag_context': True,
-                            'semantic_match_score': rag_item.get('relevance_score', 0.8)
+                            'semantic_match_score': hit.score
                         })
                         break
                 
                 enriched_recommendations.append(enriched_rec)
             
-            # RAG에서 추가 추천이 있으면 뒤에 붙이기 (최대 5개)
-            additional_recs = [item for item in rag_info 
-                             if not any(item.get('shop_name', '') == rec.get('shop_name', '') 
-                                      for rec in recommendations)]
+            # 기존 추천에 없는 가게는 뒤에 붙이기 (최대 2개 추가, 전체 5개)
+            additional_hits = [hit for hit in rag_hits
+                               if not any(self._matches_rag_hit(rec, hit) for rec in recommendations)]
             
-            for additional_rec in additional_recs[:2]:  # 최대 2개 추가
-                enriched_recommendations.append({
-                    'shop_name': additional_rec.get('shop_name', ''),
-                    'menu_name': additional_rec.get('menu_name', ''),
-                    'price': additional_rec.get('price', 0),
-                    'type': additional_rec.get('type', 'rag_additional'),
-                    'rag_description': additional_rec.get('description', ''),
-                    'rag_context': True,
-                    'semantic_match_score': additional_rec.get('relevance_score', 0.7)
-                })
+            for hit in additional_hits[:2]:
+                enriched_recommendations.append(self._rag_hit_to_recommendation(hit))
             
             logger.info(f"RAG 보강 완료: 기본 {len(recommendations)}개 → 최종 {len(enriched_recommendations)}개")
             return enriched_recommendations[:5]  # 최대 5개로 제한
@@ -1165,69 +1123,6 @@ class NaviyamResponseGenerator:
         except Exception as e:
             logger.error(f"RAG 보강 실패: {e}")
             return recommendations  # 실패 시 원본 반환
-
-    def _extract_rag_additional_info(self, rag_context: str) -> List[Dict]:
-        """RAG 컨텍스트에서 추가 정보 추출"""
-        # _parse_rag_context_to_recommendations와 유사하지만 
-        # 보강용 정보에 특화된 파싱
-        return self._parse_rag_context_to_recommendations(rag_context)
-
-    def _extract_shop_info_from_line(self, line: str) -> Dict:
-        """라인에서 가게 정보 추출"""
-        shop_info = {}
-        
-        # 가게 이름 추출
-        if '가게 이름:' in line:
-            parts = line.split('가게 이름:')
-            if len(parts) > 1:
-                name_part = parts[1].split('.')[0].strip()
-                shop_info['name'] = name_part
-        
-        # 카테고리 추출
-        if '카테고리:' in line:
-            parts = line.split('카테고리:')
-            if len(parts) > 1:
-                category_part = parts[1].split('.')[0].strip()
-                shop_info['category'] = category_part
-        
-        # 주소 추출
-        if '주소:' in line:
-            parts = line.split('주소:')
-            if len(parts) > 1:
-                address_part = parts[1].split('.')[0].strip()
-                shop_info['location'] = address_part
-                
-        return shop_info
-
-    def _extract_menu_info_from_line(self, line: str) -> Dict:
-        """라인에서 메뉴 정보 추출"""
-        menu_info = {}
-        
-        # 메뉴명 추출
-        if '메뉴명:' in line:
-            parts = line.split('메뉴명:')
-            if len(parts) > 1:
-                name_part = parts[1].split('.')[0].strip()
-                menu_info['name'] = name_part
-        
-        # 가격 추출
-        if '가격:' in line:
-            parts = line.split('가격:')
-            if len(parts) > 1:
-                price_part = parts[1].split('원')[0].strip()
-                try:
-                    menu_info['price'] = int(price_part.replace(',', ''))
-                except:
-                    pass
-        
-        # 설명 추출
-        if '설명:' in line:
-            parts = line.split('설명:')
-            if len(parts) > 1:
-                desc_part = parts[1].split('.')[0].strip()
-                menu_info['description'] = desc_part
-                
-        return menu_info
         
     def _generate_follow_up_questions(self, intent, entities, recommendations) -> List[str]:
         """후속 질문 생성"""
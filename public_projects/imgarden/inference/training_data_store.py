@@ -0,0 +1,277 @@
+"""
+학습 데이터 저장소 (날짜 x 사용자 해시 파티션)
+LearningLogWriter 세그먼트를 날짜/사용자 버킷 단위로 골라 읽고, 사이드카 인덱스로 한 사용자의 레코드만 바로 읽음
+- 세그먼트: raw/u{버킷}_{YYYYMMDD}_{번호}.jsonl (+ .idx: 바이트 오프셋 -> 사용자)
+- 레코드는 지연 순회 (전체를 메모리에 올리지 않음)
+- 열 기반 익스포트: Parquet (pyarrow 설치 시) / NumPy npz 대체
+"""
+
+import json
+import re
+import zlib
+import zipfile
+import threading
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from inference.learning_log import INDEX_SUFFIX, iter_segment_paths, iter_segment_records, parse_segment_name
+
+logger = logging.getLogger(__name__)
+
+# 학습용 평탄화 열
+TRAINING_COLUMNS = ('timestamp', 'user_id', 'data_type', 'user_input', 'bot_response',
+                    'intent', 'confidence', 'quality_score')
+_FLOAT_COLUMNS = ('confidence', 'quality_score')
+
+_BUCKET_STREAM = re.compile(r'^u\d+$')
+
+# 레코드 생성 후 세그먼트에 기록되기까지 허용하는 최대 지연 (시간순 순회 시 보류 구간)
+LATE_COMMIT_WINDOW = timedelta(hours=1)
+
+
+def flatten_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """수집 레코드를 학습용 평탄화 행으로 변환"""
+    interaction = record.get('interaction') or {}
+    features = record.get('features') or {}
+    learning_data = record.get('learning_data') or {}
+    confidence = interaction.get('confidence', features.get('confidence', features.get('nlu_confidence',
+                                 learning_data.get('intent_confidence', 0.0))))
+    return {
+        'timestamp': record.get('timestamp', ''),
+        'user_id': str(record.get('user_id', '')),
+        'data_type': record.get('data_type', ''),
+        'user_input': interaction.get('input_text') or features.get('input_text') or '',
+        'bot_response': interaction.get('response_text') or '',
+        'intent': interaction.get('intent') or features.get('intent') or features.get('nlu_intent') or '',
+        'confidence': float(confidence or 0.0),
+        'quality_score': float(record.get('quality_score') or 0.0)
+    }
+
+
+def _parse_timestamp(record: Dict[str, Any]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(record["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class TrainingDataStore:
+    """날짜/사용자 해시로 분할된 학습 데이터 조회"""
+
+    def __init__(self, log_dir: str, num_buckets: int = 16):
+        """
+        Args:
+            log_dir: LearningLogWriter 세그먼트 디렉토리
+            num_buckets: 사용자 해시 버킷 수 (기록 중에는 바꾸지 않음)
+        """
+        self.log_dir = Path(log_dir)
+        self.num_buckets = num_buckets
+
+        # 세그먼트별 인덱스 캐시: 경로 -> (읽은 바이트 수, 사용자 -> 오프셋 목록)
+        self._index_cache: Dict[Path, Tuple[int, Dict[str, List[int]]]] = {}
+        self._index_lock = threading.Lock()
+
+    def bucket_stream(self, user_id: Any) -> str:
+        """사용자의 버킷 스트림 이름 (프로세스와 무관하게 고정된 해시)"""
+        return f"u{zlib.crc32(str(user_id).encode('utf-8')) % self.num_buckets:02d}"
+
+    def _segments(self, start: datetime, end: datetime, user_id: Optional[Any] = None) -> List[Tuple[str, Path]]:
+        """기간/사용자에 해당하는 (날짜, 세그먼트) 목록
+
+        세그먼트 날짜는 기록(커밋) 시점이므로 자정 직전 레코드를 위해 종료일 다음 날까지 포함
+        사용자 조회 시 해당 버킷과 버킷 분할 이전 형식(데이터 타입별) 세그먼트만 읽음
+        """
+        first_day = start.strftime("%Y%m%d")
+        last_day = (end + timedelta(days=1)).strftime("%Y%m%d")
+        bucket = self.bucket_stream(user_id) if user_id is not None else None
+
+        segments = []
+        for path in iter_segment_paths(self.log_dir):
+            stream, date_str, _ = parse_segment_name(path.name)
+            if not first_day <= date_str <= last_day:
+                continue
+            if bucket is not None and _BUCKET_STREAM.match(stream) and stream != bucket:
+                continue
+            segments.append((date_str, path))
+        segments.sort(key=lambda item: item[0])
+        return segments
+
+    def _user_offsets(self, path: Path, user_id: str) -> Optional[List[int]]:
+        """사이드카 인덱스에서 사용자 레코드 오프셋 조회 (인덱스가 없으면 None)
+
+        인덱스는 추가 전용이므로 지난번 이후 늘어난 부분만 읽어서 캐시에 반영
+        """
+        index_path = Path(str(path) + INDEX_SUFFIX)
+        if not path.name.endswith('.jsonl') or not index_path.exists():
+            return None
+
+        with self._index_lock:
+            parsed_bytes, offsets = self._index_cache.get(path, (0, {}))
+            try:
+                with open(index_path, 'rb') as f:
+                    f.seek(parsed_bytes)
+                    tail = f.read()
+            except OSError as e:
+                logger.warning(f"인덱스 읽기 실패 ({index_path}): {e}")
+                return None
+
+            complete = tail.rfind(b'\n') + 1  # 기록 중인 마지막 줄 제외
+            for line in tail[:complete].decode('utf-8').splitlines():
+                offset, _, key = line.partition('\t')
+                offsets.setdefault(key, []).append(int(offset))
+            self._index_cache[path] = (parsed_bytes + complete, offsets)
+            return list(offsets.get(user_id, []))
+
+    def _iter_segment(self, path: Path, user_id: Optional[str]) -> Iterator[Dict[str, Any]]:
+        if user_id is not None:
+            offsets = self._user_offsets(path, user_id)
+            if offsets is not None:
+                with open(path, 'rb') as f:
+                    for offset in offsets:
+                        f.seek(offset)
+                        try:
+                            yield json.loads(f.readline())
+                        except json.JSONDecodeError:
+                            logger.warning(f"손상된 로그 레코드 건너뜀: {path}@{offset}")
+                return
+
+        for record in iter_segment_records(path):
+            if user_id is None or str(record.get('user_id')) == user_id:
+                yield record
+
+    def iter_records(self, days: Optional[int] = None, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None, user_id: Optional[Any] = None,
+                     data_types: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """기간/사용자/데이터 타입 조건에 맞는 레코드 지연 순회 (세그먼트 순서)
+
+        Args:
+            days: 최근 일수 (start 미지정 시)
+            start, end: 조회 기간 (기본: 전체 ~ 현재)
+            user_id: 사용자 (지정 시 해당 버킷 세그먼트만, 인덱스가 있으면 오프셋으로 바로 읽음)
+            data_types: 데이터 타입 필터
+        """
+        end = end or datetime.now()
+        if start is None:
+            start = end - timedelta(days=days) if days is not None else datetime.min
+        data_types = set(data_types) if data_types else None
+        user_key = str(user_id) if user_id is not None else None
+
+        for _, path in self._segments(start, end, user_id):
+            for record in self._iter_segment(path, user_key):
+                if data_types is not None and record.get('data_type') not in data_types:
+                    continue
+                timestamp = _parse_timestamp(record)
+                if timestamp is not None and start <= timestamp <= end:
+                    yield record
+
+    def iter_records_sorted(self, days: Optional[int] = None, start: Optional[datetime] = None,
+                            end: Optional[datetime] = None,
+                            data_types: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """시간순 레코드 순회 (한 번에 하루치 세그먼트만 메모리에 유지)"""
+        end = end or datetime.now()
+        if start is None:
+            start = end - timedelta(days=days) if days is not None else datetime.min
+        data_types = set(data_types) if data_types else None
+
+        pending: List[Tuple[datetime, Dict[str, Any]]] = []
+        current_day = None
+        for date_str, path in self._segments(start, end):
+            if date_str != current_day:
+                # 이후 세그먼트에는 자정 직전(지연 커밋) 레코드가 들어 있을 수 있으므로 그 구간은 보류
+                release_before = datetime.strptime(date_str, "%Y%m%d") - LATE_COMMIT_WINDOW
+                ready = [item for item in pending if item[0] < release_before]
+                pending = [item for item in pending if item[0] >= release_before]
+                ready.sort(key=lambda item: item[0])
+                for _, record in ready:
+                    yield record
+                current_day = date_str
+
+            for record in iter_segment_records(path):
+                if data_types is not None and record.get('data_type') not in data_types:
+                    continue
+                timestamp = _parse_timestamp(record)
+                if timestamp is not None and start <= timestamp <= end:
+                    pending.append((timestamp, record))
+
+        pending.sort(key=lambda item: item[0])
+        for _, record in pending:
+            yield record
+
+    def iter_training_rows(self, days: Optional[int] = None, **kwargs) -> Iterator[Dict[str, Any]]:
+        """학습용 평탄화 행 지연 순회"""
+        for record in self.iter_records(days=days, **kwargs):
+            yield flatten_record(record)
+
+    def export_columnar(self, output_path: str, rows: Iterable[Dict[str, Any]],
+                        columns: Tuple[str, ...] = TRAINING_COLUMNS, chunk_size: int = 10000) -> Path:
+        """행을 chunk_size 단위로 열 기반 파일에 기록 (Parquet, pyarrow가 없으면 npz)
+
+        Returns:
+            실제 저장 경로 (npz 대체 시 확장자 변경)
+        """
+        output_path = Path(output_path)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            if output_path.suffix == '.parquet':
+                logger.info("pyarrow가 없어 npz 형식으로 저장합니다")
+                output_path = output_path.with_suffix('.npz')
+            self._export_npz(output_path, rows, columns, chunk_size)
+            return output_path
+
+        schema = pa.schema([(c, pa.float64() if c in _FLOAT_COLUMNS else pa.string()) for c in columns])
+        with pq.ParquetWriter(str(output_path), schema) as writer:
+            for chunk in _chunked(rows, chunk_size):
+                writer.write_table(pa.Table.from_pydict(
+                    {c: [row.get(c) for row in chunk] for c in columns}, schema=schema
+                ))
+        return output_path
+
+    def _export_npz(self, output_path: Path, rows: Iterable[Dict[str, Any]],
+                    columns: Tuple[str, ...], chunk_size: int):
+        """청크별 열 배열을 npz(zip) 항목으로 바로 기록 ({열}__{청크번호}.npy)"""
+        with zipfile.ZipFile(output_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for chunk_index, chunk in enumerate(_chunked(rows, chunk_size)):
+                for column in columns:
+                    values = [row.get(column) for row in chunk]
+                    if column in _FLOAT_COLUMNS:
+                        array = np.array([v if v is not None else np.nan for v in values], dtype=np.float64)
+                    else:
+                        array = np.array(['' if v is None else str(v) for v in values], dtype=str)
+                    with archive.open(f"{column}__{chunk_index:05d}.npy", 'w', force_zip64=True) as f:
+                        np.lib.format.write_array(f, array, allow_pickle=False)
+
+
+def _chunked(rows: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def load_columnar(path: str, columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """export_columnar 결과를 열 배열로 로드 (npz는 청크를 이어 붙임)"""
+    path = Path(path)
+    if path.suffix == '.parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(str(path), columns=list(columns) if columns else None)
+        return {name: table.column(name).to_numpy(zero_copy_only=False) for name in table.column_names}
+
+    chunks: Dict[str, List[Tuple[int, np.ndarray]]] = {}
+    with np.load(path, allow_pickle=False) as archive:
+        for name in archive.files:
+            column, _, chunk_index = name.rpartition('__')
+            if columns is not None and column not in columns:
+                continue
+            chunks.setdefault(column, []).append((int(chunk_index), archive[name]))
+    return {column: np.concatenate([array for _, array in sorted(parts, key=lambda p: p[0])])
+            for column, parts in chunks.items()}
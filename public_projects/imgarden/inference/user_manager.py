@@ -11,27 +11,37 @@ import logging
 
 from data.data_structure import UserProfile, ExtractedInfo, ChatbotResponse, IntentType, UserState, LearningData
 from nlp.preprocessor import EmotionType
+from .profile_store import ProfileStore, create_profile_backend
 
 logger = logging.getLogger(__name__)
 
 class NaviyamUserManager:
     """나비얌 사용자 관리자"""
 
-    def __init__(self, save_path: str, enable_personalization: bool = True):
+    def __init__(self, save_path: str, enable_personalization: bool = True,
+                 backend: str = "sqlite", cache_size: int = 1024, flush_interval: float = 1.0):
         """
         Args:
             save_path: 사용자 프로필 저장 경로
             enable_personalization: 개인화 기능 활성화 여부
+            backend: 프로필 저장소 ("sqlite" 또는 "json")
+            cache_size: 메모리에 유지할 최근 사용 프로필 수
+            flush_interval: 변경된 프로필 일괄 저장 주기 (초, 0 이하이면 즉시 저장)
         """
         self.save_path = Path(save_path)
         self.enable_personalization = enable_personalization
-        self.user_profiles: Dict[str, UserProfile] = {}
 
         # 디렉토리 생성
         self.save_path.mkdir(parents=True, exist_ok=True)
 
-        # 기존 프로필 로드
-        self._load_existing_profiles()
+        # 프로필은 첫 접근 시 로드 (시작 시 전체 로드 없음)
+        self.profile_store: Optional[ProfileStore] = None
+        if enable_personalization:
+            self.profile_store = ProfileStore(
+                create_profile_backend(backend, str(self.save_path)),
+                cache_size=cache_size,
+                flush_interval=flush_interval
+            )
 
     def determine_user_strategy(self, user_id: str) -> str:
         """사용자 상태에 따른 전략 결정"""
@@ -102,67 +112,32 @@ class NaviyamUserManager:
         # 프로필 저장
         self._save_user_profile(profile)
 
-    def _load_existing_profiles(self):
-        """기존 사용자 프로필 로드"""
-        if not self.enable_personalization:
-            return
-
-        try:
-            profile_files = list(self.save_path.glob("*.json"))
-            loaded_count = 0
-
-            for profile_file in profile_files:
-                user_id = profile_file.stem
-                try:
-                    with open(profile_file, 'r', encoding='utf-8') as f:
-                        profile_data = json.load(f)
-
-                    # JSON을 UserProfile 객체로 변환
-                    profile = UserProfile(
-                        user_id=profile_data["user_id"],
-                        preferred_categories=profile_data.get("preferred_categories", []),
-                        average_budget=profile_data.get("average_budget"),
-                        favorite_shops=profile_data.get("favorite_shops", []),
-                        recent_orders=profile_data.get("recent_orders", []),
-                        conversation_style=profile_data.get("conversation_style", "friendly"),
-                        last_updated=datetime.fromisoformat(profile_data.get("last_updated", datetime.now().isoformat()))
-                    )
-
-                    self.user_profiles[user_id] = profile
-                    loaded_count += 1
-
-                except Exception as e:
-                    logger.warning(f"프로필 로드 실패 ({profile_file}): {e}")
-
-            logger.info(f"사용자 프로필 {loaded_count}개 로드 완료")
-
-        except Exception as e:
-            logger.warning(f"프로필 로드 실패: {e}")
-
     def get_or_create_user_profile(self, user_id: str) -> UserProfile:
         """사용자 프로필 조회 또는 생성"""
         if not self.enable_personalization:
             # 개인화 비활성화시 기본 프로필 반환
             return UserProfile(user_id=user_id)
 
-        if user_id not in self.user_profiles:
+        profile = self.profile_store.get(user_id)
+        if profile is None:
             # 새 사용자 프로필 생성
-            new_profile = UserProfile(
+            profile = UserProfile(
                 user_id=user_id,
                 conversation_style="friendly",  # 기본값
                 last_updated=datetime.now()
             )
 
-            self.user_profiles[user_id] = new_profile
-            self._save_user_profile(new_profile)
+            self._save_user_profile(profile)
 
             logger.info(f"새 사용자 프로필 생성: {user_id}")
 
-        return self.user_profiles[user_id]
+        return profile
 
     def get_user_profile(self, user_id: str) -> Optional[UserProfile]:
         """사용자 프로필 조회만"""
-        return self.user_profiles.get(user_id)
+        if not self.enable_personalization:
+            return None
+        return self.profile_store.get(user_id)
 
     def update_user_interaction(
         self,
@@ -247,35 +222,29 @@ class NaviyamUserManager:
                 profile.conversation_style = suggested_style
 
     def _save_user_profile(self, profile: UserProfile):
-        """사용자 프로필 저장"""
+        """사용자 프로필 저장 (변경 표시만 하고 백그라운드에서 일괄 저장)"""
         if not self.enable_personalization:
             return
 
         try:
-            profile_file = self.save_path / f"{profile.user_id}.json"
+            self.profile_store.put(profile)
+        except Exception as e:
+            logger.error(f"프로필 저장 실패 ({profile.user_id}): {e}")
 
-            # UserProfile을 JSON으로 변환
-            profile_data = {
-                "user_id": profile.user_id,
-                "preferred_categories": profile.preferred_categories,
-                "average_budget": profile.average_budget,
-                "favorite_shops": profile.favorite_shops,
-                "recent_orders": profile.recent_orders,
-                "conversation_style": profile.conversation_style,
-                "last_updated": profile.last_updated.isoformat(),
-                "taste_preferences": profile.taste_preferences,
-                "companion_patterns": profile.companion_patterns,
-                "location_preferences": profile.location_preferences,
-                "good_influence_preference": profile.good_influence_preference,
-                "interaction_count": profile.interaction_count,
-                "data_completeness": profile.data_completeness
-            }
+    def save_user_profiles(self) -> int:
+        """대기 중인 프로필 변경분 즉시 저장
 
-            with open(profile_file, 'w', encoding='utf-8') as f:
-                json.dump(profile_data, f, ensure_ascii=False, indent=2)
+        Returns:
+            저장한 프로필 수
+        """
+        if not self.enable_personalization:
+            return 0
+        return self.profile_store.flush()
 
-        except Exception as e:
-            logger.error(f"프로필 저장 실패 ({profile.user_id}): {e}")
+    def close(self):
+        """남은 변경분 저장 후 저장소 종료"""
+        if self.profile_store is not None:
+            self.profile_store.close()
 
     def add_favorite_shop(self, user_id: str, shop_id: int):
         """즐겨찾는 가게 추가"""
@@ -473,17 +442,14 @@ class NaviyamUserManager:
         cutoff_date = datetime.now() - timedelta(days=days_threshold)
         removed_count = 0
 
-        for user_id in list(self.user_profiles.keys()):
-            profile = self.user_profiles[user_id]
-            if profile.last_updated < cutoff_date:
-                # 프로필 파일 삭제
-                profile_file = self.save_path / f"{user_id}.json"
-                if profile_file.exists():
-                    profile_file.unlink()
-
-                # 메모리에서 제거
-                del self.user_profiles[user_id]
-                removed_count += 1
+        expired_user_ids = [
+            profile.user_id for profile in self.profile_store.iter_profiles()
+            if profile.last_updated < cutoff_date
+        ]
+        for user_id in expired_user_ids:
+            # 저장소와 메모리에서 제거
+            self.profile_store.delete(user_id)
+            removed_count += 1
 
         logger.info(f"오래된 프로필 {removed_count}개 정리 완료")
 
@@ -510,14 +476,9 @@ class NaviyamUserManager:
     def delete_user_data(self, user_id: str) -> bool:
         """사용자 데이터 삭제 (GDPR 대응)"""
         try:
-            # 메모리에서 제거
-            if user_id in self.user_profiles:
-                del self.user_profiles[user_id]
-
-            # 파일에서 제거
-            profile_file = self.save_path / f"{user_id}.json"
-            if profile_file.exists():
-                profile_file.unlink()
+            # 메모리와 저장소에서 제거
+            if self.profile_store is not None:
+                self.profile_store.delete(user_id)
 
             logger.info(f"사용자 {user_id} 데이터 삭제 완료")
             return True
@@ -528,7 +489,8 @@ class NaviyamUserManager:
 
     def get_statistics(self) -> Dict[str, Any]:
         """사용자 관리 통계"""
-        total_users = len(self.user_profiles)
+        profiles = list(self.profile_store.iter_profiles()) if self.profile_store is not None else []
+        total_users = len(profiles)
 
         if total_users == 0:
             return {
@@ -541,7 +503,7 @@ class NaviyamUserManager:
         budget_stats = []
         category_frequency = {}
 
-        for profile in self.user_profiles.values():
+        for profile in profiles:
             # 스타일 분포
             style = profile.conversation_style
             style_distribution[style] = style_distribution.get(style, 0) + 1
@@ -566,14 +528,16 @@ class NaviyamUserManager:
             "users_with_budget_info": len(budget_stats),
             "most_popular_category": most_popular_category,
             "category_distribution": category_frequency,
-            "users_with_favorites": sum(1 for p in self.user_profiles.values() if p.favorite_shops),
-            "avg_favorite_count": sum(len(p.favorite_shops) for p in self.user_profiles.values()) / total_users
+            "users_with_favorites": sum(1 for p in profiles if p.favorite_shops),
+            "avg_favorite_count": sum(len(p.favorite_shops) for p in profiles) / total_users,
+            "profile_cache": self.profile_store.get_stats()
         }
 
 # 편의 함수들
-def create_user_manager(save_path: str, enable_personalization: bool = True) -> NaviyamUserManager:
+def create_user_manager(save_path: str, enable_personalization: bool = True,
+                        backend: str = "sqlite") -> NaviyamUserManager:
     """사용자 관리자 생성 (편의 함수)"""
-    return NaviyamUserManager(save_path, enable_personalization)
+    return NaviyamUserManager(save_path, enable_personalization, backend=backend)
 
 def quick_user_update(user_manager: NaviyamUserManager, user_id: str, food_type: str, budget: int = None):
     """빠른 사용자 정보 업데이트 (편의 함수)"""
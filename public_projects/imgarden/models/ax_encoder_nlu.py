@@ -8,7 +8,10 @@ A.X Encoder 기반 경량 NLU 모듈
 
 import json
 import time
+import queue
 import logging
+import threading
+from concurrent.futures import Future
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
@@ -248,13 +251,56 @@ class AXEncoderNLU:
         
         return result
     
+    def predict_batch(self, texts: List[str], batch_size: int = 32) -> List[NLUOutput]:
+        """
+        여러 문장을 배치로 NLU 분석 (오프라인 처리, 마이크로 배칭용)
+        
+        길이가 비슷한 문장끼리 묶어 패딩을 줄이고 배치마다 forward 1회 실행
+        
+        Args:
+            texts: 사용자 입력 텍스트 목록
+            batch_size: forward 1회에 넣을 최대 문장 수
+            
+        Returns:
+            입력 순서대로 NLUOutput 목록 (processing_time은 배치 시간을 문장 수로 나눈 값)
+        """
+        processed_texts = [self.preprocess_text(text) for text in texts]
+        results: List[Optional[NLUOutput]] = [None] * len(texts)
+        
+        if not (self.model and self.tokenizer):
+            for i, (processed, text) in enumerate(zip(processed_texts, texts)):
+                start_time = time.time()
+                results[i] = self._rule_based_predict(processed, original_text=text)
+                results[i].processing_time = time.time() - start_time
+            return results
+        
+        # 길이순 정렬 후 배치 구성
+        order = sorted(range(len(texts)), key=lambda i: len(processed_texts[i]))
+        for batch_start in range(0, len(order), batch_size):
+            batch_indices = order[batch_start:batch_start + batch_size]
+            start_time = time.time()
+            batch_results = self._model_predict_batch(
+                [processed_texts[i] for i in batch_indices],
+                [texts[i] for i in batch_indices]
+            )
+            per_item_time = (time.time() - start_time) / len(batch_indices)
+            for i, result in zip(batch_indices, batch_results):
+                result.processing_time = per_item_time
+                results[i] = result
+        
+        return results
+    
     def _model_predict(self, text: str, original_text: str) -> NLUOutput:
         """모델 기반 예측"""
+        return self._model_predict_batch([text], [original_text])[0]
+    
+    def _model_predict_batch(self, texts: List[str], original_texts: List[str]) -> List[NLUOutput]:
+        """모델 기반 배치 예측 (패딩된 배치로 forward 1회)"""
         try:
             with torch.no_grad():
-                # 토크나이징
+                # 토크나이징 (배치 내 최장 문장 길이로 패딩)
                 inputs = self.tokenizer(
-                    text,
+                    texts,
                     return_tensors="pt",
                     padding=True,
                     truncation=True,
@@ -269,32 +315,48 @@ class AXEncoderNLU:
                 
                 # 의도 예측
                 intent_probs = torch.softmax(intent_logits, dim=-1)
-                intent_idx = torch.argmax(intent_probs, dim=-1).item()
-                intent = self.INTENT_LABELS[intent_idx]
-                intent_confidence = intent_probs[0, intent_idx].item()
+                intent_confidences, intent_indices = torch.max(intent_probs, dim=-1)
+                intent_confidences = intent_confidences.cpu().tolist()
+                intent_indices = intent_indices.cpu().tolist()
                 
-                # 신뢰도가 너무 낮으면 규칙 기반으로 폴백
-                if intent_confidence < 0.3:
-                    logger.debug(f"모델 신뢰도 낮음 ({intent_confidence:.2f}), 규칙 기반 사용")
-                    return self._rule_based_predict(text, original_text)
-                
-                # 엔티티 예측
-                entity_preds = torch.argmax(entity_logits, dim=-1)[0]
-                entities = self._extract_entities(
-                    text, 
-                    entity_preds.cpu().numpy(),
-                    inputs['input_ids'][0].cpu().numpy()
-                )
-                
-                return NLUOutput(
-                    text=original_text,
-                    intent=intent,
-                    entities=entities,
-                    confidence=intent_confidence
-                )
+                entity_preds = torch.argmax(entity_logits, dim=-1).cpu().numpy()
+                input_ids = inputs['input_ids'].cpu().numpy()
+                attention_mask = inputs['attention_mask'].cpu().numpy().astype(bool)
         except Exception as e:
             logger.warning(f"모델 예측 실패, 규칙 기반으로 폴백: {e}")
-            return self._rule_based_predict(text, original_text)
+            return [self._rule_based_predict(text, original_text)
+                    for text, original_text in zip(texts, original_texts)]
+        
+        results = []
+        for i, (text, original_text) in enumerate(zip(texts, original_texts)):
+            intent_confidence = intent_confidences[i]
+            
+            # 신뢰도가 너무 낮으면 규칙 기반으로 폴백
+            if intent_confidence < 0.3:
+                logger.debug(f"모델 신뢰도 낮음 ({intent_confidence:.2f}), 규칙 기반 사용")
+                results.append(self._rule_based_predict(text, original_text))
+                continue
+            
+            # 엔티티 예측 (패딩 토큰 제외)
+            try:
+                entities = self._extract_entities(
+                    text,
+                    entity_preds[i][attention_mask[i]],
+                    input_ids[i][attention_mask[i]]
+                )
+            except Exception as e:
+                logger.warning(f"엔티티 추출 실패, 규칙 기반으로 폴백: {e}")
+                results.append(self._rule_based_predict(text, original_text))
+                continue
+            
+            results.append(NLUOutput(
+                text=original_text,
+                intent=self.INTENT_LABELS[intent_indices[i]],
+                entities=entities,
+                confidence=intent_confidence
+            ))
+        
+        return results
     
     def _rule_based_predict(self, text: str, original_text: str) -> NLUOutput:
         """규칙 기반 예측 (폴백)"""
@@ -507,6 +569,132 @@ class AXEncoderNLU:
         return 0, 0
 
 
+class AXEncoderMicroBatcher:
+    """동시 요청을 짧은 시간 모아 한 번의 forward로 처리하는 마이크로 배처
+    
+    추론 워커 스레드들이 동시에 predict를 호출하면 전용 스레드가 최대 max_wait_ms 동안
+    요청을 모아 AXEncoderNLU.predict_batch로 처리한 뒤 요청별로 결과를 돌려줌
+    """
+    
+    def __init__(self, nlu: AXEncoderNLU, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        """
+        Args:
+            nlu: 배치 추론에 사용할 AXEncoderNLU
+            max_batch_size: 한 번에 처리할 최대 요청 수
+            max_wait_ms: 첫 요청 이후 추가 요청을 기다리는 최대 시간 (밀리초)
+        """
+        self.nlu = nlu
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        
+        self._requests: queue.Queue = queue.Queue()
+        self._closed = False
+        # _closed 확인과 요청 등록을 묶어 종료 신호 뒤에 요청이 들어가지 않도록 함
+        self._lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'batches': 0,
+            'max_batch_size': 0,
+            'busy_time': 0.0
+        }
+        self._worker = threading.Thread(target=self._batch_loop, name="ax-encoder-batcher", daemon=True)
+        self._worker.start()
+    
+    def submit(self, text: str) -> Future:
+        """분석 요청 등록 (결과는 Future로 반환)"""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("마이크로 배처가 종료되었습니다")
+            self._requests.put((text, future))
+        return future
+    
+    def predict(self, text: str, timeout: Optional[float] = None) -> NLUOutput:
+        """분석 요청 후 결과 대기"""
+        return self.submit(text).result(timeout=timeout)
+    
+    def _collect_batch(self) -> List[Tuple[str, Future]]:
+        """첫 요청을 기다린 뒤 max_wait 동안 최대 max_batch_size개까지 수집"""
+        batch = [self._requests.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def _batch_loop(self):
+        try:
+            while True:
+                batch = self._collect_batch()
+                # 종료 신호 (None)가 섞인 배치는 함께 모인 요청까지 처리한 뒤 종료
+                stop = any(item is None for item in batch)
+                batch = [item for item in batch if item is not None]
+                if batch:
+                    self._run_batch(batch)
+                if stop:
+                    return
+        finally:
+            self._fail_pending()
+    
+    def _run_batch(self, batch: List[Tuple[str, Future]]):
+        """배치 추론 후 요청별 Future에 결과 전달 (취소된 요청은 제외)"""
+        batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        
+        start_time = time.time()
+        try:
+            results = self.nlu.predict_batch([text for text, _ in batch], batch_size=len(batch))
+        except BaseException as e:
+            for _, future in batch:
+                future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        
+        elapsed = time.time() - start_time
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+        
+        self.stats['requests'] += len(batch)
+        self.stats['batches'] += 1
+        self.stats['max_batch_size'] = max(self.stats['max_batch_size'], len(batch))
+        self.stats['busy_time'] += elapsed
+    
+    def _fail_pending(self):
+        """배치 스레드 종료 시 남은 요청을 예외로 완료 (호출자가 무한 대기하지 않도록)"""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                item = self._requests.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(RuntimeError("마이크로 배처가 종료되었습니다"))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """배치 통계 (평균 배치 크기, 처리량)"""
+        stats = dict(self.stats)
+        stats['avg_batch_size'] = stats['requests'] / stats['batches'] if stats['batches'] else 0.0
+        stats['throughput_per_sec'] = stats['requests'] / stats['busy_time'] if stats['busy_time'] else 0.0
+        return stats
+    
+    def close(self):
+        """배처 종료 (대기 중인 요청은 처리 후 종료)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._requests.put(None)
+        self._worker.join(timeout=5.0)
+
+
 # 기존 시스템과의 호환성을 위한 래퍼
 class AXEncoderNLUWrapper:
     """기존 NaviyamNLU 인터페이스와 호환되는 래퍼"""
@@ -3,11 +3,11 @@ A.X Encoder NLU를 NaviyamNLU 인터페이스와 호환되도록 하는 어댑
 """
 
 import logging
-from typing import Optional
+from typing import Optional, List
 from pathlib import Path
 
 from data.data_structure import ExtractedInfo, ExtractedEntity, IntentType, ConfidenceLevel
-from models.ax_encoder_nlu import AXEncoderNLU
+from models.ax_encoder_nlu import AXEncoderNLU, AXEncoderMicroBatcher, NLUOutput
 
 logger = logging.getLogger(__name__)
 
@@ -15,15 +15,26 @@ logger = logging.getLogger(__name__)
 class AXEncoderNLUAdapter:
     """A.X Encoder NLU를 NaviyamNLU 인터페이스로 래핑"""
     
-    def __init__(self, model_path: Optional[str] = None):
+    def __init__(self, model_path: Optional[str] = None, use_micro_batching: bool = True,
+                 max_batch_size: int = 16, max_wait_ms: float = 5.0):
         """
         초기화
         
         Args:
             model_path: A.X Encoder 모델 경로
+            use_micro_batching: 동시 요청을 모아 배치 forward로 처리할지 여부 (모델 로드 시에만 적용)
+            max_batch_size: 마이크로 배치 최대 크기
+            max_wait_ms: 마이크로 배치 수집 대기 시간 (밀리초)
         """
         self.encoder_nlu = AXEncoderNLU(model_path)
-        logger.info(f"A.X Encoder NLU 어댑터 초기화: {model_path}")
+        
+        # 규칙 기반 모드에서는 배치 이점이 없으므로 직접 호출
+        self.micro_batcher = None
+        if use_micro_batching and self.encoder_nlu.model is not None:
+            self.micro_batcher = AXEncoderMicroBatcher(
+                self.encoder_nlu, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+            )
+        logger.info(f"A.X Encoder NLU 어댑터 초기화: {model_path} (마이크로 배칭: {self.micro_batcher is not None})")
         
         # 의도 매핑 (A.X Encoder -> IntentType)
         # ax_encoder_nlu.py의 INTENT_LABELS와 매칭
@@ -63,9 +74,31 @@ class AXEncoderNLUAdapter:
         Returns:
             ExtractedInfo 객체
         """
-        # A.X Encoder로 예측
-        result = self.encoder_nlu.predict(text)
+        # A.X Encoder로 예측 (동시 요청은 마이크로 배처가 한 번의 forward로 묶음)
+        if self.micro_batcher is not None:
+            result = self.micro_batcher.predict(text)
+        else:
+            result = self.encoder_nlu.predict(text)
         
+        return self._to_extracted_info(text, result, user_id)
+    
+    def extract_batch(self, texts: List[str], user_id: str = None, batch_size: int = 32) -> List[ExtractedInfo]:
+        """
+        여러 문장을 배치 forward로 일괄 분석 (오프라인 처리용)
+        
+        Args:
+            texts: 입력 텍스트 목록
+            user_id: 사용자 ID (옵션)
+            batch_size: forward 1회에 넣을 최대 문장 수
+            
+        Returns:
+            입력 순서대로 ExtractedInfo 목록
+        """
+        results = self.encoder_nlu.predict_batch(texts, batch_size=batch_size)
+        return [self._to_extracted_info(text, result, user_id) for text, result in zip(texts, results)]
+    
+    def _to_extracted_info(self, text: str, result: NLUOutput, user_id: str = None) -> ExtractedInfo:
+        """A.X Encoder 결과를 ExtractedInfo로 변환"""
         # 의도 변환
         intent_type = self.intent_mapping.get(result.intent, IntentType.UNKNOWN)
         
@@ -188,5 +221,11 @@ class AXEncoderNLUAdapter:
             "model_path": self.encoder_nlu.model_path,
             "device": str(self.encoder_nlu.device),
             "size": "~600MB",
-            "speed": "~36ms"
-        }
\ No newline at end of file
+            "speed": "~36ms",
+            "micro_batching": self.micro_batcher.get_stats() if self.micro_batcher else None
+        }
+    
+    def close(self):
+        """마이크로 배처 종료"""
+        if self.micro_batcher is not None:
+            self.micro_batcher.close()
\ No newline at end of file
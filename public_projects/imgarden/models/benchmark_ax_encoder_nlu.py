@@ -0,0 +1,153 @@
+"""
+A.X Encoder NLU 배치 추론 벤치마크
+문장별 predict, 오프라인 predict_batch, 동시 요청 마이크로 배칭의 CPU 처리량 비교
+
+사용법:
+    python models/benchmark_ax_encoder_nlu.py --model_path ./models/ax_encoder_base --random_init --layers 6
+"""
+
+import argparse
+import logging
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any
+
+import torch
+from transformers import AutoTokenizer, AutoModel, AutoConfig
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.ax_encoder_nlu import AXEncoderNLU, AXEncoderMicroBatcher, AXEncoderMultiTaskModel
+
+BENCHMARK_TEXTS = [
+    "치킨 먹고 싶어",
+    "만원으로 뭐 먹을 수 있어?",
+    "근처에 맛집추 해줘",
+    "오늘 점심 뭐먹",
+    "쿠폰 있어?",
+    "김밥천국 몇 시까지 해?",
+    "학교 앞 떡볶이집 어디야",
+    "존맛 피자집 알려줘 ㅋㅋ",
+    "잔액 얼마 남았어",
+    "고마워!",
+    "친구랑 같이 갈 건데 8000원 이하로 한식 추천해줘",
+    "매운 거 말고 달달한 디저트 카페 있을까",
+]
+
+
+def build_random_init_model(nlu: AXEncoderNLU, model_path: str, layers: int):
+    """가중치가 없을 때 설정 파일로 무작위 초기화 모델 구성 (처리량 측정 전용)"""
+    config = AutoConfig.from_pretrained(model_path)
+    if layers:
+        config.num_hidden_layers = layers
+    nlu.tokenizer = AutoTokenizer.from_pretrained(model_path)
+    nlu.model = AXEncoderMultiTaskModel(
+        encoder=AutoModel.from_config(config),
+        num_intents=len(nlu.INTENT_LABELS),
+        num_entity_labels=len(nlu.ENTITY_LABELS)
+    ).to(nlu.device)
+    nlu.model.eval()
+
+
+def _summary(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """지연시간(ms) 요약 및 처리량(문장/초)"""
+    latencies = sorted(latencies)
+    return {
+        'mean_ms': statistics.mean(latencies),
+        'p50_ms': latencies[len(latencies) // 2],
+        'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        'throughput': len(latencies) / elapsed if elapsed else float('inf')
+    }
+
+
+def measure_sequential(nlu: AXEncoderNLU, texts: List[str]) -> Dict[str, float]:
+    """문장별 predict (기존 방식)"""
+    latencies = []
+    start = time.perf_counter()
+    for text in texts:
+        t0 = time.perf_counter()
+        nlu.predict(text)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return _summary(latencies, time.perf_counter() - start)
+
+
+def measure_batch(nlu: AXEncoderNLU, texts: List[str], batch_size: int) -> Dict[str, float]:
+    """오프라인 predict_batch (문장별 지연시간은 배치 시간 / 문장 수)"""
+    start = time.perf_counter()
+    results = nlu.predict_batch(texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    return _summary([r.processing_time * 1000 for r in results], elapsed)
+
+
+def measure_concurrent(predict_fn, texts: List[str], concurrency: int) -> Dict[str, float]:
+    """동시 요청 concurrency개로 predict_fn 호출 (추론 워커 풀 상황 재현)"""
+    def _call(text):
+        t0 = time.perf_counter()
+        predict_fn(text)
+        return (time.perf_counter() - t0) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(_call, texts))
+    return _summary(latencies, time.perf_counter() - start)
+
+
+def run_benchmark(model_path: str = "./models/ax_encoder_base", random_init: bool = False,
+                  layers: int = 0, repeat: int = 8, batch_size: int = 32,
+                  concurrency: int = 16, max_wait_ms: float = 5.0) -> Dict[str, Any]:
+    """문장별 / 배치 / 마이크로 배칭 처리량 비교"""
+    torch.set_grad_enabled(False)
+    nlu = AXEncoderNLU(model_path)
+    if nlu.model is None:
+        if not random_init:
+            raise RuntimeError(f"모델을 로드할 수 없습니다: {model_path} (--random_init으로 처리량만 측정 가능)")
+        build_random_init_model(nlu, model_path, layers)
+
+    texts = BENCHMARK_TEXTS * repeat
+    nlu.predict_batch(BENCHMARK_TEXTS, batch_size=batch_size)  # 워밍업
+
+    result = {
+        'texts': len(texts),
+        'device': str(nlu.device),
+        'sequential': measure_sequential(nlu, texts),
+        'predict_batch': measure_batch(nlu, texts, batch_size),
+        'concurrent_unbatched': measure_concurrent(nlu.predict, texts, concurrency)
+    }
+
+    batcher = AXEncoderMicroBatcher(nlu, max_batch_size=concurrency, max_wait_ms=max_wait_ms)
+    try:
+        result['concurrent_micro_batched'] = measure_concurrent(batcher.predict, texts, concurrency)
+        result['micro_batcher'] = batcher.get_stats()
+    finally:
+        batcher.close()
+
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="A.X Encoder NLU 배치 추론 벤치마크")
+    parser.add_argument("--model_path", default="./models/ax_encoder_base")
+    parser.add_argument("--random_init", action="store_true", help="가중치가 없으면 무작위 초기화 모델로 측정")
+    parser.add_argument("--layers", type=int, default=0, help="무작위 초기화 시 인코더 레이어 수 (0이면 설정값)")
+    parser.add_argument("--repeat", type=int, default=8, help="문장 세트 반복 횟수")
+    parser.add_argument("--batch_size", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=16, help="동시 요청 수 (= 마이크로 배치 최대 크기)")
+    parser.add_argument("--max_wait_ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    result = run_benchmark(args.model_path, args.random_init, args.layers, args.repeat,
+                           args.batch_size, args.concurrency, args.max_wait_ms)
+
+    print(f"=== A.X Encoder NLU 벤치마크 ({result['texts']}문장, {result['device']}) ===")
+    for name in ('sequential', 'predict_batch', 'concurrent_unbatched', 'concurrent_micro_batched'):
+        stats = result[name]
+        print(f"{name}: {stats['throughput']:.1f}문장/초, 평균 {stats['mean_ms']:.1f}ms, "
+              f"p50 {stats['p50_ms']:.1f}ms, p95 {stats['p95_ms']:.1f}ms")
+    batcher_stats = result['micro_batcher']
+    print(f"마이크로 배치: {batcher_stats['batches']}회, 평균 크기 {batcher_stats['avg_batch_size']:.1f}, "
+          f"최대 {batcher_stats['max_batch_size']}")
+    print(f"predict_batch 처리량 개선: {result['predict_batch']['throughput'] / result['sequential']['throughput']:.1f}배")
@@ -10,13 +10,15 @@ from transformers import (
 )
 from peft import get_peft_model, PeftModel
 import logging
-from typing import List, Dict, Optional, Tuple, Union
+from typing import Iterator, List, Dict, Optional, Tuple, Union
+import copy
 import time
 import gc
 import re
 from pathlib import Path
 
 from .models_config import ModelConfigManager
+from .text_streaming import TextStream
 
 logger = logging.getLogger(__name__)
 
@@ -186,24 +188,7 @@ class KoAlpacaModel:
 
         try:
             # 입력 토큰화
-            inputs = self.tokenizer(
-                prompt,
-                return_tensors="pt",
-                padding=True,
-                truncation=True,
-                max_length=self.config.max_length - (max_new_tokens or 200),
-                return_token_type_ids=False
-            )
-
-            # print(f"DEBUG: inputs type = {type(inputs)}")
-            # print(f"DEBUG: inputs keys = {list(inputs.keys()) if hasattr(inputs, 'keys') else 'NO KEYS'}")
-            # print(f"DEBUG: inputs = {inputs}")
-
-            if 'token_type_ids' in inputs:
-                del inputs['token_type_ids']
-
-            if torch.cuda.is_available():
-                inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
+            inputs = self._prepare_inputs(prompt, max_new_tokens)
 
             # print(f"DEBUG: After GPU move - inputs type = {type(inputs)}")
             # print(
@@ -281,6 +266,72 @@ class KoAlpacaModel:
                 "generation_time": time.time() - start_time
             }
 
+    def generate_stream(
+        self,
+        prompt: str,
+        max_new_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        stop_words: Optional[List[str]] = None
+    ) -> Iterator[str]:
+        """텍스트 스트리밍 생성 (디코딩된 텍스트 조각을 생성되는 대로 반환)
+
+        정지 단어(나비얌 정지 단어 + stop_words)는 디코딩된 텍스트에서 점진적으로 검사하며,
+        감지되면 그 앞까지만 반환하고 생성을 멈춤. 후처리(_postprocess_text)는 적용하지 않음
+        """
+        if self.model is None:
+            raise RuntimeError("모델이 로드되지 않음. load_model()을 먼저 호출하세요")
+
+        start_time = time.time()
+        inputs = self._prepare_inputs(prompt, max_new_tokens)
+
+        # 동시 요청이 공유 설정을 바꾸지 않도록 복사본 사용
+        generation_config = copy.deepcopy(self.generation_config)
+        if max_new_tokens:
+            generation_config.max_new_tokens = max_new_tokens
+        if temperature:
+            generation_config.temperature = temperature
+
+        generate_kwargs = {
+            'input_ids': inputs['input_ids'],
+            'generation_config': generation_config
+        }
+        if 'attention_mask' in inputs:
+            generate_kwargs['attention_mask'] = inputs['attention_mask']
+
+        stream = TextStream(
+            self.peft_model if self.peft_model else self.model,
+            self.tokenizer,
+            generate_kwargs,
+            stop_words=self.naviyam_stop_words + (stop_words or [])
+        )
+        yield from stream
+
+        generation_time = time.time() - start_time
+        self._update_stats(generation_time, stream.tokens_generated)
+        logger.debug(
+            f"스트리밍 완료: {stream.tokens_generated}토큰, {generation_time:.2f}초 "
+            f"(첫 토큰 {stream.first_token_latency or 0:.2f}초, {stream.finish_reason})"
+        )
+
+    def _prepare_inputs(self, prompt: str, max_new_tokens: Optional[int] = None) -> Dict:
+        """프롬프트 토큰화 후 모델 디바이스로 이동"""
+        inputs = self.tokenizer(
+            prompt,
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=self.config.max_length - (max_new_tokens or 200),
+            return_token_type_ids=False
+        )
+
+        if 'token_type_ids' in inputs:
+            del inputs['token_type_ids']
+
+        if torch.cuda.is_available():
+            inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
+
+        return inputs
+
     def _postprocess_text(self, text: str) -> str:
         """생성된 텍스트 후처리"""
         # 불필요한 공백 제거
@@ -0,0 +1,172 @@
+"""
+LLM 토큰 스트리밍
+백그라운드 스레드에서 model.generate를 실행하고 디코딩된 텍스트 조각을 생성되는 대로 전달
+- TextIteratorStreamer 기반 (프롬프트/특수 토큰 제외)
+- 정지 단어는 디코딩된 텍스트에서 점진적으로 검사 (토큰 경계에 걸친 정지 단어도 감지)
+- 정지 단어 감지, 소비자 중단 시 다음 토큰에서 생성 중단
+"""
+
+import threading
+import time
+import logging
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+
+logger = logging.getLogger(__name__)
+
+
+class StopSequenceFilter:
+    """텍스트 조각 단위 정지 단어 필터
+
+    정지 단어의 앞부분일 수 있는 꼬리는 다음 조각이 올 때까지 보류하므로
+    내보낸 텍스트에는 정지 단어(및 그 일부)가 포함되지 않음
+    """
+
+    def __init__(self, stop_words: Iterable[str]):
+        self.stop_words = [word for word in dict.fromkeys(stop_words) if word]
+        self._buffer = ""
+        self.stopped = False
+        self.stop_word: Optional[str] = None
+
+    def feed(self, text: str) -> str:
+        """새 조각을 받아 내보내도 되는 텍스트 반환 (정지 단어 감지 후에는 항상 빈 문자열)"""
+        if self.stopped or not text:
+            return ""
+        self._buffer += text
+
+        cut = -1
+        for word in self.stop_words:
+            index = self._buffer.find(word)
+            if index >= 0 and (cut < 0 or index < cut):
+                cut, self.stop_word = index, word
+        if cut >= 0:
+            self.stopped = True
+            emitted, self._buffer = self._buffer[:cut], ""
+            return emitted
+
+        keep = self._pending_prefix_length()
+        emitted = self._buffer[:len(self._buffer) - keep]
+        self._buffer = self._buffer[len(emitted):]
+        return emitted
+
+    def flush(self) -> str:
+        """생성 종료 시 보류 중인 꼬리 반환"""
+        if self.stopped:
+            return ""
+        emitted, self._buffer = self._buffer, ""
+        return emitted
+
+    def _pending_prefix_length(self) -> int:
+        """버퍼 끝이 정지 단어의 앞부분과 겹치는 최대 길이"""
+        longest = 0
+        for word in self.stop_words:
+            for length in range(min(len(word) - 1, len(self._buffer)), longest, -1):
+                if self._buffer.endswith(word[:length]):
+                    longest = length
+                    break
+        return longest
+
+
+class StreamStoppingCriteria(StoppingCriteria):
+    """외부 신호로 생성을 멈추는 정지 조건 (생성 스텝 수 집계)"""
+
+    def __init__(self):
+        self.stop_event = threading.Event()
+        self.num_steps = 0
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        self.num_steps += 1
+        return self.stop_event.is_set()
+
+
+class TextStream:
+    """백그라운드 생성 스트림 (순회하면 디코딩된 텍스트 조각 반환)
+
+    사용법:
+        stream = TextStream(model, tokenizer, generate_kwargs, stop_words=["사용자:"])
+        for delta in stream:
+            ...
+        stream.text, stream.tokens_generated, stream.first_token_latency
+    """
+
+    def __init__(self, model, tokenizer, generate_kwargs: Dict[str, Any],
+                 stop_words: Optional[Iterable[str]] = None, timeout: Optional[float] = 60.0):
+        """
+        Args:
+            model: generate()를 지원하는 모델 (LoRA 모델 포함)
+            tokenizer: 디코딩용 토크나이저
+            generate_kwargs: model.generate 인자 (streamer/stopping_criteria는 여기서 추가)
+            stop_words: 텍스트 단위 정지 단어
+            timeout: 다음 조각 대기 최대 시간 (초, None이면 무제한)
+        """
+        self.streamer = TextIteratorStreamer(
+            tokenizer, skip_prompt=True, timeout=timeout, skip_special_tokens=True
+        )
+        self.monitor = StreamStoppingCriteria()
+        self.stop_filter = StopSequenceFilter(stop_words or [])
+
+        criteria = StoppingCriteriaList(generate_kwargs.get('stopping_criteria') or [])
+        criteria.append(self.monitor)
+        self._generate_kwargs = dict(generate_kwargs, streamer=self.streamer, stopping_criteria=criteria)
+        self._model = model
+
+        self.text = ""
+        self.finish_reason: Optional[str] = None  # "stop" (정지 단어/EOS), "length", "cancelled"
+        self.first_token_latency: Optional[float] = None
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def tokens_generated(self) -> int:
+        return self.monitor.num_steps
+
+    def _run(self):
+        try:
+            self._model.generate(**self._generate_kwargs)
+        except BaseException as e:  # 소비자 쪽에서 다시 발생
+            self._error = e
+            self.streamer.end()
+
+    def cancel(self):
+        """다음 토큰에서 생성 중단"""
+        self.monitor.stop_event.set()
+
+    def __iter__(self) -> Iterator[str]:
+        if self._thread is not None:
+            raise RuntimeError("TextStream은 한 번만 순회할 수 있습니다")
+        start_time = time.time()
+        self._thread = threading.Thread(target=self._run, name="llm-stream", daemon=True)
+        self._thread.start()
+
+        completed = False
+        try:
+            for chunk in self.streamer:
+                delta = self.stop_filter.feed(chunk)
+                if delta:
+                    if self.first_token_latency is None:
+                        self.first_token_latency = time.time() - start_time
+                    self.text += delta
+                    yield delta
+                if self.stop_filter.stopped:
+                    logger.debug(f"정지 단어 감지로 스트리밍 중단: {self.stop_filter.stop_word!r}")
+                    self.finish_reason = "stop"
+                    break
+            else:
+                tail = self.stop_filter.flush()
+                if tail:
+                    self.text += tail
+                    yield tail
+            completed = True
+        finally:
+            # 정지 단어 감지 또는 소비자 중단(close) 시 생성 스레드도 멈춤
+            self.cancel()
+            self._thread.join()
+            if not completed:
+                self.finish_reason = "cancelled"
+
+        if self._error is not None:
+            raise self._error
+        if self.finish_reason is None:
+            max_new_tokens = getattr(self._generate_kwargs.get('generation_config'), 'max_new_tokens', None)
+            self.finish_reason = "length" if max_new_tokens and self.tokens_generated >= max_new_tokens else "stop"
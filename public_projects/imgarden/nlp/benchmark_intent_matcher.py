@@ -0,0 +1,135 @@
+"""
+의도 매처 벤치마크
+기존 패턴 순회(키워드 in 검사 + 미컴파일 re.search) 방식과 사전 컴파일 매처의 의도 점수 계산 시간 비교
+data_generator로 생성한 학습 대화 문장을 코퍼스로 사용하며, 두 방식의 점수 일치 여부도 함께 확인
+
+사용법:
+    python nlp/benchmark_intent_matcher.py --repeat 50
+"""
+
+import argparse
+import json
+import logging
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from data.data_structure import NaviyamKnowledge, NaviyamShop, NaviyamMenu
+from training.data_generator import generate_training_dataset
+from nlp.nlu import NaviyamNLU
+
+
+def build_knowledge(restaurants_path: str) -> NaviyamKnowledge:
+    """매장 데이터 파일로 최소 지식베이스 구성 (코퍼스 생성용)"""
+    with open(restaurants_path, 'r', encoding='utf-8') as f:
+        restaurants = json.load(f).get('restaurants', [])
+
+    knowledge = NaviyamKnowledge()
+    menu_id = 0
+    for shop_id, restaurant in enumerate(restaurants):
+        hours = restaurant.get('hours', {})
+        knowledge.shops[shop_id] = NaviyamShop(
+            id=shop_id,
+            name=restaurant.get('shopName', ''),
+            category=restaurant.get('category', ''),
+            is_good_influence_shop=restaurant.get('attributes', {}).get('isGoodShop', False),
+            is_food_card_shop='Y' if restaurant.get('attributes', {}).get('acceptsMealCard') else 'N',
+            address=restaurant.get('location', {}).get('address', ''),
+            open_hour=hours.get('open', ''),
+            close_hour=hours.get('close', ''),
+            owner_message=restaurant.get('description')
+        )
+        for menu in restaurant.get('menus', []):
+            knowledge.menus[menu_id] = NaviyamMenu(
+                id=menu_id, shop_id=shop_id, name=menu.get('name', ''),
+                price=menu.get('price', 0), is_popular=True
+            )
+            menu_id += 1
+    return knowledge
+
+
+def legacy_intent_scores(intent_patterns, text: str) -> Dict[Any, float]:
+    """기존 NaviyamNLU._extract_intent 점수 계산"""
+    text_lower = text.lower()
+    intent_scores = {}
+    for pattern in intent_patterns:
+        score = 0
+        for keyword in pattern.keywords:
+            if keyword in text_lower:
+                score += 1
+        for regex_pattern in pattern.patterns:
+            if re.search(regex_pattern, text_lower):
+                score += 2
+        final_score = score * pattern.weight
+        if final_score > 0:
+            intent_scores[pattern.intent] = final_score
+    return intent_scores
+
+
+def _measure(func, texts: List[str], repeat: int) -> Dict[str, float]:
+    """문장별 지연시간 측정 (us)"""
+    latencies = []
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            func(text)
+            latencies.append((time.perf_counter() - start) * 1e6)
+    latencies.sort()
+    return {
+        'mean_us': statistics.mean(latencies),
+        'p50_us': latencies[len(latencies) // 2],
+        'p95_us': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    }
+
+
+def run_benchmark(restaurants_path: str = "data/restaurants_optimized.json", repeat: int = 50) -> Dict[str, Any]:
+    """기존 패턴 순회 방식과 사전 컴파일 매처 비교"""
+    dataset = generate_training_dataset(build_knowledge(restaurants_path))
+    texts = [data.input_text for data in dataset]
+
+    build_start = time.perf_counter()
+    nlu = NaviyamNLU(use_preprocessor=False)
+    build_ms = (time.perf_counter() - build_start) * 1000
+    matcher = nlu.intent_matcher
+
+    mismatches = sum(
+        1 for text in texts
+        if legacy_intent_scores(nlu.intent_patterns, text) != matcher.score_intents(text.lower())
+    )
+
+    # 기존 방식은 re 모듈 캐시 조회 비용까지 포함 (실제 호출 경로와 동일)
+    legacy_stats = _measure(lambda text: legacy_intent_scores(nlu.intent_patterns, text), texts, repeat)
+    compiled_stats = _measure(lambda text: matcher.score_intents(text.lower()), texts, repeat)
+
+    return {
+        'texts': len(texts),
+        'keywords': len(matcher.automaton.keywords),
+        'nlu_init_ms': build_ms,
+        'mismatches': mismatches,
+        'legacy_loop': legacy_stats,
+        'compiled_matcher': compiled_stats,
+        'speedup_mean': legacy_stats['mean_us'] / compiled_stats['mean_us'] if compiled_stats['mean_us'] else float('inf')
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="의도 매처 벤치마크")
+    parser.add_argument("--restaurants_path", default="data/restaurants_optimized.json")
+    parser.add_argument("--repeat", type=int, default=50, help="코퍼스 반복 횟수")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    result = run_benchmark(args.restaurants_path, args.repeat)
+
+    print(f"=== 의도 매처 벤치마크 ({result['texts']}문장 x {args.repeat}회, 키워드 {result['keywords']}개) ===")
+    print(f"NaviyamNLU 초기화 (매처 컴파일 포함): {result['nlu_init_ms']:.1f}ms")
+    print(f"점수 불일치: {result['mismatches']}건")
+    for name in ('legacy_loop', 'compiled_matcher'):
+        stats = result[name]
+        print(f"{name}: 평균 {stats['mean_us']:.1f}us, p50 {stats['p50_us']:.1f}us, p95 {stats['p95_us']:.1f}us")
+    print(f"평균 지연시간 개선: {result['speedup_mean']:.1f}배")
@@ -0,0 +1,238 @@
+"""
+사전 컴파일 의도 매처
+NaviyamNLU의 의도 키워드/정규식 패턴을 생성 시점에 한 번만 컴파일
+- 모든 의도·엔티티 키워드를 Aho-Corasick 오토마톤으로 텍스트 1회 순회에 검색
+- 리터럴 대안 패턴((추천|소개) 등)은 오토마톤 결과로 판정
+- 나머지 정규식은 의도별 하나의 lookahead 결합 패턴으로 1회 매칭
+"""
+
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+# 엔티티 패턴 중 첫 매칭 그룹만 사용하는 카테고리 (오토마톤으로 판정 가능)
+FIRST_MATCH_ENTITY_CATEGORIES = ('food_types', 'locations', 'time_expressions')
+
+# 정규식 메타문자가 없는 '(a|b|c)' 형태
+_LITERAL_ALTERNATION = re.compile(r'^\(([^\\()\[\]{}.*+?^$|]+(?:\|[^\\()\[\]{}.*+?^$|]+)*)\)$')
+
+
+def strip_wildcards(pattern: str) -> str:
+    """re.search 기준으로 의미 없는 앞뒤 '.*' 제거"""
+    if pattern.startswith('.*'):
+        pattern = pattern[2:]
+    if pattern.endswith('.*') and not pattern.endswith('\\.*'):
+        pattern = pattern[:-2]
+    return pattern
+
+
+def literal_alternatives(pattern: str) -> Optional[List[str]]:
+    """'(a|b|c)' 형태의 리터럴 대안 패턴이면 대안 목록, 아니면 None"""
+    match = _LITERAL_ALTERNATION.match(pattern)
+    return match.group(1).split('|') if match else None
+
+
+class AhoCorasick:
+    """다중 키워드 동시 검색 오토마톤"""
+
+    def __init__(self, keywords: Iterable[str]):
+        """
+        Args:
+            keywords: 검색할 키워드 (빈 문자열 제외, 중복 제거)
+        """
+        self.keywords: List[str] = list(dict.fromkeys(k for k in keywords if k))
+        self.keyword_ids = {keyword: i for i, keyword in enumerate(self.keywords)}
+
+        # 트라이 구축
+        self._goto: List[Dict[str, int]] = [{}]
+        self._output: List[Tuple[int, ...]] = [()]
+        for keyword_id, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._output.append(())
+                state = next_state
+            self._output[state] += (keyword_id,)
+
+        # 실패 링크 (BFS) 및 출력 병합
+        self._fail = [0] * len(self._goto)
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, next_state in self._goto[state].items():
+                pending.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                self._output[next_state] += self._output[fail]
+
+    def first_positions(self, text: str) -> Dict[int, int]:
+        """텍스트에 나타난 키워드별 첫 시작 위치 {keyword_id: start}"""
+        goto, fail, output, keywords = self._goto, self._fail, self._output, self.keywords
+        positions: Dict[int, int] = {}
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword_id in output[state]:
+                if keyword_id not in positions:
+                    positions[keyword_id] = end - len(keywords[keyword_id]) + 1
+        return positions
+
+
+class _IntentRule:
+    """의도 하나의 컴파일된 점수 규칙"""
+
+    __slots__ = ('intent', 'weight', 'keyword_ids', 'literal_patterns', 'regex', 'regex_fallback', 'always')
+
+    def __init__(self, intent: Any, weight: float):
+        self.intent = intent
+        self.weight = weight
+        self.keyword_ids: List[int] = []  # 키워드 목록의 중복도 그대로 유지
+        self.literal_patterns: List[List[int]] = []  # 패턴별 리터럴 대안 keyword_id
+        self.regex: Optional[Pattern] = None  # 나머지 정규식 결합 패턴
+        self.regex_fallback: List[Pattern] = []  # 결합 불가 시 개별 패턴
+        self.always = 0  # 빈 키워드 (항상 매칭)
+
+
+class CompiledIntentMatcher:
+    """의도 점수와 엔티티 첫 매칭을 사전 컴파일 구조로 계산
+
+    NaviyamNLU._extract_intent의 패턴 순회와 같은 점수를 반환
+    (패턴 목록이 바뀌면 매처를 다시 생성해야 함)
+    """
+
+    def __init__(self, intent_patterns: List[Any], entity_patterns: Optional[Dict[str, List[str]]] = None):
+        """
+        Args:
+            intent_patterns: IntentPattern 목록 (intent, keywords, patterns, weight)
+            entity_patterns: 엔티티 카테고리별 정규식 목록
+        """
+        entity_patterns = entity_patterns or {}
+        keywords: List[str] = []
+        for pattern in intent_patterns:
+            keywords.extend(pattern.keywords)
+            for regex_pattern in pattern.patterns:
+                keywords.extend(literal_alternatives(strip_wildcards(regex_pattern)) or [])
+        for category in FIRST_MATCH_ENTITY_CATEGORIES:
+            for regex_pattern in entity_patterns.get(category, []):
+                keywords.extend(literal_alternatives(regex_pattern) or [])
+        self.automaton = AhoCorasick(keywords)
+        keyword_ids = self.automaton.keyword_ids
+
+        # 의도별 규칙
+        self.rules: List[_IntentRule] = []
+        for pattern in intent_patterns:
+            rule = _IntentRule(pattern.intent, pattern.weight)
+            for keyword in pattern.keywords:
+                if keyword:
+                    rule.keyword_ids.append(keyword_ids[keyword])
+                else:
+                    rule.always += 1
+
+            regex_cores = []
+            for regex_pattern in pattern.patterns:
+                core = strip_wildcards(regex_pattern)
+                alternatives = literal_alternatives(core)
+                if alternatives:
+                    rule.literal_patterns.append([keyword_ids[a] for a in alternatives])
+                else:
+                    regex_cores.append(core)
+
+            if regex_cores:
+                # 패턴마다 '있으면 캡처, 없으면 통과'하는 lookahead: 텍스트 시작에서 1회 match로 전체 판정
+                # (건너뛰기는 [\s\S]로 줄바꿈을 넘되, 패턴 내부의 '.' 의미는 그대로 유지)
+                combined = ''.join(f'(?:(?=[\\s\\S]*?(?P<p{i}>{core}))|)' for i, core in enumerate(regex_cores))
+                try:
+                    rule.regex = re.compile(combined)
+                except re.error:
+                    rule.regex_fallback = [re.compile(core) for core in regex_cores]
+            self.rules.append(rule)
+
+        # 엔티티 패턴
+        self.entity_regexes: Dict[str, List[Pattern]] = {
+            category: [re.compile(p) for p in patterns] for category, patterns in entity_patterns.items()
+        }
+        self._first_match_rules: Dict[str, List[Tuple[Optional[List[Tuple[int, str]]], Pattern]]] = {}
+        for category in FIRST_MATCH_ENTITY_CATEGORIES:
+            if category not in entity_patterns:
+                continue
+            rules = []
+            for regex_pattern, compiled in zip(entity_patterns[category], self.entity_regexes[category]):
+                alternatives = literal_alternatives(regex_pattern)
+                literal = [(keyword_ids[a], a) for a in alternatives] if alternatives else None
+                rules.append((literal, compiled))
+            self._first_match_rules[category] = rules
+
+        # 같은 텍스트에 대한 의도/엔티티 연속 호출 시 오토마톤 결과 재사용
+        self._last_scan: Tuple[Optional[str], Dict[int, int]] = (None, {})
+
+    def _scan(self, text: str) -> Dict[int, int]:
+        last_text, positions = self._last_scan
+        if last_text != text:
+            positions = self.automaton.first_positions(text)
+            self._last_scan = (text, positions)
+        return positions
+
+    def score_intents(self, text: str) -> Dict[Any, float]:
+        """의도별 점수 (키워드 1점, 정규식 2점, 가중치 적용, 0점 의도 제외)"""
+        positions = self._scan(text)
+        intent_scores = {}
+        for rule in self.rules:
+            score = rule.always
+            for keyword_id in rule.keyword_ids:
+                if keyword_id in positions:
+                    score += 1
+
+            for alternatives in rule.literal_patterns:
+                for keyword_id in alternatives:
+                    if keyword_id in positions:
+                        score += 2
+                        break
+
+            if rule.regex is not None:
+                match = rule.regex.match(text)
+                score += 2 * sum(1 for group in match.groupdict().values() if group is not None)
+            for compiled in rule.regex_fallback:
+                if compiled.search(text):
+                    score += 2
+
+            final_score = score * rule.weight
+            if final_score > 0:
+                intent_scores[rule.intent] = final_score
+        return intent_scores
+
+    def first_entity_match(self, category: str, text: str) -> Optional[str]:
+        """카테고리 패턴을 순서대로 검사해 첫 매칭의 그룹 1 반환 (re.search와 동일한 결과)"""
+        rules = self._first_match_rules.get(category)
+        if rules is None:
+            for compiled in self.entity_regexes.get(category, []):
+                match = compiled.search(text)
+                if match:
+                    return match.group(1)
+            return None
+
+        positions = self._scan(text)
+        for literal, compiled in rules:
+            if literal is None:
+                match = compiled.search(text)
+                if match:
+                    return match.group(1)
+                continue
+
+            # 가장 왼쪽 위치, 같은 위치면 앞선 대안 (정규식 대안 우선순위)
+            best = None
+            for keyword_id, alternative in literal:
+                start = positions.get(keyword_id)
+                if start is not None and (best is None or start < best[0]):
+                    best = (start, alternative)
+            if best is not None:
+                return best[1]
+        return None
@@ -4,12 +4,29 @@ LLM 기반 입력 정규화 모듈
 """
 
 import json
-from typing import Dict, List, Optional, Any
+import re
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 import logging
 
+from .intent_matcher import AhoCorasick
+
 logger = logging.getLogger(__name__)
 
+# LLM 정규화 판단용 복잡성 표현 (지표별 단어 목록)
+COMPLEXITY_SIGNAL_WORDS = {
+    "reference": ["아까", "그거", "저기", "이거"],  # 참조 표현
+    "compound": ["이랑", "하고", "그리고", "근데", "그런데"],  # 복합 표현
+    "headcount": ["명이랑", "분이랑", "사람"],  # 인원 표현
+    "taste": ["매운", "안매운", "순한", "담백한", "짜게", "싱겁게"],  # 맛 선호도
+    "urgency": ["급해", "빨리", "천천히", "나중에"],  # 시급성
+}
+
+# 아동 응답 정제 규칙 (스트리밍 중에도 같은 규칙 적용)
+CHILD_RESPONSE_STOP_INDICATORS = ["사용자:", "User:", "나비얌:", "AI:", "\n\n", "###"]
+CHILD_RESPONSE_MAX_LENGTH = 200
+CHILD_RESPONSE_MIN_STREAM_LENGTH = 11  # 챗봇이 LLM 응답을 채택하는 길이 (10자 초과)보다 짧으면 전송 보류
+
 @dataclass
 class LLMNormalizedOutput:
     """LLM이 구조화한 출력"""
@@ -24,6 +41,9 @@ class LLMNormalizer:
 
     def __init__(self, model=None):
         self.model = model
+        self._signal_automaton = AhoCorasick(
+            word for words in COMPLEXITY_SIGNAL_WORDS.values() for word in words
+        )
 
     def normalize_user_input(
         self,
@@ -83,9 +103,14 @@ class LLMNormalizer:
         extracted_info,
         recommendations: List[Dict],
         conversation_context: List[Dict] = None,
-        user_profile = None
+        user_profile = None,
+        on_token: Optional[Callable[[str], None]] = None
     ) -> str:
-        """아동 친화적 응답 생성 (LLM 사용)"""
+        """아동 친화적 응답 생성 (LLM 사용)
+
+        on_token이 주어지고 모델이 스트리밍을 지원하면 정제 결과로 확정된 텍스트 조각마다 호출
+        (전달된 조각을 이어 붙이면 반환값과 같음)
+        """
 
         if not self.model:
             return ""
@@ -96,7 +121,10 @@ class LLMNormalizer:
                 extracted_info, recommendations, conversation_context, user_profile
             )
 
-            # LLM 실행
+            # LLM 실행 (스트리밍 가능하면 조각 단위로 전달)
+            if on_token is not None and hasattr(self.model, "generate_stream"):
+                return self._stream_child_response(prompt, on_token)
+
             llm_result = self.model.generate_text(
                 prompt=prompt,
                 max_new_tokens=150,
@@ -320,6 +348,89 @@ class LLMNormalizer:
                 "confidence": 0.3
             }
 
+    def _stream_child_response(self, prompt: str, on_token: Callable[[str], None]) -> str:
+        """LLM 응답을 스트리밍하며 정제 결과로 확정된 부분만 on_token으로 전달
+
+        정지 단어 이후, 특수문자/중괄호 조각, 200자 제한을 생성 중에 적용하고,
+        채택 여부(길이)나 첫 문장 절단이 정해지지 않은 부분은 보류했다가 마지막에 전달
+        """
+        raw = ""
+        sent = ""
+        # "\n\n"은 앞쪽 공백을 제거한 뒤 검사해야 하므로 모델 정지 단어에서 제외 (아래에서 검사)
+        stream = self.model.generate_stream(
+            prompt=prompt, max_new_tokens=150, temperature=0.7,
+            stop_words=[stop for stop in CHILD_RESPONSE_STOP_INDICATORS if stop.strip()]
+        )
+        try:
+            for delta in stream:
+                raw += delta
+                committed, finished = self._committed_child_text(raw)
+                if len(committed) > len(sent) and committed.startswith(sent):
+                    on_token(committed[len(sent):])
+                    sent = committed
+                if finished:
+                    break
+        finally:
+            # 중단 시 모델 생성도 멈춤
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+        response = self._clean_child_response(raw)
+        if (len(response.strip()) >= CHILD_RESPONSE_MIN_STREAM_LENGTH
+                and response.startswith(sent) and len(response) > len(sent)):
+            on_token(response[len(sent):])
+        return response
+
+    @staticmethod
+    def _committed_child_text(raw: str) -> Tuple[str, bool]:
+        """생성 중인 원문에서 최종 정제 결과의 앞부분으로 확정된 텍스트와 생성 중단 여부
+
+        _clean_child_response와 같은 규칙을 적용하되, 이후 조각에 따라 바뀔 수 있는 부분은 제외
+        """
+        text = raw.lstrip()
+
+        cut = -1
+        for stop in CHILD_RESPONSE_STOP_INDICATORS:
+            index = text.find(stop)
+            if index >= 0 and (cut < 0 or index < cut):
+                cut = index
+        finished = cut >= 0
+        if finished:
+            text = text[:cut]
+        else:
+            # 정지 단어의 앞부분일 수 있는 꼬리 보류
+            for stop in CHILD_RESPONSE_STOP_INDICATORS:
+                for length in range(min(len(stop) - 1, len(text)), 0, -1):
+                    if text.endswith(stop[:length]):
+                        text = text[:-length]
+                        break
+
+        text = re.sub(r'[#\[\]]\.?', '', text)
+        text = re.sub(r'\{.*?\}', '', text)
+        if not finished:
+            # 닫히지 않은 중괄호 (같은 줄에서 닫히면 제거됨) 이후 보류
+            brace = text.find('{')
+            while brace >= 0 and '\n' in text[brace:]:
+                brace = text.find('{', text.index('\n', brace))
+            if brace >= 0:
+                text = text[:brace]
+        text = re.sub(r'\s+', ' ', text).strip()
+
+        if len(text) < CHILD_RESPONSE_MIN_STREAM_LENGTH:
+            return "", finished
+
+        # 200자 초과 시 첫 문장만 남으므로 첫 문장까지만 확정 (문장이 없으면 200자까지)
+        # 마침표는 응답 끝이면 개인화 말투 조정에서 바뀔 수 있어 마지막에 전달
+        period = text.find('.')
+        if period < 0:
+            return text[:CHILD_RESPONSE_MAX_LENGTH], finished or len(text) > CHILD_RESPONSE_MAX_LENGTH
+        first_sentence = text[:period].rstrip()
+        finished = finished or len(text) > CHILD_RESPONSE_MAX_LENGTH
+        if len(first_sentence) < CHILD_RESPONSE_MIN_STREAM_LENGTH:
+            return "", finished
+        return first_sentence, finished
+
     def _clean_child_response(self, response: str) -> str:
         """아동 친화적 응답 정제"""
         if not response:
@@ -329,13 +440,11 @@ class LLMNormalizer:
         response = response.strip()
 
         # 정지 단어 이후 제거
-        stop_indicators = ["사용자:", "User:", "나비얌:", "AI:", "\n\n", "###"]
-        for stop in stop_indicators:
+        for stop in CHILD_RESPONSE_STOP_INDICATORS:
             if stop in response:
                 response = response.split(stop)[0].strip()
 
         # 특수 문자나 이상한 패턴 제거
-        import re
         response = re.sub(r'[#\[\]]\.?', '', response)  # #, [], 제거
         response = re.sub(r'\{.*?\}', '', response)  # 중괄호 내용 제거
         response = re.sub(r'\s+', ' ', response)  # 중복 공백 제거
@@ -343,12 +452,12 @@ class LLMNormalizer:
         # 너무 짧거나 긴 응답 처리  
         if len(response) < 8:  # 더 엄격하게
             return ""
-        elif len(response) > 200:  # 길이 제한 늘림
+        elif len(response) > CHILD_RESPONSE_MAX_LENGTH:  # 길이 제한 늘림
             sentences = response.split('.')
             if len(sentences) > 1:
                 response = sentences[0] + '.'
             else:
-                response = response[:200] + '...'
+                response = response[:CHILD_RESPONSE_MAX_LENGTH] + '...'
 
         # 마지막 정제
         response = response.strip()
@@ -357,22 +466,36 @@ class LLMNormalizer:
 
         return response
 
-    def should_use_llm_normalization(self, text: str) -> bool:
-        """LLM 정규화 사용 여부 결정"""
+    def should_use_llm_normalization(self, text: str, preprocess_result=None) -> bool:
+        """LLM 정규화 사용 여부 결정
+
+        Args:
+            text: 사용자 입력 원문
+            preprocess_result: 같은 입력의 전처리 결과 (있으면 판단 결과를 발화 단위로 캐시)
+        """
+        if preprocess_result is not None and preprocess_result.original_text == text:
+            return preprocess_result.memo(
+                "should_use_llm_normalization", lambda: self._is_complex_input(text)
+            )
+        return self._is_complex_input(text)
+
+    def _is_complex_input(self, text: str) -> bool:
+        """복잡성 지표 2개 이상 여부 (단어 지표는 텍스트 1회 순회로 검사)"""
 
         # 너무 짧은 입력은 LLM 불필요
         if len(text.strip()) < 5:
             return False
 
+        keywords = self._signal_automaton.keywords
+        hits = {keywords[keyword_id] for keyword_id in self._signal_automaton.first_positions(text)}
+
         # 복잡한 입력에 대해서만 LLM 사용
         complexity_indicators = [
             len(text) > 25,  # 긴 문장
-            "아까" in text or "그거" in text or "저기" in text or "이거" in text,  # 참조 표현
             text.count(" ") > 6,  # 많은 단어
-            any(word in text for word in ["이랑", "하고", "그리고", "근데", "그런데"]),  # 복합 표현
-            "명이랑" in text or "분이랑" in text or "사람" in text,  # 인원 표현
-            any(word in text for word in ["매운", "안매운", "순한", "담백한", "짜게", "싱겁게"]),  # 맛 선호도
-            any(word in text for word in ["급해", "빨리", "천천히", "나중에"]),  # 시급성
+        ] + [
+            any(word in hits for word in words)  # 참조/복합/인원/맛 선호도/시급성 표현
+            for words in COMPLEXITY_SIGNAL_WORDS.values()
         ]
 
         # 2개 이상의 복잡성 지표가 있으면 LLM 사용
@@ -10,8 +10,9 @@ from dataclasses import dataclass
 from datetime import datetime, time
 
 from data.data_structure import IntentType, ExtractedEntity, ExtractedInfo, ConfidenceLevel, LearningData
-from .preprocessor import NaviyamTextPreprocessor, EmotionType
+from .preprocessor import NaviyamTextPreprocessor, EmotionType, PreprocessResult
 from .llm_normalizer import LLMNormalizedOutput
+from .intent_matcher import CompiledIntentMatcher
 from utils.categories import FOOD_CATEGORIES
 
 logger = logging.getLogger(__name__)
@@ -52,6 +53,9 @@ class NaviyamNLU:
         # 엔티티 추출 패턴들
         self.entity_patterns = self._build_entity_patterns()
 
+        # 의도/엔티티 패턴 사전 컴파일 (Aho-Corasick + 의도별 결합 정규식)
+        self.intent_matcher = CompiledIntentMatcher(self.intent_patterns, self.entity_patterns)
+
         # 맥락 정보 (대화 이력)
         self.context_memory = {}
 
@@ -243,11 +247,19 @@ class NaviyamNLU:
             ]
         }
 
-    def extract_intent_and_entities(self, text: str, user_id: str = None) -> ExtractedInfo:
-        """의도와 엔티티 동시 추출"""
-        # 전처리
+    def extract_intent_and_entities(self, text: str, user_id: str = None,
+                                    preprocess_result: Optional[PreprocessResult] = None) -> ExtractedInfo:
+        """의도와 엔티티 동시 추출
+
+        Args:
+            text: 사용자 입력
+            user_id: 사용자 ID
+            preprocess_result: 같은 입력에 대해 이미 계산된 전처리 결과 (있으면 재사용)
+        """
+        # 전처리 (호출 측에서 이미 분석한 결과가 있으면 재사용)
         if self.preprocessor:
-            preprocess_result = self.preprocessor.preprocess(text)
+            if preprocess_result is None or preprocess_result.original_text != text:
+                preprocess_result = self.preprocessor.preprocess(text)
             processed_text = preprocess_result.normalized_text
         else:
             processed_text = text
@@ -257,7 +269,7 @@ class NaviyamNLU:
         intent, intent_confidence = self._extract_intent(processed_text, preprocess_result)
 
         # 엔티티 추출
-        entities = self._extract_entities(processed_text, intent)
+        entities = self._extract_entities(processed_text, intent, preprocess_result)
 
         # 전체 신뢰도 계산
         overall_confidence = self._calculate_overall_confidence(
@@ -297,27 +309,9 @@ class NaviyamNLU:
     def _extract_intent(self, text: str, preprocess_result=None) -> Tuple[IntentType, float]:
         """의도 추출"""
         text_lower = text.lower()
-        intent_scores = {}
-
-        # 패턴 기반 점수 계산
-        for pattern in self.intent_patterns:
-            score = 0
-
-            # 키워드 매칭
-            for keyword in pattern.keywords:
-                if keyword in text_lower:
-                    score += 1
-
-            # 정규식 패턴 매칭
-            for regex_pattern in pattern.patterns:
-                if re.search(regex_pattern, text_lower):
-                    score += 2
 
-            # 가중치 적용
-            final_score = score * pattern.weight
-
-            if final_score > 0:
-                intent_scores[pattern.intent] = final_score
+        # 패턴 기반 점수 계산 (키워드 1점, 정규식 2점, 가중치 적용)
+        intent_scores = self.intent_matcher.score_intents(text_lower)
 
         # 전처리 결과 활용한 보정
         if preprocess_result:
@@ -353,22 +347,24 @@ class NaviyamNLU:
             elif keyword.startswith('companion:'):
                 intent_scores[IntentType.LOCATION_INQUIRY] = intent_scores.get(IntentType.LOCATION_INQUIRY, 0) + 0.5
 
-    def _extract_entities(self, text: str, intent: IntentType) -> ExtractedEntity:
-        """엔티티 추출"""
+    def _extract_entities(self, text: str, intent: IntentType, preprocess_result=None) -> ExtractedEntity:
+        """엔티티 추출 (전처리 결과가 있으면 예산/동반자는 분석 결과 재사용)"""
         entities = ExtractedEntity()
         text_lower = text.lower()
+        analyzed = (self.preprocessor is not None and preprocess_result is not None
+                    and preprocess_result.normalized_text == text)
 
         # 음식 종류 추출
         entities.food_type = self._extract_food_type(text_lower)
 
         # 예산 추출
-        entities.budget = self._extract_budget(text_lower)
+        entities.budget = preprocess_result.budget if analyzed else self._extract_budget(text_lower)
 
         # 위치 선호도 추출
         entities.location_preference = self._extract_location_preference(text_lower)
 
         # 동반자 추출
-        entities.companions = self._extract_companions(text_lower)
+        entities.companions = list(preprocess_result.companions) if analyzed else self._extract_companions(text_lower)
 
         # 시간 선호도 추출
         entities.time_preference = self._extract_time_preference(text_lower)
@@ -383,11 +379,7 @@ class NaviyamNLU:
 
     def _extract_food_type(self, text: str) -> Optional[str]:
         """음식 종류 추출"""
-        for pattern in self.entity_patterns['food_types']:
-            match = re.search(pattern, text)
-            if match:
-                return match.group(1)
-        return None
+        return self.intent_matcher.first_entity_match('food_types', text)
 
     def _extract_budget(self, text: str) -> Optional[int]:
         """예산 추출 (원 단위)"""
@@ -395,8 +387,8 @@ class NaviyamNLU:
             return self.preprocessor.extract_budget_info(text)
 
         # 간단한 예산 추출
-        for pattern in self.entity_patterns['budget_amounts']:
-            match = re.search(pattern, text)
+        for pattern in self.intent_matcher.entity_regexes['budget_amounts']:
+            match = pattern.search(text)
             if match:
                 amount = int(match.group(1))
                 if '만' in match.group(0):
@@ -409,11 +401,7 @@ class NaviyamNLU:
 
     def _extract_location_preference(self, text: str) -> Optional[str]:
         """위치 선호도 추출"""
-        for pattern in self.entity_patterns['locations']:
-            match = re.search(pattern, text)
-            if match:
-                return match.group(1)
-        return None
+        return self.intent_matcher.first_entity_match('locations', text)
 
     def _extract_companions(self, text: str) -> List[str]:
         """동반자 추출"""
@@ -421,25 +409,21 @@ class NaviyamNLU:
             return self.preprocessor.extract_companions(text)
 
         companions = []
-        for pattern in self.entity_patterns['companions']:
-            matches = re.findall(pattern, text)
+        for pattern in self.intent_matcher.entity_regexes['companions']:
+            matches = pattern.findall(text)
             companions.extend(matches)
 
         return list(set(companions))
 
     def _extract_time_preference(self, text: str) -> Optional[str]:
         """시간 선호도 추출"""
-        for pattern in self.entity_patterns['time_expressions']:
-            match = re.search(pattern, text)
-            if match:
-                return match.group(1)
-        return None
+        return self.intent_matcher.first_entity_match('time_expressions', text)
 
     def _extract_menu_options(self, text: str) -> List[str]:
         """메뉴 옵션 추출"""
         options = []
-        for pattern in self.entity_patterns['menu_options']:
-            matches = re.findall(pattern, text)
+        for pattern in self.intent_matcher.entity_regexes['menu_options']:
+            matches = pattern.findall(text)
             options.extend(matches)
 
         return list(set(options))
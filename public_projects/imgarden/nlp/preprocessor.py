@@ -5,11 +5,13 @@
 
 import re
 import string
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Any, Callable
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 
+from .intent_matcher import AhoCorasick
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,7 +26,7 @@ class EmotionType(Enum):
 
 @dataclass
 class PreprocessResult:
-    """전처리 결과"""
+    """전처리 결과 (발화 1건의 분석 결과, 요청 처리 동안 NLU/감정/LLM 판단에서 공유)"""
     original_text: str  # 원본 텍스트
     cleaned_text: str  # 정제된 텍스트
     normalized_text: str  # 정규화된 텍스트
@@ -32,6 +34,23 @@ class PreprocessResult:
     emotion: EmotionType  # 감정 분석 결과
     confidence: float  # 신뢰도
     preserved_expressions: List[str]  # 보존된 표현들
+    tokens: List[str] = field(default_factory=list)  # 정규화 텍스트(소문자) 공백 토큰
+    keyword_hits: Dict[str, int] = field(default_factory=dict)  # 사전 단어별 첫 등장 위치 (정규화 텍스트 소문자 기준)
+    budget_spans: List[Tuple[int, int]] = field(default_factory=list)  # 예산 표현 위치
+    budget: Optional[int] = None  # 예산 (원 단위)
+    companions: List[str] = field(default_factory=list)  # 동반자
+    _memo: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+
+    @property
+    def text_lower(self) -> str:
+        """정규화 텍스트 소문자"""
+        return self.normalized_text.lower()
+
+    def memo(self, key: str, builder: Callable[[], Any]) -> Any:
+        """발화 단위 파생 값 캐시 (같은 요청에서 여러 단계가 재계산하지 않도록)"""
+        if key not in self._memo:
+            self._memo[key] = builder()
+        return self._memo[key]
 
 
 class NaviyamTextPreprocessor:
@@ -111,6 +130,63 @@ class NaviyamTextPreprocessor:
             r'동생', r'혼자', r'애인', r'남친', r'여친', r'같이', r'함께'
         ]
 
+        # 동반자 정보 매핑
+        self.companion_mapping = {
+            '친구': 'friend',
+            '가족': 'family',
+            '엄마': 'mother',
+            '아빠': 'father',
+            '부모': 'parents',
+            '형': 'brother',
+            '누나': 'sister',
+            '언니': 'sister',
+            '오빠': 'brother',
+            '동생': 'sibling',
+            '혼자': 'alone',
+            '애인': 'partner',
+            '남친': 'boyfriend',
+            '여친': 'girlfriend'
+        }
+
+        # 사전 컴파일 정규식
+        self._preserve_regexes = [
+            (expr_type, re.compile(pattern, re.IGNORECASE))
+            for expr_type, patterns in self.preserve_patterns.items() for pattern in patterns
+        ]
+        self._budget_regexes = [re.compile(pattern, re.IGNORECASE) for pattern in self.budget_patterns]
+        self._cleaning_regexes = [
+            (re.compile(r'<[^>]+>'), ''),  # HTML 태그
+            (re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'), ''),  # URL
+            (re.compile(r'\S+@\S+'), ''),  # 이메일
+            (re.compile(r'\s+'), ' ')  # 과도한 공백
+        ]
+        # 불필요한 특수문자 (보존 모드에서는 보존할 문자 제외)
+        self._unwanted_chars_regex = re.compile(
+            r'[^\w\s가-힣ㅋㅎㅠㅜ\^!~♥❤💕❣️\?\.,]' if preserve_expressions else r'[^\w\s가-힣]'
+        )
+        # 줄임말 정규화
+        self._normalization_regexes = [
+            (re.compile(pattern, re.IGNORECASE), replacement) for pattern, replacement in {
+                r'\b넘\b': '너무',
+                r'\b짱\b': '정말',
+                r'\b개\s*맛있': '정말 맛있',
+                r'\b완전\b': '정말',
+                r'\b오짜\b': '오징어짜글이',
+                r'\b떡볶이\b': '떡볶이',
+                r'\b쫄면\b': '쫄면'
+            }.items()
+        ]
+        # 중복 문자 정리 (보존 모드에서는 한글만 2글자까지)
+        self._repeat_regex = (re.compile(r'([가-힣])\1{2,}'), r'\1\1') if preserve_expressions \
+            else (re.compile(r'(.)\1{2,}'), r'\1')
+
+        # 키워드/감정/동반자 사전 단어 오토마톤 (발화당 1회 순회로 검색)
+        self._keyword_automaton = AhoCorasick(
+            [word for words in self.food_keywords.values() for word in words] +
+            [word for words in self.emotion_keywords.values() for word in words] +
+            self.companion_patterns + list(self.companion_mapping)
+        )
+
     def preprocess(self, text: str) -> PreprocessResult:
         """전체 전처리 파이프라인"""
         if not text or not text.strip():
@@ -135,11 +211,16 @@ class NaviyamTextPreprocessor:
         # 3. 정규화
         normalized_text = self._normalize_text(cleaned_text)
 
-        # 4. 키워드 추출
-        keywords = self._extract_keywords(normalized_text)
+        # 4. 사전 단어 검색 (키워드/감정/동반자 공용, 1회 순회)
+        text_lower = normalized_text.lower()
+        keyword_hits = self._scan_keywords(text_lower)
 
-        # 5. 감정 분석
-        emotion, confidence = self._analyze_emotion(normalized_text, preserved_expressions)
+        # 5. 키워드 추출
+        budget_spans = []
+        keywords = self._extract_keywords(normalized_text, keyword_hits, budget_spans)
+
+        # 6. 감정 분석
+        emotion, confidence = self._analyze_emotion(normalized_text, preserved_expressions, keyword_hits)
 
         return PreprocessResult(
             original_text=original_text,
@@ -148,9 +229,20 @@ class NaviyamTextPreprocessor:
             extracted_keywords=keywords,
             emotion=emotion,
             confidence=confidence,
-            preserved_expressions=preserved_expressions
+            preserved_expressions=preserved_expressions,
+            tokens=text_lower.split(),
+            keyword_hits=keyword_hits,
+            budget_spans=budget_spans,
+            budget=self.extract_budget_info(normalized_text),
+            companions=self.extract_companions(normalized_text, keyword_hits)
         )
 
+    def _scan_keywords(self, text_lower: str) -> Dict[str, int]:
+        """사전 단어별 첫 등장 위치"""
+        keywords = self._keyword_automaton.keywords
+        return {keywords[keyword_id]: start
+                for keyword_id, start in self._keyword_automaton.first_positions(text_lower).items()}
+
     def _extract_preserved_expressions(self, text: str) -> List[str]:
         """보존할 표현들 추출"""
         if not self.preserve_expressions:
@@ -158,83 +250,62 @@ class NaviyamTextPreprocessor:
 
         preserved = []
 
-        for expr_type, patterns in self.preserve_patterns.items():
-            for pattern in patterns:
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                for match in matches:
-                    preserved.append(f"{expr_type}:{match}")
+        for expr_type, regex in self._preserve_regexes:
+            for match in regex.findall(text):
+                preserved.append(f"{expr_type}:{match}")
 
         return preserved
 
     def _basic_cleaning(self, text: str) -> str:
         """기본 텍스트 정제"""
-        # HTML 태그 제거
-        text = re.sub(r'<[^>]+>', '', text)
-
-        # URL 제거
-        text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
-
-        # 이메일 제거
-        text = re.sub(r'\S+@\S+', '', text)
+        # HTML 태그 / URL / 이메일 제거, 과도한 공백 정리 (하지만 의미있는 띄어쓰기는 보존)
+        for regex, replacement in self._cleaning_regexes:
+            text = regex.sub(replacement, text)
 
-        # 과도한 공백 정리 (하지만 의미있는 띄어쓰기는 보존)
-        text = re.sub(r'\s+', ' ', text)
-
-        # 불필요한 특수문자 제거 (보존할 것들은 제외)
-        if self.preserve_expressions:
-            # 보존할 특수문자 패턴 생성
-            preserve_chars = r'[ㅋㅎㅠㅜ\^!~♥❤💕❣️\?\.]'
-            # 보존할 문자가 아닌 특수문자만 제거
-            unwanted_chars = r'[^\w\s가-힣ㅋㅎㅠㅜ\^!~♥❤💕❣️\?\.,]'
-            text = re.sub(unwanted_chars, ' ', text)
-        else:
-            # 모든 특수문자 제거
-            text = re.sub(r'[^\w\s가-힣]', ' ', text)
+        # 불필요한 특수문자 제거 (보존 모드에서는 보존할 것들은 제외)
+        text = self._unwanted_chars_regex.sub(' ', text)
 
         return text.strip()
 
     def _normalize_text(self, text: str) -> str:
         """텍스트 정규화"""
         # 줄임말 정규화
-        normalizations = {
-            r'\b넘\b': '너무',
-            r'\b짱\b': '정말',
-            r'\b개\s*맛있': '정말 맛있',
-            r'\b완전\b': '정말',
-            r'\b오짜\b': '오징어짜글이',
-            r'\b떡볶이\b': '떡볶이',
-            r'\b쫄면\b': '쫄면'
-        }
-
         normalized = text
-        for pattern, replacement in normalizations.items():
-            normalized = re.sub(pattern, replacement, normalized, flags=re.IGNORECASE)
+        for regex, replacement in self._normalization_regexes:
+            normalized = regex.sub(replacement, normalized)
 
-        # 중복 문자 정리 (의미있는 것은 보존)
-        if self.preserve_expressions:
-            # ㅋㅋㅋ, ^^^ 등은 보존하고 일반 중복만 정리
-            normalized = re.sub(r'([가-힣])\1{2,}', r'\1\1', normalized)  # 한글 2글자까지만
-        else:
-            normalized = re.sub(r'(.)\1{2,}', r'\1', normalized)
+        # 중복 문자 정리 (ㅋㅋㅋ, ^^^ 등 의미있는 것은 보존)
+        regex, replacement = self._repeat_regex
+        normalized = regex.sub(replacement, normalized)
 
         return normalized.strip()
 
-    def _extract_keywords(self, text: str) -> List[str]:
-        """키워드 추출"""
+    def _extract_keywords(self, text: str, keyword_hits: Optional[Dict[str, int]] = None,
+                          budget_spans: Optional[List[Tuple[int, int]]] = None) -> List[str]:
+        """키워드 추출
+
+        Args:
+            text: 정규화된 텍스트
+            keyword_hits: _scan_keywords 결과 (없으면 새로 검색)
+            budget_spans: 전달되면 예산 표현 위치를 채움
+        """
         keywords = []
-        text_lower = text.lower()
+        if keyword_hits is None:
+            keyword_hits = self._scan_keywords(text.lower())
 
         # 음식 관련 키워드 추출
         for category, words in self.food_keywords.items():
             for word in words:
-                if word in text_lower:
+                if word in keyword_hits:
                     keywords.append(f"{category}:{word}")
 
         # 예산 키워드 추출
         budget_matches = []
-        for pattern in self.budget_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            budget_matches.extend(matches)
+        for regex in self._budget_regexes:
+            for match in regex.finditer(text):
+                budget_matches.append(match.group(1) if regex.groups else match.group(0))
+                if budget_spans is not None:
+                    budget_spans.append(match.span())
 
         if budget_matches:
             for match in budget_matches:
@@ -243,7 +314,7 @@ class NaviyamTextPreprocessor:
         # 동반자 키워드 추출
         companion_matches = []
         for pattern in self.companion_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
+            if pattern in keyword_hits:
                 companion_matches.append(pattern)
 
         if companion_matches:
@@ -253,15 +324,17 @@ class NaviyamTextPreprocessor:
         # 중복 제거
         return list(set(keywords))
 
-    def _analyze_emotion(self, text: str, preserved_expressions: List[str]) -> Tuple[EmotionType, float]:
+    def _analyze_emotion(self, text: str, preserved_expressions: List[str],
+                         keyword_hits: Optional[Dict[str, int]] = None) -> Tuple[EmotionType, float]:
         """감정 분석"""
-        text_lower = text.lower()
+        if keyword_hits is None:
+            keyword_hits = self._scan_keywords(text.lower())
         emotion_scores = {emotion: 0 for emotion in EmotionType}
 
         # 키워드 기반 감정 점수 계산
         for emotion, keywords in self.emotion_keywords.items():
             for keyword in keywords:
-                if keyword in text_lower:
+                if keyword in keyword_hits:
                     emotion_scores[emotion] += 1
 
         # 보존된 표현으로 감정 보정
@@ -316,30 +389,14 @@ class NaviyamTextPreprocessor:
 
         return None
 
-    def extract_companions(self, text: str) -> List[str]:
+    def extract_companions(self, text: str, keyword_hits: Optional[Dict[str, int]] = None) -> List[str]:
         """동반자 정보 추출"""
         companions = []
-        text_lower = text.lower()
-
-        companion_mapping = {
-            '친구': 'friend',
-            '가족': 'family',
-            '엄마': 'mother',
-            '아빠': 'father',
-            '부모': 'parents',
-            '형': 'brother',
-            '누나': 'sister',
-            '언니': 'sister',
-            '오빠': 'brother',
-            '동생': 'sibling',
-            '혼자': 'alone',
-            '애인': 'partner',
-            '남친': 'boyfriend',
-            '여친': 'girlfriend'
-        }
+        if keyword_hits is None:
+            keyword_hits = self._scan_keywords(text.lower())
 
-        for korean, english in companion_mapping.items():
-            if korean in text_lower:
+        for korean, english in self.companion_mapping.items():
+            if korean in keyword_hits:
                 companions.append(english)
 
         return list(set(companions))
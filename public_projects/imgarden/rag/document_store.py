@@ -0,0 +1,429 @@
+"""
+사전 빌드 FAISS 메타데이터의 압축 사이드카 저장소
+
+prebuilt_faiss_metadata.json을 한 번 변환해 두고 이후에는 mmap으로 열어서
+JSON 전체를 dict로 올리지 않고 검색 결과로 반환된 문서만 필요할 때 만듦
+
+파일 구성 (little-endian, 각 구간은 8바이트 정렬):
+- 헤더: 매직, 버전, 행/FAISS 위치/문자열 수, 원본 JSON 크기/수정 시각
+- 행 레코드: 문자열 번호(doc_id/type/category/content/metadata/original) + 가격 + 플래그 (struct 고정 크기)
+- FAISS 위치 -> 행 번호
+- doc_id 해시(정렬) -> 행 번호
+- 문자열 오프셋 테이블 + UTF-8 본문 blob
+"""
+
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from .documents import Document, ShopDocument, MenuDocument, StoredDocument
+
+logger = logging.getLogger(__name__)
+
+PACK_MAGIC = b'NVDOCPK1'
+PACK_VERSION = 1
+PACK_SUFFIX = '.docpack'
+
+_HEADER = struct.Struct('<8sIIIIIqq')  # 매직, 버전, 행 수, FAISS 위치 수, 문자열 수, index_info 문자열, 원본 크기, 원본 mtime_ns
+
+_RECORD_DTYPE = np.dtype([
+    ('doc_id', '<u4'),
+    ('type', '<u4'),
+    ('category', '<u4'),
+    ('content', '<u4'),
+    ('metadata', '<u4'),  # 메타데이터 JSON (0이면 메타데이터 없음)
+    ('original', '<u4'),  # original_data JSON (0이면 없음)
+    ('price', '<f8'),  # 숫자가 아니거나 없으면 NaN
+    ('flags', 'u1')
+])
+
+# 문자열 번호 0은 값 없음
+_NO_STRING = 0
+
+# 플래그 비트
+_GOOD_INFLUENCE = 1
+_HAS_GOOD_INFLUENCE = 2
+_POPULAR = 4
+_HAS_POPULAR = 8
+_IRREGULAR = 16  # 필터 값이 문자열/불리언이 아님 (필터용 메타데이터를 JSON에서 읽음)
+_NO_METADATA = 32
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _layout(num_rows: int, num_faiss: int, num_strings: int) -> Dict[str, int]:
+    """구간별 시작 위치"""
+    positions = {}
+    offset = _align(_HEADER.size)
+    for name, size in (('records', num_rows * _RECORD_DTYPE.itemsize),
+                       ('faiss_rows', num_faiss * 4),
+                       ('id_hashes', num_rows * 8),
+                       ('id_rows', num_rows * 4),
+                       ('string_offsets', (num_strings + 1) * 8)):
+        positions[name] = offset
+        offset = _align(offset + size)
+    positions['blob'] = offset
+    return positions
+
+
+def _id_hash(doc_id: str) -> int:
+    """프로세스와 무관하게 고정된 64비트 doc_id 해시"""
+    return int.from_bytes(hashlib.blake2b(doc_id.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _source_stamp(source_path: Path) -> tuple:
+    stat = source_path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def build_document_pack(metadata_path: Union[str, Path], pack_path: Union[str, Path, None] = None) -> bytes:
+    """prebuilt_faiss_metadata.json을 사이드카 형식으로 변환
+
+    Args:
+        metadata_path: 원본 메타데이터 JSON
+        pack_path: 저장 경로 (None이면 저장하지 않음, 임시 파일에 쓴 뒤 교체)
+
+    Returns:
+        변환된 바이트
+    """
+    metadata_path = Path(metadata_path)
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        metadata_info = json.load(f)
+
+    document_mapping = metadata_info.get('document_mapping', {})
+    documents_metadata = metadata_info.get('documents_metadata', {})
+    documents_content = metadata_info.get('documents_content', {})
+    original_data = metadata_info.get('original_data', {})
+
+    strings: List[str] = ['']
+    interned: Dict[str, int] = {}
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return _NO_STRING
+        index = interned.get(value)
+        if index is None:
+            index = interned[value] = len(strings)
+            strings.append(value)
+        return index
+
+    def intern_json(value) -> int:
+        return intern(json.dumps(value, ensure_ascii=False)) if value is not None else _NO_STRING
+
+    # 행 순서: FAISS 위치 순서 -> 매핑되지 않은 나머지 문서
+    num_faiss = max((int(idx) for idx in document_mapping), default=-1) + 1
+    faiss_doc_ids = [None] * num_faiss
+    for idx, doc_id in document_mapping.items():
+        faiss_doc_ids[int(idx)] = doc_id
+    row_doc_ids: List[str] = []
+    row_of: Dict[str, int] = {}
+    for doc_id in list(faiss_doc_ids) + list(documents_metadata) + list(documents_content) + list(original_data):
+        if doc_id and doc_id not in row_of:
+            row_of[doc_id] = len(row_doc_ids)
+            row_doc_ids.append(doc_id)
+
+    records = np.zeros(len(row_doc_ids), dtype=_RECORD_DTYPE)
+    for row, doc_id in enumerate(row_doc_ids):
+        metadata = documents_metadata.get(doc_id)
+        record = records[row]
+        record['doc_id'] = intern(doc_id)
+        record['content'] = intern(documents_content.get(doc_id, ""))
+        record['original'] = intern_json(original_data.get(doc_id))
+        record['price'] = math.nan
+        if metadata is None:
+            record['flags'] = _NO_METADATA
+            continue
+
+        record['metadata'] = intern_json(metadata)
+        flags = 0
+        for key in ('type', 'category'):
+            value = metadata.get(key)
+            if isinstance(value, str):
+                record[key] = intern(value)
+            elif value is not None:
+                flags |= _IRREGULAR
+        for key, has_bit, value_bit in (('is_good_influence', _HAS_GOOD_INFLUENCE, _GOOD_INFLUENCE),
+                                        ('is_popular', _HAS_POPULAR, _POPULAR)):
+            if key in metadata:
+                value = metadata[key]
+                if isinstance(value, bool):
+                    flags |= has_bit | (value_bit if value else 0)
+                else:
+                    flags |= _IRREGULAR
+        price = metadata.get('price')
+        if isinstance(price, (int, float)) and not isinstance(price, bool):
+            record['price'] = float(price)
+        record['flags'] = flags
+
+    faiss_rows = np.array([row_of[doc_id] if doc_id else -1 for doc_id in faiss_doc_ids], dtype='<i4')
+    hashes = np.array([_id_hash(doc_id) for doc_id in row_doc_ids], dtype='<u8')
+    order = np.argsort(hashes, kind='stable')
+
+    info_string = intern_json(metadata_info.get('index_info', {}))
+    encoded = [value.encode('utf-8') for value in strings]
+    string_offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+    np.cumsum([len(value) for value in encoded], out=string_offsets[1:])
+
+    layout = _layout(len(row_doc_ids), num_faiss, len(strings))
+    size, mtime_ns = _source_stamp(metadata_path)
+    buffer = bytearray(layout['blob'] + int(string_offsets[-1]))
+    _HEADER.pack_into(buffer, 0, PACK_MAGIC, PACK_VERSION, len(row_doc_ids), num_faiss, len(strings),
+                      info_string, size, mtime_ns)
+    for name, array in (('records', records), ('faiss_rows', faiss_rows), ('id_hashes', hashes[order]),
+                        ('id_rows', order.astype('<u4')), ('string_offsets', string_offsets)):
+        data = array.tobytes()
+        buffer[layout[name]:layout[name] + len(data)] = data
+    buffer[layout['blob']:] = b''.join(encoded)
+
+    if pack_path is not None:
+        pack_path = Path(pack_path)
+        tmp_path = pack_path.with_suffix(pack_path.suffix + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(buffer)
+        os.replace(tmp_path, pack_path)
+        logger.info(f"문서 사이드카 생성: {pack_path} ({len(row_doc_ids)}개 문서, {len(buffer) / 1024:.1f}KB)")
+    return bytes(buffer)
+
+
+class PackedDocumentStore:
+    """사이드카 파일 기반 문서 저장소
+
+    - 행 레코드/FAISS 위치/해시 인덱스는 mmap 위의 NumPy 뷰 (복사 없음)
+    - 문자열과 메타데이터 JSON은 요청된 문서에 대해서만 디코딩
+    - 자주 반환되는 문서는 LRU로 유지
+    """
+
+    def __init__(self, metadata_path: Union[str, Path], pack_path: Union[str, Path, None] = None,
+                 cache_size: int = 1024):
+        """
+        Args:
+            metadata_path: 원본 prebuilt_faiss_metadata.json
+            pack_path: 사이드카 경로 (기본: 메타데이터 경로 + .docpack). 없거나 원본보다 오래되면 재생성
+            cache_size: 메모리에 유지할 문서 수
+        """
+        self.metadata_path = Path(metadata_path)
+        self.pack_path = Path(pack_path) if pack_path else Path(str(self.metadata_path) + PACK_SUFFIX)
+        self.cache_size = cache_size
+
+        self._file = None
+        self._buffer = self._open()
+        (_, _, self.num_rows, self.num_faiss, self.num_strings,
+         info_string, _, _) = _HEADER.unpack_from(self._buffer, 0)
+        layout = _layout(self.num_rows, self.num_faiss, self.num_strings)
+        self._records = np.frombuffer(self._buffer, _RECORD_DTYPE, self.num_rows, layout['records'])
+        self._faiss_rows = np.frombuffer(self._buffer, '<i4', self.num_faiss, layout['faiss_rows'])
+        self._id_hashes = np.frombuffer(self._buffer, '<u8', self.num_rows, layout['id_hashes'])
+        self._id_rows = np.frombuffer(self._buffer, '<u4', self.num_rows, layout['id_rows'])
+        self._string_offsets = np.frombuffer(self._buffer, '<u8', self.num_strings + 1, layout['string_offsets'])
+        self._blob_start = layout['blob']
+
+        self.index_info: Dict[str, Any] = self._json(info_string) or {}
+
+        self._cache: 'OrderedDict[str, Optional[Document]]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def _open(self):
+        """사이드카를 mmap으로 열기 (원본과 맞지 않으면 재생성, 저장할 수 없으면 메모리에서 사용)"""
+        stamp = _source_stamp(self.metadata_path) if self.metadata_path.exists() else None
+        if self.pack_path.exists():
+            try:
+                with open(self.pack_path, 'rb') as f:
+                    header = f.read(_HEADER.size)
+                magic, version, *_, size, mtime_ns = _HEADER.unpack(header)
+                if magic == PACK_MAGIC and version == PACK_VERSION and (stamp is None or stamp == (size, mtime_ns)):
+                    self._file = open(self.pack_path, 'rb')
+                    return mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                logger.info(f"문서 사이드카가 원본과 달라 재생성합니다: {self.pack_path}")
+            except (OSError, struct.error, ValueError) as e:
+                logger.warning(f"문서 사이드카 읽기 실패, 재생성: {e}")
+
+        if stamp is None:
+            raise FileNotFoundError(f"메타데이터 파일을 찾을 수 없습니다: {self.metadata_path}")
+        try:
+            build_document_pack(self.metadata_path, self.pack_path)
+            self._file = open(self.pack_path, 'rb')
+            return mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError as e:
+            logger.warning(f"문서 사이드카 저장 실패, 메모리에서 사용: {e}")
+            return build_document_pack(self.metadata_path)
+
+    def close(self):
+        """mmap 닫기"""
+        self._records = self._faiss_rows = self._id_hashes = self._id_rows = self._string_offsets = None
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _string(self, index: int) -> Optional[str]:
+        if index == _NO_STRING:
+            return None
+        start = self._blob_start + int(self._string_offsets[index])
+        end = self._blob_start + int(self._string_offsets[index + 1])
+        return self._buffer[start:end].decode('utf-8')
+
+    def _json(self, index: int) -> Any:
+        value = self._string(int(index))
+        return json.loads(value) if value is not None else None
+
+    def _row(self, doc_id: str) -> Optional[int]:
+        """doc_id의 행 번호 (해시 이진 탐색 후 문자열 확인)"""
+        target = np.uint64(_id_hash(doc_id))  # Python int로 비교하면 float로 변환됨
+        position = int(np.searchsorted(self._id_hashes, target))
+        while position < self.num_rows and self._id_hashes[position] == target:
+            row = int(self._id_rows[position])
+            if self._string(int(self._records[row]['doc_id'])) == doc_id:
+                return row
+            position += 1
+        return None
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def __contains__(self, doc_id: str) -> bool:
+        row = self._row(doc_id)
+        return row is not None and not self._records[row]['flags'] & _NO_METADATA
+
+    def _strings(self, indexes: np.ndarray) -> List[Optional[str]]:
+        """문자열 번호 배열을 한 번에 디코딩"""
+        starts = (self._string_offsets[indexes] + self._blob_start).tolist()
+        ends = (self._string_offsets[indexes + 1] + self._blob_start).tolist()
+        buffer = self._buffer
+        return [buffer[start:end].decode('utf-8') if index != _NO_STRING else None
+                for index, start, end in zip(indexes.tolist(), starts, ends)]
+
+    def _faiss_records(self, ntotal: int) -> tuple:
+        """FAISS 위치별 (매핑 여부, 레코드) 배열"""
+        rows = self._faiss_rows[:min(ntotal, self.num_faiss)]
+        mapped = rows >= 0
+        return mapped, self._records[np.where(mapped, rows, 0)]
+
+    def faiss_doc_ids(self, ntotal: int) -> List[Optional[str]]:
+        """FAISS 위치별 document ID (매핑이 없으면 None)"""
+        mapped, records = self._faiss_records(ntotal)
+        doc_ids = self._strings(np.where(mapped, records['doc_id'], _NO_STRING))
+        return doc_ids + [None] * (ntotal - len(doc_ids))
+
+    def filter_metadata(self, ntotal: int) -> List[Optional[Dict[str, Any]]]:
+        """FAISS 위치별 필터용 메타데이터 (MetadataColumns 구성용, 메타데이터가 없으면 None)
+
+        필터 키만 레코드 열에서 복원하고, 비정형 값이 있는 문서만 JSON을 읽음
+        """
+        mapped, records = self._faiss_records(ntotal)
+        flags_column = np.where(mapped, records['flags'], _NO_METADATA).tolist()
+        types = records['type'].tolist()
+        categories = records['category'].tolist()
+        prices = records['price'].tolist()
+        metadata_indexes = records['metadata'].tolist()
+
+        values: Dict[int, Optional[str]] = {}  # type/category 문자열은 종류가 적으므로 한 번씩만 디코딩
+        metadata_list: List[Optional[Dict[str, Any]]] = [None] * ntotal
+        for idx, flags in enumerate(flags_column):
+            if flags & _NO_METADATA:
+                continue
+            if flags & _IRREGULAR:
+                metadata_list[idx] = self._json(metadata_indexes[idx])
+                continue
+
+            metadata: Dict[str, Any] = {}
+            for key, index in (('type', types[idx]), ('category', categories[idx])):
+                if index != _NO_STRING:
+                    if index not in values:
+                        values[index] = self._string(index)
+                    metadata[key] = values[index]
+            if flags & _HAS_GOOD_INFLUENCE:
+                metadata['is_good_influence'] = bool(flags & _GOOD_INFLUENCE)
+            if flags & _HAS_POPULAR:
+                metadata['is_popular'] = bool(flags & _POPULAR)
+            if not math.isnan(prices[idx]):
+                metadata['price'] = prices[idx]
+            metadata_list[idx] = metadata
+        return metadata_list
+
+    def get_documents(self, doc_ids: List[str]) -> List[Document]:
+        """ID 순서대로 문서 반환 (메타데이터가 없는 ID는 제외)"""
+        documents = []
+        for doc_id in doc_ids:
+            with self._cache_lock:
+                cached = doc_id in self._cache
+                if cached:
+                    self._cache.move_to_end(doc_id)
+                    document = self._cache[doc_id]
+                    self.stats['hits'] += 1
+            if not cached:
+                document = self._materialize(doc_id)
+                with self._cache_lock:
+                    self.stats['misses'] += 1
+                    self._cache[doc_id] = document
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            if document is not None:
+                documents.append(document)
+        return documents
+
+    def _original(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        row = self._row(doc_id)
+        return self._json(self._records[row]['original']) if row is not None else None
+
+    def _materialize(self, doc_id: str) -> Optional[Document]:
+        """문서 1건 재구성 (원본 데이터가 있으면 원본, 없으면 메타데이터 기준)"""
+        row = self._row(doc_id)
+        if row is None or self._records[row]['flags'] & _NO_METADATA:
+            return None
+        record = self._records[row]
+        metadata = self._json(record['metadata'])
+        content = self._string(int(record['content'])) or ""
+        doc_type = metadata.get('type', 'unknown')
+
+        try:
+            if doc_type == 'shop' and doc_id.startswith('shop_'):
+                shop_data = self._json(record['original']) or metadata
+                if isinstance(shop_data, dict) and 'id' in shop_data:
+                    return ShopDocument(shop_data)
+                return ShopDocument({
+                    'id': int(doc_id.replace('shop_', '')),
+                    'name': metadata.get('name', ''),
+                    'category': metadata.get('category', ''),
+                    'address': metadata.get('address', ''),
+                    'is_good_influence_shop': metadata.get('is_good_influence', False),
+                    'is_food_card_shop': metadata.get('is_food_card_shop', 'N'),
+                    'ordinary_discount': metadata.get('ordinary_discount', False),
+                    'owner_message': metadata.get('owner_message', '')
+                })
+
+            if doc_type == 'menu' and doc_id.startswith('menu_'):
+                menu_data = self._json(record['original']) or metadata
+                if isinstance(menu_data, dict) and 'id' in menu_data:
+                    # 관련 shop 정보도 필요
+                    shop_data = self._original(f"shop_{menu_data.get('shop_id', '')}") or {}
+                    return MenuDocument(menu_data, shop_data)
+                return MenuDocument({
+                    'id': int(doc_id.replace('menu_', '')),
+                    'shop_id': metadata.get('shop_id', 0),
+                    'name': metadata.get('menu_name', ''),
+                    'price': metadata.get('price', 0),
+                    'description': metadata.get('description', ''),
+                    'is_popular': metadata.get('is_popular', False)
+                }, {
+                    'name': metadata.get('shop_name', ''),
+                    'category': metadata.get('category', '')
+                })
+        except Exception as e:
+            logger.warning(f"문서 재구성 실패 {doc_id}: {e}")
+
+        # 알 수 없는 타입이나 재구성 실패는 저장된 내용 그대로 사용
+        return StoredDocument(doc_id, content, metadata)
@@ -32,6 +32,10 @@ class Document(ABC):
         """
         pass
 
+    def get_fields(self) -> Dict[str, Any]:
+        """구조화된 검색 결과(RetrievalHit)로 변환할 필드를 반환합니다. 기본은 메타데이터입니다."""
+        return self.get_metadata()
+
 
 class ShopDocument(Document):
     """가게 정보 Document"""
@@ -76,6 +80,17 @@ class ShopDocument(Document):
             "ordinary_discount": self._data.get('ordinary_discount', False)
         }
 
+    def get_fields(self) -> Dict[str, Any]:
+        return {
+            "type": "shop",
+            "shop_id": self._data['id'],
+            "name": self._data['name'],
+            "category": self._data['category'],
+            "address": self._data['address'],
+            "description": self._data.get('owner_message') or "",
+            "is_good_influence": bool(self._data.get('is_good_influence_shop', False))
+        }
+
 
 class MenuDocument(Document):
     """메뉴 정보 Document"""
@@ -136,6 +151,39 @@ class MenuDocument(Document):
         
         return metadata
 
+    def get_fields(self) -> Dict[str, Any]:
+        return {
+            "type": "menu",
+            "menu_id": self._data['id'],
+            "shop_id": self._data['shop_id'],
+            "name": self._data['name'],
+            "price": self._data['price'],
+            "category": self._data.get('category') or self._shop_info.get('category') or "",
+            "description": self._data.get('description') or "",
+            "shop_name": self._shop_info.get('name') or "",
+            "address": self._shop_info.get('address') or "",
+            "is_good_influence": bool(self._shop_info.get('is_good_influence_shop', False))
+        }
+
+
+class StoredDocument(Document):
+    """저장된 내용/메타데이터를 그대로 쓰는 Document (사전 빌드 인덱스에서 재구성할 수 없는 문서용)"""
+    
+    def __init__(self, doc_id: str, content: str, metadata: Dict[str, Any]):
+        self._id = doc_id
+        self._content = content
+        self._metadata = metadata
+
+    @property
+    def id(self) -> str:
+        return self._id
+
+    def get_content(self) -> str:
+        return self._content
+
+    def get_metadata(self) -> Dict[str, Any]:
+        return self._metadata
+
 
 class ReviewDocument(Document):
     """리뷰 정보 Document (향후 확장용)"""
@@ -11,6 +11,8 @@ from typing import List, Dict, Optional, Set, Tuple
 from pathlib import Path
 import numpy as np
 
+from .retriever import RetrievalHit
+
 class EnhancedRetriever:
     """동의어 및 하이브리드 검색을 지원하는 향상된 검색기"""
     
@@ -138,10 +140,12 @@ class EnhancedRetriever:
         # 중복 제거
         return list(set(expanded_terms))
     
-    def keyword_search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
-        """키워드 기반 검색"""
+    def keyword_search(self, query: str, top_k: int = 10,
+                       expanded_queries: Optional[List[str]] = None) -> List[Tuple[str, float]]:
+        """키워드 기반 검색 (expanded_queries: 이미 확장한 쿼리 목록)"""
         # 쿼리 확장
-        expanded_queries = self.expand_query(query)
+        if expanded_queries is None:
+            expanded_queries = self.expand_query(query)
         
         # 각 레스토랑의 매칭 점수 계산
         scores = {}
@@ -174,24 +178,60 @@ class EnhancedRetriever:
         
         return []
     
-    def vector_search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
-        """벡터 기반 의미 검색"""
-        if self.vector_retriever:
+    def vector_search(self, query: str, top_k: int = 10,
+                      expanded_queries: Optional[List[str]] = None) -> List[Tuple[str, float]]:
+        """벡터 기반 의미 검색 (확장 쿼리 전체를 한 번에 배치 검색 후 병합)"""
+        if not self.vector_retriever:
+            return []
+        
+        if not hasattr(self.vector_retriever, 'search_batch'):
             # 기존 벡터 검색 활용
             results = self.vector_retriever.search(query, k=top_k)
             # 결과 형식 변환 (필요시)
             return [(r['shop_id'], r['score']) for r in results]
+        
+        if expanded_queries is None:
+            expanded_queries = self.expand_query(query)
+        
+        # 임베딩 생성과 검색을 확장 쿼리 전체에 대해 1회 수행
+        document_lists = self.vector_retriever.search_batch(expanded_queries)
+        
+        scores = {}
+        for expanded_query, documents in zip(expanded_queries, document_lists):
+            # 쿼리별로 매장의 최고 순위만 반영 (메뉴 문서가 많은 매장 점수 중복 방지)
+            best_scores = {}
+            for rank, doc in enumerate(documents):
+                hit = RetrievalHit.from_document(doc, rank)
+                shop_id = str(hit.shop_id) if hit.shop_id is not None else hit.doc_id
+                best_scores.setdefault(shop_id, hit.score)
+            
+            # 원래 쿼리와의 매칭이면 높은 점수 (keyword_search와 동일한 가중치)
+            weight = 2.0 if expanded_query == query.lower() else 1.0
+            for shop_id, score in best_scores.items():
+                scores[shop_id] = scores.get(shop_id, 0) + weight * score
+        
+        # 점수별로 정렬 후 정규화
+        sorted_results = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        if sorted_results:
+            max_score = sorted_results[0][1]
+            return [(shop_id, score/max_score) for shop_id, score in sorted_results[:top_k]]
+        
         return []
     
     def hybrid_search(self, query: str, top_k: int = 10, 
                      keyword_weight: float = 0.5,
                      vector_weight: float = 0.5) -> List[Dict]:
         """하이브리드 검색 - 키워드와 벡터 검색 결합 (병렬 처리)"""
+        # 쿼리 확장은 한 번만 수행해 두 검색이 공유
+        expanded_queries = self.expand_query(query)
+        
         # 병렬로 검색 수행
         with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
             # 비동기 태스크 제출
-            keyword_future = executor.submit(self.keyword_search, query, top_k=top_k*2)
-            vector_future = executor.submit(self.vector_search, query, top_k=top_k*2)
+            keyword_future = executor.submit(self.keyword_search, query, top_k=top_k*2,
+                                             expanded_queries=expanded_queries)
+            vector_future = executor.submit(self.vector_search, query, top_k=top_k*2,
+                                            expanded_queries=expanded_queries)
             
             # 결과 대기
             keyword_results = keyword_future.result()
@@ -8,6 +8,7 @@ QueryStructurizer, VectorStore, Documents를 통합하여
 import json
 import logging
 import asyncio
+from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor
@@ -19,6 +20,89 @@ from utils.cache import get_query_cache, cached_result
 
 logger = logging.getLogger(__name__)
 
+NO_RESULT_CONTEXT = "관련된 가게나 메뉴 정보를 찾을 수 없습니다."
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RetrievalHit:
+    """구조화된 RAG 검색 결과 1건"""
+    doc_id: str
+    doc_type: str  # shop, menu, ...
+    name: str
+    rank: int  # 0부터 시작하는 검색 순위
+    score: float  # 순위 기반 관련도 (1 / (순위 + 1), Vector Store는 순서만 반환)
+    shop_id: Optional[int] = None
+    menu_id: Optional[int] = None
+    shop_name: str = ""
+    category: str = ""
+    price: Optional[int] = None
+    address: str = ""
+    description: str = ""
+    is_good_influence: bool = False
+    content: str = ""  # LLM 컨텍스트용 문장
+
+    @classmethod
+    def from_document(cls, doc: Document, rank: int) -> 'RetrievalHit':
+        """Document에서 생성 (get_fields가 없는 문서는 메타데이터 사용)"""
+        get_fields = getattr(doc, 'get_fields', None)
+        fields = get_fields() if get_fields is not None else doc.get_metadata()
+        doc_id = doc.id
+        doc_type = fields.get('type') or doc_id.partition('_')[0]
+        own_id = _to_int(doc_id.partition('_')[2])
+
+        shop_id = _to_int(fields.get('shop_id'))
+        if shop_id is None and doc_type == 'shop':
+            shop_id = own_id
+        menu_id = _to_int(fields.get('menu_id'))
+        if menu_id is None and doc_type == 'menu':
+            menu_id = own_id
+
+        name = fields.get('name') or fields.get('menu_name') or ""
+        return cls(
+            doc_id=doc_id,
+            doc_type=doc_type,
+            name=name,
+            rank=rank,
+            score=1.0 / (rank + 1),
+            shop_id=shop_id,
+            menu_id=menu_id,
+            shop_name=fields.get('shop_name') or (name if doc_type == 'shop' else ""),
+            category=fields.get('category') or fields.get('shop_category') or "",
+            price=_to_int(fields.get('price')),
+            address=fields.get('address') or fields.get('shop_address') or "",
+            description=fields.get('description') or fields.get('owner_message') or "",
+            is_good_influence=bool(fields.get('is_good_influence', False)),
+            content=doc.get_content()
+        )
+
+
+@dataclass
+class RetrievalResult:
+    """RAG 검색 결과 (LLM용 컨텍스트 문자열은 처음 필요할 때 생성)"""
+    query: str
+    hits: List[RetrievalHit] = field(default_factory=list)
+    _context: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def context(self) -> str:
+        """LLM에게 전달할 번호 목록 형태의 컨텍스트"""
+        if self._context is None:
+            if not self.hits:
+                self._context = NO_RESULT_CONTEXT
+            else:
+                context_parts = ["다음은 관련된 가게 및 메뉴 정보입니다:"]
+                for i, hit in enumerate(self.hits, 1):
+                    context_parts.append(f"\n{i}. {hit.content}")
+                self._context = "\n".join(context_parts)
+        return self._context
+
 
 class NaviyamRetriever:
     """나비얌 RAG 시스템의 메인 Retriever 클래스"""
@@ -142,26 +226,72 @@ class NaviyamRetriever:
         
         return documents
     
-    def get_context_for_llm(self, user_query: str) -> str:
-        """LLM에게 전달할 컨텍스트 생성
+    def search_batch(self, user_queries: List[str]) -> List[List[Document]]:
+        """여러 질문을 한 번에 검색 (쿼리 확장, 오프라인 평가용)
+        
+        임베딩은 한 번에 생성하고, 필터가 같은 질문끼리 묶어 Vector Store 배치 검색을 수행
         
         Args:
-            user_query: 사용자 질문
+            user_queries: 사용자 질문 목록
             
         Returns:
-            LLM용 컨텍스트 문자열
+            질문 순서대로 Document 리스트
         """
-        documents = self.search(user_query)
+        structured_queries = [self.query_structurizer.parse_query(query) for query in user_queries]
+        semantic_queries = [structured_query.semantic_query for structured_query in structured_queries]
+        
+        if hasattr(self.vector_store, 'encode_queries'):
+            query_embeddings = list(self.vector_store.encode_queries(semantic_queries))
+        elif hasattr(self.vector_store, 'encode_query'):
+            query_embeddings = [self.vector_store.encode_query(query) for query in semantic_queries]
+        else:
+            query_embeddings = [[0.1] * 384 for _ in semantic_queries]  # 임시 embedding
         
-        if not documents:
-            return "관련된 가게나 메뉴 정보를 찾을 수 없습니다."
+        # 필터 조건별로 질문 묶기
+        groups: Dict[str, List[int]] = {}
+        group_filters: Dict[str, Dict[str, Any]] = {}
+        for position, structured_query in enumerate(structured_queries):
+            filters = structured_query.filters.model_dump(exclude_none=True)
+            key = json.dumps(filters, sort_keys=True, ensure_ascii=False, default=str)
+            group_filters[key] = filters
+            groups.setdefault(key, []).append(position)
         
-        context_parts = ["다음은 관련된 가게 및 메뉴 정보입니다:"]
+        results: List[List[Document]] = [[] for _ in user_queries]
+        for key, positions in groups.items():
+            doc_id_lists = self.vector_store.search_batch(
+                [query_embeddings[position] for position in positions],
+                top_k=self.top_k,
+                filters=group_filters[key]
+            )
+            for position, doc_ids in zip(positions, doc_id_lists):
+                results[position] = self.vector_store.get_documents_by_ids(doc_ids)
         
-        for i, doc in enumerate(documents, 1):
-            context_parts.append(f"\n{i}. {doc.get_content()}")
+        logger.info(f"배치 검색 완료: {len(user_queries)}개 질문, {len(groups)}개 필터 그룹")
+        return results
+    
+    def retrieve(self, user_query: str) -> RetrievalResult:
+        """구조화된 검색 결과 반환
         
-        return "\n".join(context_parts)
+        Args:
+            user_query: 사용자 질문
+            
+        Returns:
+            순위 순서의 RetrievalHit 목록 (LLM용 컨텍스트는 result.context)
+        """
+        documents = self.search(user_query)
+        hits = [RetrievalHit.from_document(doc, rank) for rank, doc in enumerate(documents)]
+        return RetrievalResult(query=user_query, hits=hits)
+    
+    def get_context_for_llm(self, user_query: str) -> str:
+        """LLM에게 전달할 컨텍스트 생성
+        
+        Args:
+            user_query: 사용자 질문
+            
+        Returns:
+            LLM용 컨텍스트 문자열
+        """
+        return self.retrieve(user_query).context
 
 
 def load_knowledge_from_file(file_path: str) -> Dict[str, Any]:
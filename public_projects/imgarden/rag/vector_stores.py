@@ -9,10 +9,14 @@ from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
 import json
 import logging
+import threading
 import numpy as np
+from collections import OrderedDict
 from pathlib import Path
 
 from .documents import Document
+from .document_store import PackedDocumentStore
+from utils.cache import EmbeddingCache, get_embedding_cache
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +35,14 @@ class VectorStore(ABC):
         """쿼리 embedding과 필터를 사용하여 유사도 높은 document ID 목록을 반환합니다"""
         pass
 
+    def search_batch(self, query_embeddings, top_k: int = 10,
+                     filters: Optional[Dict[str, Any]] = None) -> List[List[str]]:
+        """여러 쿼리 embedding을 한 번에 검색하여 쿼리별 document ID 목록을 반환합니다
+
+        기본 구현은 search를 쿼리마다 호출하며, 행렬 단위 검색이 가능한 구현체는 재정의합니다.
+        """
+        return [self.search(query_embedding, top_k, filters) for query_embedding in query_embeddings]
+
     @abstractmethod
     def get_documents_by_ids(self, doc_ids: List[str]) -> List[Document]:
         """Document ID 목록으로 실제 Document 객체들을 반환합니다"""
@@ -42,6 +54,217 @@ class VectorStore(ABC):
         pass
 
 
+def _as_query_matrix(query_embeddings) -> np.ndarray:
+    """쿼리 embedding(단일 벡터 또는 벡터 목록)을 (n, d) float32 행렬로 변환"""
+    query_matrix = np.asarray(query_embeddings, dtype='float32')
+    if query_matrix.ndim == 1:
+        query_matrix = query_matrix.reshape(1, -1)
+    return np.ascontiguousarray(query_matrix)
+
+
+def _embedding_model_name(model) -> str:
+    """외부에서 주입된 SentenceTransformer의 모델 이름 (임베딩 캐시 키용)"""
+    try:
+        return model[0].auto_model.name_or_path
+    except Exception:
+        return f"{type(model).__name__}_{id(model)}"
+
+
+def _to_price(value, default: float) -> float:
+    """가격 메타데이터를 float로 변환 (숫자가 아니면 default)"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return default
+
+
+class MetadataColumns:
+    """FAISS 인덱스 순서로 정렬한 메타데이터 필터 인덱스
+
+    로드 시점에 값별 비트맵(type/category 등)과 가격 정렬 배열을 만들어 두고,
+    필터 조건을 FAISS ID selector로 변환하여 조건을 만족하는 문서 안에서만 검색
+    """
+
+    # 필터 조합별 마스크/selector 캐시 크기
+    MAX_CACHED_FILTERS = 128
+
+    def __init__(self, doc_ids: List[Optional[str]], metadata_list: List[Optional[Dict[str, Any]]],
+                 equality_keys: tuple = ('type', 'category', 'is_popular', 'is_good_influence')):
+        """
+        Args:
+            doc_ids: FAISS 인덱스별 document ID (매핑이 없으면 None, 검색 결과에서 제외)
+            metadata_list: FAISS 인덱스별 메타데이터 (None이면 필터 검사 없이 통과)
+            equality_keys: 값 일치로 비교하는 필터 키
+        """
+        self.size = len(doc_ids)
+        self.doc_ids = list(doc_ids)
+        self.valid = np.array([bool(doc_id) for doc_id in doc_ids], dtype=bool)
+        self.filterable = np.array([metadata is not None for metadata in metadata_list], dtype=bool)
+
+        metadata_list = [metadata if metadata is not None else {} for metadata in metadata_list]
+
+        # 값별 비트맵 {key: {value: mask}}
+        self.bitmaps: Dict[str, Dict[Any, np.ndarray]] = {}
+        self._unhashable_columns: Dict[str, np.ndarray] = {}
+        for key in equality_keys:
+            values = [metadata.get(key) for metadata in metadata_list]
+            try:
+                codes: Dict[Any, int] = {}
+                value_codes = np.array([codes.setdefault(value, len(codes)) for value in values], dtype=np.int32)
+            except TypeError:
+                # 비교용 값이 dict/list인 경우 비트맵 대신 열 비교
+                column = np.empty(self.size, dtype=object)
+                column[:] = values
+                self._unhashable_columns[key] = column
+                continue
+            self.bitmaps[key] = {value: value_codes == code for value, code in codes.items()}
+
+        # 가격 정렬 배열 (가격이 없을 때 기존 필터 기본값: max_price는 0, min_price는 무한대로 간주)
+        price_for_max = np.array(
+            [_to_price(metadata.get('price', 0), 0.0) for metadata in metadata_list], dtype=np.float64
+        )
+        price_for_min = np.array(
+            [_to_price(metadata.get('price', float('inf')), float('inf')) for metadata in metadata_list],
+            dtype=np.float64
+        )
+        self._max_price_order = np.argsort(price_for_max, kind='stable')
+        self._max_price_sorted = price_for_max[self._max_price_order]
+        self._min_price_order = np.argsort(price_for_min, kind='stable')
+        self._min_price_sorted = price_for_min[self._min_price_order]
+
+        self._filter_cache: 'OrderedDict[Any, tuple]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._selector_supported = True
+
+    def _equals(self, key: str, value) -> np.ndarray:
+        bitmaps = self.bitmaps.get(key)
+        if bitmaps is not None:
+            try:
+                mask = bitmaps.get(value)
+            except TypeError:
+                mask = None
+            if mask is not None:
+                return mask
+            # 비트맵 값과 타입이 다르지만 같다고 비교되는 값 (예: 1 == True)
+            matched = np.zeros(self.size, dtype=bool)
+            for bitmap_value, bitmap in bitmaps.items():
+                if bitmap_value == value:
+                    matched |= bitmap
+            return matched
+        column = self._unhashable_columns[key]
+        return np.fromiter((item == value for item in column), dtype=bool, count=len(column))
+
+    def _price_at_most(self, value) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self._max_price_order[:np.searchsorted(self._max_price_sorted, value, side='right')]] = True
+        return mask
+
+    def _price_at_least(self, value) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self._min_price_order[np.searchsorted(self._min_price_sorted, value, side='left'):]] = True
+        return mask
+
+    def _compute_mask(self, filters: Dict[str, Any]) -> np.ndarray:
+        matched = np.ones(self.size, dtype=bool)
+        for key, value in filters.items():
+            if key in self.bitmaps or key in self._unhashable_columns:
+                matched &= self._equals(key, value)
+            elif key == 'max_price':
+                matched &= self._price_at_most(value)
+            elif key == 'min_price':
+                matched &= self._price_at_least(value)
+        mask = self.valid & (~self.filterable | matched)
+        mask.flags.writeable = False
+        return mask
+
+    def _lookup(self, filters: Optional[Dict[str, Any]]) -> tuple:
+        """필터 조합별 (마스크, 허용 ID 배열, selector 검색 파라미터) 캐시 조회"""
+        if not filters:
+            filters = {}
+        try:
+            cache_key = tuple(sorted(filters.items()))
+            hash(cache_key)
+        except TypeError:
+            cache_key = None
+
+        if cache_key is not None:
+            with self._cache_lock:
+                entry = self._filter_cache.get(cache_key)
+                if entry is not None:
+                    self._filter_cache.move_to_end(cache_key)
+                    return entry
+
+        mask = self._compute_mask(filters)
+        entry = [mask, np.flatnonzero(mask).astype(np.int64), None]
+
+        if cache_key is not None:
+            with self._cache_lock:
+                self._filter_cache[cache_key] = entry
+                while len(self._filter_cache) > self.MAX_CACHED_FILTERS:
+                    self._filter_cache.popitem(last=False)
+        return entry
+
+    def filter_mask(self, filters: Optional[Dict[str, Any]]) -> np.ndarray:
+        """필터 조건을 만족하는 FAISS 인덱스 마스크"""
+        return self._lookup(filters)[0]
+
+    def _selector_params(self, entry: list):
+        """허용 ID 배열을 FAISS IDSelectorBatch 검색 파라미터로 변환 (미지원 버전이면 None)"""
+        if not self._selector_supported:
+            return None
+        if entry[2] is None:
+            try:
+                import faiss
+                allowed_ids = entry[1]
+                selector = faiss.IDSelectorBatch(len(allowed_ids), faiss.swig_ptr(allowed_ids))
+                entry[2] = faiss.SearchParameters(sel=selector)
+            except Exception as e:
+                logger.info(f"FAISS ID selector를 사용할 수 없어 확장 검색으로 대체합니다: {e}")
+                self._selector_supported = False
+                return None
+        return entry[2]
+
+    def search(self, index, query_matrix: np.ndarray, top_k: int,
+               filters: Optional[Dict[str, Any]] = None, use_selector: bool = True) -> List[List[str]]:
+        """필터를 만족하는 문서 안에서 쿼리별 상위 top_k개 document ID 검색
+
+        선택적인 필터는 IDSelectorBatch로 FAISS 검색 단계에서 적용하여 조건을 만족하는 문서가
+        top_k개 이상이면 항상 top_k개를 반환. selector를 쓸 수 없으면 결과가 찰 때까지 검색 범위를 확장
+        """
+        entry = self._lookup(filters)
+        mask, allowed_ids = entry[0], entry[1]
+        n_queries = len(query_matrix)
+        if len(allowed_ids) == 0:
+            return [[] for _ in range(n_queries)]
+
+        expected = min(top_k, len(allowed_ids))
+        if len(allowed_ids) < self.size and use_selector:
+            params = self._selector_params(entry)
+            if params is not None:
+                try:
+                    _, indices = index.search(query_matrix, expected, params=params)
+                    return self.select(indices, mask, top_k)
+                except TypeError as e:
+                    logger.info(f"FAISS 인덱스가 검색 파라미터를 지원하지 않아 확장 검색으로 대체합니다: {e}")
+                    self._selector_supported = False
+
+        search_k = min(top_k * 3, index.ntotal)
+        while True:
+            _, indices = index.search(query_matrix, search_k)
+            results = self.select(indices, mask, top_k)
+            if search_k >= index.ntotal or all(len(result) >= expected for result in results):
+                return results
+            search_k = min(search_k * 2, index.ntotal)
+
+    def select(self, indices: np.ndarray, mask: np.ndarray, top_k: int) -> List[List[str]]:
+        """FAISS 검색 결과 행렬에서 쿼리별로 마스크를 통과한 상위 top_k개 document ID 반환"""
+        in_range = (indices >= 0) & (indices < self.size)
+        keep = in_range & mask[np.where(in_range, indices, 0)]
+        results = []
+        for row, row_keep in zip(indices, keep):
+            results.append([self.doc_ids[idx] for idx in row[row_keep][:top_k]])
+        return results
+
+
 class MockVectorStore(VectorStore):
     """개발 및 테스트용 Mock Vector Store
     
@@ -140,14 +363,18 @@ class PrebuiltFAISSVectorStore(VectorStore):
     
     초기화 시간을 대폭 단축하기 위해 미리 생성된 FAISS 인덱스와 
     메타데이터를 로드합니다. 임베딩 모델은 쿼리 처리 시에만 사용됩니다.
+    문서는 메타데이터 JSON 대신 mmap 사이드카(.docpack)에서 검색 결과로 반환될 때만 재구성합니다.
     """
     
-    def __init__(self, index_path: str, metadata_path: str = None, embedding_model=None):
+    def __init__(self, index_path: str, metadata_path: str = None, embedding_model=None,
+                 embedding_cache: Optional[EmbeddingCache] = None, document_cache_size: int = 1024):
         """
         Args:
             index_path: 사전 빌드된 FAISS 인덱스 파일 경로 (.faiss)
             metadata_path: 메타데이터 파일 경로 (.json). None이면 자동 추론
             embedding_model: 쿼리 임베딩용 모델. None이면 필요시 로드
+            embedding_cache: 쿼리 임베딩 캐시. None이면 전역 캐시 사용
+            document_cache_size: 메모리에 유지할 재구성 문서 수
         """
         try:
             # FAISS GPU 버전 시도
@@ -173,12 +400,15 @@ class PrebuiltFAISSVectorStore(VectorStore):
         self.index_path = index_path
         self.metadata_path = metadata_path or index_path.replace('.faiss', '_metadata.json')
         self.embedding_model = embedding_model
+        self.embedding_cache = embedding_cache or get_embedding_cache()
+        self.document_cache_size = document_cache_size
         
         # 데이터 저장소 초기화
         self.index = None
-        self.metadata_info = {}
+        self.documents: Optional[PackedDocumentStore] = None
         self.embedding_dim = 384  # 기본값
         self.embedding_model_name = "all-MiniLM-L6-v2"  # 기본값
+        self._metadata_columns: Optional[MetadataColumns] = None
         
         # 빠른 초기화 - 인덱스와 메타데이터만 로드
         self._load_prebuilt_index()
@@ -220,16 +450,12 @@ class PrebuiltFAISSVectorStore(VectorStore):
                 except:
                     pass
         
-        # 2. 메타데이터 로드
-        if not Path(self.metadata_path).exists():
-            raise FileNotFoundError(f"메타데이터 파일을 찾을 수 없습니다: {self.metadata_path}")
-        
+        # 2. 문서 사이드카 로드 (없거나 메타데이터 JSON보다 오래되면 1회 변환)
         logger.info(f"메타데이터 로드: {self.metadata_path}")
-        with open(self.metadata_path, 'r', encoding='utf-8') as f:
-            self.metadata_info = json.load(f)
+        self.documents = PackedDocumentStore(self.metadata_path, cache_size=self.document_cache_size)
         
         # 3. 설정 정보 업데이트
-        index_info = self.metadata_info.get('index_info', {})
+        index_info = self.documents.index_info
         self.embedding_dim = index_info.get('embedding_dimension', 384)
         self.embedding_model_name = index_info.get('embedding_model', 'all-MiniLM-L6-v2')
         
@@ -247,179 +473,58 @@ class PrebuiltFAISSVectorStore(VectorStore):
         """사전 빌드된 인덱스는 추가 불가"""
         raise NotImplementedError("PrebuiltFAISSVectorStore는 문서 추가를 지원하지 않습니다. build_faiss_index.py를 사용하여 인덱스를 재빌드하세요.")
     
+    def _get_metadata_columns(self) -> MetadataColumns:
+        """FAISS 인덱스 순서의 메타데이터 필터 인덱스 (최초 검색 시 1회 구성)"""
+        if self._metadata_columns is None:
+            ntotal = self.index.ntotal
+            # 메타데이터가 없는 문서는 필터 검사 없이 통과
+            self._metadata_columns = MetadataColumns(
+                self.documents.faiss_doc_ids(ntotal), self.documents.filter_metadata(ntotal)
+            )
+        return self._metadata_columns
+    
     def search(self, query_embedding: List[float], top_k: int = 10, 
                filters: Optional[Dict[str, Any]] = None) -> List[str]:
         """빠른 유사도 검색"""
+        results = self.search_batch(query_embedding, top_k, filters)
+        return results[0] if results else []
+    
+    def search_batch(self, query_embeddings, top_k: int = 10,
+                     filters: Optional[Dict[str, Any]] = None) -> List[List[str]]:
+        """여러 쿼리를 FAISS에 한 번에 검색 (필터 조건을 만족하는 문서 중 상위 top_k개)
+        
+        Args:
+            query_embeddings: (n, d) 행렬 또는 쿼리 embedding 목록
+            top_k: 쿼리별 반환할 문서 수
+            filters: 모든 쿼리에 공통으로 적용할 메타데이터 필터
+            
+        Returns:
+            쿼리 순서대로 document ID 목록
+        """
+        try:
+            query_matrix = _as_query_matrix(query_embeddings)
+        except Exception as e:
+            logger.error(f"쿼리 임베딩 변환 실패: {e}")
+            return []
+        
         if self.index.ntotal == 0:
             logger.warning("인덱스가 비어있습니다")
-            return []
+            return [[] for _ in range(len(query_matrix))]
         
         try:
-            # 1. 쿼리 임베딩 준비
-            if isinstance(query_embedding, list):
-                query_vector = np.array(query_embedding, dtype='float32').reshape(1, -1)
-            else:
-                query_vector = query_embedding.astype('float32').reshape(1, -1)
-            
-            # 2. FAISS 검색
-            search_k = min(top_k * 3, self.index.ntotal)
-            distances, indices = self.index.search(query_vector, search_k)
-            
-            # 3. 결과 처리 및 필터링
-            results = []
-            document_mapping = self.metadata_info.get('document_mapping', {})
-            documents_metadata = self.metadata_info.get('documents_metadata', {})
-            
-            for distance, idx in zip(distances[0], indices[0]):
-                if idx == -1:
-                    continue
-                
-                # Document ID 찾기
-                doc_id = document_mapping.get(str(idx))
-                if not doc_id:
-                    continue
-                
-                # 메타데이터 필터링
-                if filters and doc_id in documents_metadata:
-                    metadata = documents_metadata[doc_id]
-                    if not self._match_filters(metadata, filters):
-                        continue
-                
-                results.append(doc_id)
-                
-                if len(results) >= top_k:
-                    break
+            # 필터는 사전 계산된 필터 인덱스로 FAISS 검색 단계에서 적용
+            results = self._get_metadata_columns().search(self.index, query_matrix, top_k, filters)
             
-            logger.debug(f"검색 완료: {len(results)}개 문서 반환")
+            logger.debug(f"검색 완료: {len(query_matrix)}개 쿼리, {sum(len(r) for r in results)}개 문서 반환")
             return results
             
         except Exception as e:
             logger.error(f"검색 실패: {e}")
-            return []
-    
-    def _match_filters(self, metadata: Dict[str, Any], filters: Dict[str, Any]) -> bool:
-        """메타데이터 필터링"""
-        for key, value in filters.items():
-            if key == 'type' and metadata.get('type') != value:
-                return False
-            elif key == 'category' and metadata.get('category') != value:
-                return False
-            elif key == 'max_price' and metadata.get('price', 0) > value:
-                return False
-            elif key == 'min_price' and metadata.get('price', float('inf')) < value:
-                return False
-            elif key == 'is_popular' and metadata.get('is_popular') != value:
-                return False
-            elif key == 'is_good_influence' and metadata.get('is_good_influence') != value:
-                return False
-        return True
+            return [[] for _ in range(len(query_matrix))]
     
     def get_documents_by_ids(self, doc_ids: List[str]) -> List[Document]:
-        """ID로 문서 내용 반환 (재구성)"""
-        documents = []
-        documents_metadata = self.metadata_info.get('documents_metadata', {})
-        documents_content = self.metadata_info.get('documents_content', {})
-        original_data = self.metadata_info.get('original_data', {})
-        
-        from .documents import ShopDocument, MenuDocument
-        
-        for doc_id in doc_ids:
-            if doc_id not in documents_metadata:
-                continue
-            
-            metadata = documents_metadata[doc_id]
-            content = documents_content.get(doc_id, "")
-            doc_type = metadata.get('type', 'unknown')
-            
-            # 원본 Document 타입에 맞게 재구성
-            try:
-                if doc_type == 'shop' and doc_id.startswith('shop_'):
-                    # ShopDocument 재구성
-                    shop_data = original_data.get(doc_id, metadata)
-                    if isinstance(shop_data, dict) and 'id' in shop_data:
-                        doc = ShopDocument(shop_data)
-                    else:
-                        # 메타데이터에서 재구성
-                        shop_info = {
-                            'id': int(doc_id.replace('shop_', '')),
-                            'name': metadata.get('name', ''),
-                            'category': metadata.get('category', ''),
-                            'address': metadata.get('address', ''),
-                            'is_good_influence_shop': metadata.get('is_good_influence', False),
-                            'is_food_card_shop': metadata.get('is_food_card_shop', 'N'),
-                            'ordinary_discount': metadata.get('ordinary_discount', False),
-                            'owner_message': metadata.get('owner_message', '')
-                        }
-                        doc = ShopDocument(shop_info)
-                    documents.append(doc)
-                    
-                elif doc_type == 'menu' and doc_id.startswith('menu_'):
-                    # MenuDocument 재구성
-                    menu_data = original_data.get(doc_id, metadata)
-                    if isinstance(menu_data, dict) and 'id' in menu_data:
-                        # 관련 shop 정보도 필요
-                        shop_id = f"shop_{menu_data.get('shop_id', '')}"
-                        shop_data = original_data.get(shop_id, {})
-                        doc = MenuDocument(menu_data, shop_data)
-                    else:
-                        # 메타데이터에서 재구성
-                        menu_info = {
-                            'id': int(doc_id.replace('menu_', '')),
-                            'shop_id': metadata.get('shop_id', 0),
-                            'name': metadata.get('menu_name', ''),
-                            'price': metadata.get('price', 0),
-                            'description': metadata.get('description', ''),
-                            'is_popular': metadata.get('is_popular', False)
-                        }
-                        shop_info = {
-                            'name': metadata.get('shop_name', ''),
-                            'category': metadata.get('category', '')
-                        }
-                        doc = MenuDocument(menu_info, shop_info)
-                    documents.append(doc)
-                    
-                else:
-                    # 알 수 없는 타입은 SimpleDocument로 처리
-                    class SimpleDocument:
-                        def __init__(self, doc_id, content, metadata):
-                            self._id = doc_id
-                            self._content = content
-                            self._metadata = metadata
-                        
-                        @property
-                        def id(self):
-                            return self._id
-                        
-                        def get_content(self):
-                            return self._content
-                        
-                        def get_metadata(self):
-                            return self._metadata
-                    
-                    documents.append(SimpleDocument(doc_id, content, metadata))
-                    
-            except Exception as e:
-                logger.warning(f"문서 재구성 실패 {doc_id}: {e}")
-                # 실패 시 SimpleDocument로 대체
-                class SimpleDocument:
-                    def __init__(self, doc_id, content, metadata):
-                        self._id = doc_id
-                        self._content = content
-                        self._metadata = metadata
-                    
-                    @property
-                    def id(self):
-                        return self._id
-                    
-                    def get_content(self):
-                        return self._content
-                    
-                    def get_metadata(self):
-                        return self._metadata
-                
-                documents.append(SimpleDocument(doc_id, content, metadata))
-        
-        return documents
+        """ID로 문서 반환 (반환된 문서만 사이드카에서 재구성, 자주 쓰는 문서는 LRU 캐시)"""
+        return self.documents.get_documents(doc_ids)
     
     def clear(self):
         """사전 빌드된 인덱스는 삭제 불가"""
@@ -427,24 +532,37 @@ class PrebuiltFAISSVectorStore(VectorStore):
     
     def encode_query(self, query_text: str) -> List[float]:
         """쿼리 텍스트를 임베딩으로 변환 (Lazy Loading)"""
+        return self.encode_queries([query_text])[0].tolist()
+    
+    def encode_queries(self, query_texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """여러 쿼리 텍스트를 한 번에 (n, d) float32 임베딩 행렬로 변환
+        
+        임베딩 캐시에 없는 쿼리만 모델로 인코딩 (모델은 필요할 때 로드)
+        """
         try:
-            model = self._ensure_embedding_model()
-            embedding = model.encode([query_text])
-            return embedding[0].tolist()
+            embeddings = self.embedding_cache.encode(
+                list(query_texts), self.embedding_model_name,
+                lambda texts: self._ensure_embedding_model().encode(
+                    texts, batch_size=batch_size, convert_to_numpy=True
+                )
+            )
+            return _as_query_matrix(embeddings)
         except Exception as e:
             logger.error(f"쿼리 임베딩 실패: {e}")
-            return [0.0] * self.embedding_dim
+            return np.zeros((len(query_texts), self.embedding_dim), dtype='float32')
 
 
 class FAISSVectorStore(VectorStore):
     """FAISS 기반 Vector Store"""
     
-    def __init__(self, embedding_model=None, index_path: Optional[str] = None, embedding_dim: int = 384):
+    def __init__(self, embedding_model=None, index_path: Optional[str] = None, embedding_dim: int = 384,
+                 embedding_cache: Optional[EmbeddingCache] = None):
         """
         Args:
             embedding_model: SentenceTransformer 모델 또는 None (기본값 사용)
             index_path: FAISS 인덱스 저장 경로
             embedding_dim: 임베딩 벡터 차원
+            embedding_cache: 쿼리 임베딩 캐시. None이면 전역 캐시 사용
         """
         try:
             # FAISS GPU 버전 시도
@@ -472,14 +590,18 @@ class FAISSVectorStore(VectorStore):
             logger.info("기본 임베딩 모델 로드: all-MiniLM-L6-v2")
             try:
                 self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+                self.embedding_model_name = 'all-MiniLM-L6-v2'
                 self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
             except Exception as e:
                 logger.warning(f"임베딩 모델 로드 실패: {e}, 다중 언어 모델 시도")
                 self.embedding_model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+                self.embedding_model_name = 'paraphrase-multilingual-MiniLM-L12-v2'
                 self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
         else:
             self.embedding_model = embedding_model
+            self.embedding_model_name = _embedding_model_name(embedding_model)
             self.embedding_dim = embedding_dim
+        self.embedding_cache = embedding_cache or get_embedding_cache()
         
         # FAISS 인덱스 초기화
         self.index = faiss.IndexFlatL2(self.embedding_dim)
@@ -495,6 +617,7 @@ class FAISSVectorStore(VectorStore):
         self.documents: Dict[str, Document] = {}  # {doc_id: Document}
         self.doc_id_to_faiss_idx: Dict[str, int] = {}  # {doc_id: faiss_idx}
         self.faiss_idx_to_doc_id: Dict[int, str] = {}  # {faiss_idx: doc_id}
+        self._metadata_columns: Optional[MetadataColumns] = None  # 검색 시 재구성 (문서 추가/삭제 시 무효화)
         
         # 인덱스 로드 시도
         if index_path and Path(index_path).exists():
@@ -549,6 +672,7 @@ class FAISSVectorStore(VectorStore):
                 self.faiss_idx_to_doc_id[faiss_idx] = doc_id
                 self.metadata_store[faiss_idx] = doc.get_metadata()
                 self.documents[doc_id] = doc
+            self._metadata_columns = None
             
             logger.info(f"{len(documents)}개 문서 추가 완료. 총 {self.index.ntotal}개 문서")
             
@@ -560,71 +684,60 @@ class FAISSVectorStore(VectorStore):
             logger.error(f"문서 추가 실패: {e}")
             raise
     
+    def _get_metadata_columns(self) -> MetadataColumns:
+        """FAISS 인덱스 순서의 메타데이터 필터 인덱스 (문서 변경 후 첫 검색 시 재구성)"""
+        columns = self._metadata_columns
+        if columns is None or columns.size != self.index.ntotal:
+            ntotal = self.index.ntotal
+            columns = MetadataColumns(
+                [self.faiss_idx_to_doc_id.get(idx) for idx in range(ntotal)],
+                [self.metadata_store.get(idx, {}) for idx in range(ntotal)],
+                equality_keys=('type', 'category', 'is_popular', 'is_good_influence', 'location')
+            )
+            self._metadata_columns = columns
+        return columns
+    
     def search(self, query_embedding: List[float], top_k: int = 10, 
                filters: Optional[Dict[str, Any]] = None) -> List[str]:
         """FAISS에서 유사도 검색 수행"""
+        results = self.search_batch(query_embedding, top_k, filters)
+        return results[0] if results else []
+    
+    def search_batch(self, query_embeddings, top_k: int = 10,
+                     filters: Optional[Dict[str, Any]] = None) -> List[List[str]]:
+        """여러 쿼리를 FAISS에 한 번에 검색 (필터 조건을 만족하는 문서 중 상위 top_k개)
+        
+        Args:
+            query_embeddings: (n, d) 행렬 또는 쿼리 embedding 목록
+            top_k: 쿼리별 반환할 문서 수
+            filters: 모든 쿼리에 공통으로 적용할 메타데이터 필터
+            
+        Returns:
+            쿼리 순서대로 document ID 목록
+        """
+        try:
+            query_matrix = _as_query_matrix(query_embeddings)
+        except Exception as e:
+            logger.error(f"쿼리 임베딩 변환 실패: {e}")
+            return []
+        
         if self.index.ntotal == 0:
             logger.warning("인덱스가 비어있습니다")
-            return []
+            return [[] for _ in range(len(query_matrix))]
         
         try:
-            # 1. 쿼리 임베딩 준비
-            if isinstance(query_embedding, list):
-                query_vector = np.array(query_embedding, dtype='float32').reshape(1, -1)
-            else:
-                query_vector = query_embedding.astype('float32').reshape(1, -1)
-            
-            # 2. FAISS 검색 (더 많이 검색해서 필터링)
-            search_k = min(top_k * 3, self.index.ntotal)  # 필터링 고려하여 더 많이 검색
-            distances, indices = self.index.search(query_vector, search_k)
+            # 필터는 사전 계산된 필터 인덱스로 FAISS 검색 단계에서 적용 (GPU 인덱스는 selector 미지원)
+            results = self._get_metadata_columns().search(
+                self.index, query_matrix, top_k, filters, use_selector=not self.use_gpu
+            )
             
-            # 3. 결과 처리
-            results = []
-            for distance, idx in zip(distances[0], indices[0]):
-                if idx == -1:  # 유효하지 않은 인덱스
-                    continue
-                
-                # 메타데이터 필터링
-                if filters and not self._match_filters(idx, filters):
-                    continue
-                
-                # Document ID 반환
-                doc_id = self.faiss_idx_to_doc_id.get(idx)
-                if doc_id:
-                    results.append(doc_id)
-                
-                # top_k 제한
-                if len(results) >= top_k:
-                    break
-            
-            logger.info(f"FAISS 검색 완료: {len(results)}개 문서 반환 (필터: {filters})")
+            logger.info(f"FAISS 검색 완료: {len(query_matrix)}개 쿼리, "
+                        f"{sum(len(r) for r in results)}개 문서 반환 (필터: {filters})")
             return results
             
         except Exception as e:
             logger.error(f"FAISS 검색 실패: {e}")
-            return []
-    
-    def _match_filters(self, faiss_idx: int, filters: Dict[str, Any]) -> bool:
-        """메타데이터 필터링 확인"""
-        metadata = self.metadata_store.get(faiss_idx, {})
-        
-        for key, value in filters.items():
-            if key == 'type' and metadata.get('type') != value:
-                return False
-            elif key == 'category' and metadata.get('category') != value:
-                return False
-            elif key == 'max_price' and metadata.get('price', 0) > value:
-                return False
-            elif key == 'min_price' and metadata.get('price', float('inf')) < value:
-                return False
-            elif key == 'is_popular' and metadata.get('is_popular') != value:
-                return False
-            elif key == 'is_good_influence' and metadata.get('is_good_influence') != value:
-                return False
-            elif key == 'location' and metadata.get('location') != value:
-                return False
-        
-        return True
+            return [[] for _ in range(len(query_matrix))]
     
     def get_documents_by_ids(self, doc_ids: List[str]) -> List[Document]:
         """Document ID로 문서 객체들 반환"""
@@ -641,6 +754,7 @@ class FAISSVectorStore(VectorStore):
         self.documents.clear()
         self.doc_id_to_faiss_idx.clear()
         self.faiss_idx_to_doc_id.clear()
+        self._metadata_columns = None
         
         logger.info("FAISS 데이터 삭제 완료")
     
@@ -694,6 +808,7 @@ class FAISSVectorStore(VectorStore):
                 self.metadata_store = {int(k): v for k, v in metadata_info['metadata_store'].items()}
                 self.doc_id_to_faiss_idx = metadata_info['doc_id_to_faiss_idx']
                 self.faiss_idx_to_doc_id = {int(k): v for k, v in metadata_info['faiss_idx_to_doc_id'].items()}
+                self._metadata_columns = None
                 
                 logger.info(f"FAISS 인덱스 로드 완료: {self.index.ntotal}개 문서")
             else:
@@ -723,12 +838,19 @@ class FAISSVectorStore(VectorStore):
     
     def encode_query(self, query_text: str) -> List[float]:
         """쿼리 텍스트를 임베딩으로 변환"""
+        return self.encode_queries([query_text])[0].tolist()
+    
+    def encode_queries(self, query_texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """여러 쿼리 텍스트를 한 번에 (n, d) float32 임베딩 행렬로 변환 (임베딩 캐시에 없는 쿼리만 인코딩)"""
         try:
-            embedding = self.embedding_model.encode([query_text])
-            return embedding[0].tolist()
+            embeddings = self.embedding_cache.encode(
+                list(query_texts), self.embedding_model_name,
+                lambda texts: self.embedding_model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+            )
+            return _as_query_matrix(embeddings)
         except Exception as e:
             logger.error(f"쿼리 임베딩 실패: {e}")
-            return [0.0] * self.embedding_dim
+            return np.zeros((len(query_texts), self.embedding_dim), dtype='float32')
 
 
 class ChromaDBVectorStore(VectorStore):
@@ -8,6 +8,7 @@ from .popularity_funnel import PopularityFunnel
 from .contextual_funnel import ContextualFunnel
 from .content_funnel import ContentFunnel
 from .collaborative_funnel import CollaborativeFunnel
+from .restaurant_store import RestaurantStore, get_restaurant_store
 from .candidate_generator import CandidateGenerator, CandidateGenerationConfig
 
 __all__ = [
@@ -15,6 +16,8 @@ __all__ = [
     'ContextualFunnel',
     'ContentFunnel',
     'CollaborativeFunnel',
+    'RestaurantStore',
+    'get_restaurant_store',
     'CandidateGenerator', 
     'CandidateGenerationConfig'
 ]
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+콘텐츠 Funnel 벤치마크
+기존 전체 매장 순회(substring 매칭) 방식과 역색인 BM25 방식의 쿼리 지연시간 비교
+
+사용법:
+    python recommendation/benchmark_content_funnel.py --replicas 10 --repeat 200
+"""
+
+import argparse
+import json
+import logging
+import re
+import statistics
+import time
+from typing import List, Dict, Any
+
+try:
+    from .content_funnel import ContentFunnel
+    from .restaurant_store import RestaurantStore
+except ImportError:
+    from content_funnel import ContentFunnel
+    from restaurant_store import RestaurantStore
+
+BENCHMARK_QUERIES = ["비빔밥", "한식", "치킨 매운", "돈까스 우동", "카츠", "김치찌개", "커피 케이크", "불고기정식"]
+
+
+def replicate_restaurants(restaurants: List[Dict[str, Any]], replicas: int) -> List[Dict[str, Any]]:
+    """매장 데이터를 replicas배로 복제 (shopId/매장명만 구분)"""
+    replicated = []
+    for replica in range(replicas):
+        for restaurant in restaurants:
+            copy = dict(restaurant)
+            copy['shopId'] = f"{restaurant.get('shopId', '')}_{replica}"
+            copy['shopName'] = f"{restaurant.get('shopName', '')} {replica}호점"
+            replicated.append(copy)
+    return replicated
+
+
+class LegacyScanContentScorer:
+    """기존 ContentFunnel 방식: 쿼리마다 전체 매장 x 토큰 x 메뉴 substring 검사"""
+
+    def __init__(self, restaurants: List[Dict[str, Any]]):
+        self.restaurants = restaurants
+        self.content_index = {}
+        for restaurant in restaurants:
+            menus = restaurant.get('menus', [])
+            text = ' '.join(
+                [restaurant.get('shopName', ''), restaurant.get('category', '')] +
+                [menu.get('name', '') for menu in menus]
+            ).lower()
+            self.content_index[restaurant.get('shopId', '')] = {
+                'tokens': self._tokenize(text),
+                'menus': [menu.get('name', '').lower() for menu in menus],
+                'category': restaurant.get('category', '').lower()
+            }
+
+    def _tokenize(self, text: str) -> List[str]:
+        tokens = re.findall(r'[가-힣a-zA-Z0-9]+', text)
+        return [token.lower() for token in tokens if len(token) > 1]
+
+    def get_candidates(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+        query = query.lower()
+        query_tokens = self._tokenize(query)
+        candidates = []
+        for restaurant in self.restaurants:
+            shop_id = restaurant.get('shopId', '')
+            index_data = self.content_index[shop_id]
+            score = 0.0
+
+            for menu_name in index_data['menus']:
+                if query in menu_name or menu_name in query:
+                    score += 50
+                    break
+
+            if any(token in index_data['category'] for token in query_tokens) or query in index_data['category']:
+                score += 30
+
+            matched_tokens = []
+            for query_token in query_tokens:
+                for content_token in index_data['tokens']:
+                    if query_token in content_token or content_token in query_token:
+                        if content_token not in matched_tokens:
+                            matched_tokens.append(content_token)
+                            break
+            score += min(len(matched_tokens) * 5, 25)
+
+            # 기존 구현은 매장명 확인을 위해 전체 매장을 다시 순회
+            for other in self.restaurants:
+                if other.get('shopId') == shop_id:
+                    shop_name = other.get('shopName', '').lower()
+                    if any(token in shop_name for token in query_tokens) or query in shop_name:
+                        score += 15
+                    break
+
+            if score > 0:
+                candidates.append({'shop_id': shop_id, 'content_score': score})
+
+        candidates.sort(key=lambda x: x['content_score'], reverse=True)
+        return candidates[:limit]
+
+
+def _measure(func, queries: List[str], repeat: int) -> Dict[str, float]:
+    """쿼리별 지연시간 측정 (ms)"""
+    latencies = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            func(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        'mean_ms': statistics.mean(latencies),
+        'p50_ms': latencies[len(latencies) // 2],
+        'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    }
+
+
+def run_benchmark(restaurants_path: str = "data/restaurants_optimized.json",
+                  replicas: int = 10, repeat: int = 100) -> Dict[str, Any]:
+    """기존 스캔 방식과 역색인 방식 비교"""
+    with open(restaurants_path, 'r', encoding='utf-8') as f:
+        restaurants = json.load(f).get('restaurants', [])
+    restaurants = replicate_restaurants(restaurants, replicas)
+
+    build_start = time.perf_counter()
+    funnel = ContentFunnel(store=RestaurantStore(restaurants))
+    index_build_ms = (time.perf_counter() - build_start) * 1000
+    legacy = LegacyScanContentScorer(restaurants)
+
+    legacy_stats = _measure(legacy.get_candidates, BENCHMARK_QUERIES, repeat)
+    indexed_stats = _measure(funnel.get_candidates, BENCHMARK_QUERIES, repeat)
+
+    return {
+        'shops': len(restaurants),
+        'queries': len(BENCHMARK_QUERIES) * repeat,
+        'index_build_ms': index_build_ms,
+        'legacy_scan': legacy_stats,
+        'inverted_index_bm25': indexed_stats,
+        'speedup_mean': legacy_stats['mean_ms'] / indexed_stats['mean_ms'] if indexed_stats['mean_ms'] else float('inf')
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="콘텐츠 Funnel 벤치마크")
+    parser.add_argument("--restaurants_path", default="data/restaurants_optimized.json")
+    parser.add_argument("--replicas", type=int, default=10, help="매장 데이터 복제 배수")
+    parser.add_argument("--repeat", type=int, default=100, help="쿼리 세트 반복 횟수")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    result = run_benchmark(args.restaurants_path, args.replicas, args.repeat)
+
+    print(f"=== 콘텐츠 Funnel 벤치마크 ({result['shops']}개 매장, {result['queries']}회 쿼리) ===")
+    print(f"역색인 구축: {result['index_build_ms']:.1f}ms")
+    for name in ('legacy_scan', 'inverted_index_bm25'):
+        stats = result[name]
+        print(f"{name}: 평균 {stats['mean_ms']:.3f}ms, p50 {stats['p50_ms']:.3f}ms, p95 {stats['p95_ms']:.3f}ms")
+    print(f"평균 지연시간 개선: {result['speedup_mean']:.1f}배")
@@ -4,7 +4,10 @@ Layer 1: 후보 생성자 (4-Funnel 통합 관리)
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Dict, Any, Optional, Callable
 from datetime import datetime
 
 try:
@@ -12,11 +15,13 @@ try:
     from .contextual_funnel import ContextualFunnel
     from .content_funnel import ContentFunnel
     from .collaborative_funnel import CollaborativeFunnel
+    from .restaurant_store import RestaurantStore, get_restaurant_store
 except ImportError:
     from popularity_funnel import PopularityFunnel
     from contextual_funnel import ContextualFunnel
     from content_funnel import ContentFunnel
     from collaborative_funnel import CollaborativeFunnel
+    from restaurant_store import RestaurantStore, get_restaurant_store
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +38,21 @@ class CandidateGenerationConfig:
     # 최종 후보 수 제한
     MAX_TOTAL_CANDIDATES = 150
     
+    # 매장 데이터 경로 (4개 Funnel이 공유)
+    RESTAURANTS_PATH = "data/restaurants_optimized.json"
+    
+    # 병렬 실행 모드: Funnel들을 스레드 풀에서 동시에 실행
+    PARALLEL_FUNNELS = False
+    MAX_FUNNEL_WORKERS = 4
+    
+    # Funnel별 지연시간 예산 (초, 병렬 모드에서 초과한 Funnel 결과는 버림)
+    FUNNEL_TIMEOUTS = {
+        'collaborative': 0.5,
+        'content': 0.5,
+        'contextual': 0.5,
+        'popularity': 0.5
+    }
+    
     # Funnel별 가중치 (추후 튜닝 가능)
     FUNNEL_WEIGHTS = {
         'popularity': 1.0,
@@ -45,18 +65,32 @@ class CandidateGenerationConfig:
 class CandidateGenerator:
     """Layer 1: 4-Funnel 후보 생성 시스템"""
     
-    def __init__(self, config: Optional[CandidateGenerationConfig] = None):
+    def __init__(self, config: Optional[CandidateGenerationConfig] = None,
+                 store: Optional[RestaurantStore] = None):
         """
         Args:
             config: 후보 생성 설정
+            store: 공유 매장 저장소 (없으면 RESTAURANTS_PATH에서 1회 로드)
         """
         self.config = config or CandidateGenerationConfig()
+        self.store = store or get_restaurant_store(self.config.RESTAURANTS_PATH)
+        
+        # 구현된 Funnel들 초기화 (같은 저장소 공유)
+        self.popularity_funnel = PopularityFunnel(store=self.store)
+        self.contextual_funnel = ContextualFunnel(store=self.store)
+        self.content_funnel = ContentFunnel(store=self.store)
+        self.collaborative_funnel = CollaborativeFunnel(store=self.store)
         
-        # 구현된 Funnel들 초기화
-        self.popularity_funnel = PopularityFunnel()
-        self.contextual_funnel = ContextualFunnel()
-        self.content_funnel = ContentFunnel()
-        self.collaborative_funnel = CollaborativeFunnel()
+        # 병렬 모드용 스레드 풀 (최초 사용 시 생성)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        
+        # Funnel별 실행 시간 통계
+        self._timing_lock = threading.Lock()
+        self.funnel_timings: Dict[str, Dict[str, Any]] = {
+            name: {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0, 'timeouts': 0, 'errors': 0}
+            for name in ('collaborative', 'content', 'contextual', 'popularity')
+        }
         
         logger.info("CandidateGenerator 초기화 완료")
     
@@ -86,58 +120,47 @@ class CandidateGenerator:
         if current_time is None:
             current_time = datetime.now()
         
-        all_candidates = []
-        
-        # Funnel 1: 협업 필터링 기반 후보 생성
-        try:
-            collaborative_candidates = self.collaborative_funnel.get_candidates(
+        # Funnel 실행 계획 (이 순서대로 결과를 병합)
+        funnel_calls = [
+            # Funnel 1: 협업 필터링 기반 후보 생성
+            ('collaborative', '협업', self.collaborative_funnel.get_candidates, dict(
                 user_id=user_id,
                 user_type=user_type,
                 filters=filters,
                 limit=self.config.COLLABORATIVE_CANDIDATES
-            )
-            all_candidates.extend(collaborative_candidates)
-            logger.info(f"협업 Funnel: {len(collaborative_candidates)}개 후보 생성")
-        except Exception as e:
-            logger.error(f"협업 Funnel 오류: {e}")
-        
-        # Funnel 2: 콘텐츠 기반 후보 생성
-        if query:
-            try:
-                content_candidates = self.content_funnel.get_candidates(
-                    query=query,
-                    filters=filters,
-                    limit=self.config.CONTENT_CANDIDATES
-                )
-                all_candidates.extend(content_candidates)
-                logger.info(f"콘텐츠 Funnel: {len(content_candidates)}개 후보 생성")
-            except Exception as e:
-                logger.error(f"콘텐츠 Funnel 오류: {e}")
-        
-        # Funnel 3: 상황/규칙 기반 후보 생성  
-        try:
-            contextual_candidates = self.contextual_funnel.get_candidates(
+            )),
+            # Funnel 3: 상황/규칙 기반 후보 생성
+            ('contextual', '상황', self.contextual_funnel.get_candidates, dict(
                 user_location=user_location,
                 current_time=current_time,
                 time_of_day=time_of_day,
                 filters=filters,
                 limit=self.config.CONTEXTUAL_CANDIDATES
-            )
-            all_candidates.extend(contextual_candidates)
-            logger.info(f"상황 Funnel: {len(contextual_candidates)}개 후보 생성")
-        except Exception as e:
-            logger.error(f"상황 Funnel 오류: {e}")
-        
-        # Funnel 4: 인기도 기반 후보 생성
-        try:
-            popularity_candidates = self.popularity_funnel.get_candidates(
+            )),
+            # Funnel 4: 인기도 기반 후보 생성
+            ('popularity', '인기도', self.popularity_funnel.get_candidates, dict(
                 filters=filters,
                 limit=self.config.POPULARITY_CANDIDATES
-            )
-            all_candidates.extend(popularity_candidates)
-            logger.info(f"인기도 Funnel: {len(popularity_candidates)}개 후보 생성")
-        except Exception as e:
-            logger.error(f"인기도 Funnel 오류: {e}")
+            ))
+        ]
+        
+        # Funnel 2: 콘텐츠 기반 후보 생성 (쿼리가 있을 때만)
+        if query:
+            funnel_calls.insert(1, ('content', '콘텐츠', self.content_funnel.get_candidates, dict(
+                query=query,
+                filters=filters,
+                limit=self.config.CONTENT_CANDIDATES
+            )))
+        
+        if self.config.PARALLEL_FUNNELS:
+            funnel_results = self._run_funnels_parallel(funnel_calls)
+        else:
+            funnel_results = [self._run_funnel(name, label, func, kwargs)
+                              for name, label, func, kwargs in funnel_calls]
+        
+        all_candidates = []
+        for candidates in funnel_results:
+            all_candidates.extend(candidates)
         
         # 중복 제거 및 통합
         unique_candidates = self._remove_duplicates(all_candidates)
@@ -148,6 +171,80 @@ class CandidateGenerator:
         logger.info(f"후보 생성 완료: 총 {len(final_candidates)}개 (중복 제거 후)")
         return final_candidates
     
+    def _run_funnel(self, name: str, label: str, func: Callable, kwargs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """단일 Funnel 실행 및 시간 기록 (오류 시 빈 결과)"""
+        start = time.perf_counter()
+        try:
+            candidates = func(**kwargs)
+            self._record_timing(name, (time.perf_counter() - start) * 1000)
+            logger.info(f"{label} Funnel: {len(candidates)}개 후보 생성")
+            return candidates
+        except Exception as e:
+            self._record_timing(name, (time.perf_counter() - start) * 1000, error=True)
+            logger.error(f"{label} Funnel 오류: {e}")
+            return []
+    
+    def _run_funnels_parallel(self, funnel_calls: List[tuple]) -> List[List[Dict[str, Any]]]:
+        """Funnel들을 동시에 실행하고, 예산 내에 끝나지 않은 Funnel은 제외"""
+        executor = self._get_executor()
+        start = time.perf_counter()
+        futures = [
+            (name, label, executor.submit(self._run_funnel, name, label, func, kwargs))
+            for name, label, func, kwargs in funnel_calls
+        ]
+        
+        # 제출 순서대로 결과 수집 (병합 순서 유지)
+        results = []
+        for name, label, future in futures:
+            budget = self.config.FUNNEL_TIMEOUTS.get(name, 0.5)
+            remaining = max(0.0, budget - (time.perf_counter() - start))
+            try:
+                results.append(future.result(timeout=remaining))
+            except FutureTimeoutError:
+                future.cancel()
+                self._record_timeout(name)
+                logger.warning(f"{label} Funnel 지연시간 예산 초과 ({budget * 1000:.0f}ms) - 결과 제외")
+                results.append([])
+        return results
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """병렬 모드용 스레드 풀 반환"""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.config.MAX_FUNNEL_WORKERS, thread_name_prefix="funnel"
+                    )
+        return self._executor
+    
+    def _record_timing(self, name: str, elapsed_ms: float, error: bool = False):
+        """Funnel 실행 시간 기록"""
+        with self._timing_lock:
+            timing = self.funnel_timings.setdefault(
+                name, {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0, 'timeouts': 0, 'errors': 0}
+            )
+            timing['calls'] += 1
+            timing['total_ms'] += elapsed_ms
+            timing['max_ms'] = max(timing['max_ms'], elapsed_ms)
+            timing['last_ms'] = elapsed_ms
+            if error:
+                timing['errors'] += 1
+    
+    def _record_timeout(self, name: str):
+        """Funnel 예산 초과 기록"""
+        with self._timing_lock:
+            self.funnel_timings[name]['timeouts'] += 1
+    
+    def attach_data_collector(self, data_collector, replay_days: int = 7):
+        """학습 데이터 수집기의 추천 선택/피드백을 인기도 Funnel 점수에 반영"""
+        self.popularity_funnel.attach_collector(data_collector, replay_days=replay_days)
+    
+    def shutdown(self):
+        """병렬 모드 스레드 풀 정리"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
     def _remove_duplicates(self, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """중복 후보 제거 및 통합"""
         seen_shops = {}
@@ -193,10 +290,28 @@ class CandidateGenerator:
                     'collaborative': self.config.COLLABORATIVE_CANDIDATES
                 }
             },
-            'popularity_stats': self.popularity_funnel.get_popularity_stats()
+            'popularity_stats': self.popularity_funnel.get_popularity_stats(),
+            'parallel': self.config.PARALLEL_FUNNELS,
+            'funnel_timings': self._get_timing_summary()
         }
         
         return stats
+    
+    def _get_timing_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Funnel별 실행 시간 요약"""
+        with self._timing_lock:
+            return {
+                name: {
+                    'calls': timing['calls'],
+                    'avg_ms': timing['total_ms'] / timing['calls'] if timing['calls'] else 0.0,
+                    'max_ms': timing['max_ms'],
+                    'last_ms': timing['last_ms'],
+                    'timeouts': timing['timeouts'],
+                    'errors': timing['errors'],
+                    'budget_ms': self.config.FUNNEL_TIMEOUTS.get(name, 0.5) * 1000
+                }
+                for name, timing in self.funnel_timings.items()
+            }
 
 
 # 테스트 함수
@@ -4,34 +4,46 @@
 현재는 규칙 기반 시뮬레이션, 추후 실제 데이터로 개선
 """
 
-import json
 import logging
 from typing import List, Dict, Any, Optional
 from collections import defaultdict, Counter
 import random
 
+import numpy as np
+
+try:
+    from .restaurant_store import RestaurantStore, get_restaurant_store
+except ImportError:
+    from restaurant_store import RestaurantStore, get_restaurant_store
+
 logger = logging.getLogger(__name__)
 
 
 class CollaborativeFunnel:
     """협업 필터링 기반 후보 생성 Funnel"""
     
-    def __init__(self, restaurants_path: str = "data/restaurants_optimized.json"):
+    # 지원하는 필터 키
+    FILTER_KEYS = ('category', 'is_good_influence', 'accepts_meal_card', 'max_price')
+    
+    def __init__(self, restaurants_path: str = "data/restaurants_optimized.json",
+                 store: Optional[RestaurantStore] = None):
         """
         Args:
             restaurants_path: 매장 데이터 파일 경로
+            store: 공유 매장 저장소 (CandidateGenerator에서 주입)
         """
         self.restaurants_path = restaurants_path
-        self.restaurants = []
+        self.store = store
+        self.restaurants = ()
         self._load_data()
         self._build_user_profiles()
     
     def _load_data(self):
-        """매장 데이터 로드"""
+        """매장 데이터 로드 (주입된 공유 저장소가 없으면 경로별 공유 저장소 사용)"""
         try:
-            with open(self.restaurants_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.restaurants = data.get('restaurants', [])
+            if self.store is None:
+                self.store = get_restaurant_store(self.restaurants_path)
+            self.restaurants = self.store.restaurants
             
             logger.info(f"협業 Funnel: {len(self.restaurants)}개 매장 데이터 로드 완료")
             
@@ -78,14 +90,22 @@ class CollaborativeFunnel:
             }
         }
         
-        # 매장별 사용자 타입 선호도 점수 계산
-        self.shop_type_scores = {}
-        for restaurant in self.restaurants:
-            shop_id = restaurant.get('shopId', '')
-            self.shop_type_scores[shop_id] = self._calculate_type_scores(restaurant)
+        # 매장별 사용자 타입 선호도 점수 계산 (매장 x 사용자 타입 행렬, 저장소에 1회만 계산)
+        self.user_types = list(self.user_type_preferences.keys())
+        self.type_score_matrix = self.store.derived(
+            'collaborative_type_scores', self._build_type_score_matrix
+        )
         
         logger.info(f"사용자 프로필 시뮬레이션 구축 완료")
     
+    def _build_type_score_matrix(self, store: RestaurantStore) -> np.ndarray:
+        """저장소 전체 매장에 대한 사용자 타입별 점수 행렬 생성"""
+        matrix = np.zeros((len(store), len(self.user_types)), dtype=np.float64)
+        for index, restaurant in enumerate(store.restaurants):
+            type_scores = self._calculate_type_scores(restaurant)
+            matrix[index] = [type_scores[user_type] for user_type in self.user_types]
+        return matrix
+    
     def _calculate_type_scores(self, restaurant: Dict[str, Any]) -> Dict[str, float]:
         """매장에 대한 사용자 타입별 점수 계산"""
         scores = {}
@@ -167,35 +187,26 @@ class CollaborativeFunnel:
         
         candidates = []
         
-        for restaurant in self.restaurants:
-            shop_id = restaurant.get('shopId', '')
-            
-            # 기본 필터 적용
-            if not self._passes_basic_filters(restaurant, filters or {}):
-                continue
-            
-            # 협업 필터링 점수 계산
-            collaborative_score = self.shop_type_scores.get(shop_id, {}).get(user_type, 0)
-            
-            # 점수가 너무 낮으면 제외
-            if collaborative_score < 10:
-                continue
-            
+        # 협업 필터링 점수 열
+        scores = self.type_score_matrix[:, self.user_types.index(user_type)]
+        
+        # 기본 필터 + 점수가 너무 낮은 매장 제외 후 점수순 정렬
+        mask = self.store.filter_mask(filters, self.FILTER_KEYS) & (scores >= 10)
+        
+        for index in self.store.top_indices(scores, mask, limit):
+            restaurant = self.store.get(index)
             candidate = {
-                'shop_id': shop_id,
+                'shop_id': restaurant.get('shopId', ''),
                 'shop_name': restaurant.get('shopName', ''),
                 'category': restaurant.get('category', ''),
                 'funnel_source': 'collaborative',
-                'collaborative_score': collaborative_score,
+                'collaborative_score': float(scores[index]),
                 'reason': self._get_collaborative_reason(restaurant, user_type)
             }
             candidates.append(candidate)
         
-        # 협업 필터링 점수로 정렬
-        candidates.sort(key=lambda x: x['collaborative_score'], reverse=True)
-        
-        logger.info(f"협업 Funnel: {len(candidates[:limit])}개 후보 생성 (사용자 타입: {user_type})")
-        return candidates[:limit]
+        logger.info(f"협업 Funnel: {len(candidates)}개 후보 생성 (사용자 타입: {user_type})")
+        return candidates
     
     def _infer_user_type(self, user_id: Optional[str], filters: Dict[str, Any]) -> str:
         """필터 조건으로부터 사용자 타입 추론"""
@@ -225,34 +236,6 @@ class CollaborativeFunnel:
         
         return 'default'
     
-    def _passes_basic_filters(self, restaurant: Dict[str, Any], filters: Dict[str, Any]) -> bool:
-        """기본 필터 조건 확인"""
-        # 카테고리 필터
-        if filters.get('category'):
-            category_filter = filters['category'].lower()
-            if category_filter not in restaurant.get('category', '').lower():
-                return False
-        
-        # 착한가게 필터
-        if filters.get('is_good_influence'):
-            if not restaurant.get('attributes', {}).get('isGoodShop', False):
-                return False
-        
-        # 급식카드 필터
-        if filters.get('accepts_meal_card'):
-            if not restaurant.get('attributes', {}).get('acceptsMealCard', False):
-                return False
-        
-        # 최대 가격 필터
-        if filters.get('max_price'):
-            menus = restaurant.get('menus', [])
-            if menus:
-                min_price = min(menu.get('price', float('inf')) for menu in menus)
-                if min_price > filters['max_price']:
-                    return False
-        
-        return True
-    
     def _get_collaborative_reason(self, restaurant: Dict[str, Any], user_type: str) -> str:
         """협업 필터링 추천 이유 생성"""
         preferences = self.user_type_preferences.get(user_type, {})
@@ -291,19 +274,17 @@ class CollaborativeFunnel:
         """사용자 타입별 매장 점수 분포"""
         distribution = {}
         
-        for user_type in self.user_type_preferences.keys():
-            scores = []
-            for shop_scores in self.shop_type_scores.values():
-                if user_type in shop_scores:
-                    scores.append(shop_scores[user_type])
-            
-            if scores:
-                distribution[user_type] = {
-                    'avg_score': sum(scores) / len(scores),
-                    'max_score': max(scores),
-                    'min_score': min(scores),
-                    'shop_count': len(scores)
-                }
+        if not len(self.type_score_matrix):
+            return distribution
+        
+        for type_index, user_type in enumerate(self.user_types):
+            scores = self.type_score_matrix[:, type_index]
+            distribution[user_type] = {
+                'avg_score': float(scores.mean()),
+                'max_score': float(scores.max()),
+                'min_score': float(scores.min()),
+                'shop_count': len(scores)
+            }
         
         return distribution
 
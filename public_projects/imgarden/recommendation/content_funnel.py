@@ -3,34 +3,54 @@
 검색 쿼리와 메뉴/카테고리 매칭 기반 추천
 """
 
-import json
 import logging
 from typing import List, Dict, Any, Optional
-from collections import Counter
+from collections import Counter, defaultdict
 import re
 
+import numpy as np
+
+try:
+    from .restaurant_store import RestaurantStore, get_restaurant_store
+except ImportError:
+    from restaurant_store import RestaurantStore, get_restaurant_store
+
 logger = logging.getLogger(__name__)
 
 
 class ContentFunnel:
     """콘텐츠 기반 후보 생성 Funnel"""
     
-    def __init__(self, restaurants_path: str = "data/restaurants_optimized.json"):
+    # 지원하는 필터 키
+    FILTER_KEYS = ('category', 'is_good_influence', 'accepts_meal_card')
+    
+    # BM25 파라미터 / 필드 가중치 (메뉴 > 카테고리 > 매장명, 기존 매칭 점수 비중 유지)
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    FIELD_WEIGHTS = {'name': 1.5, 'category': 2.0, 'menu': 3.0}
+    
+    # 다른 Funnel 점수와 비슷한 범위로 맞추기 위한 배율
+    SCORE_SCALE = 10.0
+    
+    def __init__(self, restaurants_path: str = "data/restaurants_optimized.json",
+                 store: Optional[RestaurantStore] = None):
         """
         Args:
             restaurants_path: 매장 데이터 파일 경로
+            store: 공유 매장 저장소 (CandidateGenerator에서 주입)
         """
         self.restaurants_path = restaurants_path
-        self.restaurants = []
+        self.store = store
+        self.restaurants = ()
         self._load_data()
         self._build_content_index()
     
     def _load_data(self):
-        """매장 데이터 로드"""
+        """매장 데이터 로드 (주입된 공유 저장소가 없으면 경로별 공유 저장소 사용)"""
         try:
-            with open(self.restaurants_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.restaurants = data.get('restaurants', [])
+            if self.store is None:
+                self.store = get_restaurant_store(self.restaurants_path)
+            self.restaurants = self.store.restaurants
             
             logger.info(f"콘텐츠 Funnel: {len(self.restaurants)}개 매장 데이터 로드 완료")
             
@@ -39,42 +59,48 @@ class ContentFunnel:
             self.restaurants = []
     
     def _build_content_index(self):
-        """콘텐츠 검색을 위한 인덱스 구축"""
-        self.content_index = {}
+        """콘텐츠 검색을 위한 역색인(postings list) 구축
+
+        term -> (매장 인덱스 배열, BM25 기여도 배열)
+        필드별 가중치(매장명/카테고리/메뉴)를 반영한 BM25F 방식으로 기여도를 미리 계산해두고,
+        검색 시에는 쿼리 term의 postings만 합산
+        """
+        n_shops = len(self.store)
+        term_frequencies: Dict[str, Dict[int, float]] = defaultdict(dict)
+        doc_lengths = np.zeros(n_shops, dtype=np.float64)
+        self.keyword_counts = Counter()
         
-        for restaurant in self.restaurants:
-            shop_id = restaurant.get('shopId', '')
-            
-            # 검색 가능한 모든 텍스트 수집
-            searchable_text = []
-            
-            # 매장명
-            shop_name = restaurant.get('shopName', '')
-            if shop_name:
-                searchable_text.append(shop_name)
-            
-            # 카테고리
-            category = restaurant.get('category', '')
-            if category:
-                searchable_text.append(category)
-            
-            # 메뉴명들
-            menus = restaurant.get('menus', [])
-            for menu in menus:
-                menu_name = menu.get('name', '')
-                if menu_name:
-                    searchable_text.append(menu_name)
-            
-            # 검색용 텍스트 통합 (소문자 변환)
-            combined_text = ' '.join(searchable_text).lower()
-            self.content_index[shop_id] = {
-                'text': combined_text,
-                'tokens': self._tokenize(combined_text),
-                'menus': [menu.get('name', '').lower() for menu in menus],
-                'category': category.lower()
+        for index, restaurant in enumerate(self.store.restaurants):
+            fields = {
+                'name': restaurant.get('shopName', ''),
+                'category': restaurant.get('category', ''),
+                'menu': ' '.join(menu.get('name', '') for menu in restaurant.get('menus', []))
             }
+            
+            for field, text in fields.items():
+                weight = self.FIELD_WEIGHTS[field]
+                tokens = self._tokenize(text)
+                self.keyword_counts.update(tokens)
+                
+                terms = self._analyze_tokens(tokens)
+                doc_lengths[index] += weight * len(terms)
+                for term in terms:
+                    shop_tf = term_frequencies[term]
+                    shop_tf[index] = shop_tf.get(index, 0.0) + weight
+        
+        avg_doc_length = doc_lengths.mean() if n_shops and doc_lengths.mean() > 0 else 1.0
+        length_norm = self.BM25_K1 * (1 - self.BM25_B + self.BM25_B * doc_lengths / avg_doc_length)
         
-        logger.info(f"콘텐츠 인덱스 구축 완료: {len(self.content_index)}개 매장")
+        self.postings: Dict[str, tuple] = {}
+        for term, shop_tf in term_frequencies.items():
+            shop_indices = np.fromiter(shop_tf.keys(), dtype=np.int32, count=len(shop_tf))
+            tf = np.fromiter(shop_tf.values(), dtype=np.float64, count=len(shop_tf))
+            df = len(shop_tf)
+            idf = np.log(1 + (n_shops - df + 0.5) / (df + 0.5))
+            impact = idf * tf * (self.BM25_K1 + 1) / (tf + length_norm[shop_indices])
+            self.postings[term] = (shop_indices, impact)
+        
+        logger.info(f"콘텐츠 역색인 구축 완료: {n_shops}개 매장, {len(self.postings)}개 term")
     
     def _tokenize(self, text: str) -> List[str]:
         """텍스트를 토큰으로 분리"""
@@ -82,6 +108,18 @@ class ContentFunnel:
         tokens = re.findall(r'[가-힣a-zA-Z0-9]+', text)
         return [token.lower() for token in tokens if len(token) > 1]
     
+    def _analyze_tokens(self, tokens: List[str]) -> List[str]:
+        """토큰을 색인 term으로 변환 (토큰 자체 + 문자 bigram)
+
+        '비빔밥' 검색이 '돌솥비빔밥' 메뉴와 매칭되도록 부분 문자열 매칭을 bigram으로 대체
+        """
+        terms = []
+        for token in tokens:
+            terms.append(token)
+            if len(token) > 2:
+                terms.extend(token[i:i + 2] for i in range(len(token) - 1))
+        return terms
+    
     def get_candidates(self, 
                       query: Optional[str] = None,
                       filters: Optional[Dict[str, Any]] = None,
@@ -101,116 +139,82 @@ class ContentFunnel:
             # 쿼리가 없으면 빈 결과 반환
             return []
         
-        candidates = []
         query_tokens = self._tokenize(query.lower())
         
         if not query_tokens:
             return []
         
-        for restaurant in self.restaurants:
-            shop_id = restaurant.get('shopId', '')
-            
-            # 콘텐츠 매칭 점수 계산
-            content_score, match_reasons = self._calculate_content_score(
-                shop_id, query_tokens, query.lower()
-            )
-            
-            # 점수가 0이면 건너뛰기
-            if content_score <= 0:
-                continue
-            
-            # 기본 필터 적용
-            if not self._passes_basic_filters(restaurant, filters or {}):
-                continue
-            
+        # 쿼리 term의 postings만 합산 (쿼리와 term을 공유하는 매장만 접근)
+        shop_indices, scores = self._score_postings(query_tokens)
+        if not len(shop_indices):
+            return []
+        
+        # 기본 필터 적용 (후보 매장에 대해서만 마스크 조회)
+        if filters:
+            keep = self.store.filter_mask(filters, self.FILTER_KEYS)[shop_indices]
+            shop_indices, scores = shop_indices[keep], scores[keep]
+        
+        # 콘텐츠 점수로 정렬 (동점은 매장 순서 유지)
+        order = np.lexsort((shop_indices, -scores))[:limit]
+        
+        candidates = []
+        for position in order:
+            restaurant = self.store.get(shop_indices[position])
+            match_reasons = self._get_match_reasons(restaurant, query_tokens, query.lower())
             candidate = {
-                'shop_id': shop_id,
+                'shop_id': restaurant.get('shopId', ''),
                 'shop_name': restaurant.get('shopName', ''),
                 'category': restaurant.get('category', ''),
                 'funnel_source': 'content',
-                'content_score': content_score,
+                'content_score': float(scores[position]) * self.SCORE_SCALE,
                 'reason': self._format_match_reason(match_reasons, query)
             }
             candidates.append(candidate)
         
-        # 콘텐츠 점수로 정렬
-        candidates.sort(key=lambda x: x['content_score'], reverse=True)
-        
-        logger.info(f"콘텐츠 Funnel: {len(candidates[:limit])}개 후보 생성 (쿼리: '{query}')")
-        return candidates[:limit]
+        logger.info(f"콘텐츠 Funnel: {len(candidates)}개 후보 생성 (쿼리: '{query}')")
+        return candidates
     
-    def _calculate_content_score(self, shop_id: str, query_tokens: List[str], query: str) -> tuple[float, List[str]]:
-        """콘텐츠 매칭 점수 계산"""
-        if shop_id not in self.content_index:
-            return 0.0, []
+    def _score_postings(self, query_tokens: List[str]) -> tuple:
+        """쿼리 term별 postings를 합산하여 (매장 인덱스, BM25 점수) 반환"""
+        matched = [self.postings[term] for term in set(self._analyze_tokens(query_tokens))
+                   if term in self.postings]
+        if not matched:
+            return np.zeros(0, dtype=np.int32), np.zeros(0)
         
-        index_data = self.content_index[shop_id]
-        score = 0.0
+        all_indices = np.concatenate([shop_indices for shop_indices, _ in matched])
+        all_impacts = np.concatenate([impact for _, impact in matched])
+        shop_indices, inverse = np.unique(all_indices, return_inverse=True)
+        scores = np.bincount(inverse, weights=all_impacts)
+        return shop_indices, scores
+    
+    def _get_match_reasons(self, restaurant: Dict[str, Any], query_tokens: List[str], query: str) -> List[str]:
+        """매칭 이유 생성 (반환 후보에 대해서만 계산)"""
         match_reasons = []
         
-        # 1. 정확한 메뉴명 매칭 (최우선, 50점)
-        for menu_name in index_data['menus']:
-            if query in menu_name or menu_name in query:
-                score += 50
+        # 1. 메뉴명 매칭
+        menu_names = [menu.get('name', '').lower() for menu in restaurant.get('menus', [])]
+        for menu_name in menu_names:
+            if query in menu_name or menu_name in query or any(token in menu_name for token in query_tokens):
                 match_reasons.append(f"메뉴 '{menu_name}' 매칭")
                 break
         
-        # 2. 카테고리 매칭 (30점)
-        category = index_data['category']
+        # 2. 카테고리 매칭
+        category = restaurant.get('category', '').lower()
         if any(token in category for token in query_tokens) or query in category:
-            score += 30
             match_reasons.append(f"카테고리 '{category}' 매칭")
         
-        # 3. 토큰 기반 부분 매칭 (토큰당 5점, 최대 25점)
-        content_tokens = index_data['tokens']
-        matched_tokens = []
-        
-        for query_token in query_tokens:
-            for content_token in content_tokens:
-                if query_token in content_token or content_token in query_token:
-                    if content_token not in matched_tokens:
-                        score += 5
-                        matched_tokens.append(content_token)
-                        break
-        
-        if matched_tokens:
-            # 최대 25점으로 제한
-            token_score = min(len(matched_tokens) * 5, 25)
-            score = score - len(matched_tokens) * 5 + token_score  # 위에서 더한 것 조정
-            if len(matched_tokens) > 1:
-                match_reasons.append(f"키워드 {len(matched_tokens)}개 매칭")
-        
-        # 4. 매장명 매칭 (15점)
-        shop_name_tokens = self._tokenize(query)
-        for restaurant in self.restaurants:
-            if restaurant.get('shopId') == shop_id:
-                shop_name = restaurant.get('shopName', '').lower()
-                if any(token in shop_name for token in shop_name_tokens) or query in shop_name:
-                    score += 15
-                    match_reasons.append("매장명 매칭")
-                break
-        
-        return score, match_reasons
-    
-    def _passes_basic_filters(self, restaurant: Dict[str, Any], filters: Dict[str, Any]) -> bool:
-        """기본 필터 조건 확인"""
-        # 카테고리 필터
-        if filters.get('category'):
-            category_filter = filters['category'].lower()
-            if category_filter not in restaurant.get('category', '').lower():
-                return False
-        
-        # 착한가게 필터
-        if filters.get('is_good_influence'):
-            if not restaurant.get('attributes', {}).get('isGoodShop', False):
-                return False
+        # 3. 키워드 매칭 수
+        content_text = ' '.join([restaurant.get('shopName', ''), category] + menu_names).lower()
+        matched_tokens = [token for token in query_tokens if token in content_text]
+        if len(matched_tokens) > 1:
+            match_reasons.append(f"키워드 {len(matched_tokens)}개 매칭")
         
-        # 급식카드 필터
-        if filters.get('accepts_meal_card'):
-            if not restaurant.get('attributes', {}).get('acceptsMealCard', False):
-                return False
+        # 4. 매장명 매칭
+        shop_name = restaurant.get('shopName', '').lower()
+        if any(token in shop_name for token in query_tokens) or query in shop_name:
+            match_reasons.append("매장명 매칭")
         
-        return True
+        return match_reasons
     
     def _format_match_reason(self, match_reasons: List[str], query: str) -> str:
         """매칭 이유 포맷팅"""
@@ -227,12 +231,7 @@ class ContentFunnel:
     
     def get_popular_keywords(self) -> Dict[str, int]:
         """인기 키워드 분석"""
-        keyword_counter = Counter()
-        
-        for shop_id, index_data in self.content_index.items():
-            keyword_counter.update(index_data['tokens'])
-        
-        return dict(keyword_counter.most_common(20))
+        return dict(self.keyword_counts.most_common(20))
 
 
 # 테스트 함수
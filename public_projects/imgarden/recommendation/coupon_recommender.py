@@ -34,18 +34,14 @@ class CouponRecommender:
                 enhanced_recommendations.append(rec)
                 continue
                 
-            # 가게의 메뉴들 확인
-            shop_menus = [m for m in self.knowledge.menus.values() if m.shop_id == shop_id]
+            # 가게의 메뉴들 확인 (가격 오름차순 인덱스)
+            shop_menus = self.knowledge.get_shop_menus(shop_id)
             if not shop_menus:
                 enhanced_recommendations.append(rec)
                 continue
                 
-            # 대표 메뉴 선택 (인기 메뉴 또는 가장 저렴한 메뉴)
-            popular_menus = [m for m in shop_menus if m.is_popular]
-            if popular_menus:
-                selected_menu = min(popular_menus, key=lambda m: m.price)
-            else:
-                selected_menu = min(shop_menus, key=lambda m: m.price)
+            # 대표 메뉴 선택 (가장 저렴한 인기 메뉴, 없으면 가장 저렴한 메뉴)
+            selected_menu = next((m for m in shop_menus if m.is_popular), shop_menus[0])
             
             # 적용 가능한 쿠폰 찾기
             applicable_coupons = self.knowledge.get_applicable_coupons(
@@ -111,8 +107,8 @@ class CouponRecommender:
             if shop.is_food_card_shop != 'Y':
                 continue
                 
-            # 가게의 메뉴들 확인
-            shop_menus = [m for m in self.knowledge.menus.values() if m.shop_id == shop.id]
+            # 가게의 메뉴들 확인 (가격 오름차순 인덱스)
+            shop_menus = self.knowledge.get_shop_menus(shop.id)
             
             for menu in shop_menus:
                 # 원래 가격으로는 살 수 없는 메뉴
@@ -150,10 +146,11 @@ class CouponRecommender:
                         affordable_options.append(option)
                         break  # 한 메뉴당 하나의 쿠폰만
                         
-        # 정렬: 할인율 높은 순 > 착한가게 우선
+        # 정렬: 할인율 높은 순 > 착한가게 우선 (동점은 가게/메뉴 등록 순)
+        indexes = self.knowledge.indexes
         affordable_options.sort(
-            key=lambda x: (x['savings_rate'], x['is_good_influence']),
-            reverse=True
+            key=lambda x: (-x['savings_rate'], not x['is_good_influence'],
+                           indexes.shop_order.get(x['shop_id'], 0), indexes.menu_order.get(x['menu_id'], 0))
         )
         
         return affordable_options[:max_results]
@@ -173,10 +170,10 @@ class CouponRecommender:
                 # 카테고리별 쿠폰
                 shops = self.knowledge.get_shops_by_category(coupon.target[0])
                 for shop in shops[:2]:  # 각 쿠폰당 최대 2개 가게
-                    shop_menus = [m for m in self.knowledge.menus.values() 
-                                 if m.shop_id == shop.id and m.price >= (coupon.min_amount or 0)]
-                    if shop_menus:
-                        menu = min(shop_menus, key=lambda m: m.price)
+                    # 최소 금액 이상인 가장 저렴한 메뉴 (가격 오름차순 인덱스)
+                    menu = next((m for m in self.knowledge.get_shop_menus(shop.id)
+                                 if m.price >= (coupon.min_amount or 0)), None)
+                    if menu:
                         discount = coupon.calculate_discount(menu.price)
                         
                         recommendations.append({
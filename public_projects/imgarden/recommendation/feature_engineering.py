@@ -10,6 +10,11 @@ from datetime import datetime, time
 import logging
 from dataclasses import dataclass
 
+try:
+    from .restaurant_store import RestaurantStore, hours_masks, parse_hours_range, parse_minutes
+except ImportError:
+    from restaurant_store import RestaurantStore, hours_masks, parse_hours_range, parse_minutes
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,8 +44,15 @@ class FeatureConfig:
 class FeatureEngineer:
     """Layer 1 후보를 Layer 2 특성으로 변환"""
     
-    def __init__(self, config: Optional[FeatureConfig] = None):
+    def __init__(self, config: Optional[FeatureConfig] = None,
+                 store: Optional[RestaurantStore] = None):
+        """
+        Args:
+            config: 특성 엔지니어링 설정
+            store: 공유 매장 저장소 (있으면 매장 영업시간으로 영업 여부 계산)
+        """
         self.config = config or FeatureConfig()
+        self.store = store
         
         # 특성 인덱스 매핑
         self._init_feature_mappings()
@@ -248,10 +260,30 @@ class FeatureEngineer:
         ])
     
     def _is_shop_open_now(self, candidate: Dict[str, Any], context: Dict[str, Any]) -> float:
-        """현재 시간에 매장이 열려있는지"""
-        # 실제로는 영업시간 데이터 필요
-        current_hour = context.get('current_time', datetime.now()).hour
-        if 9 <= current_hour <= 22:  # 기본 영업시간
+        """현재 시간에 매장이 열려있는지
+
+        저장소의 전체 매장 영업 마스크(같은 시각이면 재사용) → 후보의 영업시간 → 기본 영업시간 순으로 판단
+        """
+        current_time = context.get('current_time') or datetime.now()
+
+        index = self.store.index_of.get(candidate.get('shop_id')) if self.store is not None else None
+        if index is not None:
+            has_hours, open_now, _ = self.store.hours_status(current_time)
+            if has_hours[index]:
+                return 1.0 if open_now[index] else 0.0
+        else:
+            hours = candidate.get('hours')
+            if isinstance(hours, dict):
+                open_minutes, close_minutes = parse_minutes(hours.get('open')), parse_minutes(hours.get('close'))
+            else:
+                open_minutes, close_minutes = parse_hours_range(candidate.get('operating_hours'))
+            has_hours, open_now, _ = hours_masks(
+                np.array([open_minutes]), np.array([close_minutes]), current_time
+            )
+            if has_hours[0]:
+                return 1.0 if open_now[0] else 0.0
+
+        if 9 <= current_time.hour <= 22:  # 기본 영업시간
             return 1.0
         return 0.0
     
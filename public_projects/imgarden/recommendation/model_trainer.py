@@ -20,9 +20,11 @@ import matplotlib.pyplot as plt
 try:
     from .ranking_model import WideAndDeepRankingModel, RankingModelConfig
     from .feature_engineering import FeatureEngineer, FeatureConfig
+    from .restaurant_store import RestaurantStore
 except ImportError:
     from ranking_model import WideAndDeepRankingModel, RankingModelConfig
     from feature_engineering import FeatureEngineer, FeatureConfig
+    from restaurant_store import RestaurantStore
 
 logger = logging.getLogger(__name__)
 
@@ -73,16 +75,18 @@ class ModelTrainer:
     def __init__(self, 
                  model_config: Optional[RankingModelConfig] = None,
                  feature_config: Optional[FeatureConfig] = None,
-                 save_dir: str = "./outputs/recommendation_models"):
+                 save_dir: str = "./outputs/recommendation_models",
+                 store: Optional[RestaurantStore] = None):
         
         self.model_config = model_config or RankingModelConfig()
         self.feature_config = feature_config or FeatureConfig()
+        self.store = store  # 공유 매장 저장소 (FeatureEngineer 영업 여부 계산용)
         self.save_dir = Path(save_dir)
         self.save_dir.mkdir(parents=True, exist_ok=True)
         
         # 모델 및 유틸리티
         self.model = None
-        self.feature_engineer = FeatureEngineer(self.feature_config)
+        self.feature_engineer = FeatureEngineer(self.feature_config, store=self.store)
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         
         # ID 매핑 (문자열 ID -> 숫자 ID)
@@ -330,7 +334,7 @@ class ModelTrainer:
             self.model.load_state_dict(checkpoint['model_state_dict'])
             
             # Feature Engineer 갱신
-            self.feature_engineer = FeatureEngineer(self.feature_config)
+            self.feature_engineer = FeatureEngineer(self.feature_config, store=self.store)
             
             logger.info(f"모델 로드 완료: {model_path}")
             return True
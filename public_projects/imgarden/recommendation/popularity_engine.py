@@ -0,0 +1,364 @@
+"""
+온라인 인기도 엔진
+추천 노출/선택/피드백 이벤트를 매장별 시간 감쇠 카운터로 누적하고, 카테고리별 Top-K를 증분 유지
+- 전방 감쇠(forward decay): 이벤트 가중치에 exp((t - t0) / tau)를 곱해 더하므로 조회 시 모든 매장에 같은 배율이 적용되어 순위 유지
+- 주기적 기준 시각 갱신(rebase) 때만 전체 배열 재계산, 그 사이에는 이벤트마다 O(log K) 갱신
+"""
+
+import heapq
+import math
+import time
+import threading
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .restaurant_store import RestaurantStore
+except ImportError:
+    from restaurant_store import RestaurantStore
+
+logger = logging.getLogger(__name__)
+
+# 이벤트 가중치 (정적 인기도 점수와 같은 단위)
+EVENT_WEIGHTS = {
+    'impression': 0.5,
+    'selection': 5.0,
+    'positive_feedback': 10.0,
+    'negative_feedback': -10.0
+}
+
+# 전체 매장 파티션 키
+ALL_SHOPS = -1
+
+# 부정 피드백 키워드 (텍스트 피드백)
+_NEGATIVE_WORDS = ('싫', '별로', '맛없', '최악', '불친절', '비싸')
+
+
+class _TopK:
+    """점수 상위 K개 매장 (최소 힙 + 지연 삭제)
+
+    점수가 오르기만 하는 갱신은 정확히 반영하고, 내려가는 갱신은 파티션 재구성으로 처리
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.members: Dict[int, float] = {}
+        self._heap: List[Tuple[float, int]] = []  # (점수, -인덱스): 동점이면 인덱스가 큰 매장이 먼저 밀려남
+        self._ranked: Optional[List[Tuple[float, int]]] = None  # 정렬 결과 캐시 (갱신 시 무효화)
+
+    def reset(self, indices: np.ndarray, scores: np.ndarray):
+        self.members = {int(i): float(scores[i]) for i in indices}
+        self._heap = [(score, -index) for index, score in self.members.items()]
+        heapq.heapify(self._heap)
+        self._ranked = None
+
+    def _peek(self) -> Tuple[float, int]:
+        """유효한 최소 항목 (갱신 전 항목은 버림)"""
+        while True:
+            score, neg_index = self._heap[0]
+            if self.members.get(-neg_index) == score:
+                return score, neg_index
+            heapq.heappop(self._heap)
+
+    def offer(self, index: int, score: float):
+        """점수가 오른 매장 반영"""
+        if index in self.members:
+            self.members[index] = score
+        elif len(self.members) < self.k:
+            self.members[index] = score
+        elif (score, -index) > self._peek():
+            _, evicted = heapq.heappop(self._heap)
+            del self.members[-evicted]
+            self.members[index] = score
+        else:
+            return
+        self._ranked = None
+        heapq.heappush(self._heap, (score, -index))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(s, -i) for i, s in self.members.items()]
+            heapq.heapify(self._heap)
+
+    def ranked(self) -> List[Tuple[float, int]]:
+        """점수 내림차순 (동점은 인덱스 순) (-점수, 인덱스) 목록"""
+        if self._ranked is None:
+            self._ranked = sorted((-score, index) for index, score in self.members.items())
+        return self._ranked
+
+
+class PopularityEngine:
+    """시간 감쇠 이벤트 카운터 기반 온라인 인기도"""
+
+    def __init__(self, store: RestaurantStore, prior_scores: Optional[np.ndarray] = None,
+                 half_life_hours: float = 72.0, top_k: int = 100,
+                 rebase_interval: float = 3600.0, event_weights: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            store: 공유 매장 저장소
+            prior_scores: 정적 인기도 점수 (저장소 인덱스 순서, 이벤트가 없을 때의 순위)
+            half_life_hours: 이벤트 가중치 반감기 (시간)
+            top_k: 파티션(카테고리)별 유지할 상위 매장 수
+            rebase_interval: 기준 시각 갱신 간격 (초), 사이에는 정적 점수도 같은 비율로 감쇠
+            event_weights: 이벤트 종류별 가중치
+        """
+        self.store = store
+        self.tau = half_life_hours * 3600.0 / math.log(2)
+        self.top_k = top_k
+        self.rebase_interval = rebase_interval
+        self.event_weights = dict(EVENT_WEIGHTS, **(event_weights or {}))
+
+        size = store.size
+        self.prior = np.zeros(size, dtype=np.float64) if prior_scores is None else \
+            np.asarray(prior_scores, dtype=np.float64).copy()
+        self.counts = np.zeros(size, dtype=np.float64)  # 기준 시각 t0 단위 감쇠 카운터
+        self.scores = self.prior.copy()                  # prior + counts (t0 단위)
+        self._t0 = time.time()
+
+        # 매장 이름 -> 인덱스 (shop_id 체계가 다른 이벤트용)
+        self._name_index = {}
+        for index, restaurant in enumerate(store.restaurants):
+            self._name_index.setdefault(restaurant.get('shopName', ''), index)
+
+        # 파티션: 카테고리 코드별 + 전체
+        self._partition_indices: Dict[int, np.ndarray] = {ALL_SHOPS: np.arange(size)}
+        for code in range(len(store.categories)):
+            self._partition_indices[code] = np.flatnonzero(store.category_codes == code)
+        self._categories_lower = [c.lower() for c in store.categories]
+        self._partitions: Dict[int, _TopK] = {}
+        self._dirty = set()
+
+        self._lock = threading.Lock()
+        self.stats = {
+            'events': 0,
+            'ignored_events': 0,
+            'rebases': 0,
+            'partition_rebuilds': 0,
+            'topk_reads': 0,
+            'fallback_reads': 0
+        }
+        self._rebuild_all()
+
+        logger.info(f"PopularityEngine 초기화: {size}개 매장, {len(store.categories)}개 카테고리, "
+                    f"반감기 {half_life_hours}시간, Top-{top_k}")
+
+    # === 이벤트 반영 ===
+
+    def record_event(self, shop_ref: Any, event: str, timestamp: Optional[float] = None,
+                     weight: Optional[float] = None) -> bool:
+        """매장 이벤트 1건 반영
+
+        Args:
+            shop_ref: shop_id / 매장 이름 / 추천 항목 dict
+            event: 이벤트 종류 (EVENT_WEIGHTS 키)
+            timestamp: 이벤트 시각 (epoch 초, 기본: 현재)
+            weight: 가중치 직접 지정 (기본: 이벤트 종류별 가중치)
+
+        Returns:
+            반영 여부 (매장을 찾지 못하면 False)
+        """
+        index = self._resolve(shop_ref)
+        if weight is None:
+            weight = self.event_weights.get(event, 0.0)
+        if index is None or not weight:
+            with self._lock:
+                self.stats['ignored_events'] += 1
+            return False
+
+        now = time.time()
+        timestamp = now if timestamp is None else min(timestamp, now)
+        with self._lock:
+            self._maybe_rebase(now)
+            delta = weight * math.exp((timestamp - self._t0) / self.tau)
+            self.counts[index] += delta
+            self.scores[index] += delta
+            self.stats['events'] += 1
+
+            score = float(self.scores[index])
+            for key in (ALL_SHOPS, int(self.store.category_codes[index])):
+                if delta > 0:
+                    self._partitions[key].offer(index, score)
+                elif index in self._partitions[key].members:
+                    self._dirty.add(key)  # Top-K 안의 매장 점수 하락 -> 다음 조회 때 재구성
+        return True
+
+    def observe(self, data_point: Dict[str, Any]) -> int:
+        """LearningDataCollector 레코드 반영 (추천 노출/선택, 피드백)
+
+        Returns:
+            반영된 매장 이벤트 수
+        """
+        data_type = data_point.get('data_type')
+        timestamp = _epoch(data_point.get('timestamp'))
+        applied = 0
+
+        if data_type == 'recommendation':
+            for recommendation in data_point.get('recommendations') or []:
+                applied += self.record_event(recommendation, 'impression', timestamp)
+            if data_point.get('user_selection'):
+                applied += self.record_event(data_point['user_selection'], 'selection', timestamp)
+
+        elif data_type == 'feedback':
+            content = data_point.get('feedback_content')
+            context = data_point.get('context') or {}
+            shop_ref = content if isinstance(content, dict) and self._resolve(content) is not None else context
+            event, weight = self._feedback_event(data_point.get('feedback_type'), content, context)
+            applied += self.record_event(shop_ref, event, timestamp, weight)
+
+        return applied
+
+    def replay(self, data_points: Iterable[Dict[str, Any]]) -> int:
+        """저장된 학습 로그로 카운터 복원 (예: collector.iter_recent_data(days=14))"""
+        return sum(self.observe(data_point) for data_point in data_points)
+
+    def _feedback_event(self, feedback_type: Optional[str], content: Any,
+                        context: Dict[str, Any]) -> Tuple[str, Optional[float]]:
+        """피드백 -> (이벤트 종류, 가중치), 평점은 3점 기준으로 가중치 조정"""
+        if feedback_type == 'selection':
+            return 'selection', None
+
+        rating = content.get('rating') if isinstance(content, dict) else context.get('rating')
+        if rating is None and feedback_type == 'rating' and isinstance(content, (int, float)):
+            rating = content
+        if isinstance(rating, (int, float)):
+            return 'rating', (rating - 3) / 2 * self.event_weights['positive_feedback']
+
+        if isinstance(content, dict) and 'positive' in content:
+            negative = not content['positive']
+        elif context.get('sentiment'):
+            negative = context['sentiment'] == 'negative'
+        else:
+            negative = isinstance(content, str) and any(word in content for word in _NEGATIVE_WORDS)
+        return ('negative_feedback' if negative else 'positive_feedback'), None
+
+    def _resolve(self, shop_ref: Any) -> Optional[int]:
+        """이벤트의 매장 참조 -> 저장소 인덱스"""
+        if isinstance(shop_ref, dict):
+            for key in ('shop_id', 'shopId'):
+                index = self.store.index_of.get(shop_ref.get(key))
+                if index is not None:
+                    return index
+            return self._name_index.get(shop_ref.get('shop_name') or shop_ref.get('shopName'))
+        if shop_ref is None:
+            return None
+        index = self.store.index_of.get(shop_ref)
+        return index if index is not None else self._name_index.get(shop_ref)
+
+    # === 기준 시각 / 파티션 관리 ===
+
+    def _maybe_rebase(self, now: float):
+        """기준 시각을 현재로 옮기고 카운터를 현재 단위로 환산 (정적 점수 감쇠도 복구됨)"""
+        if now - self._t0 < self.rebase_interval:
+            return
+        self.counts *= math.exp(-(now - self._t0) / self.tau)
+        self._t0 = now
+        np.add(self.prior, self.counts, out=self.scores)
+        self.stats['rebases'] += 1
+        self._rebuild_all()
+
+    def _rebuild_all(self):
+        for key in self._partition_indices:
+            self._rebuild(key)
+        self._dirty.clear()
+
+    def _rebuild(self, key: int):
+        indices = self._partition_indices[key]
+        partition = self._partitions.get(key) or _TopK(self.top_k)
+        if len(indices) > self.top_k:
+            order = np.argsort(-self.scores[indices], kind='stable')[:self.top_k]
+            indices = indices[order]
+        partition.reset(indices, self.scores)
+        self._partitions[key] = partition
+        self.stats['partition_rebuilds'] += 1
+
+    def _partition_keys(self, category: Optional[str]) -> List[int]:
+        """카테고리 필터(소문자 부분 문자열)에 해당하는 파티션"""
+        if not category:
+            return [ALL_SHOPS]
+        keyword = category.lower()
+        return [code for code, name in enumerate(self._categories_lower) if keyword in name]
+
+    # === 조회 ===
+
+    def top_indices(self, filters: Optional[Dict[str, Any]] = None, limit: int = 30,
+                    filter_keys: Iterable[str] = ('category',)) -> List[int]:
+        """인기도 상위 매장 인덱스 (점수 내림차순, 동점은 매장 순서)
+
+        카테고리 외 필터는 Top-K 안에서 걸러내고, 부족하면 전체 배열 정렬로 대체
+        """
+        filters = filters or {}
+        filter_keys = tuple(filter_keys)
+        other_filters = {key: value for key, value in filters.items()
+                         if key != 'category' and key in filter_keys and value}
+        category = filters.get('category') if 'category' in filter_keys else None
+        mask = self.store.filter_mask(other_filters, filter_keys) if other_filters else None
+
+        with self._lock:
+            self._maybe_rebase(time.time())
+            keys = self._partition_keys(category)
+            for key in [key for key in keys if key in self._dirty]:
+                self._rebuild(key)
+                self._dirty.discard(key)
+
+            if len(keys) == 1:
+                ranked = self._partitions[keys[0]].ranked()
+            else:
+                ranked = heapq.merge(*(self._partitions[key].ranked() for key in keys))
+            complete = all(len(self._partition_indices[key]) <= self.top_k for key in keys)
+            result = []
+            for _, index in ranked:
+                if mask is None or mask[index]:
+                    result.append(index)
+                    if len(result) >= limit:
+                        break
+
+            if len(result) >= limit or complete:
+                self.stats['topk_reads'] += 1
+                return result
+
+            # Top-K 밖까지 필요한 경우: 전체 점수 배열에서 정렬
+            self.stats['fallback_reads'] += 1
+            full_mask = self.store.filter_mask(
+                {key: value for key, value in filters.items() if key in filter_keys}, filter_keys
+            )
+            return [int(i) for i in self.store.top_indices(self.scores, full_mask, limit)]
+
+    def current_scores(self, indices: Iterable[int]) -> List[float]:
+        """현재 시각 기준 점수 (정적 점수 + 감쇠된 이벤트 점수)"""
+        with self._lock:
+            decay = math.exp(-(time.time() - self._t0) / self.tau)
+            return [float(self.prior[i] + self.counts[i] * decay) for i in indices]
+
+    def demand_scores(self, indices: Iterable[int]) -> List[float]:
+        """현재 시각 기준 감쇠된 이벤트 점수"""
+        with self._lock:
+            decay = math.exp(-(time.time() - self._t0) / self.tau)
+            return [float(self.counts[i] * decay) for i in indices]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """엔진 통계"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update({
+                'shops': self.store.size,
+                'active_shops': int(np.count_nonzero(self.counts)),
+                'partitions': len(self._partitions),
+                'top_k': self.top_k,
+                'half_life_hours': self.tau * math.log(2) / 3600.0
+            })
+        return stats
+
+
+def _epoch(timestamp: Any) -> Optional[float]:
+    """ISO 문자열/datetime/epoch -> epoch 초"""
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    if isinstance(timestamp, str):
+        try:
+            return datetime.fromisoformat(timestamp).timestamp()
+        except ValueError:
+            return None
+    return None
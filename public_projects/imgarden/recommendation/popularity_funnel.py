@@ -1,40 +1,67 @@
 """
 인기도 기반 Funnel (Funnel 4)
-가장 간단한 추천 로직 - 단순 집계 기반
+정적 규칙 점수 + 실제 추천 선택/피드백 이벤트의 시간 감쇠 점수 (PopularityEngine)
 """
 
-import json
 import logging
 from typing import List, Dict, Any, Optional
 from collections import defaultdict, Counter
 from datetime import datetime, timedelta
 
+import numpy as np
+
+try:
+    from .restaurant_store import RestaurantStore, get_restaurant_store
+    from .popularity_engine import PopularityEngine, EVENT_WEIGHTS
+except ImportError:
+    from restaurant_store import RestaurantStore, get_restaurant_store
+    from popularity_engine import PopularityEngine, EVENT_WEIGHTS
+
 logger = logging.getLogger(__name__)
 
 
 class PopularityFunnel:
     """인기도 기반 후보 생성 Funnel"""
     
-    def __init__(self, restaurants_path: str = "data/restaurants_optimized.json"):
+    # 지원하는 필터 키
+    FILTER_KEYS = ('category', 'location', 'is_good_influence', 'accepts_meal_card')
+    
+    def __init__(self, restaurants_path: str = "data/restaurants_optimized.json",
+                 store: Optional[RestaurantStore] = None,
+                 half_life_hours: float = 72.0, top_k: int = 100):
         """
         Args:
             restaurants_path: 매장 데이터 파일 경로
+            store: 공유 매장 저장소 (CandidateGenerator에서 주입)
+            half_life_hours: 이벤트 점수 반감기 (시간)
+            top_k: 카테고리별로 유지할 상위 매장 수 (limit이 이보다 크면 전체 정렬)
         """
         self.restaurants_path = restaurants_path
-        self.restaurants = []
+        self.store = store
+        self.restaurants = ()
         self.popularity_scores = {}
+        self.score_array = np.zeros(0)
+        self.half_life_hours = half_life_hours
+        self.top_k = top_k
+        self.engine: Optional[PopularityEngine] = None
         self._load_data()
     
     def _load_data(self):
-        """매장 데이터 로드"""
+        """매장 데이터 로드 (주입된 공유 저장소가 없으면 경로별 공유 저장소 사용)"""
         try:
-            with open(self.restaurants_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.restaurants = data.get('restaurants', [])
+            if self.store is None:
+                self.store = get_restaurant_store(self.restaurants_path)
+            self.restaurants = self.store.restaurants
             
             logger.info(f"인기도 Funnel: {len(self.restaurants)}개 매장 데이터 로드 완료")
             self._calculate_popularity_scores()
             
+            # 정적 점수를 사전 점수로 하는 온라인 인기도 엔진
+            self.engine = PopularityEngine(
+                self.store, prior_scores=self.score_array,
+                half_life_hours=self.half_life_hours, top_k=self.top_k
+            )
+            
         except Exception as e:
             logger.error(f"매장 데이터 로드 실패: {e}")
             self.restaurants = []
@@ -44,7 +71,7 @@ class PopularityFunnel:
         매장별 인기도 점수 계산
         현재는 간단한 규칙 기반으로 계산 (추후 실제 데이터로 대체)
         """
-        for restaurant in self.restaurants:
+        for index, restaurant in enumerate(self.restaurants):
             shop_id = restaurant.get('shopId', '')
             
             # 기본 점수 계산 요소들
@@ -72,20 +99,17 @@ class PopularityFunnel:
                     base_score += 10
             
             # 5. 영업시간 점수 (긴 영업시간 = 접근성 좋음)
-            hours = restaurant.get('hours', {})
-            if hours.get('open') and hours.get('close'):
-                try:
-                    open_time = datetime.strptime(hours['open'], '%H:%M').time()
-                    close_time = datetime.strptime(hours['close'], '%H:%M').time()
-                    
-                    # 영업시간이 10시간 이상이면 보너스
-                    if close_time.hour - open_time.hour >= 10:
-                        base_score += 10
-                except:
-                    pass
+            # 저장소에서 미리 파싱한 영업 시간 길이 사용 (자정 넘김 포함, 정보 없으면 -1)
+            if self.store.operating_minutes[index] >= 10 * 60:  # 영업시간이 10시간 이상이면 보너스
+                base_score += 10
             
             self.popularity_scores[shop_id] = base_score
         
+        # 저장소 인덱스 순서의 점수 배열 (정렬용)
+        self.score_array = np.array(
+            [self.popularity_scores.get(shop_id, 0) for shop_id in self.store.shop_ids], dtype=np.float64
+        )
+        
         logger.info(f"인기도 점수 계산 완료: 평균 {sum(self.popularity_scores.values()) / len(self.popularity_scores):.1f}점")
     
     def get_candidates(self, 
@@ -102,65 +126,59 @@ class PopularityFunnel:
             인기도 순으로 정렬된 후보 매장 리스트
         """
         candidates = []
+        if self.engine is None:
+            return candidates
         
-        # 필터링된 매장들
-        filtered_restaurants = self._apply_filters(self.restaurants, filters or {})
-        
-        # 인기도 점수로 정렬
-        sorted_restaurants = sorted(
-            filtered_restaurants,
-            key=lambda x: self.popularity_scores.get(x.get('shopId', ''), 0),
-            reverse=True
-        )
+        # 카테고리별 Top-K에서 바로 읽음 (그 외 필터는 Top-K 안에서 거르고, 부족하면 전체 정렬)
+        top_indices = self.engine.top_indices(filters, limit, self.FILTER_KEYS)
+        scores = self.engine.current_scores(top_indices)
+        demand_scores = self.engine.demand_scores(top_indices)
         
         # 후보 생성
-        for restaurant in sorted_restaurants[:limit]:
+        for index, score, demand_score in zip(top_indices, scores, demand_scores):
+            restaurant = self.store.get(index)
             shop_id = restaurant.get('shopId', '')
             candidate = {
                 'shop_id': shop_id,
                 'shop_name': restaurant.get('shopName', ''),
                 'category': restaurant.get('category', ''),
                 'funnel_source': 'popularity',
-                'base_score': self.popularity_scores.get(shop_id, 0),
-                'reason': self._get_popularity_reason(restaurant)
+                'base_score': score,
+                'demand_score': demand_score,
+                'reason': self._get_popularity_reason(restaurant, demand_score)
             }
             candidates.append(candidate)
         
         logger.info(f"인기도 Funnel: {len(candidates)}개 후보 생성 (필터: {filters})")
         return candidates
     
-    def _apply_filters(self, restaurants: List[Dict], filters: Dict[str, Any]) -> List[Dict]:
-        """필터 조건 적용"""
-        filtered = restaurants
-        
-        # 카테고리 필터
-        if filters.get('category'):
-            category_filter = filters['category'].lower()
-            filtered = [r for r in filtered 
-                       if category_filter in r.get('category', '').lower()]
-        
-        # 위치 필터 (주소에 포함된 키워드로 검색)
-        if filters.get('location'):
-            location_filter = filters['location']
-            filtered = [r for r in filtered 
-                       if location_filter in r.get('location', {}).get('address', '')]
-        
-        # 착한가게 필터
-        if filters.get('is_good_influence'):
-            filtered = [r for r in filtered 
-                       if r.get('attributes', {}).get('isGoodShop', False)]
-        
-        # 급식카드 필터
-        if filters.get('accepts_meal_card'):
-            filtered = [r for r in filtered 
-                       if r.get('attributes', {}).get('acceptsMealCard', False)]
+    def record_event(self, shop_ref: Any, event: str, timestamp: Optional[float] = None) -> bool:
+        """매장 이벤트 반영 (impression, selection, positive_feedback, negative_feedback)"""
+        return self.engine is not None and self.engine.record_event(shop_ref, event, timestamp)
+    
+    def attach_collector(self, data_collector, replay_days: int = 0):
+        """학습 데이터 수집기의 추천/피드백 레코드를 인기도 엔진에 연결
         
-        return filtered
+        Args:
+            data_collector: LearningDataCollector
+            replay_days: 연결 전에 저장된 로그에서 복원할 일수 (0이면 복원 안 함)
+        """
+        if self.engine is None:
+            return
+        if replay_days > 0:
+            replayed = self.engine.replay(
+                data_collector.iter_recent_data(days=replay_days, data_types=['recommendation', 'feedback'])
+            )
+            logger.info(f"인기도 이벤트 복원: 최근 {replay_days}일, {replayed}건")
+        data_collector.add_event_listener(self.engine.observe)
     
-    def _get_popularity_reason(self, restaurant: Dict[str, Any]) -> str:
+    def _get_popularity_reason(self, restaurant: Dict[str, Any], demand_score: float = 0.0) -> str:
         """인기 이유 생성"""
         reasons = []
         
+        if demand_score >= EVENT_WEIGHTS['selection']:
+            reasons.append('최근 많이 선택')
+        
         if restaurant.get('attributes', {}).get('isGoodShop', False):
             reasons.append('착한가게')
         
@@ -194,7 +212,8 @@ class PopularityFunnel:
                 [(shop_id, score) for shop_id, score in self.popularity_scores.items()],
                 key=lambda x: x[1],
                 reverse=True
-            )[:5]
+            )[:5],
+            'engine': self.engine.get_stats() if self.engine is not None else {}
         }
 
 
@@ -19,11 +19,13 @@ try:
     from .ranking_model import PersonalizedRanker, RankingModelConfig
     from .feature_engineering import FeatureEngineer, FeatureConfig
     from .model_trainer import ModelTrainer
+    from .restaurant_store import parse_hours_range, operating_minutes
 except ImportError:
     from candidate_generator import CandidateGenerator, CandidateGenerationConfig
     from ranking_model import PersonalizedRanker, RankingModelConfig
     from feature_engineering import FeatureEngineer, FeatureConfig
     from model_trainer import ModelTrainer
+    from restaurant_store import parse_hours_range, operating_minutes
 
 # 급식카드 매니저 임포트
 try:
@@ -344,23 +346,17 @@ class RealDataFeatureExtractor:
         return min(matches / len(dietary_preferences), 1.0)
     
     def _calculate_operating_hours(self, operating_hours: str) -> float:
-        """영업시간 계산 (문자열 → 시간)"""
-        if not operating_hours:
-            return 12.0  # 기본값
+        """영업시간 계산 (문자열 → 시간)
         
-        try:
-            # 간단한 파싱 (실제로는 더 정교한 파싱 필요)
-            # 예: "09:00-22:00" → 13시간
-            if '-' in operating_hours:
-                parts = operating_hours.split('-')
-                if len(parts) == 2:
-                    start_hour = int(parts[0].split(':')[0])
-                    end_hour = int(parts[1].split(':')[0])
-                    return float(end_hour - start_hour)
-        except:
-            pass
+        예: "09:00-22:00" → 13시간, "18:00-02:00" → 8시간 (같은 문자열은 파싱 결과 캐시)
+        """
+        if not isinstance(operating_hours, str):
+            return 12.0  # 기본값
         
-        return 12.0  # 기본값
+        duration = operating_minutes(*parse_hours_range(operating_hours))
+        if duration < 0:
+            return 12.0  # 기본값 (정보 없음/파싱 실패)
+        return duration / 60.0
 
 
 class RecommendationEngine:
@@ -373,10 +369,18 @@ class RecommendationEngine:
                  candidate_config: Optional[CandidateGenerationConfig] = None,
                  ranking_config: Optional[RankingModelConfig] = None,
                  model_path: Optional[str] = None,
-                 foodcard_manager: Optional[FoodcardManager] = None):
+                 foodcard_manager: Optional[FoodcardManager] = None,
+                 data_collector=None):
+        """
+        Args:
+            data_collector: LearningDataCollector (있으면 추천 선택/피드백을 인기도 Funnel에 실시간 반영,
+                            최근 7일 로그 복원). 챗봇 서빙 경로는 이 엔진을 만들지 않으므로 생성하는 쪽에서 전달
+        """
         
         # Layer 1: 4-Funnel 후보 생성기 (기존 완성된 시스템)
         self.candidate_generator = CandidateGenerator(candidate_config)
+        if data_collector is not None:
+            self.candidate_generator.attach_data_collector(data_collector)
         
         # Layer 2: Wide & Deep 개인화 랭커
         self.feature_extractor = RealDataFeatureExtractor()
@@ -772,7 +776,7 @@ class RecommendationEngine:
     def _try_load_deep_model(self, model_path: str):
         """딥러닝 모델 로드 시도"""
         try:
-            trainer = ModelTrainer()
+            trainer = ModelTrainer(store=self.candidate_generator.store)
             if trainer.load_model(model_path):
                 self.ranker.model = trainer.model
                 self.ranker.id_mappings = trainer.id_mappings
@@ -0,0 +1,300 @@
+"""
+공유 매장 데이터 저장소
+4개 Funnel이 같은 매장 데이터를 한 번만 로드하고 공유하도록 하는 열(column) 기반 저장소
+필터 조건/영업시간은 매장별 dict 순회 대신 NumPy 마스크로 계산
+"""
+
+import json
+import re
+import struct
+import logging
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Callable, Iterable, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# 필터 키 전체 (Funnel마다 지원하는 키만 골라서 사용)
+ALL_FILTER_KEYS = ('category', 'location', 'is_good_influence', 'accepts_meal_card', 'max_price')
+
+MINUTES_PER_DAY = 24 * 60
+
+_HOURS_RANGE_SEPARATOR = re.compile(r'\s*[-~]\s*')
+
+
+def parse_minutes(time_str: Optional[str]) -> int:
+    """'HH:MM' 문자열을 자정 기준 분으로 변환 (실패 시 -1)"""
+    if not time_str:
+        return -1
+    try:
+        hour, minute = time_str.strip().split(':')
+        hour, minute = int(hour), int(minute)
+    except (ValueError, AttributeError):
+        return -1
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        return -1
+    return hour * 60 + minute
+
+
+@lru_cache(maxsize=4096)
+def parse_hours_range(operating_hours: Optional[str]) -> Tuple[int, int]:
+    """'09:00-22:00' 형식 영업시간을 (오픈 분, 마감 분)으로 변환 (실패 시 -1)"""
+    if not operating_hours:
+        return -1, -1
+    parts = _HOURS_RANGE_SEPARATOR.split(operating_hours.strip())
+    if len(parts) != 2:
+        return -1, -1
+    return parse_minutes(parts[0]), parse_minutes(parts[1])
+
+
+def operating_minutes(open_minutes, close_minutes):
+    """영업 시간 길이(분), 자정을 넘기는 영업 포함 (정보 없으면 -1, 스칼라/배열 모두 지원)"""
+    open_minutes = np.asarray(open_minutes, dtype=np.int32)
+    close_minutes = np.asarray(close_minutes, dtype=np.int32)
+    duration = np.where(
+        (open_minutes >= 0) & (close_minutes >= 0),
+        (close_minutes - open_minutes) % MINUTES_PER_DAY,
+        -1
+    )
+    return duration if duration.ndim else int(duration)
+
+
+def hours_masks(open_minutes: np.ndarray, close_minutes: np.ndarray, current_time: datetime,
+                soon_minutes: int = 60) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """영업시간 상태 마스크 (영업시간 정보 있음, 현재 영업 중, soon_minutes 이내 오픈)
+
+    - 마감이 오픈보다 이르면 자정을 넘기는 영업 (예: 22:00 - 02:00)
+    - 현재 영업 여부는 초 단위까지 비교 (22:00 마감이면 22:00:30은 영업 종료)
+    """
+    has_hours = (open_minutes >= 0) & (close_minutes >= 0)
+    now = current_time.hour * 60 + current_time.minute
+    now_exact = now + (current_time.second + current_time.microsecond / 1e6) / 60
+
+    overnight = close_minutes < open_minutes
+    after_open = open_minutes <= now_exact
+    before_close = now_exact <= close_minutes
+    open_now = has_hours & np.where(overnight, after_open | before_close, after_open & before_close)
+
+    until_open = (open_minutes.astype(np.int32) - now) % MINUTES_PER_DAY
+    opens_soon = has_hours & (until_open > 0) & (until_open <= soon_minutes)
+    return has_hours, open_now, opens_soon
+
+
+def parse_coordinates(coordinates: Optional[str]) -> tuple:
+    """WKB(Point) 16진수 좌표 문자열을 (위도, 경도)로 변환
+
+    예: '0x00000000 01 01000000 <X:8바이트> <Y:8바이트>' (MySQL SRID 접두 포함 형식)
+    """
+    if not coordinates:
+        return float('nan'), float('nan')
+    try:
+        raw = bytes.fromhex(coordinates[2:] if coordinates.startswith('0x') else coordinates)
+        if len(raw) == 25:  # SRID(4바이트) 접두 제거
+            raw = raw[4:]
+        byte_order = '<' if raw[0] == 1 else '>'
+        lon, lat = struct.unpack(f'{byte_order}dd', raw[5:21])
+        return lat, lon
+    except (ValueError, struct.error, IndexError):
+        return float('nan'), float('nan')
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+class RestaurantStore:
+    """불변 열 기반 매장 저장소"""
+
+    def __init__(self, restaurants: List[Dict[str, Any]]):
+        """
+        Args:
+            restaurants: restaurants_optimized.json의 매장 리스트
+        """
+        # 원본 dict는 공유 참조로만 사용 (수정 금지)
+        self.restaurants = tuple(restaurants)
+        self.size = len(self.restaurants)
+        self.shop_ids = [r.get('shopId', '') for r in self.restaurants]
+        self.index_of = {shop_id: i for i, shop_id in enumerate(self.shop_ids)}
+
+        # 카테고리 코드화
+        self.categories: List[str] = []
+        category_code_map: Dict[str, int] = {}
+        category_codes = []
+        for r in self.restaurants:
+            category = r.get('category', '')
+            if category not in category_code_map:
+                category_code_map[category] = len(self.categories)
+                self.categories.append(category)
+            category_codes.append(category_code_map[category])
+        self._categories_lower = [c.lower() for c in self.categories]
+        self.category_codes = _readonly(np.array(category_codes, dtype=np.int32))
+
+        # 가격 / 메뉴 정보 (메뉴가 없으면 NaN)
+        min_prices, avg_prices, menu_counts = [], [], []
+        for r in self.restaurants:
+            menus = r.get('menus', [])
+            prices = [menu.get('price', 0) for menu in menus if menu.get('price', 0) > 0]
+            min_prices.append(min((menu.get('price', float('inf')) for menu in menus), default=float('nan')))
+            avg_prices.append(sum(prices) / len(prices) if prices else float('nan'))
+            menu_counts.append(len(menus))
+        self.min_price = _readonly(np.array(min_prices, dtype=np.float64))
+        self.avg_price = _readonly(np.array(avg_prices, dtype=np.float64))
+        self.menu_count = _readonly(np.array(menu_counts, dtype=np.int32))
+        self.rating = _readonly(np.array(
+            [r.get('rating') if r.get('rating') is not None else float('nan') for r in self.restaurants],
+            dtype=np.float32
+        ))
+
+        # 속성
+        self.is_good_shop = _readonly(np.array(
+            [bool(r.get('attributes', {}).get('isGoodShop', False)) for r in self.restaurants], dtype=bool
+        ))
+        self.accepts_meal_card = _readonly(np.array(
+            [bool(r.get('attributes', {}).get('acceptsMealCard', False)) for r in self.restaurants], dtype=bool
+        ))
+
+        # 영업시간 (자정 기준 분, 정보 없음/파싱 실패 시 -1)
+        self.open_minutes = _readonly(np.array(
+            [parse_minutes(r.get('hours', {}).get('open')) for r in self.restaurants], dtype=np.int16
+        ))
+        self.close_minutes = _readonly(np.array(
+            [parse_minutes(r.get('hours', {}).get('close')) for r in self.restaurants], dtype=np.int16
+        ))
+        self.operating_minutes = _readonly(
+            np.asarray(operating_minutes(self.open_minutes, self.close_minutes), dtype=np.int16)
+        )
+        self._hours_cache: Optional[Tuple[datetime, int, Tuple[np.ndarray, ...]]] = None
+
+        # 위치
+        self.addresses = np.array(
+            [r.get('location', {}).get('address', '') for r in self.restaurants], dtype=str
+        ) if self.size else np.array([], dtype=str)
+        _readonly(self.addresses)
+        coords = [parse_coordinates(r.get('location', {}).get('coordinates')) for r in self.restaurants]
+        self.lat = _readonly(np.array([c[0] for c in coords], dtype=np.float64))
+        self.lon = _readonly(np.array([c[1] for c in coords], dtype=np.float64))
+
+        # 파생 열 (Funnel별 사전 계산 점수 등)
+        self._derived: Dict[str, np.ndarray] = {}
+        self._derived_lock = threading.Lock()
+
+        logger.info(f"RestaurantStore 구축 완료: {self.size}개 매장, {len(self.categories)}개 카테고리")
+
+    @classmethod
+    def from_json(cls, restaurants_path: str) -> 'RestaurantStore':
+        """매장 데이터 파일에서 저장소 생성"""
+        try:
+            with open(restaurants_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                restaurants = data.get('restaurants', [])
+        except Exception as e:
+            logger.error(f"매장 데이터 로드 실패: {e}")
+            restaurants = []
+        return cls(restaurants)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def get(self, index: int) -> Dict[str, Any]:
+        """인덱스로 매장 dict 조회"""
+        return self.restaurants[index]
+
+    def derived(self, name: str, builder: Callable[['RestaurantStore'], np.ndarray]) -> np.ndarray:
+        """파생 열 조회 (최초 1회만 계산 후 공유)"""
+        array = self._derived.get(name)
+        if array is None:
+            with self._derived_lock:
+                array = self._derived.get(name)
+                if array is None:
+                    array = _readonly(np.asarray(builder(self)))
+                    self._derived[name] = array
+        return array
+
+    def hours_status(self, current_time: datetime,
+                     soon_minutes: int = 60) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """전체 매장 영업시간 상태 마스크 (영업시간 정보 있음, 현재 영업 중, 곧 오픈)
+
+        같은 시각으로 반복 호출하면 직전 결과 재사용 (배치 특성 추출 등)
+        """
+        cached = self._hours_cache
+        if cached is not None and cached[0] == current_time and cached[1] == soon_minutes:
+            return cached[2]
+        masks = tuple(_readonly(mask) for mask in
+                      hours_masks(self.open_minutes, self.close_minutes, current_time, soon_minutes))
+        self._hours_cache = (current_time, soon_minutes, masks)
+        return masks
+
+    def category_mask(self, keyword: str) -> np.ndarray:
+        """카테고리에 keyword(소문자 부분 문자열)가 포함된 매장 마스크"""
+        keyword = keyword.lower()
+        lookup = np.array([keyword in c for c in self._categories_lower], dtype=bool)
+        if not len(lookup):
+            return np.zeros(self.size, dtype=bool)
+        return lookup[self.category_codes]
+
+    def address_mask(self, keyword: str) -> np.ndarray:
+        """주소에 keyword가 포함된 매장 마스크"""
+        if not self.size:
+            return np.zeros(0, dtype=bool)
+        return np.char.find(self.addresses, keyword) >= 0
+
+    def filter_mask(self, filters: Optional[Dict[str, Any]],
+                    keys: Iterable[str] = ALL_FILTER_KEYS) -> np.ndarray:
+        """필터 조건을 만족하는 매장 마스크
+
+        Args:
+            filters: 필터 조건
+            keys: 적용할 필터 키 (Funnel마다 지원하는 필터가 다름)
+        """
+        mask = np.ones(self.size, dtype=bool)
+        if not filters:
+            return mask
+        keys = set(keys)
+
+        if 'category' in keys and filters.get('category'):
+            mask &= self.category_mask(filters['category'])
+
+        if 'location' in keys and filters.get('location'):
+            mask &= self.address_mask(filters['location'])
+
+        if 'is_good_influence' in keys and filters.get('is_good_influence'):
+            mask &= self.is_good_shop
+
+        if 'accepts_meal_card' in keys and filters.get('accepts_meal_card'):
+            mask &= self.accepts_meal_card
+
+        if 'max_price' in keys and filters.get('max_price'):
+            # 메뉴 정보가 없는 매장은 통과
+            mask &= np.isnan(self.min_price) | (self.min_price <= filters['max_price'])
+
+        return mask
+
+    def top_indices(self, scores: np.ndarray, mask: Optional[np.ndarray] = None,
+                    limit: Optional[int] = None) -> np.ndarray:
+        """마스크 내 매장을 점수 내림차순으로 정렬한 인덱스 (동점은 원래 순서 유지)"""
+        indices = np.flatnonzero(mask) if mask is not None else np.arange(self.size)
+        order = np.argsort(-scores[indices], kind='stable')
+        indices = indices[order]
+        return indices[:limit] if limit is not None else indices
+
+
+# 전역 저장소 (경로별 1회 로드)
+_restaurant_stores: Dict[str, RestaurantStore] = {}
+_restaurant_stores_lock = threading.Lock()
+
+
+def get_restaurant_store(restaurants_path: str = "data/restaurants_optimized.json") -> RestaurantStore:
+    """경로별 공유 매장 저장소 반환"""
+    store = _restaurant_stores.get(restaurants_path)
+    if store is None:
+        with _restaurant_stores_lock:
+            store = _restaurant_stores.get(restaurants_path)
+            if store is None:
+                store = RestaurantStore.from_json(restaurants_path)
+                _restaurant_stores[restaurants_path] = store
+    return store
@@ -0,0 +1,203 @@
+"""
+LLM 스트리밍 테스트
+- 작은 CPU 모델(무작위 초기화 1층 GPT-2 + 로컬 인코더 토크나이저)로 TextStream 토큰 스트리밍/정지 단어 확인
+- 스트리밍으로 보낸 조각을 이어 붙이면 정제된 최종 응답과 같은지 확인 (아동 응답 정제, OpenAI SSE)
+
+실행: pytest test_streaming.py
+"""
+
+import asyncio
+import json
+import random
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from nlp.llm_normalizer import LLMNormalizer
+
+TOKENIZER_PATH = Path(__file__).parent / "models" / "ax_encoder_base"
+MAX_NEW_TOKENS = 24
+
+
+class ScriptedModel:
+    """정해진 텍스트를 조각 단위로 돌려주는 스트리밍 모델"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    def generate_stream(self, prompt, max_new_tokens=None, temperature=None, stop_words=None):
+        try:
+            yield from self.chunks
+        finally:
+            self.closed = True
+
+
+def _random_chunks(text, rng):
+    chunks, i = [], 0
+    while i < len(text):
+        size = rng.randint(1, 5)
+        chunks.append(text[i:i + size])
+        i += size
+    return chunks
+
+
+def _stream_child_response(model):
+    normalizer = LLMNormalizer(model)
+    deltas = []
+    response = normalizer._stream_child_response("프롬프트", deltas.append)
+    return deltas, response
+
+
+def _assert_stream_matches(deltas, response):
+    """보낸 조각 = 최종 응답 (챗봇이 채택하지 않는 10자 이하 응답이면 아무것도 보내지 않음)"""
+    expected = response if len(response.strip()) > 10 else ""
+    assert "".join(deltas) == expected
+
+
+# === 작은 CPU 모델 ===
+
+@pytest.fixture(scope="module")
+def tiny_model():
+    torch = pytest.importorskip("torch")
+    from transformers import AutoTokenizer, GPT2Config, GPT2LMHeadModel
+
+    tokenizer = AutoTokenizer.from_pretrained(TOKENIZER_PATH)
+    torch.manual_seed(0)
+    config = GPT2Config(vocab_size=len(tokenizer), n_positions=128, n_embd=32, n_layer=1, n_head=2)
+    model = GPT2LMHeadModel(config).eval()
+    return model, tokenizer
+
+
+def _generate_kwargs(tokenizer, prompt="치킨 먹고 싶어"):
+    from transformers import GenerationConfig
+
+    inputs = tokenizer(prompt, return_tensors="pt", add_special_tokens=False)
+    return {
+        "input_ids": inputs["input_ids"],
+        "attention_mask": inputs["attention_mask"],
+        "generation_config": GenerationConfig(
+            max_new_tokens=MAX_NEW_TOKENS, do_sample=False,
+            pad_token_id=tokenizer.pad_token_id, eos_token_id=None
+        )
+    }
+
+
+def _reference_text(model, tokenizer):
+    kwargs = _generate_kwargs(tokenizer)
+    output = model.generate(**kwargs)
+    return tokenizer.decode(output[0, kwargs["input_ids"].shape[1]:], skip_special_tokens=True)
+
+
+def test_text_stream_matches_generate(tiny_model):
+    from models.text_streaming import TextStream
+
+    model, tokenizer = tiny_model
+    reference = _reference_text(model, tokenizer)
+
+    stream = TextStream(model, tokenizer, _generate_kwargs(tokenizer))
+    deltas = list(stream)
+
+    assert "".join(deltas) == reference == stream.text
+    assert stream.first_token_latency is not None
+    assert stream.finish_reason == "length"
+
+
+def test_text_stream_stop_word(tiny_model):
+    from models.text_streaming import TextStream
+
+    model, tokenizer = tiny_model
+    reference = _reference_text(model, tokenizer).strip()
+    if len(reference) < 6:
+        pytest.skip("생성 텍스트가 너무 짧음")
+    stop_word = reference[len(reference) // 3:len(reference) // 3 + 2]
+
+    stream = TextStream(model, tokenizer, _generate_kwargs(tokenizer), stop_words=[stop_word])
+    streamed = "".join(stream)
+
+    assert stop_word not in streamed
+    assert streamed.strip() == reference[:reference.find(stop_word)].strip()
+    assert stream.finish_reason == "stop"
+
+
+def test_child_response_stream_with_tiny_model(tiny_model):
+    from models.text_streaming import TextStream
+
+    model, tokenizer = tiny_model
+
+    class TinyStreamingModel:
+        def generate_stream(self, prompt, max_new_tokens=None, temperature=None, stop_words=None):
+            yield from TextStream(model, tokenizer, _generate_kwargs(tokenizer), stop_words=stop_words)
+
+    deltas, response = _stream_child_response(TinyStreamingModel())
+    _assert_stream_matches(deltas, response)
+
+
+# === 아동 응답 정제 규칙 스트리밍 ===
+
+@pytest.mark.parametrize("text", [
+    "치킨 먹으러 가요! 바삭한 후라이드 어때요? 😊\n\n사용자: 다른 거",
+    "떡볶이집 추천해요! 매콤달콤 맛있어요 나비얌: 또 뭐가 궁금해?",
+    "  {이름}님 [착한가게] 김밥천국 #추천 어때요? 한 줄에 3000원이에요",
+    "가" * 150 + " 오늘은 여기까지 추천할게요. " + "나" * 100,
+    "나" * 250,
+    "좋아요!",
+    "\n\n 앞 공백 뒤 응답도 정제 규칙은 같아요! 맛있게 먹어요",
+])
+def test_child_response_stream_matches_cleaned(text):
+    rng = random.Random(0)
+    for _ in range(20):
+        model = ScriptedModel(_random_chunks(text, rng))
+        deltas, response = _stream_child_response(model)
+
+        _assert_stream_matches(deltas, response)
+        assert response == LLMNormalizer(None)._clean_child_response(text)
+        assert "나비얌:" not in "".join(deltas) and "사용자:" not in "".join(deltas)
+        assert len("".join(deltas)) <= 203
+
+
+def test_child_response_stream_stops_at_length_cap():
+    text = "가" * 150 + " 첫 문장은 여기까지입니다. " + "나" * 400
+    model = ScriptedModel([text[i:i + 3] for i in range(0, len(text), 3)])
+
+    deltas, response = _stream_child_response(model)
+
+    assert response.endswith("여기까지입니다.")
+    assert "".join(deltas) == response
+    assert model.closed
+
+
+# === OpenAI SSE ===
+
+def _collect_openai_content(events):
+    from api.openai_adapter import stream_openai_chunks
+
+    async def collect():
+        return [line async for line in stream_openai_chunks(events)]
+
+    content = ""
+    for event in asyncio.run(collect()):
+        payload = event[len("data: "):].strip()
+        if payload == "[DONE]":
+            continue
+        content += json.loads(payload)["choices"][0]["delta"].get("content", "")
+    return content
+
+
+def _chat_events(tokens, final_text):
+    async def events():
+        for token in tokens:
+            yield "token", token
+        yield "output", SimpleNamespace(response=SimpleNamespace(text=final_text, recommendations=[]))
+    return events()
+
+
+def test_openai_stream_sends_remaining_text():
+    content = _collect_openai_content(_chat_events(["치킨 먹으러", " 가요"], "치킨 먹으러 가요!"))
+    assert content == "치킨 먹으러 가요!"
+
+
+def test_openai_stream_corrects_changed_response():
+    content = _collect_openai_content(_chat_events(["치킨 좋아요"], "치킨 완전 좋아요!"))
+    assert content.endswith("\n\n치킨 완전 좋아요!")
@@ -3,9 +3,10 @@ LoRA 학습 데이터 관리
 데이터 수집, 품질 검사, 전처리를 담당하는 클래스
 """
 
+import heapq
 import logging
+from pathlib import Path
 from typing import List, Dict, Any, Optional
-from datetime import datetime
 from dataclasses import dataclass
 
 from inference.data_collector import LearningDataCollector
@@ -53,30 +54,45 @@ class LoRADataManager:
         """
         logger.info(f"훈련 데이터 수집 시작 (최근 {days}일)")
         
-        # 1. 원시 데이터 수집
-        all_data = self.data_collector.get_recent_data(days=days)
-        logger.info(f"원시 데이터 수집: {len(all_data)}개")
-        
-        # 2. 품질 필터링
-        quality_data = []
-        for data in all_data:
-            if self.is_high_quality_data(data):
-                quality_data.append(data)
-        
-        logger.info(f"품질 필터링 후: {len(quality_data)}개")
-        
-        # 3. 샘플 수 제한 (최신 데이터 우선)
-        if len(quality_data) > self.quality_config.max_samples_per_batch:
-            quality_data = sorted(
-                quality_data, 
-                key=lambda x: x.get('timestamp', datetime.min), 
-                reverse=True
-            )
-            quality_data = quality_data[:self.quality_config.max_samples_per_batch]
+        # 1~2. 원시 데이터를 순회하며 품질 필터링 (전체를 메모리에 올리지 않음)
+        stats = {'raw': 0, 'quality': 0}
+
+        def quality_rows():
+            for data in self.data_collector.iter_training_rows(days=days):
+                stats['raw'] += 1
+                if self.is_high_quality_data(data):
+                    stats['quality'] += 1
+                    yield data
+
+        # 3. 샘플 수 제한 (최신 데이터 우선, 상위 N개만 유지)
+        quality_data = heapq.nlargest(
+            self.quality_config.max_samples_per_batch,
+            quality_rows(),
+            key=lambda x: x.get('timestamp', '')
+        )
+        logger.info(f"원시 데이터 수집: {stats['raw']}개")
+        logger.info(f"품질 필터링 후: {stats['quality']}개")
+        if stats['quality'] > len(quality_data):
             logger.info(f"샘플 수 제한: {len(quality_data)}개")
         
         return quality_data
     
+    def export_training_data(self, output_path: str, days: int = 7) -> Path:
+        """품질 검사를 통과한 훈련 데이터를 열 기반 파일로 저장 (Parquet, pyarrow가 없으면 npz)
+        
+        Args:
+            output_path: 저장 경로
+            days: 수집할 데이터의 일수
+            
+        Returns:
+            실제 저장 경로
+        """
+        rows = (data for data in self.data_collector.iter_training_rows(days=days)
+                if self.is_high_quality_data(data))
+        saved_path = self.data_collector.store.export_columnar(output_path, rows)
+        logger.info(f"훈련 데이터 저장 완료: {saved_path}")
+        return saved_path
+    
     def is_high_quality_data(self, data: Dict) -> bool:
         """데이터 품질 검사
         
@@ -4,50 +4,97 @@
 쿼리 결과와 임베딩을 캐싱하여 성능 향상
 """
 
+import os
+import re
 import json
 import time
+import atexit
+import heapq
+import queue
 import hashlib
 import pickle
-from typing import Any, Optional, Dict, List
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Dict, List, Set, Callable
 from pathlib import Path
-from functools import lru_cache, wraps
+from functools import wraps
 from datetime import datetime, timedelta
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
+class _CacheEntry:
+    """메모리 캐시 항목"""
+    __slots__ = ('result', 'expires_at', 'disk_key')
+
+    def __init__(self, result: Any, expires_at: float, disk_key: str):
+        self.result = result
+        self.expires_at = expires_at  # time.time() 기준
+        self.disk_key = disk_key
+
+
 class QueryCache:
-    """쿼리 결과 캐싱 시스템"""
-    
-    def __init__(self, cache_dir: Path, ttl_minutes: int = 60, max_size: int = 1000):
+    """쿼리 결과 캐싱 시스템
+
+    - 메모리 계층: OrderedDict 기반 O(1) LRU, 조회는 lock 없이 수행 (OrderedDict 단일 연산은 GIL로 원자적)
+    - 만료: TTL 휠 (만료 시각 버킷별 키 목록)로 만료된 항목만 정리
+    - 디스크 계층: pickle 파일, 쓰기/삭제는 단일 백그라운드 writer 스레드가 처리
+    - 통계 카운터는 lock 없이 갱신하므로 동시 요청 시 근사값
+    """
+
+    # TTL 휠 버킷 수 (버킷 간격 = TTL / 버킷 수, 최소 1초)
+    TTL_WHEEL_BUCKETS = 60
+
+    def __init__(self, cache_dir: Path, ttl_minutes: int = 60, max_size: int = 1000,
+                 disk_queue_size: int = 1024):
         """
         Args:
             cache_dir: 캐시 디렉토리
             ttl_minutes: 캐시 유효시간 (분)
             max_size: 최대 캐시 항목 수
+            disk_queue_size: 디스크 writer 대기열 크기 (가득 차면 디스크 저장 생략)
         """
         self.cache_dir = cache_dir
         self.ttl = timedelta(minutes=ttl_minutes)
         self.max_size = max_size
-        
-        # 메모리 캐시
-        self._memory_cache: Dict[str, Dict[str, Any]] = {}
-        
+
+        # 메모리 캐시 (오래된 항목이 앞쪽)
+        self._memory_cache: 'OrderedDict[tuple, _CacheEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        # TTL 휠: {버킷 번호: {키...}}, 버킷 번호 힙 (키는 현재 항목의 만료 버킷에만 등록)
+        self._wheel_resolution = max(1.0, self.ttl.total_seconds() / self.TTL_WHEEL_BUCKETS)
+        self._ttl_wheel: Dict[int, Set[tuple]] = {}
+        self._wheel_buckets: List[int] = []
+
         # 캐시 디렉토리 생성
         self.cache_dir.mkdir(exist_ok=True, parents=True)
-        
+
+        # 디스크에 있는 캐시 키 (존재하는 파일만 열도록 시작 시 1회 스캔)
+        self._disk_keys = {cache_file.stem for cache_file in self.cache_dir.glob("*.pkl")}
+
+        # 디스크 writer
+        self._disk_queue: queue.Queue = queue.Queue(maxsize=disk_queue_size)
+        self._writer = threading.Thread(target=self._disk_writer_loop, name="query-cache-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
+
         # 캐시 통계
         self.stats = {
             'hits': 0,
             'misses': 0,
-            'evictions': 0
+            'evictions': 0,
+            'expirations': 0,
+            'disk_writes_dropped': 0
         }
-        
+
         logger.info(f"QueryCache 초기화: TTL={ttl_minutes}분, 최대크기={max_size}")
-    
+
     def _get_cache_key(self, query: str, filters: Optional[Dict] = None, version: str = "v1") -> str:
-        """쿼리와 필터로 캐시 키 생성 (버전 포함)"""
+        """쿼리와 필터로 캐시 키 생성 (버전 포함, 디스크 파일명용)"""
         cache_data = {
             'query': query.strip().lower(),
             'filters': filters or {},
@@ -55,153 +102,535 @@ class QueryCache:
         }
         cache_str = json.dumps(cache_data, sort_keys=True, ensure_ascii=False)
         return hashlib.sha256(cache_str.encode()).hexdigest()
-    
+
+    def _memory_key(self, query: str, filters: Optional[Dict], version: str) -> tuple:
+        """메모리 캐시 키 (해시 계산 없이 튜플 사용)"""
+        filters_key = json.dumps(filters, sort_keys=True, ensure_ascii=False) if filters else ""
+        return (query.strip().lower(), filters_key, version)
+
     def get(self, query: str, filters: Optional[Dict] = None, version: str = "v1") -> Optional[List[Any]]:
         """캐시에서 결과 조회"""
+        memory_key = self._memory_key(query, filters, version)
+        now = time.time()
+
+        # 1. 메모리 캐시 확인 (lock 없이 조회, 만료 항목은 TTL 휠이 정리)
+        entry = self._memory_cache.get(memory_key)
+        if entry is not None and now < entry.expires_at:
+            try:
+                self._memory_cache.move_to_end(memory_key)
+            except KeyError:
+                pass  # 다른 스레드가 방금 제거함
+            self.stats['hits'] += 1
+            logger.debug(f"캐시 히트: {query[:30]}...")
+            return entry.result
+
+        # 2. 디스크 캐시 확인 (파일이 있는 키만)
         cache_key = self._get_cache_key(query, filters, version)
-        
-        # 1. 메모리 캐시 확인
-        if cache_key in self._memory_cache:
-            entry = self._memory_cache[cache_key]
-            if datetime.now() < entry['expires_at']:
-                self.stats['hits'] += 1
-                logger.debug(f"캐시 히트: {query[:30]}...")
-                return entry['result']
-            else:
-                # 만료된 항목 제거
-                del self._memory_cache[cache_key]
-        
-        # 2. 디스크 캐시 확인
-        cache_file = self.cache_dir / f"{cache_key}.pkl"
-        if cache_file.exists():
+        if cache_key in self._disk_keys:
+            cache_file = self.cache_dir / f"{cache_key}.pkl"
             try:
                 with open(cache_file, 'rb') as f:
-                    entry = pickle.load(f)
-                
-                if datetime.now() < entry['expires_at']:
+                    disk_entry = pickle.load(f)
+
+                expires_at = disk_entry['expires_at'].timestamp()
+                if now < expires_at:
                     # 메모리 캐시에 추가
-                    self._memory_cache[cache_key] = entry
+                    with self._lock:
+                        self._insert(memory_key, _CacheEntry(disk_entry['result'], expires_at, cache_key), now)
                     self.stats['hits'] += 1
                     logger.debug(f"디스크 캐시 히트: {query[:30]}...")
-                    return entry['result']
+                    return disk_entry['result']
                 else:
                     # 만료된 파일 삭제
-                    cache_file.unlink()
+                    self._enqueue_disk(('delete', cache_key, None))
+            except FileNotFoundError:
+                self._disk_keys.discard(cache_key)
             except UnicodeDecodeError as e:
                 logger.warning(f"캐시 파일 읽기 실패 (유니코드 에러): {e}")
                 # 손상된 캐시 파일 삭제
-                try:
-                    cache_file.unlink()
-                except:
-                    pass
+                self._enqueue_disk(('delete', cache_key, None))
             except Exception as e:
                 logger.warning(f"캐시 파일 읽기 실패: {e}")
                 # 손상된 캐시 파일 삭제
-                try:
-                    cache_file.unlink()
-                except:
-                    pass
-        
+                self._enqueue_disk(('delete', cache_key, None))
+
         self.stats['misses'] += 1
         return None
-    
+
     def set(self, query: str, result: List[Any], filters: Optional[Dict] = None, version: str = "v1"):
-        """결과를 캐시에 저장"""
+        """결과를 캐시에 저장 (디스크 저장은 백그라운드 writer가 처리)"""
+        memory_key = self._memory_key(query, filters, version)
         cache_key = self._get_cache_key(query, filters, version)
-        
-        # 캐시 크기 제한 확인
-        if len(self._memory_cache) >= self.max_size:
-            self._evict_oldest()
-        
+        now = time.time()
+        created_at = datetime.fromtimestamp(now)
+
+        with self._lock:
+            self._insert(memory_key, _CacheEntry(result, now + self.ttl.total_seconds(), cache_key), now)
+
         entry = {
             'query': query,
             'filters': filters,
             'result': result,
-            'created_at': datetime.now(),
-            'expires_at': datetime.now() + self.ttl
+            'created_at': created_at,
+            'expires_at': created_at + self.ttl
         }
-        
-        # 메모리 캐시에 저장
-        self._memory_cache[cache_key] = entry
-        
-        # 디스크에도 저장 (비동기적으로 처리 가능)
-        try:
-            cache_file = self.cache_dir / f"{cache_key}.pkl"
-            with open(cache_file, 'wb') as f:
-                # UTF-8로 안전하게 저장하기 위해 protocol 버전 명시
-                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
-            logger.debug(f"캐시 저장: {query[:30]}...")
-        except UnicodeEncodeError as e:
-            logger.warning(f"캐시 파일 저장 실패 (유니코드 에러): {e}")
-            # 이모지나 특수 문자가 있는 경우 메모리 캐시만 사용
-        except Exception as e:
-            logger.warning(f"캐시 파일 저장 실패: {e}")
-    
+        self._enqueue_disk(('write', cache_key, entry))
+        logger.debug(f"캐시 저장: {query[:30]}...")
+
+    def _insert(self, memory_key: tuple, entry: _CacheEntry, now: float):
+        """메모리 캐시에 추가 후 만료/용량 초과 항목 정리 (lock 보유 상태에서 호출)"""
+        self._expire_due(now)
+
+        previous = self._memory_cache.get(memory_key)
+        if previous is not None:
+            self._wheel_discard(memory_key, previous)
+
+        self._memory_cache[memory_key] = entry
+        self._memory_cache.move_to_end(memory_key)
+
+        bucket = int(entry.expires_at // self._wheel_resolution)
+        keys = self._ttl_wheel.get(bucket)
+        if keys is None:
+            self._ttl_wheel[bucket] = keys = set()
+            heapq.heappush(self._wheel_buckets, bucket)
+        keys.add(memory_key)
+
+        while len(self._memory_cache) > self.max_size:
+            self._evict_oldest()
+
+    def _expire_due(self, now: float):
+        """구간이 모두 지난 TTL 휠 버킷의 만료 항목 제거 (lock 보유 상태에서 호출)
+
+        진행 중인 버킷의 만료 항목은 조회 시 만료 시각 비교로 걸러지고, 버킷이 지난 뒤 제거됨
+        """
+        current_bucket = int(now // self._wheel_resolution)
+        while self._wheel_buckets and self._wheel_buckets[0] < current_bucket:
+            bucket = heapq.heappop(self._wheel_buckets)
+            keys = self._ttl_wheel.pop(bucket)
+            for key in keys:
+                entry = self._memory_cache.get(key)
+                if entry is not None and entry.expires_at <= now:
+                    del self._memory_cache[key]
+                    self.stats['expirations'] += 1
+
+    def _wheel_discard(self, memory_key: tuple, entry: _CacheEntry):
+        """TTL 휠에서 항목의 키 제거 (빈 버킷은 구간이 지날 때 정리, lock 보유 상태에서 호출)"""
+        keys = self._ttl_wheel.get(int(entry.expires_at // self._wheel_resolution))
+        if keys is not None:
+            keys.discard(memory_key)
+
     def _evict_oldest(self):
-        """가장 오래된 캐시 항목 제거"""
+        """가장 오래 사용되지 않은 캐시 항목 1개 제거 (lock 보유 상태에서 호출)"""
         if not self._memory_cache:
             return
-        
-        # 생성 시간 기준으로 정렬
-        sorted_items = sorted(
-            self._memory_cache.items(),
-            key=lambda x: x[1]['created_at']
-        )
-        
-        # 가장 오래된 10% 제거
-        evict_count = max(1, len(sorted_items) // 10)
-        for key, _ in sorted_items[:evict_count]:
-            del self._memory_cache[key]
-            self.stats['evictions'] += 1
-            
-            # 디스크 파일도 삭제
-            cache_file = self.cache_dir / f"{key}.pkl"
-            if cache_file.exists():
-                cache_file.unlink()
-    
+
+        memory_key, entry = self._memory_cache.popitem(last=False)
+        self._wheel_discard(memory_key, entry)
+        self.stats['evictions'] += 1
+
+        # 디스크 파일도 삭제
+        self._enqueue_disk(('delete', entry.disk_key, None))
+
+    def _enqueue_disk(self, operation: tuple):
+        """디스크 writer에 작업 전달 (대기열이 가득 차면 쓰기는 생략)"""
+        try:
+            self._disk_queue.put_nowait(operation)
+        except queue.Full:
+            if operation[0] == 'write':
+                self.stats['disk_writes_dropped'] += 1
+                logger.debug("캐시 디스크 대기열이 가득 차 디스크 저장 생략")
+            else:
+                # 삭제/전체 삭제는 누락되면 안 되므로 대기
+                self._disk_queue.put(operation)
+
+    def _disk_writer_loop(self):
+        """디스크 쓰기/삭제 전담 스레드"""
+        while True:
+            action, cache_key, entry = self._disk_queue.get()
+            try:
+                if action == 'write':
+                    cache_file = self.cache_dir / f"{cache_key}.pkl"
+                    tmp_file = cache_file.with_suffix('.tmp')
+                    with open(tmp_file, 'wb') as f:
+                        # UTF-8로 안전하게 저장하기 위해 protocol 버전 명시
+                        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    os.replace(tmp_file, cache_file)
+                    self._disk_keys.add(cache_key)
+                elif action == 'delete':
+                    self._disk_keys.discard(cache_key)
+                    cache_file = self.cache_dir / f"{cache_key}.pkl"
+                    if cache_file.exists():
+                        cache_file.unlink()
+                elif action == 'clear':
+                    self._disk_keys.clear()
+                    for cache_file in self.cache_dir.glob("*.pkl"):
+                        cache_file.unlink()
+            except UnicodeEncodeError as e:
+                logger.warning(f"캐시 파일 저장 실패 (유니코드 에러): {e}")
+                # 이모지나 특수 문자가 있는 경우 메모리 캐시만 사용
+            except Exception as e:
+                logger.warning(f"캐시 파일 {action} 실패: {e}")
+            finally:
+                self._disk_queue.task_done()
+
+    def flush(self):
+        """대기 중인 디스크 작업이 모두 끝날 때까지 대기"""
+        self._disk_queue.join()
+
     def clear(self):
         """전체 캐시 삭제"""
-        self._memory_cache.clear()
-        
+        with self._lock:
+            self._memory_cache.clear()
+            self._ttl_wheel.clear()
+            self._wheel_buckets.clear()
+
         # 디스크 캐시 파일 모두 삭제
-        for cache_file in self.cache_dir.glob("*.pkl"):
-            cache_file.unlink()
-        
+        self._enqueue_disk(('clear', None, None))
+        self.flush()
+
         logger.info("캐시 전체 삭제 완료")
-    
+
     def get_stats(self) -> Dict[str, Any]:
         """캐시 통계 반환"""
         total_requests = self.stats['hits'] + self.stats['misses']
         hit_rate = self.stats['hits'] / total_requests if total_requests > 0 else 0
-        
+
         return {
             'hits': self.stats['hits'],
             'misses': self.stats['misses'],
             'evictions': self.stats['evictions'],
+            'expirations': self.stats['expirations'],
             'hit_rate': f"{hit_rate:.1%}",
             'memory_items': len(self._memory_cache),
-            'disk_files': len(list(self.cache_dir.glob("*.pkl")))
+            'disk_files': len(self._disk_keys),
+            'disk_queue': self._disk_queue.qsize(),
+            'disk_writes_dropped': self.stats['disk_writes_dropped']
+        }
+
+
+class EmbeddingSpillFile:
+    """모델별 임베딩 디스크 스필 파일 (재시작 후에도 유지)
+
+    고정 크기 float32 memmap 슬롯 파일과 텍스트 -> 슬롯 인덱스 파일로 구성.
+    슬롯이 가득 차면 가장 오래된 슬롯부터 덮어씀 (링 버퍼)
+    슬롯 인덱스는 프로세스 메모리에 있으므로 한 디렉토리를 여러 프로세스가 함께 쓰면 안 됨
+    (EmbeddingCache가 디렉토리 잠금으로 보장)
+    """
+
+    def __init__(self, spill_dir: Path, model_name: str, dim: int, capacity: int = 100000):
+        safe_name = self.safe_name(model_name)
+        self.vectors_path = spill_dir / f"{safe_name}_{dim}.f32"
+        self.index_path = spill_dir / f"{safe_name}_{dim}.index.json"
+        self.dim = dim
+        self.capacity = capacity
+        self.slots: Dict[str, int] = {}
+        self.slot_keys: List[Optional[str]] = [None] * capacity
+        self.next_slot = 0
+        self._unsaved = 0
+
+        spill_dir.mkdir(exist_ok=True, parents=True)
+        if self.index_path.exists() and self.vectors_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    index_data = json.load(f)
+                if index_data.get('dim') == dim and index_data.get('capacity') == capacity:
+                    self.slots = {key: int(slot) for key, slot in index_data.get('slots', {}).items()}
+                    for key, slot in self.slots.items():
+                        self.slot_keys[slot] = key
+                    self.next_slot = int(index_data.get('next_slot', 0)) % capacity
+            except Exception as e:
+                logger.warning(f"임베딩 스필 인덱스 로드 실패, 새로 시작: {e}")
+                self.slots = {}
+                self.slot_keys = [None] * capacity
+                self.next_slot = 0
+
+        mode = 'r+' if self.vectors_path.exists() and \
+            self.vectors_path.stat().st_size == capacity * dim * 4 else 'w+'
+        if mode == 'w+':
+            self.slots = {}
+            self.slot_keys = [None] * capacity
+            self.next_slot = 0
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode=mode, shape=(capacity, dim))
+
+    @staticmethod
+    def safe_name(model_name: str) -> str:
+        """파일명에 쓸 수 있는 모델명"""
+        return re.sub(r'[^0-9A-Za-z.-]+', '_', model_name)
+
+    @classmethod
+    def find_dims(cls, spill_dir: Path, model_name: str) -> List[int]:
+        """디스크에 남아 있는 모델의 스필 파일 차원 목록"""
+        prefix = f"{cls.safe_name(model_name)}_"
+        dims = []
+        for index_path in spill_dir.glob(f"{prefix}*.index.json"):
+            dim = index_path.name[len(prefix):-len(".index.json")]
+            if dim.isdigit():
+                dims.append(int(dim))
+        return dims
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        slot = self.slots.get(key)
+        if slot is None:
+            return None
+        return np.array(self.vectors[slot])
+
+    def put(self, key: str, vector: np.ndarray):
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = self.next_slot
+            self.next_slot = (self.next_slot + 1) % self.capacity
+            old_key = self.slot_keys[slot]
+            if old_key is not None:
+                del self.slots[old_key]
+            self.slots[key] = slot
+            self.slot_keys[slot] = key
+        self.vectors[slot] = vector
+        self._unsaved += 1
+
+    @property
+    def unsaved_count(self) -> int:
+        return self._unsaved
+
+    def flush(self):
+        """벡터 파일과 인덱스를 디스크에 반영 (인덱스는 임시 파일 후 교체)"""
+        if not self._unsaved:
+            return
+        self.vectors.flush()
+        index_data = {
+            'dim': self.dim,
+            'capacity': self.capacity,
+            'next_slot': self.next_slot,
+            'slots': self.slots
         }
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index_data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+        self._unsaved = 0
 
 
 class EmbeddingCache:
-    """임베딩 벡터 캐싱 (텍스트 -> 벡터)"""
+    """임베딩 벡터 캐싱 (정규화된 텍스트 + 모델명 -> float32 벡터)
+
+    - OrderedDict 기반 O(1) LRU
+    - spill_dir 지정 시 모델별 memmap 스필 파일에 저장하여 재시작 후에도 재사용
+      (디렉토리 잠금을 얻은 한 프로세스만 사용, 다른 워커 프로세스는 메모리 캐시만 사용)
+    - 히트/미스는 ProductionMonitor.record_cache_hit("embedding", ...)로 기록
+    """
     
-    def __init__(self, cache_size: int = 10000):
+    def __init__(self, cache_size: int = 10000, spill_dir: Optional[Path] = None,
+                 spill_capacity: int = 100000, spill_flush_every: int = 256,
+                 record_metrics: bool = True):
+        """
+        Args:
+            cache_size: 메모리에 유지할 임베딩 수
+            spill_dir: 디스크 스필 디렉토리 (None이면 메모리만 사용)
+            spill_capacity: 모델별 스필 파일 슬롯 수
+            spill_flush_every: 이 수만큼 새로 저장할 때마다 스필 인덱스를 디스크에 반영
+            record_metrics: 프로덕션 모니터에 히트/미스 기록 여부
+        """
         self.cache_size = cache_size
-        self._cache = {}
-        self.stats = {'hits': 0, 'misses': 0}
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.spill_capacity = spill_capacity
+        self.spill_flush_every = spill_flush_every
+        self.record_metrics = record_metrics
+        
+        self._cache: 'OrderedDict[tuple, np.ndarray]' = OrderedDict()
+        self._spills: Dict[tuple, EmbeddingSpillFile] = {}
+        self._discovered_models: set = set()
+        self._lock = threading.RLock()
+        self.stats = {'hits': 0, 'misses': 0, 'disk_hits': 0, 'evictions': 0}
+        
+        self._spill_lock_file = None
+        if self.spill_dir and not self._acquire_spill_dir():
+            logger.info(f"임베딩 스필 디렉토리를 다른 프로세스가 사용 중이라 메모리 캐시만 사용: {self.spill_dir}")
+            self.spill_dir = None
+        if self.spill_dir:
+            atexit.register(self.flush)
+        
+        logger.info(f"EmbeddingCache 초기화: 최대크기={cache_size}, 스필={self.spill_dir}")
+    
+    def _acquire_spill_dir(self) -> bool:
+        """스필 디렉토리 단독 사용 잠금 (프로세스가 끝날 때까지 유지)"""
+        try:
+            self.spill_dir.mkdir(exist_ok=True, parents=True)
+            lock_file = open(self.spill_dir / ".lock", 'a+b')
+        except OSError as e:
+            logger.warning(f"임베딩 스필 디렉토리 잠금 파일 생성 실패: {e}")
+            return False
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._spill_lock_file = lock_file
+        return True
+    
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """캐시 키용 텍스트 정규화 (앞뒤 공백 제거, 소문자, 연속 공백 축약)"""
+        return ' '.join(text.strip().lower().split())
+    
+    def _record(self, hit: bool):
+        if not self.record_metrics:
+            return
+        try:
+            from utils.monitoring import get_production_monitor
+            get_production_monitor().record_cache_hit("embedding", hit)
+        except Exception as e:
+            logger.debug(f"임베딩 캐시 메트릭 기록 실패: {e}")
+    
+    def _get_spill(self, model_name: str, dim: int) -> Optional[EmbeddingSpillFile]:
+        if not self.spill_dir:
+            return None
+        spill_key = (model_name, dim)
+        spill = self._spills.get(spill_key)
+        if spill is None:
+            try:
+                spill = EmbeddingSpillFile(self.spill_dir, model_name, dim, self.spill_capacity)
+            except Exception as e:
+                logger.warning(f"임베딩 스필 파일 열기 실패 ({model_name}): {e}")
+                return None
+            self._spills[spill_key] = spill
+        return spill
     
-    @lru_cache(maxsize=10000)
-    def get_embedding(self, text: str) -> Optional[List[float]]:
-        """캐시된 임베딩 조회"""
-        # LRU 캐시가 자동으로 처리
+    def _find_spilled(self, model_name: str, text: str) -> Optional[np.ndarray]:
+        """모델의 스필 파일들(차원별)에서 조회 (이전 실행에서 남은 파일은 처음 조회 시 열기)"""
+        if not self.spill_dir:
+            return None
+        if model_name not in self._discovered_models:
+            self._discovered_models.add(model_name)
+            if self.spill_dir.exists():
+                for dim in EmbeddingSpillFile.find_dims(self.spill_dir, model_name):
+                    self._get_spill(model_name, dim)
+        for (spill_model, dim), spill in list(self._spills.items()):
+            if spill_model == model_name:
+                vector = spill.get(text)
+                if vector is not None:
+                    return vector
         return None
     
-    def set_embedding(self, text: str, embedding: List[float]):
+    def _lookup(self, text: str, model_name: str) -> Optional[np.ndarray]:
+        key = (model_name, text)
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.stats['hits'] += 1
+                return vector
+            vector = self._find_spilled(model_name, text)
+            if vector is not None:
+                vector.flags.writeable = False
+                self._insert(key, vector)
+                self.stats['hits'] += 1
+                self.stats['disk_hits'] += 1
+                return vector
+            self.stats['misses'] += 1
+            return None
+    
+    def _insert(self, key: tuple, vector: np.ndarray):
+        """LRU에 추가하고 초과분 제거 (lock 보유 상태에서 호출)"""
+        self._cache[key] = vector
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+            self.stats['evictions'] += 1
+    
+    def get_embedding(self, text: str, model_name: str = "default") -> Optional[np.ndarray]:
+        """캐시된 임베딩 조회 (읽기 전용 float32 벡터, 없으면 None)"""
+        vector = self._lookup(self.normalize_text(text), model_name)
+        self._record(vector is not None)
+        return vector
+    
+    def set_embedding(self, text: str, embedding, model_name: str = "default"):
         """임베딩 캐시에 저장"""
-        # 실제로는 별도 저장 로직 필요
-        pass
+        self._store(self.normalize_text(text), embedding, model_name)
+    
+    def _store(self, text: str, embedding, model_name: str):
+        vector = np.array(embedding, dtype=np.float32).reshape(-1)
+        vector.flags.writeable = False
+        with self._lock:
+            self._insert((model_name, text), vector)
+            spill = self._get_spill(model_name, len(vector))
+            if spill is not None:
+                spill.put(text, vector)
+                if spill.unsaved_count >= self.spill_flush_every:
+                    spill.flush()
+    
+    def encode(self, texts: List[str], model_name: str, encode_fn: Callable[[List[str]], Any]) -> np.ndarray:
+        """캐시를 거쳐 텍스트 목록을 (n, d) float32 임베딩 행렬로 변환
+        
+        캐시에 없는 텍스트만 중복 제거 후 encode_fn으로 한 번에 인코딩
+        
+        Args:
+            texts: 인코딩할 텍스트 목록
+            model_name: 임베딩 모델 이름 (캐시 키에 포함)
+            encode_fn: 텍스트 목록 -> (m, d) 임베딩 (캐시 미스만 전달됨)
+        """
+        normalized = [self.normalize_text(text) for text in texts]
+        vectors: List[Optional[np.ndarray]] = []
+        missing: Dict[str, List[int]] = OrderedDict()
+        for position, text in enumerate(normalized):
+            vector = self._lookup(text, model_name)
+            self._record(vector is not None)
+            vectors.append(vector)
+            if vector is None:
+                missing.setdefault(text, []).append(position)
+        
+        if missing:
+            # 첫 번째 원문 텍스트로 인코딩 (정규화는 키에만 사용)
+            miss_texts = [texts[positions[0]] for positions in missing.values()]
+            encoded = np.asarray(encode_fn(miss_texts), dtype=np.float32).reshape(len(miss_texts), -1)
+            for (text, positions), vector in zip(missing.items(), encoded):
+                self._store(text, vector, model_name)
+                for position in positions:
+                    vectors[position] = vector
+        
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(vectors).astype(np.float32, copy=False)
+    
+    def flush(self):
+        """스필 파일 디스크 반영"""
+        with self._lock:
+            for spill in self._spills.values():
+                try:
+                    spill.flush()
+                except Exception as e:
+                    logger.warning(f"임베딩 스필 저장 실패: {e}")
+    
+    def close(self):
+        """스필 파일 반영 후 디렉토리 잠금 해제"""
+        self.flush()
+        if self._spill_lock_file is not None:
+            self._spill_lock_file.close()  # 파일을 닫으면 잠금도 해제됨
+            self._spill_lock_file = None
+    
+    def clear(self):
+        """메모리 캐시 삭제 (스필 파일은 유지)"""
+        with self._lock:
+            self._cache.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 통계 반환"""
+        with self._lock:
+            total_requests = self.stats['hits'] + self.stats['misses']
+            hit_rate = self.stats['hits'] / total_requests if total_requests > 0 else 0
+            return {
+                'hits': self.stats['hits'],
+                'misses': self.stats['misses'],
+                'disk_hits': self.stats['disk_hits'],
+                'evictions': self.stats['evictions'],
+                'hit_rate': f"{hit_rate:.1%}",
+                'memory_items': len(self._cache),
+                'spilled_items': sum(len(spill.slots) for spill in self._spills.values())
+            }
 
 
 def cached_result(cache: QueryCache):
@@ -244,8 +673,17 @@ def get_query_cache(cache_dir: Optional[Path] = None) -> QueryCache:
 
 
 def get_embedding_cache() -> EmbeddingCache:
-    """전역 임베딩 캐시 인스턴스 반환"""
+    """전역 임베딩 캐시 인스턴스 반환 (init_embedding_cache 전에는 메모리 캐시만 사용)"""
     global _embedding_cache
     if _embedding_cache is None:
         _embedding_cache = EmbeddingCache()
+    return _embedding_cache
+
+
+def init_embedding_cache(spill_dir: Optional[Path] = None, **kwargs) -> EmbeddingCache:
+    """전역 임베딩 캐시 설정 (spill_dir 지정 시 디스크 스필 사용, 디렉토리 잠금을 얻은 프로세스만 스필)"""
+    global _embedding_cache
+    if _embedding_cache is not None:
+        _embedding_cache.close()
+    _embedding_cache = EmbeddingCache(spill_dir=spill_dir, **kwargs)
     return _embedding_cache
\ No newline at end of file
@@ -183,6 +183,9 @@ class RAGConfig:
     embedding_dim: int = 384
     top_k: int = 5
     enable_rag: bool = True
+    # 쿼리 임베딩 디스크 스필 (CACHE_DIR/embeddings, 재시작 후 재사용)
+    # 디렉토리는 한 프로세스만 사용 가능: 다중 워커에서는 잠금을 얻은 첫 프로세스만 스필
+    embedding_spill: bool = False
     
     # PathConfig를 사용하여 동적으로 경로 설정
     def get_index_path(self, path_config: PathConfig) -> str:
@@ -217,6 +220,22 @@ class InferenceConfig:
     enable_personalization: bool = True
     save_conversations: bool = False
     response_timeout: int = 30  # 초
+    # 추론 워커 풀 (api/inference_executor.py)
+    executor_mode: str = "thread"  # thread, process
+    executor_workers: int = 2
+    executor_queue_size: int = 16  # 초과 시 429
+    # 사용자 프로필 저장소 (inference/profile_store.py)
+    profile_backend: str = "sqlite"  # sqlite, json
+    profile_cache_size: int = 1024  # 메모리에 유지할 프로필 수
+    profile_flush_interval: float = 1.0  # 지연 쓰기 주기 (초)
+    # 단계별 지연 추적 (utils/tracing.py)
+    tracing_enabled: bool = True
+    trace_sample_rate: float = 0.05  # span 트리를 보관할 요청 비율
+    trace_slow_threshold: float = 3.0  # 이 시간(초)을 넘은 요청은 항상 보관
+    # 사용자별 속도 제한 (utils/security.py, GCRA)
+    rate_limit_per_minute: int = 30
+    rate_limit_burst: int = 30  # 연속으로 허용할 최대 요청 수
+    rate_limit_backend: str = "memory"  # memory, sqlite (여러 워커 프로세스가 한도 공유)
 
 
 @dataclass
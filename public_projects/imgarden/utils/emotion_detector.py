@@ -38,11 +38,15 @@ class EmotionDetector:
         intent: IntentType,
         user_text: str,
         response_text: str,
-        context: Dict = None
+        context: Dict = None,
+        preprocess_result=None
     ) -> Tuple[str, float]:
         """
         감정 상태 결정
         
+        Args:
+            preprocess_result: 같은 사용자 입력의 전처리 결과 (있으면 키워드 검사 결과를 발화 단위로 캐시)
+        
         Returns:
             emotion: 감정 상태 (happy, excited, thinking, confused, sad)
             confidence: 감정 신뢰도 (0.0 ~ 1.0)
@@ -59,11 +63,15 @@ class EmotionDetector:
         emotion_scores[base_emotion] = 0.5
         
         # 2. 사용자 텍스트 분석
-        user_text_lower = user_text.lower()
-        for emotion, keywords in self.emotion_keywords.items():
-            for keyword in keywords:
-                if keyword in user_text_lower:
-                    emotion_scores[emotion] += 0.2
+        if preprocess_result is not None and preprocess_result.original_text == user_text:
+            keyword_counts = preprocess_result.memo(
+                "emotion_detector_keywords", lambda: self._count_user_keywords(user_text)
+            )
+        else:
+            keyword_counts = self._count_user_keywords(user_text)
+        for emotion, count in keyword_counts.items():
+            for _ in range(count):
+                emotion_scores[emotion] += 0.2
                     
         # 3. 응답 텍스트 분석
         response_text_lower = response_text.lower()
@@ -112,6 +120,14 @@ class EmotionDetector:
             
         return emotion, confidence
     
+    def _count_user_keywords(self, user_text: str) -> Dict[str, int]:
+        """감정별 트리거 키워드 등장 수"""
+        user_text_lower = user_text.lower()
+        return {
+            emotion: sum(1 for keyword in keywords if keyword in user_text_lower)
+            for emotion, keywords in self.emotion_keywords.items()
+        }
+    
     def get_emotion_transitions(self, current_emotion: str) -> Dict[str, float]:
         """
         자연스러운 감정 전이 확률
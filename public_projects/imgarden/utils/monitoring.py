@@ -5,9 +5,11 @@
 """
 
 import logging
+import math
+import re
 import time
 import json
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
 from dataclasses import dataclass, asdict
@@ -17,15 +19,6 @@ import threading
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class PerformanceMetric:
-    """성능 메트릭"""
-    name: str
-    value: float
-    timestamp: datetime
-    tags: Dict[str, str] = None
-
-
 @dataclass
 class ErrorEvent:
     """에러 이벤트"""
@@ -36,88 +29,315 @@ class ErrorEvent:
     context: Dict[str, Any] = None
 
 
+class Counter:
+    """단조 증가 카운터"""
+
+    __slots__ = ('_value', '_lock')
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+
+class LogHistogram:
+    """로그 버킷 히스토그램 (DDSketch 방식)
+
+    - 값 v는 ceil(log_gamma(v)) 버킷에 집계, 분위수의 상대 오차는 relative_accuracy 이내
+    - 버킷 범위가 [min_value, max_value]로 제한되어 메모리가 고정됨 (min_value 미만은 0 버킷)
+    - 분위수 계산 O(버킷 수), 같은 설정의 히스토그램끼리 병합 가능
+    - 스레드 안전하지 않음 (SlidingWindowHistogram이 잠금 관리)
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-6, max_value: float = 1e9):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._max_index = self._index(max_value)
+        self.clear()
+
+    def clear(self):
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value: float):
+        if value < self.min_value:
+            self.zero_count += 1
+        else:
+            index = min(self._index(value), self._max_index)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LogHistogram"):
+        """다른 히스토그램 합산 (같은 relative_accuracy/범위여야 함)"""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def copy_empty(self) -> "LogHistogram":
+        return LogHistogram(self.relative_accuracy, self.min_value, self.max_value)
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        """여러 분위수를 버킷 한 번 순회로 계산 (정렬된 값의 int(q * count)번째에 해당)"""
+        qs = list(qs)
+        if not self.count:
+            return [None] * len(qs)
+
+        ranks = sorted((min(int(q * self.count), self.count - 1), position) for position, q in enumerate(qs))
+        results: List[Optional[float]] = [None] * len(qs)
+        pending = iter(ranks)
+        rank, position = next(pending)
+
+        cumulative = self.zero_count
+        while rank < cumulative:
+            results[position] = max(self.min, 0.0)
+            rank, position = next(pending, (None, None))
+            if rank is None:
+                return results
+
+        for index in sorted(self.buckets):
+            cumulative += self.buckets[index]
+            while rank < cumulative:
+                # 버킷 대표값 (상대 오차 최소), 관측 범위로 제한
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                results[position] = min(max(value, self.min), self.max)
+                rank, position = next(pending, (None, None))
+                if rank is None:
+                    return results
+        return results
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.quantiles([q])[0]
+
+
+class SlidingWindowHistogram:
+    """시간 슬롯별 LogHistogram 링 버퍼
+
+    최근 window_seconds를 num_slots개 슬롯으로 나눠 기록하고, 조회 시 필요한 슬롯만 병합
+    누적 count/sum은 Prometheus 내보내기용으로 별도 유지
+    """
+
+    def __init__(self, window_seconds: float = 3600, num_slots: int = 60, relative_accuracy: float = 0.01):
+        self.slot_seconds = window_seconds / num_slots
+        self.num_slots = num_slots
+        self._slots = [LogHistogram(relative_accuracy) for _ in range(num_slots)]
+        self._epochs = [-1] * num_slots
+        self.total_count = 0
+        self.total_sum = 0.0
+        self.last_value: Optional[float] = None
+        self.last_time = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, value: float, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        epoch = int(now // self.slot_seconds)
+        slot = epoch % self.num_slots
+        with self._lock:
+            if self._epochs[slot] != epoch:
+                self._slots[slot].clear()
+                self._epochs[slot] = epoch
+            self._slots[slot].add(value)
+            self.total_count += 1
+            self.total_sum += value
+            self.last_value = value
+            self.last_time = now
+
+    def snapshot(self, seconds: Optional[float] = None, now: Optional[float] = None,
+                 into: Optional[LogHistogram] = None) -> LogHistogram:
+        """최근 seconds(기본: 전체 창) 구간을 병합한 히스토그램 (into가 있으면 거기에 합산)"""
+        now = time.time() if now is None else now
+        epoch = int(now // self.slot_seconds)
+        span = self.num_slots if seconds is None else min(self.num_slots, max(1, math.ceil(seconds / self.slot_seconds)))
+        merged = into if into is not None else self._slots[0].copy_empty()
+        with self._lock:
+            for slot_epoch in range(epoch - span + 1, epoch + 1):
+                slot = slot_epoch % self.num_slots
+                if self._epochs[slot] == slot_epoch:
+                    merged.merge(self._slots[slot])
+        return merged
+
+
+def _histogram_summary(histogram: LogHistogram) -> Dict[str, Any]:
+    p50, p95, p99 = histogram.quantiles((0.5, 0.95, 0.99))
+    return {
+        "count": histogram.count,
+        "min": histogram.min,
+        "max": histogram.max,
+        "avg": histogram.sum / histogram.count,
+        "p50": p50,
+        "p95": p95,
+        "p99": p99
+    }
+
+
+def _prometheus_name(name: str) -> str:
+    name = re.sub(r'[^a-zA-Z0-9_:]', '_', name)
+    return name if not name[:1].isdigit() else f"_{name}"
+
+
+def _prometheus_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return "NaN" if math.isnan(value) else repr(float(value))
+
+
+def _prometheus_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{_prometheus_name(key)}="{value}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
 class MetricsCollector:
-    """메트릭 수집기"""
-    
-    def __init__(self, max_history: int = 10000):
-        self.max_history = max_history
-        self.metrics: Dict[str, deque] = defaultdict(lambda: deque(maxlen=max_history))
-        self.counters: Dict[str, int] = defaultdict(int)
-        self.timers: Dict[str, List[float]] = defaultdict(list)
+    """메트릭 수집기
+
+    - 메트릭/타이머: 태그 조합별 SlidingWindowHistogram (고정 메모리, 분위수 O(버킷 수))
+    - 카운터: 이름별 Counter
+    - 기록 경로는 시리즈별 잠금만 사용 (시리즈 생성 시에만 전체 잠금)
+    """
+
+    def __init__(self, window_minutes: int = 60, relative_accuracy: float = 0.01):
+        """
+        Args:
+            window_minutes: 요약 조회 가능한 최대 구간 (분 단위 슬롯)
+            relative_accuracy: 분위수 상대 오차
+        """
+        self.window_minutes = window_minutes
+        self.relative_accuracy = relative_accuracy
+        self.metrics: Dict[str, Dict[Tuple[Tuple[str, str], ...], SlidingWindowHistogram]] = {}
+        self.timers: Dict[str, SlidingWindowHistogram] = {}
+        self.counters: Dict[str, Counter] = {}
         self._lock = threading.Lock()
-    
+
+    def _new_window(self) -> SlidingWindowHistogram:
+        return SlidingWindowHistogram(self.window_minutes * 60, self.window_minutes, self.relative_accuracy)
+
     def record_metric(self, name: str, value: float, tags: Dict[str, str] = None):
-        """메트릭 기록"""
-        with self._lock:
-            metric = PerformanceMetric(
-                name=name,
-                value=value,
-                timestamp=datetime.now(),
-                tags=tags or {}
-            )
-            self.metrics[name].append(metric)
-    
+        """메트릭 기록 (태그 조합별 시리즈)"""
+        labels = tuple(sorted(tags.items())) if tags else ()
+        series = self.metrics.get(name)
+        window = series.get(labels) if series is not None else None
+        if window is None:
+            with self._lock:
+                window = self.metrics.setdefault(name, {}).setdefault(labels, self._new_window())
+        window.record(value)
+
     def increment_counter(self, name: str, value: int = 1):
         """카운터 증가"""
-        with self._lock:
-            self.counters[name] += value
-    
+        counter = self.counters.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self.counters.setdefault(name, Counter())
+        counter.inc(value)
+
+    def counter_value(self, name: str) -> int:
+        counter = self.counters.get(name)
+        return counter.value if counter is not None else 0
+
     def record_time(self, name: str, duration: float):
         """시간 측정 기록"""
-        with self._lock:
-            self.timers[name].append(duration)
-            # 최근 1000개만 유지
-            if len(self.timers[name]) > 1000:
-                self.timers[name] = self.timers[name][-1000:]
-    
+        window = self.timers.get(name)
+        if window is None:
+            with self._lock:
+                window = self.timers.setdefault(name, self._new_window())
+        window.record(duration)
+
     def get_summary(self, metric_name: str, minutes: int = 5) -> Dict[str, Any]:
-        """메트릭 요약 통계"""
-        with self._lock:
-            if metric_name not in self.metrics:
-                return {}
-            
-            cutoff_time = datetime.now() - timedelta(minutes=minutes)
-            recent_metrics = [
-                m for m in self.metrics[metric_name]
-                if m.timestamp > cutoff_time
-            ]
-            
-            if not recent_metrics:
-                return {}
-            
-            values = [m.value for m in recent_metrics]
-            return {
-                "count": len(values),
-                "min": min(values),
-                "max": max(values),
-                "avg": sum(values) / len(values),
-                "last": values[-1] if values else None
-            }
-    
+        """메트릭 요약 통계 (최근 minutes분, 태그 시리즈 합산)"""
+        series = self.metrics.get(metric_name)
+        if not series:
+            return {}
+
+        now = time.time()
+        merged = None
+        last_time, last_value = 0.0, None
+        for window in list(series.values()):
+            merged = window.snapshot(minutes * 60, now, into=merged)
+            if window.last_time > last_time:
+                last_time, last_value = window.last_time, window.last_value
+
+        if not merged.count:
+            return {}
+        summary = _histogram_summary(merged)
+        summary["last"] = last_value
+        return summary
+
     def get_all_summaries(self, minutes: int = 5) -> Dict[str, Any]:
         """모든 메트릭 요약"""
         summaries = {}
-        for metric_name in self.metrics:
+        for metric_name in list(self.metrics):
             summaries[metric_name] = self.get_summary(metric_name, minutes)
-        
+
         # 카운터 추가
-        summaries["counters"] = dict(self.counters)
-        
+        summaries["counters"] = {name: counter.value for name, counter in list(self.counters.items())}
+
         # 타이머 통계 추가
         timer_stats = {}
-        for timer_name, durations in self.timers.items():
-            if durations:
-                timer_stats[timer_name] = {
-                    "count": len(durations),
-                    "avg": sum(durations) / len(durations),
-                    "p50": sorted(durations)[len(durations) // 2],
-                    "p95": sorted(durations)[int(len(durations) * 0.95)],
-                    "p99": sorted(durations)[int(len(durations) * 0.99)]
-                }
+        now = time.time()
+        for timer_name, window in list(self.timers.items()):
+            histogram = window.snapshot(minutes * 60, now)
+            if histogram.count:
+                summary = _histogram_summary(histogram)
+                timer_stats[timer_name] = {key: summary[key] for key in ("count", "avg", "p50", "p95", "p99")}
         summaries["timers"] = timer_stats
-        
+
         return summaries
 
+    def export_prometheus(self, prefix: str = "naviyam_", minutes: int = 5,
+                          quantiles: Tuple[float, ...] = (0.5, 0.95, 0.99)) -> str:
+        """Prometheus 텍스트 형식 내보내기
+
+        카운터는 counter, 메트릭/타이머는 summary (분위수는 최근 minutes분, _count/_sum은 누적)
+        """
+        lines = []
+        for name, counter in sorted(self.counters.items()):
+            metric = _prometheus_name(f"{prefix}{name}_total")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {counter.value}")
+
+        now = time.time()
+        families = [(name, series) for name, series in sorted(self.metrics.items())]
+        families += [(name, {(): window}) for name, window in sorted(self.timers.items())]
+        for name, series in families:
+            metric = _prometheus_name(f"{prefix}{name}")
+            lines.append(f"# TYPE {metric} summary")
+            for labels, window in sorted(series.items()):
+                values = window.snapshot(minutes * 60, now).quantiles(quantiles)
+                for q, value in zip(quantiles, values):
+                    if value is not None:
+                        lines.append(f"{metric}{_prometheus_labels(labels + (('quantile', q),))} {_prometheus_value(value)}")
+                label_text = _prometheus_labels(labels)
+                lines.append(f"{metric}_sum{label_text} {_prometheus_value(window.total_sum)}")
+                lines.append(f"{metric}_count{label_text} {window.total_count}")
+
+        return "\n".join(lines) + "\n" if lines else ""
+
 
 class ErrorTracker:
     """에러 추적기"""
@@ -126,7 +346,7 @@ class ErrorTracker:
         self.max_errors = max_errors
         self.errors: deque = deque(maxlen=max_errors)
         self.error_counts: Dict[str, int] = defaultdict(int)
-        self._lock = threading.Lock()
+        self._lock = threading.RLock()  # get_error_summary가 잠금 안에서 get_recent_errors 호출
     
     def track_error(self, error_type: str, message: str, 
                    user_id: Optional[str] = None, context: Dict[str, Any] = None):
@@ -243,6 +463,12 @@ class ProductionMonitor:
         
         self.metrics.record_time(f"request_time_{request_type}", duration)
     
+    def record_rejection(self, request_type: str, reason: str):
+        """거부된 요청 기록 (속도 제한, 추론 대기열 초과 등 429)"""
+        self.metrics.increment_counter("requests_rejected")
+        self.metrics.increment_counter(f"requests_rejected_{reason}")
+        self.metrics.increment_counter(f"requests_rejected_{request_type}")
+    
     def record_model_inference(self, model_name: str, duration: float, tokens: int):
         """모델 추론 기록"""
         self.metrics.record_metric("model_inference_time", duration, {
@@ -267,9 +493,9 @@ class ProductionMonitor:
         health_status = self.health.run_checks()
         
         # 요청 성공률 계산
-        total_requests = self.metrics.counters.get("requests_success", 0) + \
-                        self.metrics.counters.get("requests_failure", 0)
-        success_rate = (self.metrics.counters.get("requests_success", 0) / total_requests * 100) \
+        total_requests = self.metrics.counter_value("requests_success") + \
+                        self.metrics.counter_value("requests_failure")
+        success_rate = (self.metrics.counter_value("requests_success") / total_requests * 100) \
                       if total_requests > 0 else 0
         
         return {
@@ -284,6 +510,26 @@ class ProductionMonitor:
             }
         }
     
+    def export_prometheus(self, extra_gauges: Optional[Dict[str, float]] = None,
+                          prefix: str = "naviyam_") -> str:
+        """Prometheus 텍스트 형식 내보내기 (메트릭 + 에러 유형별 카운터 + 추가 게이지)"""
+        lines = [self.metrics.export_prometheus(prefix=prefix).rstrip("\n")]
+
+        with self.errors._lock:
+            error_counts = sorted(self.errors.error_counts.items())
+        if error_counts:
+            metric = f"{prefix}errors_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(f"{metric}{_prometheus_labels([('type', error_type)])} {count}"
+                         for error_type, count in error_counts)
+
+        for name, value in sorted((extra_gauges or {}).items()):
+            metric = _prometheus_name(f"{prefix}{name}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {_prometheus_value(value)}")
+
+        return "\n".join(line for line in lines if line) + "\n"
+
     def save_snapshot(self):
         """현재 상태 스냅샷 저장"""
         if not self.log_dir:
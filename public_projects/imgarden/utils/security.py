@@ -5,8 +5,14 @@
 """
 
 import re
+import math
+import sqlite3
+import threading
+import time
 import logging
-from typing import Dict, List, Any, Optional
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
@@ -214,34 +220,215 @@ class InputValidator:
         return validation_result
 
 
+def gcra_update(tat: Optional[float], now: float, emission_interval: float,
+                capacity: float, cost: int = 1) -> Tuple[bool, float]:
+    """GCRA 한 번 적용
+
+    Args:
+        tat: 키의 이론적 도착 시각 (없으면 None = 버킷 가득 참)
+        emission_interval: 토큰 1개 보충 간격 (초)
+        capacity: 버킷 크기 x emission_interval (초)
+    Returns:
+        (허용 여부, 적용 후 TAT)
+    """
+    base = now if tat is None or tat < now else tat
+    new_tat = base + emission_interval * cost
+    if new_tat - now > capacity:
+        return False, base
+    return True, new_tat
+
+
+class RateLimitBackend(ABC):
+    """속도 제한 상태 저장소 (키당 TAT 하나)"""
+
+    # 다른 프로세스와 공유되는 저장소 여부 (공유 저장소는 I/O가 있어 이벤트 루프 밖에서 호출)
+    shared = False
+
+    @abstractmethod
+    def update(self, key: str, now: float, emission_interval: float,
+               capacity: float, cost: int = 1) -> Tuple[bool, float]:
+        """키의 TAT를 원자적으로 읽고 GCRA 적용 후 저장 (허용 여부, 적용 후 TAT)"""
+        pass
+
+    @abstractmethod
+    def evict_idle(self, now: float) -> int:
+        """버킷이 가득 찬(TAT가 지난) 키 제거 후 제거 수 반환"""
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    def close(self):
+        """저장소 종료"""
+        pass
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """프로세스 내 dict 저장소"""
+
+    def __init__(self):
+        self._tats: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def update(self, key: str, now: float, emission_interval: float,
+               capacity: float, cost: int = 1) -> Tuple[bool, float]:
+        with self._lock:
+            allowed, tat = gcra_update(self._tats.get(key), now, emission_interval, capacity, cost)
+            if allowed:
+                self._tats[key] = tat
+            return allowed, tat
+
+    def evict_idle(self, now: float) -> int:
+        with self._lock:
+            idle = [key for key, tat in self._tats.items() if tat <= now]
+            for key in idle:
+                del self._tats[key]
+        return len(idle)
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """SQLite 파일 저장소 (같은 호스트의 여러 uvicorn 워커가 한도 공유)
+
+    읽기-계산-쓰기를 BEGIN IMMEDIATE 트랜잭션으로 묶어 프로세스 간에도 원자적으로 갱신
+    """
+
+    shared = True
+
+    def __init__(self, db_path: str, busy_timeout: float = 5.0):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=busy_timeout, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+
+    def update(self, key: str, now: float, emission_interval: float,
+               capacity: float, cost: int = 1) -> Tuple[bool, float]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+                allowed, tat = gcra_update(row[0] if row else None, now, emission_interval, capacity, cost)
+                if allowed:
+                    self._conn.execute(
+                        "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                        (key, tat)
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return allowed, tat
+
+    def evict_idle(self, now: float) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,)).rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_rate_limit_backend(backend_type: str = "memory", db_path: Optional[str] = None) -> RateLimitBackend:
+    """속도 제한 저장소 생성
+
+    Args:
+        backend_type: "memory" 또는 "sqlite"
+        db_path: SQLite 파일 경로 (기본: CACHE_DIR/rate_limits.db)
+    """
+    if backend_type == "memory":
+        return MemoryRateLimitBackend()
+    if backend_type == "sqlite":
+        if db_path is None:
+            from utils.config import PathConfig
+            db_path = str(PathConfig().CACHE_DIR / "rate_limits.db")
+        return SQLiteRateLimitBackend(db_path)
+    raise ValueError(f"지원하지 않는 속도 제한 백엔드: {backend_type}")
+
+
+@dataclass
+class RateLimitDecision:
+    """속도 제한 판정 결과"""
+    allowed: bool
+    limit: int  # 버킷 크기 (연속 허용 요청 수)
+    remaining: int  # 지금 바로 더 보낼 수 있는 요청 수
+    retry_after: float  # 거부 시 다시 시도 가능한 시간 (초)
+    reset_after: float  # 버킷이 가득 찰 때까지 시간 (초)
+
+
 class RateLimiter:
-    """요청 속도 제한"""
-    
-    def __init__(self, max_requests_per_minute: int = 30):
+    """요청 속도 제한 (GCRA 토큰 버킷)
+
+    - 키당 상태는 이론적 도착 시각(TAT) 하나, 토큰은 조회 시 경과 시간만큼 지연 보충
+    - 분당 max_requests_per_minute개 보충, 최대 burst개까지 연속 허용
+    - 버킷이 가득 찬 키는 상태가 없는 키와 같으므로 eviction_interval마다 제거
+    - 저장소 오류 시 요청을 막지 않음 (fail-open)
+    """
+
+    def __init__(self, max_requests_per_minute: int = 30, burst: Optional[int] = None,
+                 backend: Optional[RateLimitBackend] = None, eviction_interval: float = 60.0):
         self.max_requests = max_requests_per_minute
-        self.requests: Dict[str, List[float]] = {}
-    
+        self.burst = burst or max_requests_per_minute
+        self.emission_interval = 60.0 / max_requests_per_minute
+        self.capacity = self.burst * self.emission_interval
+        self.backend = backend if backend is not None else MemoryRateLimitBackend()
+        self.eviction_interval = eviction_interval
+        self._next_eviction = time.time() + eviction_interval
+        self._eviction_lock = threading.Lock()
+
+    def acquire(self, key: str, cost: int = 1) -> RateLimitDecision:
+        """요청 1건(cost개 토큰) 사용 시도"""
+        now = time.time()
+        try:
+            allowed, tat = self.backend.update(key, now, self.emission_interval, self.capacity, cost)
+        except Exception as e:
+            logger.warning(f"속도 제한 저장소 오류, 요청 허용: {e}")
+            return RateLimitDecision(True, self.burst, self.burst, 0.0, 0.0)
+
+        if now >= self._next_eviction:
+            self._evict_idle(now)
+
+        backlog = max(tat - now, 0.0)
+        retry_after = 0.0 if allowed else backlog + self.emission_interval * cost - self.capacity
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=self.burst,
+            remaining=max(0, math.floor((self.capacity - backlog) / self.emission_interval + 1e-9)),
+            retry_after=retry_after,
+            reset_after=backlog
+        )
+
+    def _evict_idle(self, now: float):
+        # 한 스레드만 정리 (나머지는 바로 진행)
+        if not self._eviction_lock.acquire(blocking=False):
+            return
+        try:
+            if now < self._next_eviction:
+                return
+            self._next_eviction = now + self.eviction_interval
+            evicted = self.backend.evict_idle(now)
+            if evicted:
+                logger.debug(f"유휴 속도 제한 키 {evicted}개 제거")
+        except Exception as e:
+            logger.warning(f"유휴 속도 제한 키 정리 실패: {e}")
+        finally:
+            self._eviction_lock.release()
+
     def check_rate_limit(self, user_id: str) -> bool:
         """속도 제한 확인"""
-        import time
-        current_time = time.time()
-        
-        if user_id not in self.requests:
-            self.requests[user_id] = []
-        
-        # 1분 이상 지난 요청 제거
-        self.requests[user_id] = [
-            t for t in self.requests[user_id]
-            if current_time - t < 60
-        ]
-        
-        # 제한 확인
-        if len(self.requests[user_id]) >= self.max_requests:
-            return False
-        
-        # 요청 기록
-        self.requests[user_id].append(current_time)
-        return True
+        return self.acquire(user_id).allowed
 
 
 class ContentFilter:
@@ -293,6 +480,18 @@ def get_rate_limiter() -> RateLimiter:
     return _rate_limiter
 
 
+def init_rate_limiter(max_requests_per_minute: int = 30, burst: Optional[int] = None,
+                      backend_type: str = "memory", db_path: Optional[str] = None) -> RateLimiter:
+    """전역 속도 제한기 설정 (기존 저장소는 종료)"""
+    global _rate_limiter
+    if _rate_limiter is not None:
+        _rate_limiter.backend.close()
+    _rate_limiter = RateLimiter(
+        max_requests_per_minute, burst, create_rate_limit_backend(backend_type, db_path)
+    )
+    return _rate_limiter
+
+
 def get_content_filter() -> ContentFilter:
     """전역 콘텐츠 필터 반환"""
     global _content_filter
@@ -0,0 +1,262 @@
+"""
+요청 단위 단계별 지연 추적 (경량 span)
+
+- tracer.start_trace()/finish_trace() 또는 tracer.trace()로 요청 하나를 감싸고,
+  그 안에서 tracer.span("단계") / @traced("단계")로 단계 구간 측정 (중첩 가능)
+- 단계별 소요 시간은 항상 히스토그램에 집계, span 트리는 샘플링(또는 느린 요청)만 링 버퍼에 보관
+- 비활성화 또는 추적 중인 요청이 없으면 span()은 공용 no-op 컨텍스트 매니저 반환
+- 현재 요청은 contextvars로 구분 (스레드/비동기 작업별 독립)
+"""
+
+import random
+import threading
+import time
+import functools
+import logging
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from utils.monitoring import MetricsCollector
+
+logger = logging.getLogger(__name__)
+
+
+class _NoopSpan:
+    """추적하지 않을 때 쓰는 공용 span"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """추적 구간"""
+
+    __slots__ = ('name', 'start', 'end', 'children', 'attributes', 'error')
+
+    def __init__(self, name: str, start: float, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.start = start
+        self.end: Optional[float] = None
+        self.children: List["Span"] = []
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        """요청 시작 기준 상대 시각(ms)으로 변환"""
+        data = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3)
+        }
+        if self.attributes:
+            data["attributes"] = self.attributes
+        if self.error:
+            data["error"] = self.error
+        if self.children:
+            data["children"] = [child.to_dict(origin) for child in self.children]
+        return data
+
+
+class Trace:
+    """요청 하나의 span 트리"""
+
+    __slots__ = ('root', 'stack', 'sampled', 'started_at', '_token')
+
+    def __init__(self, root: Span, sampled: bool):
+        self.root = root
+        self.stack = [root]
+        self.sampled = sampled
+        self.started_at = datetime.now()
+        self._token = None
+
+
+class _SpanContext:
+    """활성 요청의 단계 span (종료 시 단계 히스토그램에 기록)"""
+
+    __slots__ = ('_tracer', '_trace', '_span')
+
+    def __init__(self, tracer: "RequestTracer", trace: Trace, span: Span):
+        self._tracer = tracer
+        self._trace = trace
+        self._span = span
+
+    def __enter__(self) -> Span:
+        self._trace.stack[-1].children.append(self._span)
+        self._trace.stack.append(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        span = self._span
+        span.end = time.perf_counter()
+        if exc_type is not None:
+            span.error = exc_type.__name__
+        self._trace.stack.pop()
+        self._tracer.stage_metrics.record_metric("stage_duration", span.end - span.start, {"stage": span.name})
+        return False
+
+
+class RequestTracer:
+    """요청 단위 단계별 지연 추적기"""
+
+    def __init__(self, enabled: bool = True, sample_rate: float = 0.05,
+                 capacity: int = 200, slow_threshold: float = 3.0):
+        """
+        Args:
+            enabled: 추적 여부 (False면 모든 span이 no-op)
+            sample_rate: span 트리를 보관할 요청 비율
+            capacity: 보관할 최근 트리 수 (링 버퍼)
+            slow_threshold: 이 시간(초)을 넘은 요청은 샘플링과 무관하게 보관
+        """
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.stage_metrics = MetricsCollector()
+        self._traces: deque = deque(maxlen=capacity)
+        self._current: ContextVar[Optional[Trace]] = ContextVar("naviyam_trace", default=None)
+
+    def start_trace(self, name: str, **attributes) -> Optional[Trace]:
+        """요청 추적 시작 (비활성화 상태면 None)"""
+        if not self.enabled:
+            return None
+        trace = Trace(Span(name, time.perf_counter(), attributes or None),
+                      sampled=random.random() < self.sample_rate)
+        trace._token = self._current.set(trace)
+        return trace
+
+    def finish_trace(self, trace: Optional[Trace], error: Optional[str] = None):
+        """요청 추적 종료 (전체 시간 집계, 샘플/느린 요청이면 트리 보관)"""
+        if trace is None:
+            return
+        root = trace.root
+        root.end = time.perf_counter()
+        root.error = error
+        try:
+            self._current.reset(trace._token)
+        except ValueError:
+            # 다른 컨텍스트에서 종료된 경우 (정상 경로에서는 발생하지 않음)
+            self._current.set(None)
+
+        duration = root.end - root.start
+        self.stage_metrics.record_time(root.name, duration)
+        self.stage_metrics.increment_counter("traced")
+
+        slow = duration >= self.slow_threshold
+        if slow:
+            self.stage_metrics.increment_counter("slow")
+            logger.warning(
+                f"느린 요청 ({duration:.2f}s): " +
+                ", ".join(f"{child.name}={child.duration * 1000:.0f}ms" for child in root.children)
+            )
+        if trace.sampled or slow:
+            self.stage_metrics.increment_counter("sampled")
+            record = root.to_dict(root.start)
+            record["timestamp"] = trace.started_at.isoformat()
+            record["slow"] = slow
+            self._traces.append(record)
+
+    @contextmanager
+    def trace(self, name: str, **attributes) -> Iterator[Optional[Trace]]:
+        """요청 추적 컨텍스트 매니저"""
+        trace = self.start_trace(name, **attributes)
+        try:
+            yield trace
+        except BaseException as e:
+            self.finish_trace(trace, error=type(e).__name__)
+            raise
+        else:
+            self.finish_trace(trace)
+
+    def span(self, name: str, **attributes):
+        """단계 span 컨텍스트 매니저 (추적 중인 요청이 없으면 no-op)"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        trace = self._current.get()
+        if trace is None:
+            return _NOOP_SPAN
+        return _SpanContext(self, trace, Span(name, time.perf_counter(), attributes or None))
+
+    def get_recent_traces(self, limit: int = 20, slow_only: bool = False) -> List[Dict[str, Any]]:
+        """최근 보관된 span 트리 (최신순)"""
+        traces = [t for t in list(self._traces) if t["slow"] or not slow_only]
+        return traces[::-1][:limit]
+
+    def get_stage_summary(self, minutes: int = 5) -> Dict[str, Any]:
+        """단계별 소요 시간 분위수 (초)와 전체 요청 시간"""
+        series = self.stage_metrics.metrics.get("stage_duration", {})
+        stages = {}
+        for labels in list(series):
+            stage = dict(labels)["stage"]
+            summary = self._series_summary(series[labels], minutes)
+            if summary:
+                stages[stage] = summary
+        requests = {
+            name: self._series_summary(window, minutes)
+            for name, window in list(self.stage_metrics.timers.items())
+        }
+        stats = {name: self.stage_metrics.counter_value(name) for name in ("traced", "sampled", "slow")}
+        return {"stages": stages, "requests": requests, "stats": stats}
+
+    @staticmethod
+    def _series_summary(window, minutes: int) -> Dict[str, Any]:
+        histogram = window.snapshot(minutes * 60)
+        if not histogram.count:
+            return {}
+        p50, p95, p99 = histogram.quantiles((0.5, 0.95, 0.99))
+        return {"count": histogram.count, "avg": histogram.sum / histogram.count,
+                "p50": p50, "p95": p95, "p99": p99, "max": histogram.max}
+
+    def export_prometheus(self, prefix: str = "naviyam_trace_") -> str:
+        """단계별 소요 시간 Prometheus 텍스트"""
+        return self.stage_metrics.export_prometheus(prefix=prefix)
+
+
+def traced(name: Optional[str] = None):
+    """함수 실행을 현재 요청의 단계 span으로 기록하는 데코레이터"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_request_tracer().span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+    return decorator
+
+
+# 전역 추적기
+_request_tracer: Optional[RequestTracer] = None
+_request_tracer_lock = threading.Lock()
+
+
+def init_request_tracer(**kwargs) -> RequestTracer:
+    """전역 추적기 설정 (enabled, sample_rate, capacity, slow_threshold)"""
+    global _request_tracer
+    with _request_tracer_lock:
+        _request_tracer = RequestTracer(**kwargs)
+    return _request_tracer
+
+
+def get_request_tracer() -> RequestTracer:
+    """전역 추적기 반환 (없으면 기본 설정으로 생성)"""
+    global _request_tracer
+    if _request_tracer is None:
+        with _request_tracer_lock:
+            if _request_tracer is None:
+                _request_tracer = RequestTracer()
+    return _request_tracer